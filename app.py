@@ -13,12 +13,11 @@ if homebrew_bin not in os.environ.get("PATH", ""):
 import json
 import uuid
 import asyncio
+import functools
+import time
 import traceback
-from flask import Flask, render_template, request, jsonify, session, send_from_directory, url_for, send_file
+from flask import Flask, render_template, request, jsonify, session, send_from_directory, url_for, send_file, Response, stream_with_context, g
 from datetime import datetime
-
-# Dictionary to store processing status for each session
-processing_status = {}
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 # datetime already imported above
@@ -60,6 +59,8 @@ from utils.file_utils import (
 from utils.metadata_manager import update_metadata, update_metadata_field, get_metadata_field, get_metadata, update_metadata_section, debug_metadata_changes
 from utils.audio_utils import convert_audio_format
 from utils.video_utils import extract_audio_from_url, is_valid_video_url
+from utils.job_queue import get_job_queue, run_coroutine
+from utils.status_pubsub import get_status_pubsub, format_sse_event
 
 # Load environment variables
 load_dotenv()
@@ -114,35 +115,63 @@ CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 ensure_dir(app.config['UPLOAD_FOLDER'])
 ensure_dir(app.config['OUTPUT_FOLDER'])
 
+# Warm up the VAD model at worker start so requests never pay for model loading
+if os.environ.get('PRELOAD_VAD_MODEL', 'false').lower() in ('true', 'yes', '1'):
+    from utils.preload_models import warm_up_vad_model
+    warm_up_vad_model()
+
 # Function to update processing status
-def update_processing_status(session_id, stage, message, progress=0):
+def update_processing_status(session_id, stage, message, progress=0, **details):
     """
     Update processing status for the frontend
     
+    The status is published on the session's status channel, so it reaches
+    /api/processing_status and progress streams in every worker process.
+    
     Args:
         session_id: Unique session identifier
         stage: Current processing stage (e.g., 'video_processing', 'transcription')
         message: User-friendly status message
         progress: Progress percentage (0-100)
+        **details: Extra stage-specific fields (e.g. partial_transcript)
     """
     if not session_id:
         return
         
-    processing_status[session_id] = {
+    get_status_pubsub().publish(session_id, {
         "stage": stage,
         "message": message,
         "progress": progress,
-        "timestamp": datetime.now().isoformat()
-    }
+        "timestamp": datetime.now().isoformat(),
+        **details
+    })
     print(f"Status update for {session_id}: {stage} - {message} ({progress}%)")
 
+def transcription_progress_callback(session_id):
+    """
+    Build a progress callback that publishes the partial transcript to the processing status
+    
+    Args:
+        session_id: Unique session identifier
+        
+    Returns:
+        Callback for transcribe_with_vad_diarization
+    """
+    def on_progress(progress):
+        completed, total = progress["segments_completed"], progress["segments_total"]
+        message = f"Transcribed {completed} of {total} segments" if total else f"Transcribed {completed} segments"
+        percent = int(100 * completed / total) if total else 0
+        update_processing_status(session_id, "transcription", message, percent, **progress)
+    return on_progress
+
 # API endpoint to get processing status
 @app.route('/api/processing_status/<session_id>', methods=['GET'])
 def get_processing_status(session_id):
     """
     Get current processing status for a session
     """
-    if not session_id or session_id not in processing_status:
+    latest = get_status_pubsub().get_latest(session_id) if session_id else None
+    if not latest:
         return jsonify({
             "stage": "initializing",
             "message": "Starting process...",
@@ -150,7 +179,132 @@ def get_processing_status(session_id):
             "timestamp": datetime.now().isoformat()
         })
         
-    return jsonify(processing_status[session_id])
+    return jsonify(latest[1])
+
+# API endpoint to stream processing status updates as Server-Sent Events
+@app.route('/api/processing_events/<session_id>', methods=['GET'])
+def stream_processing_status(session_id):
+    """
+    Stream status updates for a session as they are published
+    
+    Sends the latest status first (or everything after Last-Event-ID when a
+    client reconnects), then each new update. The stream ends after a
+    'completed' or 'error' stage, or after stream_timeout seconds; EventSource
+    clients reconnect on their own. Each open stream holds one of the server's
+    request threads, so the timeout is kept short.
+    """
+    from modules.speech_config import get_status_pubsub_config
+    
+    pubsub = get_status_pubsub()
+    stream_timeout = get_status_pubsub_config()["stream_timeout"]
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    
+    def generate():
+        deadline = time.monotonic() + stream_timeout
+        if last_event_id and last_event_id.isdigit():
+            after_id = int(last_event_id)
+        else:
+            latest = pubsub.get_latest(session_id)
+            after_id = 0
+            if latest:
+                after_id = latest[0]
+                yield format_sse_event(*latest)
+                if latest[1].get('stage') in ('completed', 'error'):
+                    return
+        
+        while time.monotonic() < deadline:
+            events = pubsub.listen(session_id, after_id, timeout=min(15.0, max(0.0, deadline - time.monotonic())))
+            if not events:
+                # Comment line to keep proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            for event_id, message in events:
+                after_id = event_id
+                yield format_sse_event(event_id, message)
+                if message.get('stage') in ('completed', 'error'):
+                    return
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def wants_background_job():
+    """
+    Check whether the current request asked to run as a background job (async=true)
+    """
+    request_data = request.get_json(silent=True) or {}
+    value = request_data.get('async', request.form.get('async', request.args.get('async', False)))
+    return str(value).lower() in ('true', 'yes', '1')
+
+def run_as_background_job(job_type, new_session=False):
+    """
+    Let an endpoint run as a background job when the request passes async=true
+    
+    The request is replayed in a worker thread with the same body, query string and cookies, and
+    the endpoint's JSON response becomes the job result. Stage progress still goes
+    through update_processing_status. Changes the endpoint makes to the Flask
+    session cookie are not sent back, so results are read from the job, the
+    session's metadata and its output files instead.
+    
+    Endpoints that create their session get its ID before the job is submitted,
+    as g.job_session_id in the replayed request, so the job, its status stream
+    and the 202 response all refer to the session the endpoint works in.
+    
+    Args:
+        job_type: Kind of job, also used as the processing status stage
+        new_session: Whether the endpoint creates a new session
+        
+    Returns:
+        Decorator for the endpoint's view function
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # Buffer the body before anything parses the form, which would consume it
+            body = request.get_data(cache=True)
+            if not wants_background_job():
+                return view(*args, **kwargs)
+            
+            request_data = request.get_json(silent=True) or {}
+            session_id = request_data.get('session_id') or request.form.get('session_id')
+            if new_session:
+                session_id = generate_random_session_id()
+            path, method, query_string = request.path, request.method, request.query_string.decode('latin-1')
+            content_type = request.content_type
+            headers = {'Cookie': request.headers.get('Cookie', '')}
+            
+            def run_job():
+                with app.test_request_context(path, method=method, query_string=query_string, data=body,
+                                              content_type=content_type, headers=headers):
+                    if new_session:
+                        g.job_session_id = session_id
+                    response = app.make_response(view(*args, **kwargs))
+                    result = response.get_json(silent=True)
+                    if response.status_code >= 400:
+                        raise RuntimeError((result or {}).get('error') or f"{job_type} failed with status {response.status_code}")
+                    return result
+            
+            job_id = get_job_queue().submit(job_type, run_job, session_id=session_id, status_callback=update_processing_status)
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'session_id': session_id,
+                'status_url': url_for('get_job_status', job_id=job_id)
+            }), 202
+        return wrapper
+    return decorator
+
+# API endpoint to get the state and result of a background job
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """
+    Get the state of a background job, and its result once it has finished
+    """
+    job = get_job_queue().get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
 
 # Helper function to save original tool outputs
 def save_original_output(session_id, file_name, data):
@@ -368,6 +522,7 @@ def record_audio():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/detect_language', methods=['POST'])
+@run_as_background_job('detect_language')
 def detect_language():
     """Detect language and transcribe audio file with diarization."""
     try:
@@ -419,21 +574,18 @@ def detect_language():
         
         print(f"Using VAD with threshold: {vad_config['threshold']}, combine_duration: {vad_config['combine_duration']}s")
             
-        # Use asyncio to run the async transcribe_with_vad_diarization function
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
+        # Run the async transcribe_with_vad_diarization function on this thread's event loop
         try:
             # Use the new VAD-enhanced diarization function
-            result = loop.run_until_complete(
+            result = run_coroutine(
                 transcribe_with_vad_diarization(
                     audio_path=upload_path,
                     api_key=SARVAM_API_KEY,
                     vad_segments_dir=vad_output_dir,
-                    min_segment_duration=vad_config.get('min_segment_duration', 1.0)
+                    min_segment_duration=vad_config.get('min_segment_duration', 1.0),
+                    progress_callback=transcription_progress_callback(session_id)
                 )
             )
-            loop.close()
             
             # Check for errors in the result
             if 'error' in result:
@@ -665,20 +817,17 @@ def transcribe():
             
             print(f"Using VAD with threshold: {vad_config['threshold']}, combine_duration: {vad_config['combine_duration']}s")
             
-            # Use asyncio to run the async transcribe_with_vad_diarization function
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
+            # Run the async transcribe_with_vad_diarization function on this thread's event loop
             try:
                 # Use the new VAD-enhanced diarization function with proper parameters
-                result = loop.run_until_complete(
+                result = run_coroutine(
                     transcribe_with_vad_diarization(
                         audio_path=upload_path,
                         vad_segments_dir=vad_output_dir,
-                        min_segment_duration=vad_config.get('min_segment_duration', 1.0)
+                        min_segment_duration=vad_config.get('min_segment_duration', 1.0),
+                        progress_callback=transcription_progress_callback(session_id)
                     )
                 )
-                loop.close()
                 
                 # Check for errors in the result
                 if 'error' in result:
@@ -830,6 +979,7 @@ def transcribe():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/translate', methods=['POST'])
+@run_as_background_job('translation')
 def translate():
     """
     Translate transcription to target language.
@@ -978,12 +1128,7 @@ def translate():
                 transcription = f.read()
             
             # Get source language from metadata
-            metadata_path = os.path.join("outputs", session_id, "metadata.json")
-            source_language = "english"  # Default
-            if os.path.exists(metadata_path):
-                with open(metadata_path, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                    source_language = metadata.get("source_language", "english")
+            source_language = get_metadata_field(session_id, "source_language", "english")
             
             # Translate using traditional method
             print(f"==== TRANSLATION DEBUG ==== Using traditional translation method with source_language={source_language}, target_language={target_language}")
@@ -1027,6 +1172,7 @@ def synthesize():
     return synthesize_time_aligned()
 
 @app.route('/api/synthesize-time-aligned', methods=['POST'])
+@run_as_background_job('synthesis')
 def synthesize_time_aligned():
     """Synthesize speech with time alignment to original audio."""
     try:
@@ -1803,6 +1949,7 @@ def save_translation():
         return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/process_video_url', methods=['POST'])
+@run_as_background_job('video_processing', new_session=True)
 def process_video_url():
     """
     Process a YouTube or Instagram video URL by extracting its audio.
@@ -1833,8 +1980,8 @@ def process_video_url():
         
         print(f"==== VIDEO URL DEBUG ==== Valid {platform} URL: {video_url}")
         
-        # Generate session ID using the random format (session_XXXXXXXXXX)
-        session_id = generate_random_session_id()
+        # Generate session ID using the random format (session_XXXXXXXXXX), unless a background job already did
+        session_id = g.get('job_session_id') or generate_random_session_id()
         print(f"==== VIDEO URL DEBUG ==== Generated session ID: {session_id}")
         
         # Initialize processing status
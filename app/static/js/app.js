@@ -1718,64 +1718,101 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     // Show loading overlay
-    // Variable to store the status polling interval
+    // Variable to store the status polling interval (or event stream)
     let statusPollingInterval = null;
+    let statusEventSource = null;
     
     /**
-     * Poll the server for processing status updates
-     * @param {string} sessionId - The session ID to check status for
+     * Stop receiving processing status updates
      */
-    function pollProcessingStatus(sessionId) {
-        // Clear any existing polling interval
+    function stopStatusUpdates() {
         if (statusPollingInterval) {
             clearInterval(statusPollingInterval);
+            statusPollingInterval = null;
+        }
+        if (statusEventSource) {
+            statusEventSource.close();
+            statusEventSource = null;
+        }
+    }
+    
+    /**
+     * Show a processing status update in the loading overlay
+     * @param {Object} status - Status with stage, message and progress
+     * @returns {boolean} Whether updates should stop
+     */
+    function handleProcessingStatus(status) {
+        console.log('Processing status update:', status);
+        
+        // Update loading overlay with status information
+        const loadingOverlay = document.getElementById('loading-overlay');
+        const loadingStage = document.getElementById('loading-stage');
+        const loadingMessage = document.getElementById('loading-message');
+        const progressBar = document.getElementById('loading-progress-bar');
+        
+        // Only update if the loading overlay is visible and all elements exist
+        if (loadingOverlay && !loadingOverlay.classList.contains('hidden') && 
+            loadingStage && loadingMessage && progressBar) {
+            
+            // Format the stage name for display (convert snake_case to Title Case)
+            const formattedStage = status.stage
+                .split('_')
+                .map(word => word.charAt(0).toUpperCase() + word.slice(1))
+                .join(' ');
+                
+            loadingStage.textContent = formattedStage;
+            loadingMessage.textContent = status.message;
+            progressBar.style.width = `${status.progress}%`;
+            
+            // If we reach 100% progress or encounter an error, stop updates
+            if (status.progress === 100 || status.stage === 'error' || status.stage === 'completed') {
+                console.log('Stopping status updates - process complete or error occurred');
+                
+                // If there was an error, we'll let the error handler in the fetch response handle it
+                // Otherwise, we'll keep the loading overlay visible until the main process completes
+                return true;
+            }
+        } else if (loadingOverlay && loadingOverlay.classList.contains('hidden')) {
+            // If the loading overlay is hidden, stop updates
+            console.log('Loading overlay is hidden, stopping status updates');
+            return true;
+        }
+        return false;
+    }
+    
+    /**
+     * Follow processing status updates for a session.
+     * Uses the server-sent event stream when the browser supports it,
+     * and otherwise polls the status endpoint every second.
+     * @param {string} sessionId - The session ID to check status for
+     */
+    function pollProcessingStatus(sessionId) {
+        // Stop any existing status updates
+        stopStatusUpdates();
+        
+        if (!sessionId) {
+            console.warn('No session ID available for status updates');
+            return;
+        }
+        
+        if (window.EventSource) {
+            statusEventSource = new EventSource(`/api/processing_events/${sessionId}`);
+            statusEventSource.addEventListener('status', event => {
+                if (handleProcessingStatus(JSON.parse(event.data))) {
+                    stopStatusUpdates();
+                }
+            });
+            // EventSource reconnects on its own after network errors
+            return;
         }
         
         // Set up polling interval (every 1 second)
         statusPollingInterval = setInterval(() => {
-            if (!sessionId) {
-                console.warn('No session ID available for status polling');
-                clearInterval(statusPollingInterval);
-                return;
-            }
-            
             fetch(`/api/processing_status/${sessionId}`)
                 .then(response => response.json())
                 .then(status => {
-                    console.log('Processing status update:', status);
-                    
-                    // Update loading overlay with status information
-                    const loadingOverlay = document.getElementById('loading-overlay');
-                    const loadingStage = document.getElementById('loading-stage');
-                    const loadingMessage = document.getElementById('loading-message');
-                    const progressBar = document.getElementById('loading-progress-bar');
-                    
-                    // Only update if the loading overlay is visible and all elements exist
-                    if (loadingOverlay && !loadingOverlay.classList.contains('hidden') && 
-                        loadingStage && loadingMessage && progressBar) {
-                        
-                        // Format the stage name for display (convert snake_case to Title Case)
-                        const formattedStage = status.stage
-                            .split('_')
-                            .map(word => word.charAt(0).toUpperCase() + word.slice(1))
-                            .join(' ');
-                            
-                        loadingStage.textContent = formattedStage;
-                        loadingMessage.textContent = status.message;
-                        progressBar.style.width = `${status.progress}%`;
-                        
-                        // If we reach 100% progress or encounter an error, stop polling
-                        if (status.progress === 100 || status.stage === 'error' || status.stage === 'completed') {
-                            console.log('Stopping status polling - process complete or error occurred');
-                            clearInterval(statusPollingInterval);
-                            
-                            // If there was an error, we'll let the error handler in the fetch response handle it
-                            // Otherwise, we'll keep the loading overlay visible until the main process completes
-                        }
-                    } else if (loadingOverlay && loadingOverlay.classList.contains('hidden')) {
-                        // If the loading overlay is hidden, stop polling
-                        console.log('Loading overlay is hidden, stopping status polling');
-                        clearInterval(statusPollingInterval);
+                    if (handleProcessingStatus(status)) {
+                        stopStatusUpdates();
                     }
                 })
                 .catch(error => {
@@ -1813,11 +1850,8 @@ document.addEventListener('DOMContentLoaded', function() {
         console.log('HIDE LOADING CALLED');
         const loadingOverlay = document.getElementById('loading-overlay');
         
-        // Stop any active status polling
-        if (statusPollingInterval) {
-            clearInterval(statusPollingInterval);
-            statusPollingInterval = null;
-        }
+        // Stop any active status polling or event stream
+        stopStatusUpdates();
         
         if (loadingOverlay) {
             // Hide the overlay by adding the hidden class back
@@ -1,10 +1,10 @@
 import os
 import logging
-import requests
 import json
 
 # Import Secret Manager utility
 from utils.secret_manager import get_secret
+from utils.provider_request import send_provider_request
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -84,6 +84,9 @@ AVAILABLE_VOICES = {
     }
 }
 
+# Cartesia model used for synthesis
+CARTESIA_MODEL = "sonic-2"
+
 # Default API version
 default_api_version = '2024-11-13'
 
@@ -165,7 +168,7 @@ def synthesize_speech(text, output_path, voice_id=None, bit_rate=128000, sample_
         }
         
         payload = {
-            "model_id": "sonic-2",
+            "model_id": CARTESIA_MODEL,
             "transcript": text,
             "voice": {
                 "mode": "id",
@@ -183,8 +186,8 @@ def synthesize_speech(text, output_path, voice_id=None, bit_rate=128000, sample_
         # Removed duration parameter to ensure consistent time alignment with Sarvam TTS
         # Time alignment will be handled by the time_aligned_tts module instead
         
-        # Make API request
-        response = requests.post(url, headers=headers, json=payload)
+        # Make API request (rate limited, with retries on 429 and 5xx responses)
+        response = send_provider_request("cartesia", "POST", url, headers=headers, json=payload)
         
         # Check for successful response
         if response.status_code == 200:
@@ -9,13 +9,13 @@ It supports voice mapping from character names to OpenAI voices and instructions
 
 import os
 import json
-import requests
 import logging
 from typing import Dict, Any, Optional
-import time
 import tempfile
 from pydub import AudioSegment
 
+from utils.provider_request import send_provider_request
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,8 +25,6 @@ OPENAI_API_ENDPOINT = "https://api.openai.com/v1/audio/speech"
 OPENAI_MODEL = "gpt-4o-mini-tts"
 DEFAULT_VOICE = "alloy"
 VOICE_MAPPING_FILE = os.path.join(os.path.dirname(__file__), "MCMOpenAIVoices.json")
-MAX_RETRIES = 3
-RETRY_DELAY = 2  # seconds
 
 def get_openai_api_key() -> Optional[str]:
     """
@@ -123,53 +121,34 @@ def synthesize_speech(text: str, voice_id: str, output_path: str, api_key: Optio
     if instructions:
         payload["instructions"] = instructions
     
-    # Make API request with retries
-    for attempt in range(MAX_RETRIES):
-        try:
-            logger.info(f"Sending TTS request to OpenAI (attempt {attempt+1}/{MAX_RETRIES})")
-            response = requests.post(OPENAI_API_ENDPOINT, headers=headers, json=payload)
-            
-            if response.status_code == 200:
-                # Save the MP3 to a temporary file first
-                with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-                    temp_file.write(response.content)
-                    temp_mp3_path = temp_file.name
-                
-                try:
-                    # Convert MP3 to WAV using pydub
-                    logger.info(f"Converting MP3 to WAV format")
-                    audio = AudioSegment.from_mp3(temp_mp3_path)
-                    audio.export(output_path, format="wav")
-                    
-                    # Remove temporary MP3 file
-                    os.remove(temp_mp3_path)
-                    
-                    logger.info(f"Successfully synthesized speech and saved to {output_path}")
-                    return True
-                except Exception as e:
-                    logger.error(f"Error converting MP3 to WAV: {e}")
-                    return False
-            else:
-                error_msg = f"OpenAI API request failed with status code {response.status_code}: {response.text}"
-                logger.error(error_msg)
-                
-                # Check for rate limiting or server errors
-                if response.status_code in [429, 500, 502, 503, 504]:
-                    logger.info(f"Retrying in {RETRY_DELAY} seconds...")
-                    time.sleep(RETRY_DELAY * (attempt + 1))  # Exponential backoff
-                    continue
-                else:
-                    # Other errors are not retryable
-                    return False
-                
-        except Exception as e:
-            logger.error(f"Error during OpenAI TTS synthesis: {e}")
-            
-            # Retry on connection errors
-            if attempt < MAX_RETRIES - 1:
-                logger.info(f"Retrying in {RETRY_DELAY} seconds...")
-                time.sleep(RETRY_DELAY * (attempt + 1))
-            else:
-                return False
+    # Make API request (rate limited, with retries on 429 and 5xx responses)
+    try:
+        logger.info("Sending TTS request to OpenAI")
+        response = send_provider_request("openai", "POST", OPENAI_API_ENDPOINT, headers=headers, json=payload)
+    except Exception as e:
+        logger.error(f"Error during OpenAI TTS synthesis: {e}")
+        return False
+    
+    if response.status_code != 200:
+        logger.error(f"OpenAI API request failed with status code {response.status_code}: {response.text}")
+        return False
+    
+    # Save the MP3 to a temporary file first
+    with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
+        temp_file.write(response.content)
+        temp_mp3_path = temp_file.name
     
-    return False
+    try:
+        # Convert MP3 to WAV using pydub
+        logger.info(f"Converting MP3 to WAV format")
+        audio = AudioSegment.from_mp3(temp_mp3_path)
+        audio.export(output_path, format="wav")
+        
+        # Remove temporary MP3 file
+        os.remove(temp_mp3_path)
+        
+        logger.info(f"Successfully synthesized speech and saved to {output_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Error converting MP3 to WAV: {e}")
+        return False
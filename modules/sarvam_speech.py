@@ -1,19 +1,25 @@
 import os
 import json
 import time
+import bisect
+import random
 import logging
 import tempfile
 import asyncio
+import threading
+import concurrent.futures
 import aiohttp
 import requests
 import aiofiles
 import xml.etree.ElementTree as ET
 from urllib.parse import urlparse
-from azure.storage.filedatalake.aio import DataLakeDirectoryClient, FileSystemClient
-from azure.storage.filedatalake import ContentSettings
+from azure.storage.filedatalake import DataLakeDirectoryClient, FileSystemClient, ContentSettings
 import mimetypes
 from typing import List, Dict, Any, Optional, Union
 from . import vad_segmentation
+from utils.rate_limiter import get_rate_limiter
+from utils.connection_pool import get_http_session, get_storage_transport
+from .transcription_cache import DecodedAudioHash, get_transcription_cache, get_transcription_cache_key
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -59,10 +65,33 @@ file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 logger.info(f"Logging to file: {os.path.abspath('logs/sarvam_api.log')}")
 
+async def sarvam_api_request(method, url, **kwargs):
+    """
+    Send a request to the Sarvam API under the shared Sarvam rate limit.
+    
+    The blocking request runs in a worker thread, so concurrent segment jobs
+    don't stall the event loop while waiting on the network. Requests share the
+    process-wide pooled Sarvam HTTP session, so connections are kept alive
+    across segments and sessions.
+    
+    Args:
+        method (str): HTTP method
+        url (str): Request URL
+        **kwargs: Extra arguments passed to requests.Session.request
+        
+    Returns:
+        requests.Response: The API response
+    """
+    await get_rate_limiter("sarvam").acquire_async()
+    return await asyncio.to_thread(get_http_session("sarvam").request, method, url, **kwargs)
+
 class SarvamStorageClient:
     """
     Client for interacting with Azure Data Lake Storage used by Sarvam API.
     Handles file uploads, downloads, and listing operations.
+    
+    Storage calls go through the process-wide pooled Sarvam HTTP session and run
+    in worker threads, so concurrent transfers share kept-alive connections.
     """
     def __init__(self, url: str):
         """
@@ -75,6 +104,7 @@ class SarvamStorageClient:
             self._extract_url_components(url)
         )
         self.lock = asyncio.Lock()
+        self._directory_client = None
         logger.info(f"Initialized SarvamClient with directory: {self.directory_name}")
 
     def update_url(self, url: str):
@@ -87,6 +117,7 @@ class SarvamStorageClient:
         self.account_url, self.file_system_name, self.directory_name, self.sas_token = (
             self._extract_url_components(url)
         )
+        self._directory_client = None
         logger.info(f"Updated URL to directory: {self.directory_name}")
 
     def _extract_url_components(self, url: str):
@@ -112,6 +143,23 @@ class SarvamStorageClient:
         logger.debug(f"Extracted URL components: account_url={account_url}, file_system={file_system_name}, directory={directory_name}")
         return account_url, file_system_name, directory_name, sas_token
 
+    def _get_directory_client(self):
+        """
+        Get the directory client, created once per storage URL on the pooled transport.
+        
+        Returns:
+            DataLakeDirectoryClient: The directory client
+        """
+        if self._directory_client is None:
+            self._directory_client = DataLakeDirectoryClient(
+                account_url=f"{self.account_url}?{self.sas_token}",
+                file_system_name=self.file_system_name,
+                directory_name=self.directory_name,
+                credential=None,
+                transport=get_storage_transport("sarvam"),
+            )
+        return self._directory_client
+
     async def upload_file(self, local_file_path, overwrite=True):
         """
         Upload a file to Azure Data Lake Storage.
@@ -127,23 +175,39 @@ class SarvamStorageClient:
         logger.info(f"Uploading file: {file_name} from {local_file_path}")
         
         try:
-            async with DataLakeDirectoryClient(
-                account_url=f"{self.account_url}?{self.sas_token}",
-                file_system_name=self.file_system_name,
-                directory_name=self.directory_name,
-                credential=None,
-            ) as directory_client:
-                async with aiofiles.open(local_file_path, mode="rb") as file_data:
-                    mime_type = mimetypes.guess_type(local_file_path)[0] or "audio/wav"
-                    file_client = directory_client.get_file_client(file_name)
-                    data = await file_data.read()
-                    await file_client.upload_data(
-                        data,
-                        overwrite=overwrite,
-                        content_settings=ContentSettings(content_type=mime_type),
-                    )
-                    logger.info(f"File uploaded successfully: {file_name}")
-                    return True
+            async with aiofiles.open(local_file_path, mode="rb") as file_data:
+                data = await file_data.read()
+        except Exception as e:
+            logger.error(f"Upload failed for {file_name}: {str(e)}")
+            return False
+        
+        return await self.upload_data(data, file_name, overwrite=overwrite)
+
+    async def upload_data(self, data, file_name, overwrite=True):
+        """
+        Upload in-memory data (e.g. a WAV buffer) to Azure Data Lake Storage.
+        
+        Args:
+            data (bytes or file-like): Data to upload
+            file_name (str): Name of the file in the storage directory
+            overwrite (bool): Whether to overwrite existing files
+            
+        Returns:
+            bool: True if upload was successful, False otherwise
+        """
+        def upload():
+            mime_type = mimetypes.guess_type(file_name)[0] or "audio/wav"
+            file_client = self._get_directory_client().get_file_client(file_name)
+            file_client.upload_data(
+                data,
+                overwrite=overwrite,
+                content_settings=ContentSettings(content_type=mime_type),
+            )
+        
+        try:
+            await asyncio.to_thread(upload)
+            logger.info(f"File uploaded successfully: {file_name}")
+            return True
         except Exception as e:
             logger.error(f"Upload failed for {file_name}: {str(e)}")
             return False
@@ -156,70 +220,76 @@ class SarvamStorageClient:
             list: List of file names
         """
         logger.info(f"Listing files in directory: {self.directory_name}")
-        file_names = []
         
-        try:
-            async with FileSystemClient(
+        def list_paths():
+            file_system_client = FileSystemClient(
                 account_url=f"{self.account_url}?{self.sas_token}",
                 file_system_name=self.file_system_name,
                 credential=None,
-            ) as file_system_client:
-                async for path in file_system_client.get_paths(self.directory_name):
-                    file_name = path.name.split("/")[-1]
-                    if file_name:  # Skip empty names (directories)
-                        file_names.append(file_name)
-                        logger.debug(f"Found file: {file_name}")
-            
+                transport=get_storage_transport("sarvam"),
+            )
+            file_names = []
+            for path in file_system_client.get_paths(self.directory_name):
+                file_name = path.name.split("/")[-1]
+                if file_name:  # Skip empty names (directories)
+                    file_names.append(file_name)
+                    logger.debug(f"Found file: {file_name}")
+            return file_names
+        
+        try:
+            file_names = await asyncio.to_thread(list_paths)
             logger.info(f"Found {len(file_names)} files")
             return file_names
         except Exception as e:
             logger.error(f"Error listing files: {str(e)}")
             return []
 
+    async def download_file(self, file_name, destination_dir):
+        """
+        Download a file from Azure Data Lake Storage.
+        
+        Args:
+            file_name (str): Name of the file in the storage directory
+            destination_dir (str): Local directory to save the file
+            
+        Returns:
+            str: Path to the downloaded file, or None if the download failed
+        """
+        download_path = os.path.join(destination_dir, file_name)
+        
+        def download():
+            file_client = self._get_directory_client().get_file_client(file_name)
+            data = file_client.download_file().readall()
+            
+            # Create directory if it doesn't exist
+            os.makedirs(os.path.dirname(download_path), exist_ok=True)
+            with open(download_path, mode="wb") as file_data:
+                file_data.write(data)
+        
+        try:
+            await asyncio.to_thread(download)
+            logger.info(f"Downloaded: {file_name} to {download_path}")
+            return download_path
+        except Exception as e:
+            logger.error(f"Download failed for {file_name}: {str(e)}")
+            return None
+
     async def download_files(self, file_names, destination_dir):
         """
-        Download multiple files from Azure Data Lake Storage.
+        Download multiple files from Azure Data Lake Storage concurrently.
         
         Args:
             file_names (list): List of file names to download
             destination_dir (str): Local directory to save files
             
         Returns:
-            list: List of paths to downloaded files
+            list: List of paths to downloaded files, in the order of file_names
         """
         logger.info(f"Downloading {len(file_names)} files to {destination_dir}")
-        downloaded_files = []
-        
-        try:
-            async with DataLakeDirectoryClient(
-                account_url=f"{self.account_url}?{self.sas_token}",
-                file_system_name=self.file_system_name,
-                directory_name=self.directory_name,
-                credential=None,
-            ) as directory_client:
-                for file_name in file_names:
-                    try:
-                        file_client = directory_client.get_file_client(file_name)
-                        download_path = os.path.join(destination_dir, file_name)
-                        
-                        # Create directory if it doesn't exist
-                        os.makedirs(os.path.dirname(download_path), exist_ok=True)
-                        
-                        # Download the file
-                        with open(download_path, mode="wb") as file_data:
-                            stream = await file_client.download_file()
-                            data = await stream.readall()
-                            file_data.write(data)
-                            
-                        logger.info(f"Downloaded: {file_name} to {download_path}")
-                        downloaded_files.append(download_path)
-                    except Exception as e:
-                        logger.error(f"Download failed for {file_name}: {str(e)}")
-            
-            return downloaded_files
-        except Exception as e:
-            logger.error(f"Error in download_files: {str(e)}")
-            return downloaded_files
+        download_paths = await asyncio.gather(
+            *(self.download_file(file_name, destination_dir) for file_name in file_names)
+        )
+        return [path for path in download_paths if path]
 
 async def initialize_job(api_key=None):
     """
@@ -255,7 +325,7 @@ async def initialize_job(api_key=None):
         logger.info(f"Making request to URL: {url}")
         logger.info(f"Headers: {{'API-Subscription-Key': '[REDACTED]'}}")
         
-        response = requests.post(url, headers=headers)
+        response = await sarvam_api_request('POST', url, headers=headers)
         
         # Log the response details
         logger.info(f"Response status code: {response.status_code}")
@@ -298,7 +368,7 @@ async def check_job_status(job_id, api_key=None):
     headers = {'API-Subscription-Key': api_key}
     
     try:
-        response = requests.get(url, headers=headers)
+        response = await sarvam_api_request('GET', url, headers=headers)
         
         if response.status_code == 200:
             status_data = response.json()
@@ -357,7 +427,7 @@ async def start_job(job_id, api_key=None, with_diarization=True):
     logger.info(f"Request data: {json.dumps(data)}")
     
     try:
-        response = requests.post(url, headers=headers, json=data)
+        response = await sarvam_api_request('POST', url, headers=headers, json=data)
         
         if response.status_code == 200:
             logger.info("Job started successfully")
@@ -373,7 +443,7 @@ async def start_job(job_id, api_key=None, with_diarization=True):
             logger.info(f"First attempt failed. Trying alternative endpoint: {alt_url}")
             logger.info(f"Alternative request data: {json.dumps(alt_data)}")
             
-            alt_response = requests.post(alt_url, headers=headers, json=alt_data)
+            alt_response = await sarvam_api_request('POST', alt_url, headers=headers, json=alt_data)
             
             if alt_response.status_code == 200:
                 logger.info("Job started successfully with alternative endpoint")
@@ -411,7 +481,7 @@ async def get_job_results(job_id, api_key=None):
     headers = {'API-Subscription-Key': api_key}
     
     try:
-        response = requests.get(url, headers=headers)
+        response = await sarvam_api_request('GET', url, headers=headers)
         
         if response.status_code == 200:
             logger.info("Successfully retrieved job results")
@@ -423,16 +493,139 @@ async def get_job_results(job_id, api_key=None):
         logger.error(f"Error getting job results: {str(e)}")
         return None
 
-async def process_audio_with_diarization(audio_path, api_key=None):
+# Job states in which a job is still waiting for a worker
+QUEUED_JOB_STATES = ('Accepted', 'Pending')
+
+def get_job_deadline(audio_duration=None, polling_config=None):
+    """
+    Get the overall time to wait for a batch job, scaled to the length of its audio.
+    
+    Args:
+        audio_duration (float, optional): Seconds of audio in the job, if known
+        polling_config (dict, optional): Overrides for the job polling configuration
+        
+    Returns:
+        float: Deadline in seconds
+    """
+    from modules.speech_config import get_job_polling_config
+    config = get_job_polling_config(polling_config)
+    
+    deadline = config['min_deadline']
+    if audio_duration:
+        deadline = max(deadline, audio_duration * config['deadline_per_audio_second'])
+    return min(deadline, config['max_deadline'])
+
+async def wait_for_job(job_id, api_key=None, audio_duration=None, polling_config=None):
+    """
+    Poll a batch job until it completes, fails or runs past its deadline.
+    
+    The first check comes after a short delay, so short jobs are picked up quickly;
+    later checks back off exponentially with jitter up to max_delay. The overall
+    deadline grows with the audio duration (see get_job_deadline).
+    
+    Args:
+        job_id (str): Job ID
+        api_key (str, optional): Sarvam API key. If None, uses the module-level SARVAM_API_KEY.
+        audio_duration (float, optional): Seconds of audio in the job, used to scale the deadline
+        polling_config (dict, optional): Overrides for the job polling configuration
+        
+    Returns:
+        dict: Last job status with a "job_timing" entry (time spent queued and
+            processing, as observed by polling), or a dict with an "error" key
+            if the job failed or timed out
+    """
+    from modules.speech_config import get_job_polling_config
+    config = get_job_polling_config(polling_config)
+    deadline = get_job_deadline(audio_duration, polling_config)
+    
+    logger.info(f"Monitoring job status (deadline {deadline:.0f}s)...")
+    started = time.monotonic()
+    delay = config['initial_delay']
+    queue_time = None
+    status = None
+    attempt = 0
+    
+    def job_timing(total_time):
+        return {
+            "job_id": job_id,
+            "audio_duration": audio_duration,
+            "queue_time": round(queue_time if queue_time is not None else total_time, 3),
+            "processing_time": round(total_time - queue_time, 3) if queue_time is not None else 0.0,
+            "total_time": round(total_time, 3),
+            "status_checks": attempt,
+            "final_state": status
+        }
+    
+    while True:
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            logger.error(f"Job {job_id} did not finish within {deadline:.0f}s (last status: {status})")
+            return {"error": f"Job did not finish within {deadline:.0f}s (last status: {status})",
+                    "job_timing": job_timing(time.monotonic() - started)}
+        
+        jitter = random.uniform(-config['jitter'], config['jitter'])
+        await asyncio.sleep(min(delay * (1 + jitter), remaining))
+        
+        attempt += 1
+        logger.debug(f"Status check attempt {attempt} after {time.monotonic() - started:.1f}s")
+        job_status = await check_job_status(job_id, api_key)
+        elapsed = time.monotonic() - started
+        if not job_status:
+            logger.error("Failed to check job status")
+            return {"error": "Failed to check job status"}
+        
+        status = job_status['job_state']
+        if queue_time is None and status not in QUEUED_JOB_STATES:
+            queue_time = elapsed
+        
+        if status == 'Completed':
+            logger.info(f"Job completed successfully after {elapsed:.1f}s ({attempt} status checks)")
+            job_status = dict(job_status)
+            job_status['job_timing'] = job_timing(elapsed)
+            return job_status
+        elif status == 'Failed':
+            error_message = job_status.get('error_message', 'Unknown error')
+            logger.error(f"Job failed: {error_message}")
+            return {"error": f"Job failed: {error_message}", "job_timing": job_timing(elapsed)}
+        else:
+            logger.info(f"Job status: {status}. Waiting...")
+            delay = min(delay * config['backoff'], config['max_delay'])
+
+def get_audio_duration(audio_path=None, audio_data=None):
+    """
+    Get the duration of an audio file or in-memory audio without decoding it.
+    
+    Args:
+        audio_path (str, optional): Path to the audio file
+        audio_data (bytes, optional): Encoded audio, used instead of audio_path when given
+        
+    Returns:
+        float: Duration in seconds, or None if it cannot be determined
+    """
+    import io
+    import soundfile as sf
+    try:
+        source = io.BytesIO(audio_data) if isinstance(audio_data, (bytes, bytearray)) else audio_data or audio_path
+        return sf.info(source).duration
+    except Exception as e:
+        logger.debug(f"Could not determine audio duration: {str(e)}")
+        return None
+
+async def process_audio_with_diarization(audio_path, api_key=None, audio_data=None, audio_duration=None):
     """
     Process an audio file with speaker diarization using Sarvam's Batch API.
     
     Args:
-        audio_path (str): Path to the audio file
+        audio_path (str): Path to the audio file. When audio_data is given, only its
+            file name is used for the upload.
         api_key (str, optional): Sarvam API key. If None, uses the module-level SARVAM_API_KEY.
+        audio_data (bytes or file-like, optional): In-memory audio to upload instead of reading audio_path
+        audio_duration (float, optional): Duration of the audio in seconds, used to scale the
+            polling deadline. If None, it is read from the audio header.
         
     Returns:
-        dict: Processed results with transcription and diarization
+        dict: Processed results with transcription and diarization, including the
+            job's "job_timing"
     """
     logger.info(f"Processing audio with diarization: {audio_path}")
     
@@ -459,7 +652,10 @@ async def process_audio_with_diarization(audio_path, api_key=None):
     # Step 2: Upload audio file
     logger.info(f"Uploading audio file to: {input_storage_path}")
     input_client = SarvamStorageClient(input_storage_path)
-    upload_success = await input_client.upload_file(audio_path)
+    if audio_data is not None:
+        upload_success = await input_client.upload_data(audio_data, os.path.basename(audio_path))
+    else:
+        upload_success = await input_client.upload_file(audio_path)
     
     if not upload_success:
         logger.error("Failed to upload audio file")
@@ -472,33 +668,19 @@ async def process_audio_with_diarization(audio_path, api_key=None):
         return {"error": "Failed to start job"}
     
     # Step 4: Monitor job status
-    logger.info("Monitoring job status...")
-    max_attempts = 30
-    for attempt in range(1, max_attempts + 1):
-        logger.debug(f"Status check attempt {attempt}/{max_attempts}")
-        
-        job_status = await check_job_status(job_id, api_key)
-        if not job_status:
-            logger.error("Failed to check job status")
-            return {"error": "Failed to check job status"}
-        
-        status = job_status['job_state']
-        if status == 'Completed':
-            logger.info("Job completed successfully!")
-            break
-        elif status == 'Failed':
-            error_message = job_status.get('error_message', 'Unknown error')
-            logger.error(f"Job failed: {error_message}")
-            return {"error": f"Job failed: {error_message}"}
-        else:
-            logger.info(f"Job status: {status}. Waiting...")
-            await asyncio.sleep(5)  # Wait 5 seconds before checking again
+    if audio_duration is None:
+        audio_duration = get_audio_duration(audio_path, audio_data)
+    job_status = await wait_for_job(job_id, api_key, audio_duration=audio_duration)
+    if "error" in job_status:
+        return job_status
+    job_timing = job_status['job_timing']
     
     # Step 5: Get results
     # First try to get results directly from the API
     results = await get_job_results(job_id, api_key)
     if results:
         logger.info("Successfully retrieved results from API")
+        results['job_timing'] = job_timing
         return results
     
     # If direct API results fail, try downloading from storage
@@ -538,8 +720,126 @@ async def process_audio_with_diarization(audio_path, api_key=None):
             logger.error("No valid results found in downloaded files")
             return {"error": "No valid results found in downloaded files"}
         
+        results['job_timing'] = job_timing
         return results
 
+def _map_job_outputs(job_status, input_names, output_names):
+    """
+    Match the output files of a multi-file job to its input files.
+    
+    Uses the per-file job details when the status provides them, and otherwise
+    matches file names without extensions (segment_000.wav -> segment_000.json).
+    
+    Args:
+        job_status (dict): Final job status
+        input_names (list): Uploaded file names
+        output_names (list): Output file names found in storage
+        
+    Returns:
+        tuple: (dict of input name -> output name, dict of input name -> error message)
+    """
+    outputs = {}
+    errors = {}
+    
+    for detail in job_status.get('job_details') or []:
+        inputs = [item.get('file_name') for item in detail.get('inputs', [])]
+        detail_outputs = [item.get('file_name') for item in detail.get('outputs', [])]
+        for input_name in inputs:
+            if input_name not in input_names:
+                continue
+            if detail.get('state') == 'Failed':
+                errors[input_name] = detail.get('error_message') or 'Unknown error'
+            elif detail_outputs and detail_outputs[0] in output_names:
+                outputs[input_name] = detail_outputs[0]
+    
+    outputs_by_stem = {os.path.splitext(name)[0]: name for name in output_names if name.endswith('.json')}
+    for input_name in input_names:
+        if input_name not in outputs and input_name not in errors:
+            output_name = outputs_by_stem.get(os.path.splitext(input_name)[0]) or outputs_by_stem.get(input_name)
+            if output_name:
+                outputs[input_name] = output_name
+            else:
+                errors[input_name] = "No output file found"
+    
+    return outputs, errors
+
+async def process_files_with_batch_job(files, api_key=None, audio_duration=None):
+    """
+    Process several audio files with speaker diarization in a single Sarvam batch job.
+    
+    All files are uploaded to the job's input directory in parallel, the job is
+    started and polled once, and the per-file outputs are fanned back out.
+    
+    Args:
+        files (list): Dicts with a "file_name" and either "audio_data" (bytes) or "file_path"
+        api_key (str, optional): Sarvam API key. If None, uses the module-level SARVAM_API_KEY.
+        audio_duration (float, optional): Total seconds of audio in the job, used to scale the polling deadline
+        
+    Returns:
+        dict: Results per file name, each with the job's "job_timing"; failed files
+            map to a dict with an "error" key
+    """
+    input_names = [item['file_name'] for item in files]
+    logger.info(f"Processing {len(files)} files with diarization in one batch job")
+    
+    def fail_all(error_msg):
+        logger.error(error_msg)
+        return {name: {"error": error_msg} for name in input_names}
+    
+    if api_key is None:
+        api_key = SARVAM_API_KEY
+    if not api_key:
+        return fail_all("No API key available for Sarvam API")
+    
+    # Step 1: Initialize one job for all files
+    job_info = await initialize_job(api_key)
+    if not job_info:
+        return fail_all("Failed to initialize job")
+    job_id = job_info['job_id']
+    
+    # Step 2: Upload all files in parallel
+    input_client = SarvamStorageClient(job_info['input_storage_path'])
+    uploads = [
+        input_client.upload_data(item['audio_data'], item['file_name']) if item.get('audio_data') is not None
+        else input_client.upload_file(item['file_path'])
+        for item in files
+    ]
+    upload_results = await asyncio.gather(*uploads)
+    if not all(upload_results):
+        failed = [name for name, success in zip(input_names, upload_results) if not success]
+        return fail_all(f"Failed to upload {len(failed)} of {len(files)} files: {', '.join(failed)}")
+    
+    # Step 3: Start the job and wait for it
+    start_response = await start_job(job_id, api_key, with_diarization=True)
+    if not start_response:
+        return fail_all("Failed to start job")
+    
+    job_status = await wait_for_job(job_id, api_key, audio_duration=audio_duration)
+    if "error" in job_status:
+        return fail_all(job_status["error"])
+    job_timing = job_status.get('job_timing')
+    
+    # Step 4: Download the outputs and fan them out to the input files
+    output_client = SarvamStorageClient(job_info['output_storage_path'])
+    output_names = await output_client.list_files()
+    outputs, errors = _map_job_outputs(job_status, input_names, output_names)
+    
+    results = {name: {"error": f"Job failed for {name}: {error}"} for name, error in errors.items()}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        downloaded_files = await output_client.download_files(list(outputs.values()), temp_dir)
+        downloaded_by_name = {os.path.basename(path): path for path in downloaded_files}
+        
+        for input_name, output_name in outputs.items():
+            if output_name not in downloaded_by_name:
+                results[input_name] = {"error": f"Failed to download output file {output_name}"}
+                continue
+            with open(downloaded_by_name[output_name], 'r') as f:
+                results[input_name] = json.load(f)
+            results[input_name]['job_timing'] = job_timing
+    
+    logger.info(f"Batch job {job_id} finished: {len(files) - len(errors)} of {len(files)} files succeeded")
+    return results
+
 async def transcribe_with_diarization(audio_path, api_key=None):
     """
     Transcribe audio with speaker diarization.
@@ -593,15 +893,104 @@ async def transcribe_with_diarization(audio_path, api_key=None):
         logger.error(f"Error transcribing with diarization: {str(e)}")
         return {"success": False, "error": str(e)}
 
-async def transcribe_with_vad_diarization(audio_path, api_key=None, vad_segments_dir=None, min_segment_duration=1.0):
+async def iterate_in_background(iterator, max_pending=8):
+    """
+    Run a blocking iterator in a worker thread and yield its items asynchronously.
+    
+    The worker keeps producing while the caller awaits other work, and pauses
+    once max_pending items are waiting to be consumed. If the caller stops
+    early (an exception or closing the generator), the worker stops too and
+    closes the iterator instead of waiting on the full queue forever.
+    
+    Args:
+        iterator: Blocking iterator (e.g. vad_segmentation.stream_vad_segments)
+        max_pending (int): Maximum number of produced items waiting to be consumed
+        
+    Yields:
+        Items of the iterator, in order
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=max_pending)
+    done = object()
+    stop = threading.Event()
+    
+    def put(entry):
+        # Wait for room in the queue, giving up once the consumer has gone
+        future = asyncio.run_coroutine_threadsafe(queue.put(entry), loop)
+        while True:
+            try:
+                future.result(timeout=0.1)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+    
+    def produce():
+        try:
+            for item in iterator:
+                if stop.is_set() or not put((item, None)):
+                    break
+        except Exception as e:
+            if not stop.is_set():
+                put((done, e))
+        else:
+            if not stop.is_set():
+                put((done, None))
+        finally:
+            # Let the iterator release what it holds (decoded audio, decoder processes)
+            if hasattr(iterator, "close"):
+                iterator.close()
+    
+    producer = loop.run_in_executor(None, produce)
+    error = None
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+    await producer
+    if error:
+        raise error
+
+async def transcribe_with_vad_diarization(audio_path, api_key=None, vad_segments_dir=None, min_segment_duration=1.0, save_segments=None, streaming=None, max_concurrent=None, batch_job=None, use_cache=None, progress_callback=None):
     """
     Transcribe audio with VAD-based segmentation and diarization.
     
+    By default segments are kept in memory and uploaded straight from WAV buffers;
+    segment files are only written when save_segments (or the VAD save_segments
+    debug setting) is enabled. In streaming mode the audio is decoded and segmented
+    block by block, and each segment is transcribed as soon as it closes.
+    
+    Segment jobs run concurrently, at most max_concurrent at a time and under the
+    shared Sarvam rate limit; results are merged in timeline order as they finish. In batch job
+    mode, segments are grouped into multi-file jobs (up to batch_max_files each)
+    instead of one job per segment.
+    
+    Results are cached by a hash of the decoded audio plus the model and VAD
+    settings; a cache hit restores diarization.json and the segment timing
+    without running VAD or calling the API.
+    
     Args:
         audio_path (str): Path to the audio file
         api_key (str, optional): Sarvam API key. If None, uses the module-level SARVAM_API_KEY.
         vad_segments_dir (str, optional): Directory to save VAD segments
         min_segment_duration (float, optional): Minimum duration for VAD segments
+        save_segments (bool, optional): Whether to write segment WAV files to disk.
+            If None, uses the VAD configuration.
+        streaming (bool, optional): Whether to segment while decoding. If None, uses the VAD configuration.
+        max_concurrent (int, optional): Maximum number of segment jobs in flight.
+            If None, uses max_concurrent_segments from the diarization configuration.
+        batch_job (bool, optional): Whether to send segments as multi-file batch jobs.
+            If None, uses batch_job from the diarization configuration.
+        use_cache (bool, optional): Whether to use the transcription cache.
+            If None, uses the transcription cache configuration.
+        progress_callback (callable, optional): Called with the progress dict of a
+            SegmentResultAggregator (including the partial transcript) whenever a
+            segment finishes.
         
     Returns:
         dict: Processed results with transcription and diarization
@@ -616,10 +1005,24 @@ async def transcribe_with_vad_diarization(audio_path, api_key=None, vad_segments
         error_msg = "No API key available for Sarvam API"
         logger.error(error_msg)
         return {"success": False, "error": error_msg}
-    from modules.vad_segmentation import segment_audio_with_vad
+    from modules.vad_segmentation import segment_audio_with_vad, segment_audio_without_saving, stream_vad_segments, encode_wav_buffer
+    from modules.speech_config import get_vad_config, get_diarization_config
     
     logger.info(f"Transcribing with VAD and diarization: {audio_path}")
     
+    vad_config = get_vad_config()
+    if save_segments is None:
+        save_segments = vad_config.get("save_segments", False)
+    if streaming is None:
+        streaming = vad_config.get("streaming", False)
+    diarization_config = get_diarization_config()
+    if max_concurrent is None:
+        max_concurrent = diarization_config.get("max_concurrent_segments", 1)
+    if batch_job is None:
+        batch_job = diarization_config.get("batch_job", False)
+    batch_max_files = max(1, int(diarization_config.get("batch_max_files", 20)))
+    segment_slots = asyncio.Semaphore(max(1, int(max_concurrent)))
+    
     # Extract session_id from audio path
     session_id = os.path.basename(audio_path).split('.')[0]
     
@@ -629,117 +1032,421 @@ async def transcribe_with_vad_diarization(audio_path, api_key=None, vad_segments
     
     logger.info(f"Using provided directory for VAD segments: {vad_segments_dir}")
     os.makedirs(vad_segments_dir, exist_ok=True)
+    session_dir = os.path.join("outputs", session_id)
+    diarization_path = os.path.join(session_dir, "diarization.json")
+    info_path = os.path.join(vad_segments_dir, "segment_info.json")
     
-    # Segment audio using VAD
-    segments = segment_audio_with_vad(
-        audio_path=audio_path, 
-        output_dir=vad_segments_dir,
-        min_segment_duration=min_segment_duration  # Pass min_segment_duration as a separate parameter
-    )
+    def restore_cached_result(cache_entry):
+        logger.info(f"Transcription cache hit for {audio_path} ({cache_key[:12]})")
+        with open(info_path, "w", encoding="utf-8") as f:
+            json.dump(cache_entry.get("segment_info", []), f, indent=2, ensure_ascii=False)
+        os.makedirs(session_dir, exist_ok=True)
+        with open(diarization_path, 'w', encoding='utf-8') as f:
+            json.dump(cache_entry["result"], f, ensure_ascii=False, indent=2)
+        logger.info(f"Saved cached diarization results to: {diarization_path}")
+        return cache_entry["result"]
     
-    # Process each segment with diarization
-    segment_results = []
-    for i, segment_info in enumerate(segments):
+    # Return the stored result for audio that was transcribed before. Files whose
+    # bytes were seen before are looked up by their known audio hash; new files
+    # are hashed from the samples VAD decodes rather than being decoded twice.
+    cache = get_transcription_cache() if use_cache is not False else None
+    cache_sample_rate = vad_config.get("sample_rate", 16000)
+    cache_key = None
+    file_hash = None
+    audio_hash = None
+    decoded_audio_hash = None
+    if cache:
+        cache_entry = None
+        try:
+            file_hash, audio_hash = cache.lookup_audio_hash(audio_path, sample_rate=cache_sample_rate)
+            if audio_hash:
+                cache_key = get_transcription_cache_key(audio_hash, min_segment_duration)
+                cache_entry = cache.get(cache_key)
+            else:
+                decoded_audio_hash = DecodedAudioHash()
+        except Exception as e:
+            logger.warning(f"Transcription cache lookup failed: {str(e)}")
+        
+        if audio_hash:
+            record_cache_lookup(session_id, cache, cache_key, cache_entry is not None)
+        if cache_entry:
+            return restore_cached_result(cache_entry)
+    
+    def finish_audio_hash():
+        # Build the key of audio that was hashed while VAD decoded it
+        nonlocal audio_hash, cache_key
+        if decoded_audio_hash is None:
+            return
+        try:
+            audio_hash = decoded_audio_hash.hexdigest()
+            cache_key = get_transcription_cache_key(audio_hash, min_segment_duration)
+        except Exception as e:
+            logger.warning(f"Transcription cache key failed: {str(e)}")
+    
+    on_audio = decoded_audio_hash.update if decoded_audio_hash else None
+    
+    async def process_segment(i, segment_info):
         segment_id = f"seg_{i+1:03d}"
         segment_path = os.path.join(vad_segments_dir, f"segment_{i:03d}.wav")
         
-        logger.info(f"Processing segment {segment_id} with diarization")
         try:
-            # Pass the same API key to maintain consistency
-            segment_result = await process_audio_with_diarization(segment_path, api_key)
+            async with segment_slots:
+                logger.info(f"Processing segment {segment_id} with diarization")
+                # Pass the same API key to maintain consistency
+                segment_duration = segment_info['end_time'] - segment_info['start_time']
+                if 'audio_data' in segment_info:
+                    segment_buffer = encode_wav_buffer(segment_info['audio_data'], segment_info['sample_rate'])
+                    segment_result = await process_audio_with_diarization(segment_path, api_key, audio_data=segment_buffer.getvalue(), audio_duration=segment_duration)
+                else:
+                    segment_result = await process_audio_with_diarization(segment_path, api_key, audio_duration=segment_duration)
             
             # Add segment metadata
             segment_result['segment_id'] = segment_id
             segment_result['start_time'] = segment_info['start_time']
             segment_result['end_time'] = segment_info['end_time']
             
-            segment_results.append(segment_result)
             logger.info(f"Successfully processed segment {segment_id}")
         except Exception as e:
             logger.error(f"Error processing segment {segment_id}: {str(e)}")
-            segment_results.append({"error": str(e), "segment_id": segment_id})
+            segment_result = {"error": str(e), "segment_id": segment_id, "start_time": segment_info['start_time']}
+        aggregator.add(segment_result)
+        return [segment_result]
+    
+    async def process_segment_batch(indexed_segments):
+        files = []
+        for i, segment_info in indexed_segments:
+            file_name = f"segment_{i:03d}.wav"
+            if 'audio_data' in segment_info:
+                segment_buffer = encode_wav_buffer(segment_info['audio_data'], segment_info['sample_rate'])
+                files.append({"file_name": file_name, "audio_data": segment_buffer.getvalue()})
+            else:
+                files.append({"file_name": file_name, "file_path": os.path.join(vad_segments_dir, file_name)})
+        
+        try:
+            async with segment_slots:
+                batch_duration = sum(segment_info['end_time'] - segment_info['start_time'] for _, segment_info in indexed_segments)
+                batch_results = await process_files_with_batch_job(files, api_key, audio_duration=batch_duration)
+        except Exception as e:
+            logger.error(f"Error processing batch of {len(files)} segments: {str(e)}")
+            batch_results = {}
+            batch_error = str(e)
+        else:
+            batch_error = "No result returned for segment"
+        
+        segment_results = []
+        for (i, segment_info), item in zip(indexed_segments, files):
+            segment_result = dict(batch_results.get(item['file_name'], {"error": batch_error}))
+            segment_result['segment_id'] = f"seg_{i+1:03d}"
+            segment_result['start_time'] = segment_info['start_time']
+            segment_result['end_time'] = segment_info['end_time']
+            segment_results.append(segment_result)
+            aggregator.add(segment_result)
+        return segment_results
+    
+    # Segment audio using VAD and dispatch segments for diarization as soon as they are available
+    aggregator = SegmentResultAggregator(on_update=progress_callback)
+    segment_tasks = []
+    pending_batch = []
     
-    # Combine results from all segments
-    combined_results = combine_segment_results(segment_results)
+    def dispatch(i, segment_info):
+        if not batch_job:
+            segment_tasks.append(asyncio.ensure_future(process_segment(i, segment_info)))
+            return
+        pending_batch.append((i, segment_info))
+        if len(pending_batch) >= batch_max_files:
+            segment_tasks.append(asyncio.ensure_future(process_segment_batch(list(pending_batch))))
+            pending_batch.clear()
+    
+    if streaming:
+        segment_info_list = []
+        segment_stream = stream_vad_segments(
+            audio_path=audio_path,
+            min_segment_duration=min_segment_duration,
+            on_audio=on_audio
+        )
+        async for segment_info in iterate_in_background(segment_stream):
+            i = len(segment_info_list)
+            if save_segments:
+                segment_path = os.path.join(vad_segments_dir, f"segment_{i:03d}.wav")
+                with open(segment_path, "wb") as f:
+                    f.write(encode_wav_buffer(segment_info['audio_data'], segment_info['sample_rate']).getvalue())
+            segment_info_list.append({key: value for key, value in segment_info.items() if key not in ("audio_data", "sample_rate")})
+            dispatch(i, segment_info)
+        
+        with open(info_path, "w", encoding="utf-8") as f:
+            json.dump(segment_info_list, f, indent=2, ensure_ascii=False)
+        
+        # Segments were sent while decoding, so a match can only be stored, not reused
+        finish_audio_hash()
+        if decoded_audio_hash is not None and cache_key:
+            record_cache_lookup(session_id, cache, cache_key, False)
+    else:
+        if save_segments:
+            segments = segment_audio_with_vad(
+                audio_path=audio_path, 
+                output_dir=vad_segments_dir,
+                min_segment_duration=min_segment_duration,  # Pass min_segment_duration as a separate parameter
+                on_audio=on_audio
+            )
+        else:
+            segments = segment_audio_without_saving(
+                audio_path=audio_path,
+                min_segment_duration=min_segment_duration,
+                on_audio=on_audio
+            )
+        
+        # New bytes may still be known audio (e.g. the same recording in another container)
+        finish_audio_hash()
+        if decoded_audio_hash is not None and cache_key:
+            cache_entry = cache.get(cache_key)
+            record_cache_lookup(session_id, cache, cache_key, cache_entry is not None)
+            if cache_entry:
+                return restore_cached_result(cache_entry)
+            
+        segment_info_list = [{key: value for key, value in segment.items() if key not in ("audio_data", "sample_rate")} for segment in segments]
+        if not save_segments:
+            # Keep the segment timing on disk for later lookups; the audio stays in memory
+            with open(info_path, "w", encoding="utf-8") as f:
+                json.dump(segment_info_list, f, indent=2, ensure_ascii=False)
+        
+        for i, segment_info in enumerate(segments):
+            dispatch(i, segment_info)
+    
+    if pending_batch:
+        segment_tasks.append(asyncio.ensure_future(process_segment_batch(pending_batch)))
+    aggregator.set_total(len(segment_info_list))
+    
+    # Results were merged into the aggregator as each task finished
+    segment_results = [result for task_results in await asyncio.gather(*segment_tasks) for result in task_results]
+    record_job_timings(session_id, segment_results)
+    combined_results = aggregator.get_result()
     
     # Save the diarization results to the expected path
-    session_dir = os.path.join("outputs", session_id)
     os.makedirs(session_dir, exist_ok=True)
-    diarization_path = os.path.join(session_dir, "diarization.json")
     with open(diarization_path, 'w', encoding='utf-8') as f:
         json.dump(combined_results, f, ensure_ascii=False, indent=2)
     logger.info(f"Saved diarization results to: {diarization_path}")
     
+    # Only complete transcriptions are cached, so failed segments are retried next time
+    if cache_key and not any('error' in result for result in segment_results):
+        try:
+            cache.put(cache_key, combined_results, segment_info_list, audio_hash=audio_hash)
+            if file_hash:
+                cache.remember_audio_hash(file_hash, audio_hash, sample_rate=cache_sample_rate)
+        except Exception as e:
+            logger.warning(f"Could not store transcription in cache: {str(e)}")
+    
     return combined_results
 
-def combine_segment_results(segment_results):
+def record_cache_lookup(session_id, cache, cache_key, hit):
     """
-    Combine results from multiple audio segments into a single result.
+    Record a transcription cache lookup and the cache counters in the session metadata.
+    
+    Args:
+        session_id (str): Session ID
+        cache (TranscriptionCache): The transcription cache
+        cache_key (str): Cache key that was looked up, or None if the key could not be built
+        hit (bool): Whether the lookup was a hit
+    """
+    stats = cache.get_stats()
+    logger.info(f"Transcription cache {'hit' if hit else 'miss'}; process stats: {stats}")
+    try:
+        from utils.metadata_manager import update_metadata_section
+        update_metadata_section(session_id, "transcription_cache", {"hit": hit, "key": cache_key, "stats": stats})
+    except Exception as e:
+        logger.warning(f"Could not record cache lookup in metadata: {str(e)}")
+
+def record_job_timings(session_id, segment_results):
+    """
+    Record how long each Sarvam job spent queued and processing in the session metadata.
     
     Args:
-        segment_results (list): List of results from individual segments
+        session_id (str): Session ID
+        segment_results (list): Segment results carrying a "job_timing" entry
         
     Returns:
-        dict: Combined results
+        dict: The recorded "diarization_jobs" section, or None if no job was timed
     """
-    combined_transcript = ""
-    combined_segments = []
-    language_code = None
-    
+    # Segments of one multi-file job share its timing
+    timings = {}
     for result in segment_results:
-        # Process each segment result
-        processed_result = process_diarization_results(result)
+        job_timing = result.get('job_timing')
+        if job_timing:
+            timings[job_timing['job_id']] = job_timing
+    if not timings:
+        return None
+    
+    jobs = list(timings.values())
+    queue_times = [job['queue_time'] for job in jobs]
+    processing_times = [job['processing_time'] for job in jobs]
+    section = {
+        "jobs": jobs,
+        "job_count": len(jobs),
+        "mean_queue_time": round(sum(queue_times) / len(jobs), 3),
+        "max_queue_time": max(queue_times),
+        "mean_processing_time": round(sum(processing_times) / len(jobs), 3),
+        "max_processing_time": max(processing_times)
+    }
+    logger.info(f"Sarvam jobs for session {session_id}: {len(jobs)} jobs, mean queue {section['mean_queue_time']}s, mean processing {section['mean_processing_time']}s")
+    
+    try:
+        from utils.metadata_manager import update_metadata_section
+        update_metadata_section(session_id, "diarization_jobs", section)
+    except Exception as e:
+        logger.warning(f"Could not record job timings in metadata: {str(e)}")
+    return section
+
+class SegmentResultAggregator:
+    """
+    Incrementally combines segment results that arrive in any order.
+    
+    Each result is processed once when it is added and kept ordered by its start
+    time, so a partial transcript of the segments finished so far is available
+    while later segments are still in flight.
+    """
+    def __init__(self, on_update=None):
+        """
+        Initialize the aggregator.
+        
+        Args:
+            on_update (callable, optional): Called with get_progress() after every change
+        """
+        self.on_update = on_update
+        self.order_keys = []  # (start_time, arrival order) of each entry, sorted
+        self.entries = []  # (raw result, processed result), in the same order
+        self.segments_total = None
+        self.segments_failed = 0
+        self._partial_transcript = None
+    
+    def add(self, result):
+        """
+        Add a segment result.
         
-        # Skip segments with errors
+        Args:
+            result (dict): Result of one segment, with its start_time offset
+        """
+        processed_result = process_diarization_results(result)
         if 'error' in processed_result:
             logger.error(f"Error in results: {processed_result['error']}")
-            continue
+            self.segments_failed += 1
         
-        # Extract transcript and segments
-        transcript = processed_result.get('transcript', '')
-        segments = processed_result.get('segments', [])
-        
-        if not language_code and 'language_code' in processed_result:
-            language_code = processed_result['language_code']
+        order_key = (result.get('start_time', 0), len(self.entries))
+        position = bisect.bisect(self.order_keys, order_key)
+        self.order_keys.insert(position, order_key)
+        self.entries.insert(position, (result, processed_result))
+        self._partial_transcript = None
+        self._notify()
+    
+    def set_total(self, segments_total):
+        """
+        Set the number of segments expected, once segmentation has finished.
         
-        # Add transcript to combined transcript
-        if transcript:
-            if combined_transcript:
-                combined_transcript += " " + transcript
-            else:
-                combined_transcript = transcript
-        
-        # Adjust segment timestamps based on segment start time
-        segment_start = result.get('start_time', 0)
-        for i, segment in enumerate(segments):
-            # Create a properly structured segment with consistent key names
-            adjusted_segment = {
-                'segment_id': f"seg_{len(combined_segments):03d}",
-                'speaker': segment.get('speaker', f"SPEAKER_{i % 2:02d}"),
-                'text': segment.get('text', ''),
-                'start_time': segment.get('start_time', 0) + segment_start,
-                'end_time': segment.get('end_time', 0) + segment_start,
-                'gender': segment.get('gender', 'unknown'),
-                'pace': segment.get('pace', 1.0)
-            }
-            
-            # Add duration field calculated from start_time and end_time
-            adjusted_segment['duration'] = adjusted_segment['end_time'] - adjusted_segment['start_time']
-            
-            combined_segments.append(adjusted_segment)
+        Args:
+            segments_total (int): Number of segments
+        """
+        self.segments_total = segments_total
+        self._notify()
     
-    # Create combined result
-    combined_result = {
-        'transcript': combined_transcript,
-        'segments': combined_segments
-    }
+    def _notify(self):
+        if self.on_update:
+            try:
+                self.on_update(self.get_progress())
+            except Exception as e:
+                logger.warning(f"Progress callback failed: {str(e)}")
     
-    if language_code:
-        combined_result['language_code'] = language_code
+    def get_partial_transcript(self):
+        """
+        Get the transcript of the segments finished so far, in timeline order.
+        
+        Returns:
+            str: Partial transcript
+        """
+        if self._partial_transcript is None:
+            self._partial_transcript = " ".join(
+                processed['transcript'] for _, processed in self.entries
+                if 'error' not in processed and processed.get('transcript')
+            )
+        return self._partial_transcript
     
-    logger.info(f"Combined {len(segment_results)} segments into final result with {len(combined_segments)} speaker segments")
+    def get_progress(self):
+        """
+        Get the progress of the transcription.
+        
+        Returns:
+            dict: segments_completed, segments_failed, segments_total (None while
+                segmentation is still running) and partial_transcript
+        """
+        return {
+            "segments_completed": len(self.entries),
+            "segments_failed": self.segments_failed,
+            "segments_total": self.segments_total,
+            "partial_transcript": self.get_partial_transcript()
+        }
+    
+    def get_result(self):
+        """
+        Get the combined result of all segments added so far.
+        
+        Returns:
+            dict: Combined results
+        """
+        combined_segments = []
+        language_code = None
+        
+        for result, processed_result in self.entries:
+            # Skip segments with errors
+            if 'error' in processed_result:
+                continue
+            
+            if not language_code and 'language_code' in processed_result:
+                language_code = processed_result['language_code']
+            
+            # Adjust segment timestamps based on segment start time
+            segment_start = result.get('start_time', 0)
+            for i, segment in enumerate(processed_result.get('segments', [])):
+                # Create a properly structured segment with consistent key names
+                adjusted_segment = {
+                    'segment_id': f"seg_{len(combined_segments):03d}",
+                    'speaker': segment.get('speaker', f"SPEAKER_{i % 2:02d}"),
+                    'text': segment.get('text', ''),
+                    'start_time': segment.get('start_time', 0) + segment_start,
+                    'end_time': segment.get('end_time', 0) + segment_start,
+                    'gender': segment.get('gender', 'unknown'),
+                    'pace': segment.get('pace', 1.0)
+                }
+                
+                # Add duration field calculated from start_time and end_time
+                adjusted_segment['duration'] = adjusted_segment['end_time'] - adjusted_segment['start_time']
+                
+                combined_segments.append(adjusted_segment)
+        
+        # Create combined result
+        combined_result = {
+            'transcript': self.get_partial_transcript(),
+            'segments': combined_segments
+        }
+        
+        if language_code:
+            combined_result['language_code'] = language_code
+        
+        logger.info(f"Combined {len(self.entries)} segments into final result with {len(combined_segments)} speaker segments")
+        
+        return combined_result
+
+def combine_segment_results(segment_results):
+    """
+    Combine results from multiple audio segments into a single result.
     
-    return combined_result
+    Args:
+        segment_results (list): List of results from individual segments, in any order
+        
+    Returns:
+        dict: Combined results
+    """
+    aggregator = SegmentResultAggregator()
+    for result in segment_results:
+        aggregator.add(result)
+    return aggregator.get_result()
 
 def process_diarization_results(results):
     """
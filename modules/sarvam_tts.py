@@ -1,11 +1,11 @@
 import os
 import logging
-import requests
 import json
 import base64
 
 # Import Secret Manager utility
 from utils.secret_manager import get_secret
+from utils.provider_request import send_provider_request
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -186,8 +186,8 @@ def synthesize_speech(text, language, output_path, speaker=None, pitch=0, pace=1
                 "model": model
             }
             
-            # Make API request
-            response = requests.post(url, headers=headers, json=payload)
+            # Make API request (rate limited, with retries on 429 and 5xx responses)
+            response = send_provider_request("sarvam", "POST", url, headers=headers, json=payload)
             
             # Check for successful response
             if response.status_code == 200:
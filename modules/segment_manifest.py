@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Segment manifest module.
+The synthesis stage records which audio file holds each segment, with its
+duration and format, in a manifest next to the audio. Time alignment looks
+segments up there instead of scanning the TTS directory once per segment,
+falling back to a single directory index for anything the manifest lacks.
+"""
+
+import os
+import json
+import bisect
+import logging
+import tempfile
+from typing import Dict, Any, List, Optional
+
+import soundfile as sf
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Manifest file name inside the TTS directory
+SEGMENT_MANIFEST_FILE = "segment_manifest.json"
+
+# Bump when the manifest format changes
+MANIFEST_VERSION = 1
+
+def describe_audio_file(path: str) -> Dict[str, Any]:
+    """
+    Build the manifest entry of a synthesized audio file.
+
+    Args:
+        path: Path to the audio file
+
+    Returns:
+        Dict: file name, duration in seconds (None if the header can't be read),
+        format, size and mtime
+    """
+    entry = {"file": os.path.basename(path), "duration": None, "format": os.path.splitext(path)[1].lstrip(".").lower()}
+    try:
+        # Providers don't always match the extension to the container, so trust the header
+        info = sf.info(path)
+        entry["duration"] = info.duration
+        entry["format"] = info.format.lower()
+    except Exception as e:
+        logger.debug(f"Could not read audio header of {path}: {str(e)}")
+
+    stat = os.stat(path)
+    entry["size"] = stat.st_size
+    entry["mtime"] = stat.st_mtime
+    return entry
+
+def load_segment_manifest(tts_dir: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the segment manifest of a TTS directory.
+
+    Args:
+        tts_dir: Directory containing TTS segments
+
+    Returns:
+        Dict: Segment ID -> manifest entry (empty if there is no usable manifest)
+    """
+    manifest_path = os.path.join(tts_dir, SEGMENT_MANIFEST_FILE)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Could not load segment manifest {manifest_path}: {str(e)}")
+        return {}
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        logger.info(f"Ignoring segment manifest version {manifest.get('version')}")
+        return {}
+    return manifest.get("segments", {})
+
+def write_segment_manifest(tts_dir: str, segment_files: Dict[str, str],
+                           previous: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Write the segment manifest of a TTS directory.
+
+    Entries of previous whose file is unchanged on disk are kept as they are,
+    so only newly synthesized files have their headers read.
+
+    Args:
+        tts_dir: Directory containing TTS segments
+        segment_files: Segment ID -> path of its synthesized audio (missing files are left out)
+        previous: Manifest entries of the previous run (optional)
+
+    Returns:
+        Dict: Segment ID -> manifest entry as written
+    """
+    previous = previous or {}
+    segments = {}
+    for segment_id, path in segment_files.items():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entry = previous.get(segment_id)
+        if (entry and entry.get("file") == os.path.basename(path)
+                and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime):
+            segments[segment_id] = entry
+        else:
+            segments[segment_id] = describe_audio_file(path)
+
+    # Write to a temporary file first so the aligner never reads a partial manifest
+    fd, temp_path = tempfile.mkstemp(dir=tts_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "segments": segments}, f, indent=2)
+        os.replace(temp_path, os.path.join(tts_dir, SEGMENT_MANIFEST_FILE))
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    logger.info(f"Wrote segment manifest with {len(segments)} entries to {tts_dir}")
+    return segments
+
+class TTSFileIndex:
+    """
+    Lookup of synthesized segment audio in a TTS directory.
+
+    Segments are looked up in the manifest first. Anything it doesn't cover
+    (or whose file changed since) is found by prefix in a sorted listing of
+    the directory, which is read at most once.
+    """
+    def __init__(self, tts_dir: str):
+        """
+        Initialize the index.
+
+        Args:
+            tts_dir: Directory containing TTS segments
+        """
+        self.tts_dir = tts_dir
+        self.manifest = load_segment_manifest(tts_dir)
+        self.names = None
+        self.stats = {"manifest_hits": 0, "directory_hits": 0, "misses": 0}
+
+    @property
+    def source(self) -> str:
+        return "manifest" if self.manifest else "directory"
+
+    def index_directory(self) -> List[str]:
+        """
+        List the audio files of the TTS directory (once).
+
+        Returns:
+            List[str]: Sorted file names of synthesized audio
+        """
+        if self.names is None:
+            # Earlier aligned output isn't synthesized audio
+            self.names = sorted(
+                name for name in os.listdir(self.tts_dir)
+                if (name.endswith(".wav") or name.endswith(".mp3")) and not name.endswith("_time_aligned.wav")
+            )
+            logger.info(f"Indexed {len(self.names)} audio files in {self.tts_dir}")
+        return self.names
+
+    def _manifest_entry(self, segment_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.manifest.get(segment_id)
+        if not entry:
+            return None
+        path = os.path.join(self.tts_dir, entry["file"])
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if stat.st_size != entry.get("size") or stat.st_mtime != entry.get("mtime"):
+            return None
+        return dict(entry, file=path, source="manifest")
+
+    def _find_by_prefix(self, prefix: str) -> Optional[str]:
+        names = self.index_directory()
+        position = bisect.bisect_left(names, prefix)
+        if position < len(names) and names[position].startswith(prefix):
+            return os.path.join(self.tts_dir, names[position])
+        return None
+
+    def find(self, segment_id: str, original_segments: Optional[List[Dict]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find the synthesized audio of a segment.
+
+        Args:
+            segment_id: Segment ID
+            original_segments: Original segments within a merged segment (optional)
+
+        Returns:
+            Dict: "file" path, "source" ("manifest" or "directory") plus "duration"
+            and "format" when known, or None if not found
+        """
+        original_ids = [
+            str(orig_seg.get("segment_id")) for orig_seg in original_segments or []
+            if isinstance(orig_seg, dict) and orig_seg.get("segment_id")
+        ]
+
+        for candidate in [str(segment_id)] + original_ids:
+            entry = self._manifest_entry(candidate)
+            if entry:
+                self.stats["manifest_hits"] += 1
+                return entry
+
+        # Check for both original segment ID and merged segment ID formats
+        prefixes = [f"segment_{segment_id}", f"segment_merged_{segment_id}"]
+        prefixes.extend(f"segment_{orig_id}" for orig_id in original_ids)
+        for prefix in prefixes:
+            path = self._find_by_prefix(prefix)
+            if path:
+                self.stats["directory_hits"] += 1
+                return {"file": path, "source": "directory", "duration": None,
+                        "format": os.path.splitext(path)[1].lstrip(".").lower()}
+
+        self.stats["misses"] += 1
+        return None
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Speaking rate module.
+Keeps a table of how many characters per second each provider voice speaks
+in each language, with the variance, aggregated from the synthesis logs of
+every session and updated after each synthesis job. The table predicts how
+long a segment's audio will be before it is synthesized, so a segment can be
+synthesized at the pace that makes it fit its slot, and jobs can be
+scheduled and costed ahead of time.
+"""
+
+import os
+import glob
+import json
+import math
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional
+
+from modules.speech_config import get_speaking_rate_config
+from modules.tts_cache import normalize_text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bump when the table format changes
+RATE_TABLE_VERSION = 1
+
+# Process-wide tables by file
+_speaking_rate_tables = {}
+_speaking_rate_tables_lock = threading.Lock()
+
+def count_spoken_chars(text: str) -> int:
+    """
+    Count the characters of text that take time to speak.
+
+    Args:
+        text: Text to synthesize
+
+    Returns:
+        Number of non-whitespace characters in the normalized text
+    """
+    return sum(1 for char in normalize_text(text) if not char.isspace())
+
+def make_rate_key(provider: str, voice: Optional[str], language: Optional[str]) -> str:
+    """
+    Build the key a voice's speaking rate is stored under.
+
+    Args:
+        provider: TTS provider (e.g. 'sarvam', 'cartesia')
+        voice: Voice or speaker ID (None for the provider's default voice)
+        language: Target language
+
+    Returns:
+        Key of the form "provider|voice|language"
+    """
+    return f"{provider}|{voice or 'default'}|{(language or '').lower()}"
+
+def hash_records(records: List[Dict[str, Any]]) -> str:
+    """
+    Hash synthesis records, to tell whether a log still starts with the records already counted.
+
+    Args:
+        records: Synthesis records
+
+    Returns:
+        Hex digest of the records
+    """
+    records_data = json.dumps(records, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(records_data.encode("utf-8")).hexdigest()
+
+def records_from_synthesis_details(details: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extract synthesis records from a saved synthesis details file.
+
+    TTSProcessor saves "synthesis_records" directly. SynthesisLogger logs
+    instead keep each segment's text and pace, with the provider, language
+    and speaker at the top level. Their "duration" is the length of the
+    original speaker's slot, so only segments that also carry the measured
+    "output_duration" of the synthesized audio are used.
+
+    Args:
+        details: Parsed synthesis details
+
+    Returns:
+        List of dictionaries with provider, voice, language, chars, pace and duration
+    """
+    if "synthesis_records" in details:
+        return details["synthesis_records"] or []
+
+    records = []
+    for segment in details.get("segments") or []:
+        if not isinstance(segment, dict) or not segment.get("text") or not segment.get("output_duration"):
+            continue
+        records.append({
+            "provider": segment.get("provider", details.get("provider")),
+            "voice": segment.get("voice", details.get("speaker")),
+            "language": segment.get("language", details.get("language")),
+            "chars": count_spoken_chars(segment["text"]),
+            "pace": segment.get("pace") or 1.0,
+            "duration": segment["output_duration"]
+        })
+    return records
+
+class SpeakingRateTable:
+    """
+    Characters-per-second mean and variance of every (provider, voice, language).
+
+    Each synthesized segment is one sample of the voice's rate, normalized to
+    pace 1.0 and folded in with Welford's update, so the table can be updated
+    one job at a time without keeping the samples. How many records of each
+    synthesis details file were counted is remembered, so aggregating the logs
+    again only reads new sessions, and a log that is rewritten with more
+    records appended only has the new ones counted.
+    """
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the table, loading it from path if it exists.
+
+        Args:
+            path: JSON file the table is persisted to (None to keep it in memory)
+        """
+        self.path = path
+        self.rates = {}
+        self.sources = {}
+        self.lock = threading.Lock()
+        if path:
+            self.load()
+
+    def load(self) -> None:
+        """Load the persisted table, starting empty if there is no usable file."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                table = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Could not load speaking rate table {self.path}: {str(e)}")
+            return
+
+        if table.get("version") != RATE_TABLE_VERSION:
+            logger.info(f"Ignoring speaking rate table version {table.get('version')}")
+            return
+        with self.lock:
+            self.rates = table.get("rates", {})
+            self.sources = table.get("sources", {})
+
+    def save(self) -> None:
+        """Persist the table (no-op for an in-memory table)."""
+        if not self.path:
+            return
+        with self.lock:
+            table = {"version": RATE_TABLE_VERSION, "rates": self.rates, "sources": self.sources}
+            table_data = json.dumps(table, indent=2, ensure_ascii=False)
+
+        # Write to a temporary file first so readers never see a partial table
+        table_dir = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(table_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=table_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(table_data)
+            os.replace(temp_path, self.path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def observe(self, provider: str, voice: Optional[str], language: Optional[str],
+                chars: int, duration: float, pace: float = 1.0) -> None:
+        """
+        Add one synthesized segment to the table.
+
+        Args:
+            provider: TTS provider
+            voice: Voice or speaker ID
+            language: Target language
+            chars: Spoken characters of the segment's text
+            duration: Duration of the synthesized audio in seconds
+            pace: Pace the audio was synthesized at
+        """
+        if not chars or not duration or duration <= 0 or not pace or pace <= 0:
+            return
+        chars_per_second = chars / (duration * pace)
+        key = make_rate_key(provider, voice, language)
+        with self.lock:
+            rate = self.rates.setdefault(key, {
+                "provider": provider, "voice": voice, "language": (language or "").lower(),
+                "count": 0, "mean": 0.0, "m2": 0.0, "chars": 0, "seconds": 0.0
+            })
+            rate["count"] += 1
+            delta = chars_per_second - rate["mean"]
+            rate["mean"] += delta / rate["count"]
+            rate["m2"] += delta * (chars_per_second - rate["mean"])
+            rate["chars"] += chars
+            rate["seconds"] += duration * pace
+
+    def get_stats(self, provider: str, voice: Optional[str], language: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Get the speaking rate statistics of a voice.
+
+        Args:
+            provider: TTS provider
+            voice: Voice or speaker ID
+            language: Target language
+
+        Returns:
+            Dict: provider, voice, language, count, chars_per_second, variance,
+            chars and seconds, or None if the voice has never been synthesized
+        """
+        with self.lock:
+            rate = self.rates.get(make_rate_key(provider, voice, language))
+            if not rate:
+                return None
+            return self._stats(rate)
+
+    @staticmethod
+    def _stats(rate: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "provider": rate["provider"],
+            "voice": rate["voice"],
+            "language": rate["language"],
+            "count": rate["count"],
+            "chars_per_second": rate["mean"],
+            "variance": rate["m2"] / (rate["count"] - 1) if rate["count"] > 1 else 0.0,
+            "chars": rate["chars"],
+            "seconds": rate["seconds"]
+        }
+
+    def get_table(self) -> List[Dict[str, Any]]:
+        """
+        Get the statistics of every voice in the table.
+
+        Returns:
+            List of get_stats dictionaries, sorted by provider, voice and language
+        """
+        with self.lock:
+            return [self._stats(self.rates[key]) for key in sorted(self.rates)]
+
+    def get_rate(self, provider: str, voice: Optional[str], language: Optional[str],
+                 min_samples: int = 1) -> Optional[float]:
+        """
+        Get the natural speaking rate of a voice.
+
+        Args:
+            provider: TTS provider
+            voice: Voice or speaker ID
+            language: Target language
+            min_samples: Segments needed before the rate is trusted
+
+        Returns:
+            float: Mean characters per second at pace 1.0, or None without enough data
+        """
+        stats = self.get_stats(provider, voice, language)
+        if not stats or stats["count"] < max(1, min_samples) or stats["chars_per_second"] <= 0:
+            return None
+        return stats["chars_per_second"]
+
+    def predict_duration(self, provider: str, voice: Optional[str], language: Optional[str], text: str,
+                         pace: float = 1.0, min_samples: int = 1) -> Optional[Dict[str, Any]]:
+        """
+        Predict how long synthesizing text will take.
+
+        Args:
+            provider: TTS provider
+            voice: Voice or speaker ID
+            language: Target language
+            text: Text to synthesize
+            pace: Pace it will be synthesized at
+            min_samples: Segments needed before the voice's rate is trusted
+
+        Returns:
+            Dict: predicted "duration" and its "std" in seconds, with the "chars",
+            "chars_per_second" and "samples" it was based on, or None without enough data
+        """
+        stats = self.get_stats(provider, voice, language)
+        chars = count_spoken_chars(text)
+        if (not stats or stats["count"] < max(1, min_samples) or stats["chars_per_second"] <= 0
+                or not pace or pace <= 0):
+            return None
+
+        chars_per_second = stats["chars_per_second"]
+        duration = chars / (chars_per_second * pace)
+        # First-order spread of chars / rate around the mean rate
+        std = duration * math.sqrt(stats["variance"]) / chars_per_second
+        return {
+            "duration": duration,
+            "std": std,
+            "chars": chars,
+            "chars_per_second": chars_per_second,
+            "samples": stats["count"]
+        }
+
+    def ingest_synthesis_details(self, details_file: str, records: Optional[List[Dict[str, Any]]] = None) -> int:
+        """
+        Add the records of one synthesis details file that weren't already counted.
+
+        If the file still starts with the records counted last time (a log that
+        was saved again with more segments), only the records after them are
+        added. Otherwise the file holds a new run and all of its records are added.
+
+        Args:
+            details_file: Path of the synthesis details file
+            records: Records it holds (read from the file if not given)
+
+        Returns:
+            int: Number of records added
+        """
+        source = os.path.abspath(details_file)
+        try:
+            stat = os.stat(details_file)
+        except OSError:
+            return 0
+        with self.lock:
+            seen = self.sources.get(source)
+        if seen and seen.get("size") == stat.st_size and seen.get("mtime") == stat.st_mtime:
+            return 0
+
+        if records is None:
+            try:
+                with open(details_file, "r", encoding="utf-8") as f:
+                    records = records_from_synthesis_details(json.load(f))
+            except Exception as e:
+                logger.debug(f"Could not read synthesis records from {details_file}: {str(e)}")
+                records = []
+
+        offset = 0
+        if seen and 0 < seen.get("records", 0) <= len(records):
+            if hash_records(records[:seen["records"]]) == seen.get("records_hash"):
+                offset = seen["records"]
+
+        observed = 0
+        for record in records[offset:]:
+            try:
+                self.observe(record["provider"], record.get("voice"), record.get("language"),
+                             int(record["chars"]), float(record["duration"]), float(record.get("pace") or 1.0))
+                observed += 1
+            except (KeyError, TypeError, ValueError):
+                continue
+        with self.lock:
+            self.sources[source] = {"size": stat.st_size, "mtime": stat.st_mtime,
+                                    "records": len(records), "records_hash": hash_records(records)}
+        return observed
+
+    def aggregate_logs(self, log_dir: str) -> int:
+        """
+        Add the synthesis details of every session not yet counted.
+
+        Args:
+            log_dir: Directory holding one subdirectory per session
+
+        Returns:
+            int: Number of records added
+        """
+        pattern = os.path.join(log_dir, "*", "synthesis", "synthesis_details_*.json")
+        observed = sum(self.ingest_synthesis_details(details_file) for details_file in sorted(glob.glob(pattern)))
+        logger.info(f"Aggregated {observed} new synthesis records from {log_dir}")
+        return observed
+
+def get_speaking_rate_table(override_config: Optional[Dict[str, Any]] = None) -> SpeakingRateTable:
+    """
+    Get the process-wide speaking rate table.
+
+    On first use the persisted table is loaded and any sessions in the log
+    directory that it doesn't cover yet are aggregated into it.
+
+    Args:
+        override_config: Speaking rate configuration overrides (optional)
+
+    Returns:
+        SpeakingRateTable for the configured table file
+    """
+    config = get_speaking_rate_config(override_config)
+    key = os.path.abspath(config["table_file"])
+    with _speaking_rate_tables_lock:
+        table = _speaking_rate_tables.get(key)
+        if table is None:
+            table = SpeakingRateTable(config["table_file"])
+            if config["log_dir"] and os.path.isdir(config["log_dir"]) and table.aggregate_logs(config["log_dir"]):
+                try:
+                    table.save()
+                except OSError as e:
+                    logger.warning(f"Could not save speaking rate table: {str(e)}")
+            _speaking_rate_tables[key] = table
+        return table
+
+def update_speaking_rates(details_file: str, records: Optional[List[Dict[str, Any]]] = None) -> int:
+    """
+    Add a finished job's synthesis records to the speaking rate table and persist it.
+
+    Args:
+        details_file: Synthesis details file the job saved
+        records: Records it holds (read from the file if not given)
+
+    Returns:
+        int: Number of records added (0 if the table couldn't be updated)
+    """
+    try:
+        table = get_speaking_rate_table()
+        observed = table.ingest_synthesis_details(details_file, records)
+        if observed:
+            table.save()
+        return observed
+    except Exception as e:
+        logger.warning(f"Could not update speaking rate table: {str(e)}")
+        return 0
+
+def predict_segment_duration(provider: str, voice: Optional[str], language: Optional[str], text: str,
+                             pace: float = 1.0, min_samples: int = 1) -> Optional[Dict[str, Any]]:
+    """
+    Predict how long synthesizing a segment's text will take.
+
+    Args:
+        provider: TTS provider
+        voice: Voice or speaker ID
+        language: Target language
+        text: Text to synthesize
+        pace: Pace it will be synthesized at
+        min_samples: Segments needed before the voice's rate is trusted
+
+    Returns:
+        Dict: see SpeakingRateTable.predict_duration, or None without enough data
+    """
+    return get_speaking_rate_table().predict_duration(provider, voice, language, text, pace=pace, min_samples=min_samples)
+
+def choose_pace(chars_per_second: Optional[float], chars: int, target_duration: float,
+                min_pace: float = 0.8, max_pace: float = 1.5, step: float = 0.05) -> float:
+    """
+    Choose the pace that makes a segment's audio last its target duration.
+
+    Args:
+        chars_per_second: Natural speaking rate of the voice (None if unknown)
+        chars: Spoken characters of the segment's text
+        target_duration: Duration the audio should have in seconds
+        min_pace: Slowest pace to request
+        max_pace: Fastest pace to request
+        step: Pace increment the result is rounded to (0 keeps two decimals)
+
+    Returns:
+        float: Pace rounded to the step (1.0 when the rate or target is unknown)
+    """
+    if not chars_per_second or not chars or not target_duration or target_duration <= 0:
+        return 1.0
+    predicted_duration = chars / chars_per_second
+    pace = predicted_duration / target_duration
+    # Coarse steps keep the pace of a segment, and so its cache key, stable
+    # while the learned rate drifts with every new sample
+    if step and step > 0:
+        pace = round(pace / step) * step
+    return round(max(min_pace, min(max_pace, pace)), 2)
@@ -22,7 +22,12 @@ DEFAULT_VAD_CONFIG = {
     "combine_duration": 8.0,  # Maximum duration for combined segments in seconds
     "combine_gap": 1.0,       # Maximum gap between segments to combine in seconds
     "sample_rate": 16000,     # Sample rate for audio processing
-    "min_segment_duration": 1.0  # Minimum duration for VAD segments in seconds
+    "min_segment_duration": 1.0,  # Minimum duration for VAD segments in seconds
+    "backend": os.getenv("VAD_BACKEND", "torch"),  # VAD inference backend ("torch" or "onnx")
+    "model_path": os.getenv("SILERO_VAD_MODEL_PATH"),  # Local Silero VAD TorchScript file (None to use torch.hub)
+    "onnx_model_path": os.getenv("SILERO_VAD_ONNX_MODEL_PATH"),  # Local Silero VAD ONNX file (None to use torch.hub)
+    "save_segments": os.getenv("VAD_SAVE_SEGMENTS", "false").lower() in ("true", "yes", "1"),  # Debug: write segment WAVs to disk
+    "streaming": os.getenv("VAD_STREAMING", "false").lower() in ("true", "yes", "1")  # Decode and segment long uploads block by block
 }
 
 # Default Diarization Configuration
@@ -30,7 +35,119 @@ DEFAULT_DIARIZATION_CONFIG = {
     "enabled": True,
     "model": "saarika:v2",    # Sarvam model to use for transcription
     "min_speakers": None,     # Minimum number of speakers (None for auto-detection)
-    "max_speakers": None      # Maximum number of speakers (None for auto-detection)
+    "max_speakers": None,     # Maximum number of speakers (None for auto-detection)
+    "max_concurrent_segments": int(os.getenv("SARVAM_MAX_CONCURRENT_JOBS", "8")),  # VAD segments transcribed at once
+    "batch_job": os.getenv("SARVAM_BATCH_JOB", "false").lower() in ("true", "yes", "1"),  # One multi-file job per session
+    "batch_max_files": int(os.getenv("SARVAM_BATCH_MAX_FILES", "20"))  # Maximum segments per multi-file job
+}
+
+# Default per-provider API rate limits, shared by all requests in a process
+DEFAULT_RATE_LIMIT_CONFIG = {
+    "sarvam": {
+        "requests_per_second": float(os.getenv("SARVAM_REQUESTS_PER_SECOND", "5")),
+        "burst": int(os.getenv("SARVAM_REQUEST_BURST", "5"))
+    },
+    "cartesia": {
+        "requests_per_second": float(os.getenv("CARTESIA_REQUESTS_PER_SECOND", "5")),
+        "burst": int(os.getenv("CARTESIA_REQUEST_BURST", "5"))
+    },
+    "openai": {
+        "requests_per_second": float(os.getenv("OPENAI_TTS_REQUESTS_PER_SECOND", "5")),
+        "burst": int(os.getenv("OPENAI_TTS_REQUEST_BURST", "5"))
+    }
+}
+
+# Default per-provider retry policy for rate-limited (429) and server (5xx) errors
+DEFAULT_RETRY_CONFIG = {
+    "sarvam": {"max_retries": int(os.getenv("SARVAM_MAX_RETRIES", "3")), "backoff": 1.0},
+    "cartesia": {"max_retries": int(os.getenv("CARTESIA_MAX_RETRIES", "3")), "backoff": 1.0},
+    "openai": {"max_retries": int(os.getenv("OPENAI_TTS_MAX_RETRIES", "2")), "backoff": 2.0}
+}
+
+# Default concurrent speech synthesis
+DEFAULT_TTS_CONCURRENCY_CONFIG = {
+    "max_workers": int(os.getenv("TTS_MAX_WORKERS", "8"))  # Segments synthesized at once per request
+}
+
+# Default parallelism of time alignment (CPU-bound stretching, one segment per job)
+DEFAULT_ALIGNMENT_CONCURRENCY_CONFIG = {
+    "max_workers": int(os.getenv("ALIGNMENT_MAX_WORKERS", "0"))  # Worker processes; 0 splits the available cores between JOB_QUEUE_WORKERS jobs, 1 aligns in this process
+}
+
+# Default keep-alive HTTP connection pools, shared by all requests in a process
+DEFAULT_CONNECTION_POOL_CONFIG = {
+    "pool_connections": 10,   # Number of hosts to keep connection pools for
+    "pool_maxsize": int(os.getenv("HTTP_POOL_MAXSIZE", "32"))  # Kept-alive connections per host
+}
+
+# Default Sarvam job status polling: a fast first check, then exponential backoff with jitter
+DEFAULT_JOB_POLLING_CONFIG = {
+    "initial_delay": float(os.getenv("SARVAM_POLL_INITIAL_DELAY", "1.0")),  # Seconds before the first status check
+    "max_delay": float(os.getenv("SARVAM_POLL_MAX_DELAY", "15.0")),  # Upper bound for the delay between checks
+    "backoff": 1.5,           # Delay multiplier after each check
+    "jitter": 0.2,            # Random +/- fraction applied to each delay
+    "min_deadline": float(os.getenv("SARVAM_POLL_MIN_DEADLINE", "150")),  # Overall wait for short or unknown-length audio
+    "deadline_per_audio_second": float(os.getenv("SARVAM_POLL_DEADLINE_PER_AUDIO_SECOND", "3.0")),  # Extra wait per second of audio
+    "max_deadline": float(os.getenv("SARVAM_POLL_MAX_DEADLINE", "3600"))  # Hard cap on the overall wait
+}
+
+# Default transcription result cache on local disk
+DEFAULT_TRANSCRIPTION_CACHE_CONFIG = {
+    "enabled": os.getenv("TRANSCRIPTION_CACHE_ENABLED", "true").lower() in ("true", "yes", "1"),
+    "cache_dir": os.getenv("TRANSCRIPTION_CACHE_DIR", os.path.join("cache", "transcriptions")),
+    "max_bytes": int(os.getenv("TRANSCRIPTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))  # Least recently used entries are evicted beyond this
+}
+
+# Default synthesized speech cache on local disk
+DEFAULT_TTS_CACHE_CONFIG = {
+    "enabled": os.getenv("TTS_CACHE_ENABLED", "true").lower() in ("true", "yes", "1"),
+    "cache_dir": os.getenv("TTS_CACHE_DIR", os.path.join("cache", "tts")),
+    "max_bytes": int(os.getenv("TTS_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))  # Least recently used entries are evicted beyond this
+}
+
+# Default time stretching of synthesized segments to their original durations
+DEFAULT_TIME_STRETCH_CONFIG = {
+    "engine": os.getenv("TIME_STRETCH_ENGINE", "wsola"),  # "wsola" (in process) or "ffmpeg" (atempo subprocess per segment)
+    "render_mode": os.getenv("TIME_ALIGNED_RENDER_MODE", "segments")  # "segments" (stretch each, then stitch) or "filter_graph" (one ffmpeg run per dub)
+}
+
+# Default pace-targeted synthesis (ask the provider for the pace that hits the segment duration)
+DEFAULT_PACE_TARGETING_CONFIG = {
+    "enabled": os.getenv("PACE_TARGETING_ENABLED", "false").lower() in ("true", "yes", "1"),
+    "min_pace": float(os.getenv("PACE_TARGETING_MIN_PACE", "0.8")),  # Slowest pace to request
+    "max_pace": float(os.getenv("PACE_TARGETING_MAX_PACE", "1.5")),  # Fastest pace to request
+    "min_samples": int(os.getenv("PACE_TARGETING_MIN_SAMPLES", "5")),  # Past syntheses of a voice needed before its rate is trusted
+    "pace_step": float(os.getenv("PACE_TARGETING_PACE_STEP", "0.05"))  # Pace increment requested paces are rounded to, so cache keys survive small rate changes
+}
+
+# Default speaking rate table (characters per second of each provider voice and language)
+DEFAULT_SPEAKING_RATE_CONFIG = {
+    "table_file": os.getenv("SPEAKING_RATE_TABLE_FILE", os.path.join("outputs", "speaking_rates.json")),  # Where the table is persisted
+    "log_dir": os.getenv("SPEAKING_RATE_LOG_DIR", "outputs")  # Sessions whose synthesis logs are aggregated into the table
+}
+
+# Default background job queue for long pipeline stages
+DEFAULT_JOB_QUEUE_CONFIG = {
+    "backend": os.getenv("JOB_QUEUE_BACKEND", "memory"),  # "memory" (this process) or "sqlite" (shared by processes on the host)
+    "db_path": os.getenv("JOB_QUEUE_DB_PATH", os.path.join("outputs", "jobs.db")),  # SQLite database for the "sqlite" backend
+    "max_workers": int(os.getenv("JOB_QUEUE_WORKERS", "2"))  # Jobs run at once per process
+}
+
+# Default pub/sub for processing status events
+DEFAULT_STATUS_PUBSUB_CONFIG = {
+    "backend": os.getenv("STATUS_PUBSUB_BACKEND", "memory"),  # "memory" (this process) or "sqlite" (shared by processes on the host)
+    "db_path": os.getenv("STATUS_PUBSUB_DB_PATH", os.path.join("outputs", "status_events.db")),  # SQLite database for the "sqlite" backend
+    "poll_interval": 0.25,    # Seconds between checks for new events (sqlite backend)
+    "retention": 3600,        # Seconds events are kept (sqlite backend)
+    "stream_timeout": float(os.getenv("STATUS_STREAM_TIMEOUT", "45"))  # Longest a progress stream holds a server thread; clients reconnect with Last-Event-ID
+}
+
+# Default session metadata store
+DEFAULT_METADATA_STORE_CONFIG = {
+    "backend": os.getenv("METADATA_BACKEND", "json"),  # "json" (metadata.json per session) or "sqlite" (also indexed for queries across sessions)
+    "db_path": os.getenv("METADATA_DB_PATH", os.path.join("outputs", "metadata.db")),  # SQLite index for the "sqlite" backend
+    "coalesce_delay": float(os.getenv("METADATA_COALESCE_DELAY", "0")),  # Seconds to batch metadata writes (0 writes each update)
+    "max_sessions": 256       # Sessions kept in the in-process cache
 }
 
 # Default Transcription Configuration
@@ -86,6 +203,220 @@ def get_transcription_config(override_config: Optional[Dict[str, Any]] = None) -
         config.update(override_config)
     return config
 
+def get_transcription_cache_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the transcription cache configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete transcription cache configuration
+    """
+    config = DEFAULT_TRANSCRIPTION_CACHE_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_tts_cache_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the TTS audio cache configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete TTS cache configuration
+    """
+    config = DEFAULT_TTS_CACHE_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_time_stretch_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the time stretch configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete time stretch configuration
+    """
+    config = DEFAULT_TIME_STRETCH_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_pace_targeting_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the pace-targeted synthesis configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete pace targeting configuration
+    """
+    config = DEFAULT_PACE_TARGETING_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_speaking_rate_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the speaking rate table configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete speaking rate configuration
+    """
+    config = DEFAULT_SPEAKING_RATE_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_job_queue_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the background job queue configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete job queue configuration
+    """
+    config = DEFAULT_JOB_QUEUE_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_status_pubsub_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the processing status pub/sub configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete status pub/sub configuration
+    """
+    config = DEFAULT_STATUS_PUBSUB_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_metadata_store_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the metadata store configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete metadata store configuration
+    """
+    config = DEFAULT_METADATA_STORE_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_rate_limit_config(provider: str, override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the API rate limit configuration for a provider with optional overrides.
+    
+    Args:
+        provider: Provider name (e.g. 'sarvam')
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Rate limit configuration (requests_per_second of None means no limit)
+    """
+    config = {"requests_per_second": None, "burst": 1}
+    config.update(DEFAULT_RATE_LIMIT_CONFIG.get(provider, {}))
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_retry_config(provider: str, override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the API retry configuration for a provider with optional overrides.
+    
+    Args:
+        provider: Provider name (e.g. 'cartesia')
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Retry configuration (max_retries of 0 means no retries)
+    """
+    config = {"max_retries": 0, "backoff": 1.0, "max_delay": 30.0, "retry_statuses": [429, 500, 502, 503, 504]}
+    config.update(DEFAULT_RETRY_CONFIG.get(provider, {}))
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_tts_concurrency_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the concurrent speech synthesis configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete TTS concurrency configuration
+    """
+    config = DEFAULT_TTS_CONCURRENCY_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_alignment_concurrency_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the time alignment parallelism configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete alignment concurrency configuration
+    """
+    config = DEFAULT_ALIGNMENT_CONCURRENCY_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_connection_pool_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the HTTP connection pool configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete connection pool configuration
+    """
+    config = DEFAULT_CONNECTION_POOL_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
+def get_job_polling_config(override_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Get the Sarvam job status polling configuration with optional overrides.
+    
+    Args:
+        override_config: Dictionary of configuration values to override
+        
+    Returns:
+        Complete job polling configuration
+    """
+    config = DEFAULT_JOB_POLLING_CONFIG.copy()
+    if override_config:
+        config.update(override_config)
+    return config
+
 def get_api_url(translate: bool = False) -> str:
     """
     Get the appropriate Sarvam API URL based on whether translation is required.
@@ -9,6 +9,8 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from pathlib import Path
 
+from modules.speaking_rate import update_speaking_rates
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
@@ -208,6 +210,9 @@ class SynthesisLogger:
             logging.info(f"Synthesis details saved to: {self.log_file}")
             logging.info(f"Final silence padding array length: {len(self.data['silence_padding'])}")
             
+            # Add this session's segments to the speaking rate table
+            update_speaking_rates(self.log_file)
+            
         except Exception as e:
             logging.error(f"Error saving synthesis details: {str(e)}")
             logging.error(f"Data state at error: {json.dumps(self.data, indent=2)}")
@@ -7,20 +7,30 @@ to match the exact duration of the original audio segments, maintaining temporal
 
 import os
 import json
+import time
 import logging
 import tempfile
 import subprocess
 import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple, Optional, Union, Any
 import librosa
 import numpy as np
+import soundfile as sf
 from pydub import AudioSegment
 
+from modules.segment_manifest import TTSFileIndex
+from modules.speech_config import get_alignment_concurrency_config, get_job_queue_config, get_time_stretch_config
+from modules.time_stretch import OUTPUT_SAMPLE_RATE, write_stretched_audio
 from utils.file_utils import get_ffmpeg_path
-from utils.metadata_manager import update_metadata_section
+from utils.metadata_manager import update_metadata_section, get_metadata_field
 
 logger = logging.getLogger(__name__)
 
+# Engines adjust_segment_duration can stretch segments with
+TIME_STRETCH_ENGINES = ("wsola", "ffmpeg")
+
 def build_atempo_filters(speed_factor: float) -> str:
     """
     Build ffmpeg atempo filter string for the given speed factor.
@@ -51,46 +61,23 @@ def build_atempo_filters(speed_factor: float) -> str:
     
     return ",".join(filters)
 
-def adjust_segment_duration(
-    input_path: str, 
-    output_path: str, 
-    target_duration: float,
-    original_duration: Optional[float] = None
-) -> Tuple[bool, Dict[str, Any]]:
+def get_speed_factor_quality(original_duration: float, target_duration: float) -> Dict[str, Any]:
     """
-    Adjust the duration of an audio segment to match the target duration.
+    Work out the speed factor for a segment and score its expected quality.
     
     Args:
-        input_path: Path to input audio file
-        output_path: Path to save the adjusted audio file
+        original_duration: Duration of the synthesized audio in seconds
         target_duration: Target duration in seconds
-        original_duration: Original duration in seconds (if None, will be calculated)
         
     Returns:
-        Tuple[bool, Dict]: Success status and metadata about the adjustment
+        Dict: Quality metrics with the (clamped) speed_factor, quality_level and quality_score
     """
-    # Get original duration if not provided
-    if original_duration is None:
-        try:
-            audio = AudioSegment.from_file(input_path)
-            original_duration = len(audio) / 1000  # Convert ms to seconds
-        except Exception as e:
-            logger.error(f"Error getting original duration: {str(e)}")
-            return False, {"error": f"Error getting original duration: {str(e)}"}
-    
-    # Calculate speed factor
-    if original_duration <= 0 or target_duration <= 0:
-        logger.error(f"Invalid durations: original={original_duration}, target={target_duration}")
-        return False, {"error": "Invalid durations"}
-    
     speed_factor = original_duration / target_duration
     
     # Limit minimum speed factor to 0.9 to prevent excessive slowdown
     if speed_factor < 0.9:
         logger.info(f"Limiting speed factor from {speed_factor:.4f} to 0.9 to prevent excessive slowdown")
         speed_factor = 0.9
-        
-    logger.info(f"Adjusting segment duration: original={original_duration:.2f}s, target={target_duration:.2f}s, speed_factor={speed_factor:.4f}")
     
     # Build quality metrics
     quality_metrics = {
@@ -111,6 +98,93 @@ def adjust_segment_duration(
         quality_metrics["quality_score"] = 50
         quality_metrics["warning"] = "Extreme speed adjustment may affect audio quality"
     
+    return quality_metrics
+
+def score_output_duration(quality_metrics: Dict[str, Any], output_duration: float):
+    """
+    Record the duration of the adjusted audio and penalize a large miss.
+    
+    Args:
+        quality_metrics: Quality metrics from get_speed_factor_quality (updated in place)
+        output_duration: Duration of the adjusted audio in seconds
+    """
+    target_duration = quality_metrics["target_duration"]
+    quality_metrics["output_duration"] = output_duration
+    quality_metrics["duration_difference"] = abs(output_duration - target_duration)
+    
+    logger.info(f"Output duration: {output_duration:.2f}s (target: {target_duration:.2f}s, difference: {quality_metrics['duration_difference']:.2f}s)")
+    
+    # Update quality score based on actual result
+    if quality_metrics["duration_difference"] > 0.5:
+        quality_metrics["quality_score"] -= 10
+        quality_metrics["warning"] = f"Duration difference ({quality_metrics['duration_difference']:.2f}s) exceeds 0.5s"
+
+def adjust_segment_duration(
+    input_path: str, 
+    output_path: str, 
+    target_duration: float,
+    original_duration: Optional[float] = None,
+    engine: Optional[str] = None
+) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Adjust the duration of an audio segment to match the target duration.
+    
+    Args:
+        input_path: Path to input audio file
+        output_path: Path to save the adjusted audio file
+        target_duration: Target duration in seconds
+        original_duration: Original duration in seconds (if None, will be calculated)
+        engine: Time stretch engine, "wsola" or "ffmpeg" (default from the time stretch config)
+        
+    Returns:
+        Tuple[bool, Dict]: Success status and metadata about the adjustment
+    """
+    engine = engine or get_time_stretch_config()["engine"]
+    if engine not in TIME_STRETCH_ENGINES:
+        logger.error(f"Unknown time stretch engine: {engine}")
+        return False, {"error": f"Unknown time stretch engine: {engine}"}
+    
+    # Decode once up front for the in-process engine; anything soundfile can't read goes through ffmpeg
+    audio = None
+    if engine == "wsola":
+        try:
+            audio, input_rate = sf.read(input_path, dtype="float32")
+        except Exception as e:
+            logger.warning(f"Could not decode {input_path} in process, falling back to ffmpeg: {str(e)}")
+            engine = "ffmpeg"
+    
+    # Get original duration if not provided
+    if original_duration is None:
+        if audio is not None:
+            original_duration = len(audio) / input_rate
+        else:
+            try:
+                original_audio = AudioSegment.from_file(input_path)
+                original_duration = len(original_audio) / 1000  # Convert ms to seconds
+            except Exception as e:
+                logger.error(f"Error getting original duration: {str(e)}")
+                return False, {"error": f"Error getting original duration: {str(e)}"}
+    
+    # Calculate speed factor
+    if original_duration <= 0 or target_duration <= 0:
+        logger.error(f"Invalid durations: original={original_duration}, target={target_duration}")
+        return False, {"error": "Invalid durations"}
+    
+    quality_metrics = get_speed_factor_quality(original_duration, target_duration)
+    speed_factor = quality_metrics["speed_factor"]
+    quality_metrics["engine"] = engine
+        
+    logger.info(f"Adjusting segment duration: original={original_duration:.2f}s, target={target_duration:.2f}s, speed_factor={speed_factor:.4f}, engine={engine}")
+    
+    if audio is not None:
+        try:
+            output_duration = write_stretched_audio(audio, input_rate, output_path, speed_factor)
+            score_output_duration(quality_metrics, output_duration)
+            return True, quality_metrics
+        except Exception as e:
+            logger.error(f"Error adjusting segment duration: {str(e)}")
+            return False, {"error": f"Error adjusting segment duration: {str(e)}"}
+    
     # Build ffmpeg filter
     atempo_filter = build_atempo_filters(speed_factor)
     logger.info(f"Using ffmpeg filter: {atempo_filter}")
@@ -123,7 +197,7 @@ def adjust_segment_duration(
         "-i", input_path,
         "-filter:a", atempo_filter,
         "-acodec", "pcm_s16le",  # Use standard WAV format
-        "-ar", "44100",  # 44.1kHz sample rate
+        "-ar", str(OUTPUT_SAMPLE_RATE),  # 44.1kHz sample rate
         output_path
     ]
     
@@ -144,17 +218,7 @@ def adjust_segment_duration(
         # Verify the output duration
         try:
             output_audio = AudioSegment.from_file(output_path)
-            output_duration = len(output_audio) / 1000
-            
-            quality_metrics["output_duration"] = output_duration
-            quality_metrics["duration_difference"] = abs(output_duration - target_duration)
-            
-            logger.info(f"Output duration: {output_duration:.2f}s (target: {target_duration:.2f}s, difference: {quality_metrics['duration_difference']:.2f}s)")
-            
-            # Update quality score based on actual result
-            if quality_metrics["duration_difference"] > 0.5:
-                quality_metrics["quality_score"] -= 10
-                quality_metrics["warning"] = f"Duration difference ({quality_metrics['duration_difference']:.2f}s) exceeds 0.5s"
+            score_output_duration(quality_metrics, len(output_audio) / 1000)
         except Exception as e:
             logger.warning(f"Error verifying output duration: {str(e)}")
         
@@ -167,12 +231,320 @@ def adjust_segment_duration(
         logger.error(f"Error adjusting segment duration: {str(e)}")
         return False, {"error": f"Error adjusting segment duration: {str(e)}"}
 
+def measure_time_stretch(
+    input_path: str,
+    target_durations: List[float],
+    engines: Optional[List[str]] = None,
+    repeats: int = 3
+) -> Dict[str, Any]:
+    """
+    Compare time-stretch engines on duration accuracy and wall time.
+
+    Args:
+        input_path: Path to an audio file
+        target_durations: Target durations in seconds to stretch the file to
+        engines: Engines to compare (default: all of TIME_STRETCH_ENGINES)
+        repeats: Timed runs per engine and target (best run is reported)
+
+    Returns:
+        Dict: Engine -> list of {"target_duration", "output_duration", "duration_error", "elapsed"}
+    """
+    results = {}
+    for engine in engines or TIME_STRETCH_ENGINES:
+        results[engine] = []
+        for target_duration in target_durations:
+            best: Optional[Tuple[float, Dict[str, Any]]] = None
+            for _ in range(repeats):
+                fd, output_path = tempfile.mkstemp(suffix=".wav")
+                os.close(fd)
+                try:
+                    started = time.perf_counter()
+                    success, metrics = adjust_segment_duration(input_path, output_path, target_duration, engine=engine)
+                    elapsed = time.perf_counter() - started
+                finally:
+                    os.remove(output_path)
+                if not success:
+                    best = (elapsed, metrics)
+                    break
+                if best is None or elapsed < best[0]:
+                    best = (elapsed, metrics)
+
+            elapsed, metrics = best
+            if "error" in metrics:
+                results[engine].append({"target_duration": target_duration, "error": metrics["error"]})
+                continue
+            # Clamping limits the slowdown, so measure against the duration actually requested
+            expected_duration = metrics["original_duration"] / metrics["speed_factor"]
+            output_duration = metrics.get("output_duration", expected_duration)
+            results[engine].append({
+                "target_duration": target_duration,
+                "speed_factor": metrics["speed_factor"],
+                "output_duration": output_duration,
+                "duration_error": abs(output_duration - expected_duration),
+                "elapsed": elapsed
+            })
+    return results
+
+def find_segment_tts_file(
+    segment_id: str,
+    original_segments: List[Dict],
+    tts_dir: str,
+    file_index: Optional[TTSFileIndex] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Find the synthesized audio of a segment.
+    
+    Args:
+        segment_id: Segment ID
+        original_segments: Original segments within a merged segment
+        tts_dir: Directory containing TTS segments
+        file_index: Index of tts_dir to look the segment up in (optional, built if not given)
+        
+    Returns:
+        Dict: "file" path plus "duration" and "format" when known, and "lookup_ms",
+        the time the lookup took; None if there is no synthesized audio
+    """
+    started = time.perf_counter()
+    if file_index is None:
+        file_index = TTSFileIndex(tts_dir)
+    entry = file_index.find(segment_id, original_segments)
+    if entry:
+        entry["lookup_ms"] = (time.perf_counter() - started) * 1000
+        logger.info(f"Found TTS file for segment {segment_id}: {os.path.basename(entry['file'])}")
+    return entry
+
+def plan_segment(
+    segment_id: str,
+    original_duration: float,
+    original_segments: List[Dict],
+    tts_dir: str,
+    file_index: Optional[TTSFileIndex] = None
+) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Work out the speed factor of a segment without stretching it.
+    
+    Used when the whole dub is rendered by a single ffmpeg filter graph, which
+    stretches the synthesized audio itself.
+    
+    Args:
+        segment_id: Segment ID
+        original_duration: Duration of the original segment in seconds
+        original_segments: Original segments within a merged segment
+        tts_dir: Directory containing TTS segments
+        file_index: Index of tts_dir to look the segment up in (optional)
+        
+    Returns:
+        Tuple[bool, Dict]: Success status and segment alignment metadata
+        (status "skipped" if no synthesized audio was found)
+    """
+    tts_entry = find_segment_tts_file(segment_id, original_segments, tts_dir, file_index)
+    if not tts_entry:
+        logger.warning(f"TTS file not found for segment {segment_id}")
+        return False, {
+            "segment_id": segment_id,
+            "original_duration": original_duration,
+            "status": "skipped",
+            "reason": "TTS file not found"
+        }
+    
+    tts_file = tts_entry["file"]
+    synthesized_duration = tts_entry.get("duration")
+    if synthesized_duration is None:
+        try:
+            try:
+                synthesized_duration = sf.info(tts_file).duration
+            except Exception:
+                synthesized_duration = len(AudioSegment.from_file(tts_file)) / 1000  # Convert ms to seconds
+        except Exception as e:
+            logger.error(f"Error getting duration of {tts_file}: {str(e)}")
+            synthesized_duration = 0
+    
+    if synthesized_duration <= 0 or original_duration <= 0:
+        logger.error(f"Invalid durations: original={synthesized_duration}, target={original_duration}")
+        segment_metadata = {"error": "Invalid durations"}
+        success = False
+    else:
+        segment_metadata = get_speed_factor_quality(synthesized_duration, original_duration)
+        segment_metadata["engine"] = "filter_graph"
+        success = True
+    
+    segment_metadata["segment_id"] = segment_id
+    segment_metadata["status"] = "success" if success else "failed"
+    segment_metadata["input_file"] = tts_file
+    segment_metadata["output_file"] = None
+    segment_metadata["lookup_ms"] = tts_entry["lookup_ms"]
+    segment_metadata["lookup_source"] = tts_entry["source"]
+    
+    return success, segment_metadata
+
+def align_segment(
+    segment_id: str,
+    original_duration: float,
+    original_segments: List[Dict],
+    tts_dir: str,
+    file_index: Optional[TTSFileIndex] = None
+) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Find the synthesized audio of a segment and adjust it to the original duration.
+    
+    Args:
+        segment_id: Segment ID
+        original_duration: Duration of the original segment in seconds
+        original_segments: Original segments within a merged segment
+        tts_dir: Directory containing TTS segments
+        file_index: Index of tts_dir to look the segment up in (optional)
+        
+    Returns:
+        Tuple[bool, Dict]: Success status and segment alignment metadata
+        (status "skipped" if no synthesized audio was found)
+    """
+    # Find corresponding TTS file
+    tts_entry = find_segment_tts_file(segment_id, original_segments, tts_dir, file_index)
+    
+    if not tts_entry:
+        logger.warning(f"TTS file not found for segment {segment_id}")
+        return False, {
+            "segment_id": segment_id,
+            "original_duration": original_duration,
+            "status": "skipped",
+            "reason": "TTS file not found"
+        }
+    
+    tts_file = tts_entry["file"]
+    
+    # Process this segment
+    logger.info(f"Processing segment {segment_id} with original duration {original_duration}s")
+    
+    # Create output path (ensure it's different from the input file)
+    tts_file_name = os.path.basename(tts_file)
+    output_file = os.path.join(tts_dir, f"segment_{segment_id}_time_aligned.wav")
+    
+    # Create a temporary file for processing to avoid in-place editing
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+        temp_output = temp_file.name
+    
+    # Adjust duration using the temporary file
+    success, segment_metadata = adjust_segment_duration(
+        tts_file,
+        temp_output,
+        original_duration,
+        tts_entry.get("duration")  # Known from the manifest, saving a decode
+    )
+    
+    # If successful, copy the temp file to the final output location
+    if success:
+        try:
+            import shutil
+            shutil.copy2(temp_output, output_file)
+            os.remove(temp_output)  # Clean up temp file
+        except Exception as e:
+            logger.error(f"Error copying temp file to output: {str(e)}")
+            success = False
+    else:
+        # Clean up temp file in case of failure
+        try:
+            os.remove(temp_output)
+        except:
+            pass
+    
+    # Update metadata
+    segment_metadata["segment_id"] = segment_id
+    segment_metadata["status"] = "success" if success else "failed"
+    segment_metadata["input_file"] = tts_file
+    segment_metadata["output_file"] = output_file if success else None
+    segment_metadata["lookup_ms"] = tts_entry["lookup_ms"]
+    segment_metadata["lookup_source"] = tts_entry["source"]
+    
+    return success, segment_metadata
+
+# Index of the TTS directory in alignment worker processes
+_worker_file_index = None
+
+def _init_alignment_worker(file_index: TTSFileIndex):
+    """Keep the TTS file index in a worker process so it's sent once, not per segment."""
+    global _worker_file_index
+    _worker_file_index = file_index
+
+def _align_segment_job(job: Tuple[str, float, List[Dict], str]) -> Tuple[bool, Dict[str, Any]]:
+    """Align one segment in a worker process."""
+    return align_segment(*job, _worker_file_index)
+
+def get_alignment_workers(max_workers: Optional[int] = None) -> int:
+    """
+    Get the number of worker processes to align segments with.
+    
+    Args:
+        max_workers: Worker count (optional, from the alignment concurrency config by default);
+            0 or less means an equal share of the cores available to this process for
+            each job the job queue runs at once
+        
+    Returns:
+        int: Number of worker processes
+    """
+    if max_workers is None:
+        max_workers = get_alignment_concurrency_config()["max_workers"]
+    if max_workers <= 0:
+        try:
+            cores = len(os.sched_getaffinity(0))
+        except AttributeError:
+            cores = os.cpu_count() or 1
+        # Jobs aligning at the same time would otherwise each start a process per core
+        max_workers = max(1, cores // max(1, get_job_queue_config()["max_workers"]))
+    return max_workers
+
+def get_alignment_mp_context():
+    """
+    Get the multiprocessing context alignment workers are started with.
+    
+    Workers aren't forked: the web process runs request and job queue threads
+    (and may have torch loaded), so a forked child could inherit a lock held
+    by another thread and deadlock.
+    
+    Returns:
+        multiprocessing context using forkserver where available, spawn otherwise
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+def run_alignment_jobs(
+    jobs: List[Tuple[str, float, List[Dict], str]],
+    file_index: TTSFileIndex,
+    workers: int
+) -> List[Tuple[bool, Dict[str, Any]]]:
+    """
+    Align segments, in parallel worker processes when there is more than one worker.
+    
+    Args:
+        jobs: (segment_id, original_duration, original_segments, tts_dir) per segment
+        file_index: Index of the TTS directory
+        workers: Number of worker processes
+        
+    Returns:
+        List[Tuple[bool, Dict]]: align_segment results, in the order of jobs
+    """
+    if workers > 1 and len(jobs) > 1:
+        # List the directory once here rather than once per worker
+        file_index.index_directory()
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_alignment_mp_context(),
+                                     initializer=_init_alignment_worker, initargs=(file_index,)) as executor:
+                results = list(executor.map(_align_segment_job, jobs))
+            logger.info(f"Aligned {len(jobs)} segments with {workers} worker processes")
+            return results
+        except Exception as e:
+            logger.warning(f"Parallel alignment failed, aligning in this process: {str(e)}")
+    
+    return [align_segment(*job, file_index) for job in jobs]
+
 def process_segments_with_time_alignment(
     session_id: str,
     output_dir: str,
     vad_segments_file: Optional[str] = None,
     tts_dir: Optional[str] = None,
-    metadata_output_path: Optional[str] = None
+    metadata_output_path: Optional[str] = None,
+    segment_ids: Optional[List[str]] = None,
+    plan_only: bool = False,
+    max_workers: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     Process all TTS segments to match the original segment durations.
@@ -183,6 +555,12 @@ def process_segments_with_time_alignment(
         vad_segments_file: Path to VAD segments JSON file (optional)
         tts_dir: Directory containing TTS segments (optional)
         metadata_output_path: Path to save alignment metadata (optional)
+        segment_ids: IDs of the segments to align (optional, all by default); other
+            segments reuse their result from the previous run's metadata file
+        plan_only: Only work out speed factors, leaving the stretching to
+            render_time_aligned_filter_graph (no _time_aligned.wav files are written)
+        max_workers: Worker processes to align segments with (optional, from the
+            alignment concurrency config by default; 1 aligns in this process)
         
     Returns:
         Dict: Metadata about the time alignment process
@@ -248,9 +626,29 @@ def process_segments_with_time_alignment(
         "segments": []
     }
     
-    # Process each segment
-    speed_factors = []
+    # Load the previous run's results when only some segments are re-aligned
+    realign = {str(segment_id) for segment_id in segment_ids} if segment_ids is not None else None
+    previous_segments = {}
+    if realign is not None and os.path.exists(metadata_output_path):
+        try:
+            with open(metadata_output_path, 'r') as f:
+                previous_metadata = json.load(f)
+            previous_segments = {
+                str(entry.get("segment_id")): entry
+                for entry in previous_metadata.get("segments", []) if isinstance(entry, dict)
+            }
+        except Exception as e:
+            logger.warning(f"Could not load previous time alignment metadata: {str(e)}")
+    
+    # Index the synthesized audio once instead of scanning tts_dir per segment
+    index_started = time.perf_counter()
+    file_index = TTSFileIndex(tts_dir)
+    index_ms = (time.perf_counter() - index_started) * 1000
+    lookup_times = []
     
+    # Work out which segments need aligning, keeping timeline order
+    jobs = []
+    ordered_results = []
     for segment in vad_segments:
         # Handle both dictionary segments and string segment IDs
         if isinstance(segment, dict):
@@ -276,86 +674,36 @@ def process_segments_with_time_alignment(
             original_segments = []
             logger.warning(f"Received string segment ID instead of dictionary: {segment_id}")
         
-        # Find corresponding TTS file
-        tts_file = None
-        
-        # Check for both original segment ID and merged segment ID formats
-        possible_prefixes = [
-            f"segment_{segment_id}",  # Original format (segment_seg_000)
-            f"segment_merged_{segment_id}"  # Merged format (segment_merged_000)
-        ]
-        
-        # If this is a merged segment file, also look for the original segments
-        for orig_seg in original_segments:
-            if isinstance(orig_seg, dict):
-                orig_id = orig_seg.get('segment_id')
-                if orig_id:
-                    possible_prefixes.append(f"segment_{orig_id}")
-        
-        # Check for files with any of the possible prefixes
-        for filename in os.listdir(tts_dir):
-            for prefix in possible_prefixes:
-                if filename.startswith(prefix) and (filename.endswith(".wav") or filename.endswith(".mp3")):
-                    tts_file = os.path.join(tts_dir, filename)
-                    logger.info(f"Found TTS file for segment {segment_id}: {filename}")
-                    break
-            if tts_file:
-                break
+        # Reuse the previous result of segments that don't need re-aligning
+        previous = previous_segments.get(str(segment_id))
+        if (realign is not None and str(segment_id) not in realign and previous
+                and previous.get("status") == "success" and os.path.exists(previous.get("output_file") or "")):
+            logger.info(f"Reusing time-aligned audio for unchanged segment {segment_id}")
+            ordered_results.append((True, dict(previous, reused=True)))
+        else:
+            ordered_results.append(len(jobs))
+            jobs.append((segment_id, original_duration, original_segments, tts_dir))
+    
+    # Align (or plan) the segments, spreading the stretching over worker processes
+    workers = min(get_alignment_workers(max_workers), len(jobs))
+    if plan_only:
+        job_results = [plan_segment(*job, file_index) for job in jobs]
+    else:
+        job_results = run_alignment_jobs(jobs, file_index, workers)
+    alignment_metadata["alignment_workers"] = 1 if plan_only else max(workers, 1)
+    
+    # Aggregate in timeline order so the statistics don't depend on which worker finished first
+    speed_factors = []
+    for result in ordered_results:
+        success, segment_metadata = job_results[result] if isinstance(result, int) else result
+        if "lookup_ms" in segment_metadata and not segment_metadata.get("reused"):
+            lookup_times.append(segment_metadata["lookup_ms"])
         
-        if not tts_file:
-            logger.warning(f"TTS file not found for segment {segment_id}")
-            
-            # Add to metadata
-            alignment_metadata["segments"].append({
-                "segment_id": segment_id,
-                "original_duration": original_duration,
-                "status": "skipped",
-                "reason": "TTS file not found"
-            })
-            
+        if segment_metadata.get("status") == "skipped":
+            alignment_metadata["segments"].append(segment_metadata)
             alignment_metadata["global_stats"]["failed_segments"] += 1
             continue
         
-        # Process this segment
-        logger.info(f"Processing segment {segment_id} with original duration {original_duration}s")
-        
-        # Create output path (ensure it's different from the input file)
-        tts_file_name = os.path.basename(tts_file)
-        output_file = os.path.join(tts_dir, f"segment_{segment_id}_time_aligned.wav")
-        
-        # Create a temporary file for processing to avoid in-place editing
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-            temp_output = temp_file.name
-        
-        # Adjust duration using the temporary file
-        success, segment_metadata = adjust_segment_duration(
-            tts_file,
-            temp_output,
-            original_duration
-        )
-        
-        # If successful, copy the temp file to the final output location
-        if success:
-            try:
-                import shutil
-                shutil.copy2(temp_output, output_file)
-                os.remove(temp_output)  # Clean up temp file
-            except Exception as e:
-                logger.error(f"Error copying temp file to output: {str(e)}")
-                success = False
-        else:
-            # Clean up temp file in case of failure
-            try:
-                os.remove(temp_output)
-            except:
-                pass
-        
-        # Update metadata
-        segment_metadata["segment_id"] = segment_id
-        segment_metadata["status"] = "success" if success else "failed"
-        segment_metadata["input_file"] = tts_file
-        segment_metadata["output_file"] = output_file if success else None
-        
         alignment_metadata["segments"].append(segment_metadata)
         alignment_metadata["global_stats"]["processed_segments"] += 1
         
@@ -395,6 +743,19 @@ def process_segments_with_time_alignment(
     if alignment_metadata["global_stats"]["min_speed_factor"] == float('inf'):
         alignment_metadata["global_stats"]["min_speed_factor"] = 0
     
+    # Record how the synthesized audio was found and what the lookups cost
+    alignment_metadata["file_lookup"] = {
+        "source": file_index.source,
+        "index_ms": index_ms,
+        "lookups": len(lookup_times),
+        "total_lookup_ms": sum(lookup_times),
+        "avg_lookup_ms": sum(lookup_times) / len(lookup_times) if lookup_times else 0,
+        "manifest_hits": sum(1 for entry in alignment_metadata["segments"] if entry.get("lookup_source") == "manifest" and not entry.get("reused")),
+        "directory_hits": sum(1 for entry in alignment_metadata["segments"] if entry.get("lookup_source") == "directory" and not entry.get("reused")),
+        "misses": sum(1 for entry in alignment_metadata["segments"] if entry.get("status") == "skipped")
+    }
+    logger.info(f"Looked up {len(lookup_times)} TTS files via {file_index.source} in {sum(lookup_times):.1f}ms")
+    
     # Save metadata using the metadata manager
     try:
         # Extract session_id from the output path
@@ -425,66 +786,184 @@ def process_segments_with_time_alignment(
     
     return alignment_metadata
 
-def stitch_time_aligned_segments(
-    session_id: str,
-    output_dir: str,
-    alignment_metadata: Optional[Dict] = None,
-    metadata_file: Optional[str] = None,
-    output_file: Optional[str] = None,
-    original_audio_path: Optional[str] = None
-) -> str:
+def load_canvas_samples(path: str, channels: int = 1, sample_rate: int = OUTPUT_SAMPLE_RATE) -> np.ndarray:
     """
-    Stitch time-aligned segments together with precise silence padding to match original audio timing.
+    Load audio as float32 samples at the canvas sample rate.
     
     Args:
-        session_id: Session ID
-        output_dir: Base output directory
-        alignment_metadata: Time alignment metadata (optional)
-        metadata_file: Path to time alignment metadata file (optional)
-        output_file: Path to save the stitched audio (optional)
-        original_audio_path: Path to the original audio file (optional)
+        path: Path to the audio file
+        channels: Channel count of the returned samples (mono is duplicated, more channels are downmixed)
+        sample_rate: Sample rate of the canvas
         
     Returns:
-        str: Path to the stitched audio file
+        np.ndarray: Samples with shape (frames, channels)
     """
-    # Set up paths
-    tts_dir = os.path.join(output_dir, session_id, "tts")
-    synthesis_dir = os.path.join(output_dir, session_id, "synthesis")
+    try:
+        audio, input_rate = sf.read(path, dtype="float32", always_2d=True)
+    except Exception:
+        # Let ffmpeg decode anything libsndfile can't (e.g. MP3 bytes behind a .wav name)
+        segment = AudioSegment.from_file(path)
+        audio = np.array(segment.get_array_of_samples(), dtype=np.float32).reshape(-1, segment.channels)
+        audio /= float(1 << (8 * segment.sample_width - 1))
+        input_rate = segment.frame_rate
     
-    if not metadata_file:
-        metadata_file = os.path.join(synthesis_dir, "time_alignment_metadata.json")
+    if input_rate != sample_rate:
+        audio = librosa.resample(audio.T, orig_sr=input_rate, target_sr=sample_rate).T
+    if audio.shape[1] != channels:
+        audio = np.repeat(audio, channels, axis=1) if audio.shape[1] == 1 else np.repeat(audio.mean(axis=1, keepdims=True), channels, axis=1)
+    return np.ascontiguousarray(audio, dtype=np.float32)
+
+def ms_to_samples(ms: float, sample_rate: int = OUTPUT_SAMPLE_RATE) -> int:
+    """Convert a time in milliseconds to a sample offset."""
+    return int(round(ms * sample_rate / 1000))
+
+def render_speech_canvas(placements: Dict[str, Dict[str, Any]], duration_ms: int, channels: int = 1) -> np.ndarray:
+    """
+    Add segments onto a silent sample buffer at their positions.
     
-    if not output_file:
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = os.path.join(tts_dir, f"final_output_time_aligned_{timestamp}.wav")
+    The buffer is allocated once for the full duration and every segment is
+    added in place, so the cost grows with the audio rather than with
+    segments x duration.
     
-    # Determine original audio path if not provided
-    if not original_audio_path:
-        original_audio_path = os.path.join(output_dir, session_id, "audio", f"session_{session_id}.wav")
+    Args:
+        placements: Segment ID -> {"position_ms", "file"}; "length_ms" is filled in
+        duration_ms: Canvas duration in milliseconds
+        channels: Channel count of the canvas
+        
+    Returns:
+        np.ndarray: The speech canvas as float32 samples with shape (frames, channels)
+            at OUTPUT_SAMPLE_RATE
+    """
+    canvas = np.zeros((ms_to_samples(duration_ms), channels), dtype=np.float32)
+    for segment_id, placement in placements.items():
+        try:
+            segment_audio = load_canvas_samples(placement["file"], channels)
+            # Add segment at the exact position
+            position = ms_to_samples(placement["position_ms"])
+            end = min(position + len(segment_audio), len(canvas))
+            canvas[position:end] += segment_audio[:max(0, end - position)]
+            placement["length_ms"] = len(segment_audio) * 1000 / OUTPUT_SAMPLE_RATE
+            
+            logger.info(f"Added segment {segment_id} to position {placement['position_ms']/1000:.2f}s (duration: {placement['length_ms']/1000:.2f}s)")
+        except Exception as e:
+            logger.error(f"Error processing segment {segment_id}: {str(e)}")
+    return canvas
+
+def patch_speech_canvas(
+    canvas: np.ndarray,
+    placements: Dict[str, Dict[str, Any]],
+    previous_placements: Dict[str, Dict[str, Any]],
+    dirty_segments: List[str]
+) -> np.ndarray:
+    """
+    Re-mix only the parts of a speech canvas covered by changed segments.
+    
+    The old and new extents of every changed segment are cleared, then every
+    segment overlapping a cleared range is added again, clipped to the range,
+    so neighbours that overlap a changed segment keep their audio.
+    
+    Args:
+        canvas: Speech canvas of the previous run (samples at OUTPUT_SAMPLE_RATE, patched in place)
+        placements: Segment ID -> {"position_ms", "file"} of this run; "length_ms" is filled in
+        previous_placements: Segment ID -> {"position_ms", "file", "length_ms"} of the previous run
+        dirty_segments: IDs of the segments whose audio changed (moved segments are found from the placements)
+        
+    Returns:
+        np.ndarray: The patched canvas
+    """
+    changed = {str(segment_id) for segment_id in dirty_segments}
+    changed |= set(placements) ^ set(previous_placements)
+    changed |= {segment_id for segment_id, placement in previous_placements.items() if "length_ms" not in placement}
+    # Segments can move or switch files without their own audio changing (e.g. when
+    # positions follow the previous segment's output duration)
+    changed |= {
+        segment_id for segment_id, placement in placements.items()
+        if segment_id in previous_placements
+        and (placement["position_ms"] != previous_placements[segment_id]["position_ms"]
+             or placement["file"] != previous_placements[segment_id]["file"])
+    }
+    channels = canvas.shape[1]
+    
+    # Unchanged segments keep their previous length; changed ones are loaded
+    audio = {}
+    for segment_id, placement in placements.items():
+        if segment_id in changed:
+            audio[segment_id] = load_canvas_samples(placement["file"], channels)
+            placement["length_ms"] = len(audio[segment_id]) * 1000 / OUTPUT_SAMPLE_RATE
+        else:
+            placement["length_ms"] = previous_placements[segment_id]["length_ms"]
+    
+    def extent(placement):
+        position = ms_to_samples(placement["position_ms"])
+        return position, position + ms_to_samples(placement.get("length_ms", 0))
+    
+    # Merge the old and new extents of the changed segments into ranges
+    extents = sorted(
+        extent(placement)
+        for segment_id in changed
+        for placement in (placements.get(segment_id), previous_placements.get(segment_id)) if placement
+    )
+    ranges = []
+    for start, end in extents:
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
     
+    for start, end in ranges:
+        end = min(end, len(canvas))
+        if start >= end:
+            continue
+        canvas[start:end] = 0
+        for segment_id, placement in placements.items():
+            position, segment_end = extent(placement)
+            if position >= end or segment_end <= start:
+                continue
+            if segment_id not in audio:
+                audio[segment_id] = load_canvas_samples(placement["file"], channels)
+            clip = audio[segment_id][max(0, start - position):end - position]
+            offset = max(position, start)
+            canvas[offset:offset + len(clip)] += clip
+        logger.info(f"Re-mixed canvas from {start/OUTPUT_SAMPLE_RATE:.2f}s to {end/OUTPUT_SAMPLE_RATE:.2f}s")
+    return canvas
+
+def get_time_aligned_layout(
+    session_id: str,
+    output_dir: str,
+    alignment_metadata: Dict,
+    original_audio_path: str,
+    file_key: str = "output_file"
+) -> Optional[Dict[str, Any]]:
+    """
+    Work out the output duration and where each aligned segment goes in it.
+    
+    Args:
+        session_id: Session ID
+        output_dir: Base output directory
+        alignment_metadata: Time alignment metadata
+        original_audio_path: Path to the original audio file
+        file_key: Segment metadata field holding the audio to place
+        
+    Returns:
+        Dict: original_duration, final_duration_ms, canvas_ms (trimmed to the original
+        duration) and placements (segment ID -> {"position_ms", "file"}), or None
+        if there are no segments
+    """
     # Get original audio duration
     original_duration = None
     try:
         if os.path.exists(original_audio_path):
-            original_audio = AudioSegment.from_file(original_audio_path)
-            original_duration = len(original_audio) / 1000  # Convert to seconds
+            # Only the header is needed for the duration
+            try:
+                original_duration = sf.info(original_audio_path).duration
+            except Exception:
+                original_duration = len(AudioSegment.from_file(original_audio_path)) / 1000  # Convert to seconds
             logger.info(f"Original audio duration: {original_duration:.2f}s")
         else:
             logger.warning(f"Original audio file not found: {original_audio_path}")
     except Exception as e:
         logger.error(f"Error getting original audio duration: {str(e)}")
     
-    # Load metadata if not provided
-    if not alignment_metadata:
-        try:
-            with open(metadata_file, 'r') as f:
-                alignment_metadata = json.load(f)
-            
-            logger.info(f"Loaded time alignment metadata from {metadata_file}")
-        except Exception as e:
-            logger.error(f"Error loading time alignment metadata: {str(e)}")
-            return None
-    
     # Get segments
     segments = alignment_metadata.get("segments", [])
     if not segments:
@@ -572,18 +1051,16 @@ def stitch_time_aligned_segments(
         final_duration_ms = int(sum(seg.get("output_duration", 0) for seg in segments) * 1000) + 2000
         logger.info(f"Using fallback duration calculation: {final_duration_ms}ms")
     
-    # Create a silent canvas of the full duration
-    canvas = AudioSegment.silent(duration=final_duration_ms)
-    
-    # Process each segment
+    # Work out where each segment goes on the canvas
+    placements = {}
     for i, segment in enumerate(segments):
         # Handle both dictionary segments and string segment IDs
         if isinstance(segment, dict):
             segment_id = segment.get("segment_id")
             status = segment.get("status")
             
-            # Get output file
-            output_file_path = segment.get("output_file")
+            # Get the audio file to place
+            output_file_path = segment.get(file_key)
         else:
             # If segment is a string, it's likely just a segment ID
             segment_id = segment
@@ -622,37 +1099,37 @@ def stitch_time_aligned_segments(
                 position_ms = 0
             logger.info(f"Positioning segment {segment_id} at {position_ms/1000:.2f}s based on timing")
         
-        # Load segment audio
-        try:
-            segment_audio = AudioSegment.from_file(output_file_path)
-            # Overlay segment at the exact position
-            canvas = canvas.overlay(segment_audio, position=position_ms)
-            
-            logger.info(f"Added segment {segment_id} to position {position_ms/1000:.2f}s (duration: {len(segment_audio)/1000:.2f}s)")
-        except Exception as e:
-            logger.error(f"Error processing segment {segment_id}: {str(e)}")
+        placements[str(segment_id)] = {"position_ms": position_ms, "file": output_file_path}
     
-    # Trim to match original duration exactly if needed
-    if original_duration and len(canvas) > original_duration * 1000:
-        target_duration_ms = int(original_duration * 1000)
-        logger.info(f"Trimmed output to match original duration exactly: {original_duration}s")
-        canvas = canvas[:target_duration_ms]
+    # Length of the speech canvas once trimmed to the original duration
+    canvas_ms = final_duration_ms
+    if original_duration and final_duration_ms > original_duration * 1000:
+        canvas_ms = int(original_duration * 1000)
     
-    # Check if we should add background music
+    return {
+        "original_duration": original_duration,
+        "final_duration_ms": final_duration_ms,
+        "canvas_ms": canvas_ms,
+        "placements": placements
+    }
+
+def get_background_mix(session_id: str, output_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Decide whether background music goes under the dub, and at what level.
+    
+    Args:
+        session_id: Session ID
+        output_dir: Base output directory
+        
+    Returns:
+        Dict: Background file and adjustment_db in dB, or None if no background is mixed in
+    """
     background_file = os.path.join(output_dir, session_id, "music", "background.wav")
     metadata_file = os.path.join(output_dir, session_id, "music", "metadata.json")
-    user_metadata_file = os.path.join(output_dir, session_id, "metadata.json")
     
     # Check user preference for background music
-    user_wants_background = False
-    if os.path.exists(user_metadata_file):
-        try:
-            with open(user_metadata_file, 'r') as f:
-                user_metadata = json.load(f)
-            user_wants_background = user_metadata.get('preserve_background_music', False)
-            logger.info(f"User preference for background music: {user_wants_background}")
-        except Exception as e:
-            logger.error(f"Error reading user metadata: {str(e)}")
+    user_wants_background = get_metadata_field(session_id, 'preserve_background_music', False, output_dir)
+    logger.info(f"User preference for background music: {user_wants_background}")
     
     # Only proceed with background processing if user enabled it
     if not user_wants_background:
@@ -671,9 +1148,6 @@ def stitch_time_aligned_segments(
             if has_significant_background:
                 logger.info("Significant background detected, applying background music")
                 
-                # Load background music
-                background_audio = AudioSegment.from_file(background_file)
-                
                 # Get volume levels from metadata
                 vocals_db = metadata.get("stats", {}).get("vocals_rms_db", -20)
                 background_db = metadata.get("stats", {}).get("background_rms_db", -30)
@@ -683,44 +1157,365 @@ def stitch_time_aligned_segments(
                 adjustment_db = background_db - background_db  # This will be 0, preserving the original level
                 
                 logger.info(f"Using original audio levels - vocals: {vocals_db}dB, background: {background_db}dB")
-                
-                # Adjust background volume
-                adjusted_background = background_audio + adjustment_db
-                
-                # Resize background to match canvas length
-                if len(adjusted_background) > len(canvas):
-                    adjusted_background = adjusted_background[:len(canvas)]
-                else:
-                    # Loop background if needed
-                    loops_needed = math.ceil(len(canvas) / len(adjusted_background))
-                    looped_background = adjusted_background * loops_needed
-                    adjusted_background = looped_background[:len(canvas)]
-                
-                # Mix background with translated audio
-                canvas = canvas.overlay(adjusted_background)
-                logger.info(f"Added background music with {adjustment_db}dB adjustment")
+                return {"file": background_file, "adjustment_db": adjustment_db}
             else:
                 logger.info("No significant background detected, skipping background music")
         except Exception as e:
             logger.error(f"Error processing background music: {str(e)}")
             import traceback
             logger.error(traceback.format_exc())
+    return None
+
+def stitch_time_aligned_segments(
+    session_id: str,
+    output_dir: str,
+    alignment_metadata: Optional[Dict] = None,
+    metadata_file: Optional[str] = None,
+    output_file: Optional[str] = None,
+    original_audio_path: Optional[str] = None,
+    canvas_state: Optional[Dict] = None,
+    dirty_segments: Optional[List[str]] = None
+) -> str:
+    """
+    Stitch time-aligned segments together with precise silence padding to match original audio timing.
+    
+    When canvas_state holds the previous run's speech canvas and dirty_segments is
+    given, only the parts of that canvas covered by the dirty segments are re-mixed.
+    
+    Args:
+        session_id: Session ID
+        output_dir: Base output directory
+        alignment_metadata: Time alignment metadata (optional)
+        metadata_file: Path to time alignment metadata file (optional)
+        output_file: Path to save the stitched audio (optional)
+        original_audio_path: Path to the original audio file (optional)
+        canvas_state: Speech canvas file and segment placements of the previous run
+            (optional); updated in place with those of this run
+        dirty_segments: IDs of the segments that changed since the previous run (optional)
+        
+    Returns:
+        str: Path to the stitched audio file
+    """
+    # Set up paths
+    tts_dir = os.path.join(output_dir, session_id, "tts")
+    synthesis_dir = os.path.join(output_dir, session_id, "synthesis")
+    
+    if not metadata_file:
+        metadata_file = os.path.join(synthesis_dir, "time_alignment_metadata.json")
+    
+    if not output_file:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = os.path.join(tts_dir, f"final_output_time_aligned_{timestamp}.wav")
+    
+    # Determine original audio path if not provided
+    if not original_audio_path:
+        original_audio_path = os.path.join(output_dir, session_id, "audio", f"session_{session_id}.wav")
+    
+    # Load metadata if not provided
+    if not alignment_metadata:
+        try:
+            with open(metadata_file, 'r') as f:
+                alignment_metadata = json.load(f)
+            
+            logger.info(f"Loaded time alignment metadata from {metadata_file}")
+        except Exception as e:
+            logger.error(f"Error loading time alignment metadata: {str(e)}")
+            return None
+    
+    # Work out the duration and where each segment goes on the canvas
+    layout = get_time_aligned_layout(session_id, output_dir, alignment_metadata, original_audio_path)
+    if not layout:
+        return None
+    original_duration = layout["original_duration"]
+    final_duration_ms = layout["final_duration_ms"]
+    canvas_ms = layout["canvas_ms"]
+    placements = layout["placements"]
+    
+    # Patch the previous run's speech canvas if only some segments changed
+    canvas = None
+    patched = False
+    canvas_samples = ms_to_samples(canvas_ms)
+    previous_canvas = (canvas_state or {}).get("speech_canvas")
+    if (dirty_segments is not None and previous_canvas and os.path.exists(previous_canvas)
+            and canvas_state.get("sample_rate") == OUTPUT_SAMPLE_RATE):
+        try:
+            canvas, _ = sf.read(previous_canvas, dtype="float32", always_2d=True)
+            if len(canvas) == canvas_samples:
+                canvas = patch_speech_canvas(canvas, placements, canvas_state.get("placements", {}), dirty_segments)
+                patched = True
+                logger.info(f"Patched speech canvas for {len(dirty_segments)} changed segments")
+            else:
+                logger.info(f"Previous speech canvas is {len(canvas)} samples instead of {canvas_samples}, rendering a new one")
+                canvas = None
+        except Exception as e:
+            logger.warning(f"Could not patch previous speech canvas: {str(e)}")
+            canvas = None
+    
+    if canvas is None:
+        # Create a silent canvas of the full duration and add every segment
+        canvas = render_speech_canvas(placements, final_duration_ms)
+        
+        # Trim to match original duration exactly if needed
+        if len(canvas) > canvas_samples:
+            logger.info(f"Trimmed output to match original duration exactly: {original_duration}s")
+            canvas = canvas[:canvas_samples]
+    
+    # Keep the speech-only canvas so the next run can patch it (as float so re-reading it is lossless).
+    # Each run writes a new file: the previous one must stay paired with the placements saved
+    # with it until this run's state is saved, or a failed run would leave audio they don't cover
+    if canvas_state is not None:
+        canvas_dir = os.path.dirname(output_file)
+        speech_canvas_file = os.path.join(canvas_dir, f"speech_canvas_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.wav")
+        try:
+            for name in os.listdir(canvas_dir):
+                stale_file = os.path.join(canvas_dir, name)
+                if name.startswith("speech_canvas") and stale_file != previous_canvas:
+                    os.remove(stale_file)
+            temp_canvas_file = f"{speech_canvas_file}.tmp"
+            sf.write(temp_canvas_file, canvas, OUTPUT_SAMPLE_RATE, subtype="FLOAT", format="WAV")
+            os.replace(temp_canvas_file, speech_canvas_file)
+            canvas_state["speech_canvas"] = speech_canvas_file
+            canvas_state["sample_rate"] = OUTPUT_SAMPLE_RATE
+            canvas_state["placements"] = placements
+            canvas_state["patched"] = patched
+        except Exception as e:
+            logger.warning(f"Could not save speech canvas: {str(e)}")
+            canvas_state.clear()
+    
+    # Check if we should add background music
+    background = get_background_mix(session_id, output_dir)
+    if background:
+        try:
+            # Load background music
+            background_audio = load_canvas_samples(background["file"], max(canvas.shape[1], sf.info(background["file"]).channels))
+            if background_audio.shape[1] > canvas.shape[1]:
+                canvas = np.repeat(canvas, background_audio.shape[1], axis=1)
+            
+            # Resize background to match canvas length, looping it if needed
+            if len(background_audio) < len(canvas):
+                loops_needed = math.ceil(len(canvas) / len(background_audio))
+                background_audio = np.tile(background_audio, (loops_needed, 1))
+            
+            # Mix background with translated audio (adjusting its volume) in one vectorized add
+            canvas = canvas + background_audio[:len(canvas)] * np.float32(10 ** (background["adjustment_db"] / 20))
+            logger.info(f"Added background music with {background['adjustment_db']}dB adjustment")
+        except Exception as e:
+            logger.error(f"Error processing background music: {str(e)}")
+            import traceback
+            logger.error(traceback.format_exc())
     
     # Get final duration
-    final_duration = len(canvas) / 1000
+    final_duration = len(canvas) / OUTPUT_SAMPLE_RATE
     if original_duration is not None:
         logger.info(f"Final output duration: {final_duration:.3f}s (target: {original_duration:.3f}s)")
     else:
         logger.info(f"Final output duration: {final_duration:.3f}s (target duration unknown)")
     
-    # Save combined audio
+    # Save combined audio in a single write
     try:
-        canvas.export(output_file, format="wav")
-        logger.info(f"Time-aligned audio saved to {output_file} (duration: {len(canvas)/1000:.2f}s)")
+        sf.write(output_file, np.clip(canvas, -1.0, 1.0), OUTPUT_SAMPLE_RATE, subtype="PCM_16")
+        logger.info(f"Time-aligned audio saved to {output_file} (duration: {final_duration:.2f}s)")
         return output_file
     except Exception as e:
         logger.error(f"Error saving time-aligned audio: {str(e)}")
         return None
 
+def assign_filter_graph_lanes(
+    placements: Dict[str, Dict[str, Any]],
+    durations: Dict[str, float],
+    duration_ms: int
+) -> List[List[str]]:
+    """
+    Group segments into lanes of non-overlapping segments in timeline order.
+    
+    Each segment goes to the first lane that has ended by its position, so
+    speech without overlaps fits in a single lane.
+    
+    Args:
+        placements: Segment ID -> {"position_ms", "file"} of the synthesized audio
+        durations: Segment ID -> duration of the stretched audio in seconds
+        duration_ms: Output duration in milliseconds (the end of segments of unknown duration)
+        
+    Returns:
+        List[List[str]]: Segment IDs of each lane, in timeline order
+    """
+    lanes = []
+    lane_ends = []
+    for segment_id in sorted(placements, key=lambda segment_id: placements[segment_id]["position_ms"]):
+        position_ms = int(placements[segment_id]["position_ms"])
+        duration = durations.get(segment_id)
+        end_ms = position_ms + math.ceil(duration * 1000) if duration is not None else max(duration_ms, position_ms + 1)
+        for index, lane_end in enumerate(lane_ends):
+            if lane_end <= position_ms:
+                lanes[index].append(segment_id)
+                lane_ends[index] = end_ms
+                break
+        else:
+            lanes.append([segment_id])
+            lane_ends.append(end_ms)
+    return lanes
+
+def build_time_aligned_filter_graph(
+    placements: Dict[str, Dict[str, Any]],
+    speed_factors: Dict[str, float],
+    duration_ms: int,
+    background: Optional[Dict[str, Any]] = None,
+    channels: int = 1,
+    durations: Optional[Dict[str, float]] = None
+) -> Tuple[List[str], str]:
+    """
+    Build the ffmpeg inputs and filter_complex graph that render a whole dub.
+    
+    Every segment is resampled and stretched with atempo. Segments that don't
+    overlap are joined into one lane with concat, each padded with apad/atrim
+    to the gap before the next, and the lane is delayed once to its first
+    segment. Only the lanes of overlapping speech and the looped background
+    stem are mixed with amix (without level normalization, which needs ffmpeg
+    4.4+), and the result is cut to duration_ms.
+    
+    Args:
+        placements: Segment ID -> {"position_ms", "file"} of the synthesized audio
+        speed_factors: Segment ID -> speed factor to stretch it by
+        duration_ms: Output duration in milliseconds
+        background: Background file and adjustment_db from get_background_mix (optional)
+        channels: Channel count of the output
+        durations: Segment ID -> duration of the stretched audio in seconds (segments
+            without one are given a lane of their own)
+        
+    Returns:
+        Tuple[List[str], str]: ffmpeg input arguments and the filter graph, whose
+        output pad is [out]
+    """
+    layout = "mono" if channels == 1 else "stereo"
+    duration = f"{duration_ms / 1000:.3f}"
+    input_args = []
+    filters = []
+    labels = []
+    
+    input_indexes = {}
+    for index, (segment_id, placement) in enumerate(placements.items()):
+        input_args.extend(["-i", placement["file"]])
+        input_indexes[segment_id] = index
+    
+    for lane_index, lane in enumerate(assign_filter_graph_lanes(placements, durations or {}, duration_ms)):
+        lane_labels = []
+        for position, segment_id in enumerate(lane):
+            index = input_indexes[segment_id]
+            segment_filter = (
+                f"[{index}:a]aresample={OUTPUT_SAMPLE_RATE},aformat=sample_fmts=fltp:channel_layouts={layout},"
+                f"{build_atempo_filters(speed_factors.get(segment_id, 1.0))}"
+            )
+            if position + 1 < len(lane):
+                # Fill the gap up to the next segment of the lane with silence
+                gap_ms = placements[lane[position + 1]]["position_ms"] - placements[segment_id]["position_ms"]
+                segment_filter += f",apad=whole_dur={gap_ms / 1000:.3f},atrim=end={gap_ms / 1000:.3f}"
+            filters.append(f"{segment_filter}[s{index}]")
+            lane_labels.append(f"[s{index}]")
+        
+        lane_filter = f"{''.join(lane_labels)}concat=n={len(lane)}:v=0:a=1," if len(lane) > 1 else f"{lane_labels[0]}"
+        filters.append(f"{lane_filter}adelay={int(placements[lane[0]]['position_ms'])}:all=1[lane{lane_index}]")
+        labels.append(f"[lane{lane_index}]")
+    
+    if background:
+        index = len(placements)
+        input_args.extend(["-stream_loop", "-1", "-i", background["file"]])
+        filters.append(
+            f"[{index}:a]aresample={OUTPUT_SAMPLE_RATE},aformat=sample_fmts=fltp:channel_layouts={layout},"
+            f"volume={background['adjustment_db']}dB,atrim=end={duration}[bg]"
+        )
+        labels.append("[bg]")
+    
+    if len(labels) > 1:
+        mix_filter = f"{''.join(labels)}amix=inputs={len(labels)}:duration=longest:dropout_transition=0:normalize=0,"
+    else:
+        mix_filter = labels[0]
+    filters.append(f"{mix_filter}apad=whole_dur={duration},atrim=end={duration}[out]")
+    return input_args, ";\n".join(filters)
+
+def render_time_aligned_filter_graph(
+    session_id: str,
+    output_dir: str,
+    alignment_metadata: Dict,
+    output_file: str,
+    original_audio_path: Optional[str] = None
+) -> Optional[str]:
+    """
+    Render a time-aligned dub from synthesized segments in a single ffmpeg process.
+    
+    Takes the metadata of process_segments_with_time_alignment(plan_only=True):
+    the segments are stretched, positioned and mixed with the background music
+    by one filter graph, so no per-segment ffmpeg runs or _time_aligned.wav
+    files are needed.
+    
+    Args:
+        session_id: Session ID
+        output_dir: Base output directory
+        alignment_metadata: Time alignment metadata with input_file and speed_factor per segment
+        output_file: Path to save the rendered audio
+        original_audio_path: Path to the original audio file (optional)
+        
+    Returns:
+        str: Path to the rendered audio file, or None on failure
+    """
+    if not original_audio_path:
+        original_audio_path = os.path.join(output_dir, session_id, "audio", f"session_{session_id}.wav")
+    
+    layout = get_time_aligned_layout(session_id, output_dir, alignment_metadata, original_audio_path, file_key="input_file")
+    if not layout or not layout["placements"]:
+        logger.error("No segments to render")
+        return None
+    
+    speed_factors = {
+        str(segment.get("segment_id")): segment.get("speed_factor", 1.0)
+        for segment in alignment_metadata.get("segments", []) if isinstance(segment, dict)
+    }
+    # Planned length of each stretched segment, which decides what overlaps
+    durations = {
+        str(segment.get("segment_id")): segment["original_duration"] / segment["speed_factor"]
+        for segment in alignment_metadata.get("segments", [])
+        if isinstance(segment, dict) and segment.get("original_duration") and segment.get("speed_factor")
+    }
+    background = get_background_mix(session_id, output_dir)
+    channels = 1
+    if background:
+        try:
+            channels = min(2, sf.info(background["file"]).channels)
+        except Exception:
+            channels = 2
+    
+    input_args, filter_graph = build_time_aligned_filter_graph(
+        layout["placements"], speed_factors, layout["canvas_ms"], background, channels, durations
+    )
+    
+    # Pass the graph as a script so long sessions don't hit the command line length limit
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as script_file:
+        script_file.write(filter_graph)
+        script_path = script_file.name
+    
+    ffmpeg_cmd = [
+        get_ffmpeg_path(),
+        "-y",  # Overwrite output files
+        *input_args,
+        "-filter_complex_script", script_path,
+        "-map", "[out]",
+        "-acodec", "pcm_s16le",  # Use standard WAV format
+        "-ar", str(OUTPUT_SAMPLE_RATE),
+        output_file
+    ]
+    
+    try:
+        logger.info(f"Rendering {len(layout['placements'])} segments with one ffmpeg filter graph")
+        subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        logger.info(f"Time-aligned audio saved to {output_file} (duration: {layout['canvas_ms']/1000:.2f}s)")
+        return output_file
+    except subprocess.CalledProcessError as e:
+        logger.error(f"ffmpeg error: {e.stderr.decode()}")
+        return None
+    except Exception as e:
+        logger.error(f"Error rendering time-aligned audio: {str(e)}")
+        return None
+    finally:
+        os.remove(script_path)
+
 # Add missing import
 import datetime
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Time-stretch module.
+Changes the speed of speech held in NumPy buffers without changing its pitch,
+using WSOLA (waveform similarity overlap-add), so time alignment can run in
+process instead of spawning ffmpeg and round-tripping each segment through disk.
+"""
+
+import logging
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import correlate
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Sample rate of time-aligned segments (matches the ffmpeg path)
+OUTPUT_SAMPLE_RATE = 44100
+
+def wsola_time_stretch(
+    audio: np.ndarray,
+    speed_factor: float,
+    sample_rate: int,
+    frame_ms: float = 30.0,
+    tolerance_ms: float = 10.0
+) -> np.ndarray:
+    """
+    Time-stretch audio with WSOLA.
+
+    Frames are taken from the input at speed_factor times the output hop and
+    overlap-added with a Hann window. Each frame is shifted by up to
+    tolerance_ms to the position that best continues the previous frame, which
+    keeps pitch periods intact in speech.
+
+    Args:
+        audio: Samples, shape (frames,) or (frames, channels)
+        speed_factor: Speed factor to apply (>1 speeds up, <1 slows down)
+        sample_rate: Sample rate of the audio
+        frame_ms: Analysis frame length in milliseconds
+        tolerance_ms: Maximum frame shift in milliseconds
+
+    Returns:
+        np.ndarray: Stretched float32 samples, round(len(audio) / speed_factor) frames long
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    mono_input = audio.ndim == 1
+    if mono_input:
+        audio = audio[:, np.newaxis]
+
+    output_length = int(round(len(audio) / speed_factor))
+    frame = max(2, int(sample_rate * frame_ms / 1000) // 2 * 2)
+    hop_out = frame // 2
+    hop_in = hop_out * speed_factor
+    tolerance = int(sample_rate * tolerance_ms / 1000)
+
+    # Pad so every frame and search region stays inside the buffer
+    frame_count = output_length // hop_out + 1
+    padding = frame + tolerance
+    tail = max(0, int(np.ceil((frame_count - 1) * hop_in)) + frame + 2 * tolerance + hop_out - len(audio))
+    padded = np.pad(audio, ((padding, padding + tail), (0, 0)))
+    guide = padded.mean(axis=1)
+
+    # Periodic Hann windows at 50% overlap sum to one
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame) / frame)).astype(np.float32)
+    output = np.zeros((frame_count * hop_out + frame, audio.shape[1]), dtype=np.float32)
+    weight = np.zeros(frame_count * hop_out + frame, dtype=np.float32)
+
+    previous = None
+    for k in range(frame_count):
+        nominal = padding + int(round(k * hop_in))
+        if previous is None:
+            position = nominal
+        else:
+            # Pick the shift that best matches the natural continuation of the previous frame
+            template = guide[previous + hop_out:previous + hop_out + frame]
+            region = guide[nominal - tolerance:nominal + tolerance + frame]
+            position = nominal - tolerance + int(np.argmax(correlate(region, template, mode="valid", method="fft")))
+        output[k * hop_out:k * hop_out + frame] += padded[position:position + frame] * window[:, np.newaxis]
+        weight[k * hop_out:k * hop_out + frame] += window
+        previous = position
+
+    # The first half frame only gets one window; normalize by the summed weights
+    output = output[hop_out:hop_out + output_length] / np.maximum(weight[hop_out:hop_out + output_length], 1e-3)[:, np.newaxis]
+    return output[:, 0] if mono_input else output
+
+def write_stretched_audio(
+    audio: np.ndarray,
+    input_rate: int,
+    output_path: str,
+    speed_factor: float,
+    sample_rate: int = OUTPUT_SAMPLE_RATE
+) -> float:
+    """
+    Time-stretch decoded audio and write it as 16-bit PCM WAV.
+
+    Args:
+        audio: Samples, shape (frames,) or (frames, channels)
+        input_rate: Sample rate of the samples
+        output_path: Path to save the stretched audio
+        speed_factor: Speed factor to apply (>1 speeds up, <1 slows down)
+        sample_rate: Sample rate of the output
+
+    Returns:
+        float: Duration of the written audio in seconds
+    """
+    if input_rate != sample_rate:
+        import librosa
+
+        audio = librosa.resample(np.asarray(audio, dtype=np.float32).T, orig_sr=input_rate, target_sr=sample_rate).T
+
+    stretched = wsola_time_stretch(audio, speed_factor, sample_rate)
+    sf.write(output_path, np.clip(stretched, -1.0, 1.0), sample_rate, subtype="PCM_16")
+    return len(stretched) / sample_rate
+
+def stretch_audio_file(
+    input_path: str,
+    output_path: str,
+    speed_factor: float,
+    sample_rate: int = OUTPUT_SAMPLE_RATE
+) -> float:
+    """
+    Time-stretch an audio file in process and write it as 16-bit PCM WAV.
+
+    Args:
+        input_path: Path to input audio file
+        output_path: Path to save the stretched audio
+        speed_factor: Speed factor to apply (>1 speeds up, <1 slows down)
+        sample_rate: Sample rate of the output
+
+    Returns:
+        float: Duration of the written audio in seconds
+    """
+    audio, input_rate = sf.read(input_path, dtype="float32")
+    return write_stretched_audio(audio, input_rate, output_path, speed_factor, sample_rate)
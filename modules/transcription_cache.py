@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Transcription cache module.
+Stores diarized transcription results on local disk, keyed by a hash of the
+decoded audio plus the model and segmentation settings, so re-runs of the same
+upload or URL skip VAD and the Sarvam API entirely.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+from modules.speech_config import get_transcription_cache_config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bump when the cached result format changes
+CACHE_VERSION = 1
+
+# VAD settings that change the segmentation, and so the transcription
+VAD_KEY_FIELDS = ("threshold", "combine_duration", "combine_gap", "sample_rate", "backend")
+
+# Process-wide caches by directory
+_transcription_caches = {}
+_transcription_caches_lock = threading.Lock()
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 of a file's bytes.
+
+    Args:
+        path: Path to the file
+        chunk_size: Bytes read at a time
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class DecodedAudioHash:
+    """
+    Incremental SHA-256 of decoded mono samples.
+
+    Fed by whichever pass already decodes the audio (VAD, in one piece or
+    block by block), so hashing doesn't decode the file a second time. The
+    same recording in a different container (e.g. a re-downloaded video)
+    hashes the same as long as it decodes to the same samples.
+    """
+    def __init__(self):
+        """Initialize an empty hash."""
+        self.digest = hashlib.sha256()
+
+    def update(self, samples):
+        """
+        Add decoded samples to the hash.
+
+        Args:
+            samples: Mono float samples (numpy array)
+        """
+        self.digest.update(samples.astype("<f4", copy=False).tobytes())
+
+    def hexdigest(self) -> str:
+        """
+        Get the hash of the samples added so far.
+
+        Returns:
+            Hex digest
+        """
+        return self.digest.hexdigest()
+
+def hash_decoded_audio(audio_path: str, sample_rate: int = 16000) -> str:
+    """
+    Compute the SHA-256 of an audio file's decoded mono samples.
+
+    Decodes the whole file; transcription hashes the samples VAD decodes instead.
+
+    Args:
+        audio_path: Path to the audio file
+        sample_rate: Sample rate the audio is decoded at
+
+    Returns:
+        Hex digest
+    """
+    from modules.vad_segmentation import stream_audio_blocks
+
+    audio_hash = DecodedAudioHash()
+    for block in stream_audio_blocks(audio_path, sample_rate=sample_rate):
+        audio_hash.update(block)
+    return audio_hash.hexdigest()
+
+def make_cache_key(audio_hash: str, model: str, config: Dict[str, Any]) -> str:
+    """
+    Build the cache key for an audio hash, model and segmentation settings.
+
+    Args:
+        audio_hash: Hash of the decoded audio
+        model: Transcription model name
+        config: Settings that affect the result
+
+    Returns:
+        Hex digest used as the cache key
+    """
+    key_data = json.dumps({"version": CACHE_VERSION, "audio": audio_hash, "model": model, "config": config}, sort_keys=True)
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+class TranscriptionCache:
+    """
+    Size-bounded, least-recently-used cache of transcription results on local disk.
+
+    Each entry is one JSON file named by its key. Reads refresh the file's
+    modification time, and the oldest files are evicted once the directory grows
+    past max_bytes. Exact file hashes are also remembered as aliases of their
+    decoded-audio hash, so re-uploads of the same file are looked up without
+    decoding. Aliases are removed along with the entries they lead to.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache entries
+            max_bytes: Maximum total size of the entries in bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        os.makedirs(os.path.join(cache_dir, "aliases"), exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _write_json(self, path: str, data: Any):
+        # Write to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _alias_path(self, file_hash: str, sample_rate: int) -> str:
+        return os.path.join(self.cache_dir, "aliases", f"{file_hash}_{sample_rate}")
+
+    def lookup_audio_hash(self, audio_path: str, sample_rate: int = 16000) -> Tuple[str, Optional[str]]:
+        """
+        Look up the decoded-audio hash of a file by its bytes, without decoding it.
+
+        Args:
+            audio_path: Path to the audio file
+            sample_rate: Sample rate the audio is decoded at
+
+        Returns:
+            Tuple of the file's byte hash and its decoded-audio hash (None if these bytes weren't seen before)
+        """
+        file_hash = hash_file(audio_path)
+        try:
+            with open(self._alias_path(file_hash, sample_rate), "r", encoding="utf-8") as f:
+                return file_hash, f.read().strip()
+        except OSError:
+            return file_hash, None
+
+    def remember_audio_hash(self, file_hash: str, audio_hash: str, sample_rate: int = 16000):
+        """
+        Remember the decoded-audio hash of a file's bytes.
+
+        Args:
+            file_hash: Hash of the file's bytes
+            audio_hash: Hash of its decoded audio
+            sample_rate: Sample rate the audio was decoded at
+        """
+        try:
+            with open(self._alias_path(file_hash, sample_rate), "w", encoding="utf-8") as f:
+                f.write(audio_hash)
+        except OSError as e:
+            logger.warning(f"Could not save audio hash alias: {str(e)}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cache entry.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The stored entry, or None on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self.lock:
+                self.stats["misses"] += 1
+            return None
+
+        with self.lock:
+            self.stats["hits"] += 1
+        return entry
+
+    def put(self, key: str, result: Dict[str, Any], segment_info: Optional[List[Dict[str, Any]]] = None,
+            audio_hash: Optional[str] = None):
+        """
+        Store a transcription result and evict old entries if the cache is full.
+
+        Args:
+            key: Cache key
+            result: Combined transcription result (diarization.json contents)
+            segment_info: VAD segment timing for the result
+            audio_hash: Decoded-audio hash the key was built from (lets its aliases be evicted with it)
+        """
+        entry = {"key": key, "created": time.time(), "result": result, "segment_info": segment_info or [],
+                 "audio_hash": audio_hash}
+        self._write_json(self._entry_path(key), entry)
+        with self.lock:
+            self.stats["stores"] += 1
+        self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            int: Number of entries removed
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        removed = 0
+        removed_audio_hashes = set()
+        for _, size, name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            path = os.path.join(self.cache_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    audio_hash = json.load(f).get("audio_hash")
+            except (OSError, ValueError):
+                audio_hash = None
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            if audio_hash:
+                removed_audio_hashes.add(audio_hash)
+            total_bytes -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"Evicted {removed} transcription cache entries ({total_bytes} bytes left)")
+            with self.lock:
+                self.stats["evictions"] += removed
+        if removed_audio_hashes:
+            self._evict_aliases(removed_audio_hashes)
+        return removed
+
+    def _evict_aliases(self, audio_hashes):
+        # Aliases are a few bytes each, so reading them all is cheap next to an eviction
+        aliases_dir = os.path.join(self.cache_dir, "aliases")
+        for name in os.listdir(aliases_dir):
+            alias_path = os.path.join(aliases_dir, name)
+            try:
+                with open(alias_path, "r", encoding="utf-8") as f:
+                    if f.read().strip() in audio_hashes:
+                        os.remove(alias_path)
+            except OSError:
+                continue
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters for this process.
+
+        Returns:
+            Dictionary with hits, misses, stores, evictions and hit_rate
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+def get_transcription_cache(override_config: Optional[Dict[str, Any]] = None) -> Optional[TranscriptionCache]:
+    """
+    Get the process-wide transcription cache.
+
+    Args:
+        override_config: Dictionary of cache configuration values to override
+
+    Returns:
+        The cache for the configured directory, or None if caching is disabled
+    """
+    config = get_transcription_cache_config(override_config)
+    if not config.get("enabled"):
+        return None
+
+    cache_dir = os.path.abspath(config["cache_dir"])
+    with _transcription_caches_lock:
+        if cache_dir not in _transcription_caches:
+            _transcription_caches[cache_dir] = TranscriptionCache(cache_dir, int(config["max_bytes"]))
+            logger.info(f"Created transcription cache in {cache_dir} (max {config['max_bytes']} bytes)")
+        return _transcription_caches[cache_dir]
+
+def get_transcription_cache_key(audio_hash: str, min_segment_duration: float) -> str:
+    """
+    Build the cache key for transcribing decoded audio with the current configuration.
+
+    Args:
+        audio_hash: Hash of the decoded audio
+        min_segment_duration: Minimum duration for VAD segments
+
+    Returns:
+        Cache key
+    """
+    from modules.speech_config import get_vad_config, get_diarization_config
+
+    vad_config = get_vad_config()
+    config = {field: vad_config.get(field) for field in VAD_KEY_FIELDS}
+    config["min_segment_duration"] = min_segment_duration
+    return make_cache_key(audio_hash, get_diarization_config().get("model"), config)
@@ -541,15 +541,8 @@ def evaluate_translation_quality(session_id: str, base_dir: str = "outputs") ->
             translated_data = json.load(f)
         
         # Load metadata if available
-        metadata_path = os.path.join(base_dir, session_id, "metadata.json")
-        metadata = {}
-        if os.path.exists(metadata_path):
-            try:
-                with open(metadata_path, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                logger.info(f"Loaded metadata for session {session_id}")
-            except Exception as e:
-                logger.warning(f"Error loading metadata: {e}")
+        from utils.metadata_manager import get_metadata
+        metadata = get_metadata(session_id, base_dir)
         
         # IMPROVED LANGUAGE DETERMINATION LOGIC
         # 1. First try to get languages from translated_data
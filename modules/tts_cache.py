@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+TTS audio cache module.
+Stores synthesized speech on local disk, keyed by the provider, model, voice,
+language, normalized text and prosody settings, so re-synthesizing a session
+after a small edit only pays for the segments whose text actually changed.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import unicodedata
+from typing import Dict, Any, Optional
+
+from modules.speech_config import get_tts_cache_config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bump when the cached audio or key format changes
+CACHE_VERSION = 1
+
+# Extension of cached audio files (the provider's own bytes, whatever the container)
+ENTRY_SUFFIX = ".audio"
+
+# Process-wide caches by directory
+_tts_caches = {}
+_tts_caches_lock = threading.Lock()
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text for cache lookups.
+
+    Unicode is NFC-normalized and runs of whitespace are collapsed, so edits
+    that don't change what is spoken don't change the key.
+
+    Args:
+        text: Text to synthesize
+
+    Returns:
+        Normalized text
+    """
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+def make_tts_cache_key(provider: str, model: Optional[str], voice: Optional[str], language: Optional[str], text: str,
+                       pace: Optional[float] = None, pitch: Optional[float] = None, loudness: Optional[float] = None) -> str:
+    """
+    Build the cache key for a synthesis request.
+
+    Args:
+        provider: TTS provider (e.g. 'sarvam', 'cartesia')
+        model: Provider model name
+        voice: Voice or speaker ID
+        language: Target language
+        text: Text to synthesize
+        pace: Speech pace, if the provider takes one
+        pitch: Voice pitch, if the provider takes one
+        loudness: Audio loudness, if the provider takes one
+
+    Returns:
+        Hex digest used as the cache key
+    """
+    key_data = json.dumps({
+        "version": CACHE_VERSION,
+        "provider": provider,
+        "model": model,
+        "voice": voice,
+        "language": language,
+        "text": normalize_text(text),
+        "pace": pace,
+        "pitch": pitch,
+        "loudness": loudness
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key_data.encode("utf-8")).hexdigest()
+
+class TTSAudioCache:
+    """
+    Size-bounded, least-recently-used cache of synthesized audio on local disk.
+
+    Each entry is one audio file named by its key. Reads refresh the file's
+    modification time, and the oldest files are evicted once the directory grows
+    past max_bytes.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache entries
+            max_bytes: Maximum total size of the entries in bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{ENTRY_SUFFIX}")
+
+    def get(self, key: str, output_path: str) -> bool:
+        """
+        Copy a cached entry to output_path.
+
+        Args:
+            key: Cache key
+            output_path: Path the audio is written to on a hit
+
+        Returns:
+            True on a hit, False on a miss
+        """
+        path = self._entry_path(key)
+        try:
+            shutil.copyfile(path, output_path)
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.stats["misses"] += 1
+            return False
+
+        with self.lock:
+            self.stats["hits"] += 1
+        return True
+
+    def put(self, key: str, audio_path: str):
+        """
+        Store synthesized audio and evict old entries if the cache is full.
+
+        Args:
+            key: Cache key
+            audio_path: Path to the synthesized audio
+        """
+        # Copy to a temporary file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(audio_path, temp_path)
+            os.replace(temp_path, self._entry_path(key))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        with self.lock:
+            self.stats["stores"] += 1
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            int: Number of entries removed
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, name in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            total_bytes -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"Evicted {removed} TTS cache entries ({total_bytes} bytes left)")
+            with self.lock:
+                self.stats["evictions"] += removed
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters for this process.
+
+        Returns:
+            Dictionary with hits, misses, stores, evictions and hit_rate
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+def get_tts_cache(override_config: Optional[Dict[str, Any]] = None) -> Optional[TTSAudioCache]:
+    """
+    Get the process-wide TTS audio cache.
+
+    Args:
+        override_config: Dictionary of cache configuration values to override
+
+    Returns:
+        The cache for the configured directory, or None if caching is disabled
+    """
+    config = get_tts_cache_config(override_config)
+    if not config.get("enabled"):
+        return None
+
+    cache_dir = os.path.abspath(config["cache_dir"])
+    with _tts_caches_lock:
+        if cache_dir not in _tts_caches:
+            _tts_caches[cache_dir] = TTSAudioCache(cache_dir, int(config["max_bytes"]))
+            logger.info(f"Created TTS audio cache in {cache_dir} (max {config['max_bytes']} bytes)")
+        return _tts_caches[cache_dir]
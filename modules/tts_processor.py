@@ -5,20 +5,34 @@ Handles routing between Cartesia and Sarvam TTS services based on target languag
 
 import os
 import json
+import hashlib
 import logging
 import tempfile
 import subprocess
 import math
 import uuid
+import threading
 import traceback
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Union, Any
+import soundfile as sf
 from pydub import AudioSegment
 
-from modules.cartesia_tts import synthesize_speech as cartesia_synthesize
-from modules.sarvam_tts import synthesize_speech as sarvam_synthesize
-from modules.time_aligned_tts import adjust_segment_duration, process_segments_with_time_alignment, stitch_time_aligned_segments
+from modules.cartesia_tts import synthesize_speech as cartesia_synthesize, CARTESIA_MODEL
+from modules.sarvam_tts import synthesize_speech as sarvam_synthesize, DEFAULT_MODEL as SARVAM_DEFAULT_MODEL
+from modules.tts_cache import get_tts_cache, make_tts_cache_key, normalize_text
+from modules.segment_manifest import load_segment_manifest, write_segment_manifest
+from modules.speaking_rate import get_speaking_rate_table, update_speaking_rates, count_spoken_chars, choose_pace
+from modules.speech_config import get_tts_concurrency_config, get_time_stretch_config, get_pace_targeting_config
+from modules.time_aligned_tts import (
+    adjust_segment_duration,
+    process_segments_with_time_alignment,
+    render_time_aligned_filter_graph,
+    stitch_time_aligned_segments
+)
 from utils.file_utils import get_ffmpeg_path
+from utils.metadata_manager import get_metadata_field, update_metadata_section
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +66,14 @@ class TTSProcessor:
         self.speaker_voice_map = speaker_voice_map or {}
         self.original_duration = 0  # Initialize original_duration
         
+        # TTS cache counters, reported in the synthesis details
+        self.cache_stats = {"hits": 0, "misses": 0}
+        self.cache_stats_lock = threading.Lock()
+        
+        # Text length, pace and duration of every segment synthesized, for learning speaking rates
+        self.synthesis_records = []
+        self.synthesis_records_lock = threading.Lock()
+        
         # Initialize segment data
         self.segments = []
         self.segment_files = []
@@ -179,6 +201,8 @@ class TTSProcessor:
         """
         Synthesize speech and stitch with silence based on pre-silence bundling.
         
+        All segments are synthesized concurrently first, then stitched in timeline order.
+        
         Args:
             bundles: List of bundles with timing information
             
@@ -197,6 +221,29 @@ class TTSProcessor:
                 total_duration = last_bundle['translated']['speech_end']
             logger.info(f"Expected total duration based on bundles: {total_duration} seconds")
         
+        # Synthesize the speech of all bundles at once, then stitch in timeline order
+        speech_tasks = {}
+        for i, bundle in enumerate(bundles):
+            if bundle.get('is_final_silence', False):
+                continue
+            
+            # Ensure speech duration is rounded to an integer
+            speech_duration = round(bundle['translated']['speech_duration'])
+            if speech_duration <= 0:
+                continue
+            
+            # Update the bundle with the rounded speech duration
+            bundle['translated']['speech_duration'] = speech_duration
+            bundle['translated']['speech_end'] = bundle['translated']['speech_start'] + speech_duration
+            
+            # Create temporary file for this segment
+            temp_file = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
+            temp_file.close()
+            segment_files.append(temp_file.name)
+            speech_tasks[i] = (bundle['segment'], temp_file.name, speech_duration)
+        
+        speech_results = dict(zip(speech_tasks, self.synthesize_segments_concurrently(list(speech_tasks.values()))))
+        
         for i, bundle in enumerate(bundles):
             logger.info(f"Processing bundle {i}")
             
@@ -215,36 +262,24 @@ class TTSProcessor:
                 silence = AudioSegment.silent(duration=silence_duration * 1000)
                 combined += silence
             
-            # Ensure speech duration is rounded to an integer
-            speech_duration = round(bundle['translated']['speech_duration'])
-            if speech_duration <= 0:
-                logger.info(f"Skipping speech synthesis for bundle {i} as duration is {speech_duration}")
+            if i not in speech_tasks:
+                logger.info(f"Skipping speech synthesis for bundle {i} as duration is {round(bundle['translated']['speech_duration'])}")
                 continue
-                
-            # Update the bundle with the rounded speech duration
-            bundle['translated']['speech_duration'] = speech_duration
-            bundle['translated']['speech_end'] = bundle['translated']['speech_start'] + speech_duration
             
-            segment = bundle['segment']
-            
-            # Create temporary file for this segment
-            temp_file = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
-            segment_files.append(temp_file.name)
-            
-            # Synthesize this segment
-            logger.info(f"Synthesizing segment {segment.get('segment_id', 'unknown')} with duration {speech_duration} seconds (from {bundle['translated']['speech_start']} to {bundle['translated']['speech_end']})")
-            success = self.synthesize_segment_with_duration(segment, temp_file.name, speech_duration)
+            segment, segment_file, speech_duration = speech_tasks[i]
+            success = speech_results[i]
+            logger.info(f"Stitching segment {segment.get('segment_id', 'unknown')} with duration {speech_duration} seconds (from {bundle['translated']['speech_start']} to {bundle['translated']['speech_end']})")
             
             # Load synthesized speech
-            if success and os.path.exists(temp_file.name) and os.path.getsize(temp_file.name) > 0:
+            if success and os.path.exists(segment_file) and os.path.getsize(segment_file) > 0:
                 try:
                     # Use direct FFmpeg command to convert to WAV if needed
-                    temp_wav = os.path.join(self.tts_dir, f"temp_segment_{len(segment_files)}.wav")
+                    temp_wav = os.path.join(self.tts_dir, f"temp_segment_{i}.wav")
                     ffmpeg_path = get_ffmpeg_path()
                     subprocess.run([
                         ffmpeg_path,
                         "-y",  # Overwrite output files
-                        "-i", temp_file.name,
+                        "-i", segment_file,
                         "-acodec", "pcm_s16le",  # Convert to standard WAV format
                         "-ar", "44100",  # 44.1kHz sample rate
                         "-ac", "1",  # Mono
@@ -287,6 +322,187 @@ class TTSProcessor:
         
         return output_file
     
+    def synthesize_segments_concurrently(self, tasks):
+        """
+        Synthesize several segments at once on a bounded thread pool.
+        
+        Provider calls are rate limited and retried per provider, so the pool
+        size only bounds how many requests are in flight at a time.
+        
+        Args:
+            tasks: List of (segment, output_path, duration) tuples
+            
+        Returns:
+            List of success statuses, in the same order as tasks
+        """
+        if not tasks:
+            return []
+        
+        max_workers = max(1, min(len(tasks), int(get_tts_concurrency_config().get("max_workers", 1))))
+        logger.info(f"Synthesizing {len(tasks)} segments with {max_workers} workers")
+        
+        def synthesize(task):
+            segment, output_path, duration = task
+            try:
+                return self.synthesize_segment_with_duration(segment, output_path, duration)
+            except Exception as e:
+                logger.error(f"Error synthesizing segment {segment.get('segment_id', 'unknown')}: {str(e)}")
+                return False
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-worker") as executor:
+            return list(executor.map(synthesize, tasks))
+    
+    def synthesize_with_cache(self, synthesize, output_path, **key_fields):
+        """
+        Synthesize a segment, reusing cached audio for identical requests.
+        
+        Args:
+            synthesize: Function that calls the provider and returns a success status
+            output_path: Path the audio is written to
+            **key_fields: Request fields for tts_cache.make_tts_cache_key
+            
+        Returns:
+            bool: Success status
+        """
+        cache = get_tts_cache()
+        if cache is None:
+            success = synthesize()
+            if success:
+                self.record_synthesis(output_path, **key_fields)
+            return success
+        
+        key = make_tts_cache_key(**key_fields)
+        hit = cache.get(key, output_path)
+        with self.cache_stats_lock:
+            self.cache_stats["hits" if hit else "misses"] += 1
+        if hit:
+            logger.info(f"Using cached {key_fields.get('provider')} audio for {output_path}")
+            return True
+        
+        success = synthesize()
+        if success and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            try:
+                cache.put(key, output_path)
+            except OSError as e:
+                logger.warning(f"Could not cache synthesized audio: {str(e)}")
+            self.record_synthesis(output_path, **key_fields)
+        return success
+    
+    def record_synthesis(self, output_path, provider, voice=None, language=None, text='', pace=None, **key_fields):
+        """
+        Record how long a provider took to speak a segment's text.
+        
+        Records are saved with the synthesis details and added to the speaking
+        rate table once the job finishes.
+        
+        Args:
+            output_path: Path of the synthesized audio
+            provider: TTS provider
+            voice: Voice or speaker ID
+            language: Target language
+            text: Synthesized text
+            pace: Pace the audio was synthesized at (None if the provider has no pace)
+            **key_fields: Other request fields (unused)
+        """
+        try:
+            duration = sf.info(output_path).duration
+        except Exception as e:
+            logger.debug(f"Could not read duration of {output_path}: {str(e)}")
+            return
+        
+        record = {
+            "provider": provider,
+            "voice": voice,
+            "language": language,
+            "chars": count_spoken_chars(text),
+            "pace": pace if pace is not None else 1.0,
+            "duration": duration
+        }
+        with self.synthesis_records_lock:
+            self.synthesis_records.append(record)
+    
+    def get_synthesis_records(self):
+        """
+        Get the synthesis records of this processor's runs.
+        
+        Returns:
+            List of dictionaries with provider, voice, language, chars, pace and duration
+        """
+        with self.synthesis_records_lock:
+            return list(self.synthesis_records)
+    
+    def get_target_pace(self, segment, text, provider, voice, language):
+        """
+        Predict the pace that makes a segment's audio fill its original duration.
+        
+        Args:
+            segment: Segment data
+            text: Text to synthesize
+            provider: TTS provider
+            voice: Voice or speaker ID
+            language: Target language
+        
+        Returns:
+            float: Pace to synthesize at (1.0 when pace targeting is off or the voice's rate is unknown)
+        """
+        pace_config = get_pace_targeting_config()
+        if not pace_config["enabled"]:
+            return 1.0
+        
+        target_duration = segment.get('duration')
+        if not target_duration and segment.get('end_time') is not None and segment.get('start_time') is not None:
+            target_duration = segment['end_time'] - segment['start_time']
+        
+        chars = count_spoken_chars(text)
+        chars_per_second = get_speaking_rate_table().get_rate(
+            provider, voice, language, min_samples=pace_config["min_samples"]
+        )
+        pace = choose_pace(chars_per_second, chars, target_duration or 0,
+                           min_pace=pace_config["min_pace"], max_pace=pace_config["max_pace"],
+                           step=pace_config["pace_step"])
+        if chars_per_second:
+            logger.info(f"Segment {segment.get('segment_id', 'unknown')}: {chars} chars at {chars_per_second:.2f} chars/s "
+                        f"for a {target_duration}s target, synthesizing at pace {pace}")
+        return pace
+    
+    def get_cache_stats(self):
+        """
+        Get the TTS cache counters for this processor's synthesis runs.
+        
+        Returns:
+            Dictionary with hits, misses and hit_rate
+        """
+        with self.cache_stats_lock:
+            stats = dict(self.cache_stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+    
+    def get_segment_fingerprint(self, segment):
+        """
+        Fingerprint everything that determines a segment's synthesized, time-aligned audio.
+        
+        Args:
+            segment: Segment data
+            
+        Returns:
+            str: Hex digest that changes whenever the segment needs re-synthesizing
+        """
+        speaker_id = segment.get('speaker', self.speaker)
+        fingerprint_data = json.dumps({
+            "text": normalize_text(segment.get('translated_text', segment.get('text', ''))),
+            "speaker": speaker_id,
+            "voice": self.speaker_voice_map.get(speaker_id),
+            "language": segment.get('language', self.language),
+            "provider": self.provider,
+            "model": self.model,
+            "options": self.options,
+            "start_time": segment.get('start_time'),
+            "end_time": segment.get('end_time'),
+            "duration": segment.get('duration')
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(fingerprint_data.encode("utf-8")).hexdigest()
+    
     def synthesize_segment_with_duration(self, segment, output_path, duration):
         """
         Synthesize a single segment with specified duration.
@@ -341,14 +557,20 @@ class TTSProcessor:
             
             logger.info(f"Using Cartesia TTS for segment {segment.get('segment_id', 'unknown')} with language {normalized_lang} and voice {voice_id}")
             
-            # Call Cartesia without duration parameter
-            success = cartesia_synthesize(
-                text=text_to_synthesize,
-                output_path=output_path,
-                voice_id=voice_id
+            # Call Cartesia without duration parameter (unless the audio is cached)
+            return self.synthesize_with_cache(
+                lambda: cartesia_synthesize(
+                    text=text_to_synthesize,
+                    output_path=output_path,
+                    voice_id=voice_id
+                ),
+                output_path,
+                provider='cartesia',
+                model=CARTESIA_MODEL,
+                voice=voice_id,
+                language=normalized_lang,
+                text=text_to_synthesize
             )
-            
-            return success
         else:
             # Use Sarvam TTS for other languages
             logger.info(f"Using Sarvam TTS for segment {segment.get('segment_id', 'unknown')} with language {normalized_lang}")
@@ -358,14 +580,29 @@ class TTSProcessor:
                 voice_id = self.speaker_voice_map.get(speaker_id)
                 logger.info(f"Found mapped voice {voice_id} for speaker {speaker_id}")
             
+            # Synthesize at the pace that fits the segment, leaving only the residual to stretch
+            pace = self.get_target_pace(segment, text_to_synthesize, 'sarvam', voice_id, normalized_lang)
+            segment['synthesis_pace'] = pace
+            
             try:
-                sarvam_synthesize(
-                    text=text_to_synthesize,
-                    output_path=output_path,
+                return self.synthesize_with_cache(
+                    lambda: sarvam_synthesize(
+                        text=text_to_synthesize,
+                        output_path=output_path,
+                        language=normalized_lang,
+                        speaker=voice_id,
+                        pace=pace
+                    ),
+                    output_path,
+                    provider='sarvam',
+                    model=SARVAM_DEFAULT_MODEL,
+                    voice=voice_id,
                     language=normalized_lang,
-                    speaker=voice_id
+                    text=text_to_synthesize,
+                    pace=pace,
+                    pitch=0,
+                    loudness=1.0
                 )
-                return True
             except Exception as e:
                 logger.error(f"Sarvam TTS failed: {str(e)}")
                 return False
@@ -467,7 +704,9 @@ class TTSProcessor:
                 "silence_padding": self.extract_silence_padding_from_bundles(bundles),
                 "provider": self.provider,
                 "language": self.language,
-                "file": os.path.basename(final_output)
+                "file": os.path.basename(final_output),
+                "tts_cache": self.get_cache_stats(),
+                "synthesis_records": self.get_synthesis_records()
             }
             
             # Drop 'text' and 'translated_text' fields from each segment before saving
@@ -481,6 +720,7 @@ class TTSProcessor:
             with open(details_file, 'w') as f:
                 json.dump(synthesis_details, f, indent=2)
             logger.info(f"Synthesis details saved to: {details_file}")
+            update_speaking_rates(details_file, synthesis_details["synthesis_records"])
             
             return final_output
             
@@ -929,7 +1169,9 @@ class TTSProcessor:
                     "segments": self.segments,
                     "silence_padding": silence_padding,
                     "provider": self.provider,
-                    "language": self.language
+                    "language": self.language,
+                    "tts_cache": self.get_cache_stats(),
+                    "synthesis_records": self.get_synthesis_records()
                 }
                 
                 # Drop 'text' and 'translated_text' fields from each segment before saving
@@ -942,6 +1184,7 @@ class TTSProcessor:
                 with open(details_file, 'w') as f:
                     json.dump(synthesis_details, f, indent=2)
                 logger.info(f"Synthesis details saved successfully")
+                update_speaking_rates(details_file, synthesis_details["synthesis_records"])
             except Exception as save_error:
                 logger.error(f"Error saving synthesis details: {str(save_error)}")
                 import traceback
@@ -1097,19 +1340,49 @@ class TTSProcessor:
             logger.error("No diarization file found")
             return None
         
-        # Synthesize each segment
-        for i, segment in enumerate(self.segments):
-            segment_id = segment.get('segment_id', f"seg_{i:03d}")
-            
-            # Create output path for this segment
-            segment_output = os.path.join(self.tts_dir, f"segment_{segment_id}.wav")
-            
-            # Synthesize this segment
-            logger.info(f"Synthesizing segment {segment_id}")
-            success = self.synthesize_segment_with_duration(segment, segment_output, 0)  # 0 means no specific duration
-            
+        # Only segments whose content changed since the last run are synthesized again
+        session_name = os.path.basename(os.path.normpath(self.output_dir))
+        session_base_dir = os.path.dirname(os.path.normpath(self.output_dir))
+        synthesis_state = get_metadata_field(session_name, "synthesis_state", {}, session_base_dir) or {}
+        previous_fingerprints = synthesis_state.get("fingerprints", {})
+        
+        segment_ids = [str(segment.get('segment_id', f"seg_{i:03d}")) for i, segment in enumerate(self.segments)]
+        fingerprints = {
+            segment_id: self.get_segment_fingerprint(segment)
+            for segment, segment_id in zip(self.segments, segment_ids)
+        }
+        # The filter graph render stretches the synthesized audio itself, so no aligned files are kept
+        render_mode = get_time_stretch_config()["render_mode"]
+        kept_file = "segment_{}.wav" if render_mode == "filter_graph" else "segment_{}_time_aligned.wav"
+        dirty_segments = [
+            segment_id for segment_id in segment_ids
+            if previous_fingerprints.get(segment_id) != fingerprints[segment_id]
+            or not os.path.exists(os.path.join(self.tts_dir, kept_file.format(segment_id)))
+        ]
+        logger.info(f"{len(dirty_segments)} of {len(segment_ids)} segments changed since the last synthesis")
+        
+        # Remove stale audio of changed segments so a failed synthesis can't reuse it
+        for segment_id in dirty_segments:
+            for stale_file in (f"segment_{segment_id}.wav", f"segment_{segment_id}_time_aligned.wav"):
+                if os.path.exists(os.path.join(self.tts_dir, stale_file)):
+                    os.remove(os.path.join(self.tts_dir, stale_file))
+        
+        # Synthesize the changed segments at once (0 means no specific duration)
+        dirty = set(dirty_segments)
+        tasks = [
+            (segment, os.path.join(self.tts_dir, f"segment_{segment_id}.wav"), 0)
+            for segment, segment_id in zip(self.segments, segment_ids) if segment_id in dirty
+        ]
+        for (segment, _, _), success in zip(tasks, self.synthesize_segments_concurrently(tasks)):
             if not success:
-                logger.warning(f"Failed to synthesize segment {segment_id}")
+                logger.warning(f"Failed to synthesize segment {segment.get('segment_id', 'unknown')}")
+        
+        # Tell the aligner which file holds each segment so it doesn't have to scan the directory
+        write_segment_manifest(
+            self.tts_dir,
+            {segment_id: os.path.join(self.tts_dir, f"segment_{segment_id}.wav") for segment_id in segment_ids},
+            load_segment_manifest(self.tts_dir)
+        )
         
         # Step 2: Get segments file path for timing
         # If we're using merged segments, we should use the merged file for timing as well
@@ -1137,11 +1410,14 @@ class TTSProcessor:
             session_id,
             os.path.dirname(self.output_dir),  # Get parent directory
             timing_file,  # Use the timing file we identified
-            self.tts_dir
+            self.tts_dir,
+            segment_ids=None if render_mode == "filter_graph" else dirty_segments,
+            plan_only=render_mode == "filter_graph"
         )
         
-        # Step 4: Stitch time-aligned segments
-        logger.info("Step 4: Stitching time-aligned segments")
+        # Step 4: Stitch time-aligned segments, patching the previous canvas where possible
+        logger.info(f"Step 4: Stitching time-aligned segments (render mode: {render_mode})")
+        canvas_state = dict(synthesis_state.get("canvas") or {}) if render_mode != "filter_graph" else {}
         # Try to extract session ID from directory path
         dir_session_id = None
         if self.output_dir and "/" in self.output_dir:
@@ -1190,18 +1466,48 @@ class TTSProcessor:
         # Create timestamp for file naming
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        output_file = stitch_time_aligned_segments(
-            session_id,
-            os.path.dirname(self.output_dir),  # Get parent directory
-            alignment_metadata,
-            output_file=os.path.join(self.tts_dir, f"final_output_{timestamp}.wav"),
-            original_audio_path=original_audio_path
-        )
+        if render_mode == "filter_graph":
+            output_file = render_time_aligned_filter_graph(
+                session_id,
+                os.path.dirname(self.output_dir),  # Get parent directory
+                alignment_metadata,
+                os.path.join(self.tts_dir, f"final_output_{timestamp}.wav"),
+                original_audio_path=original_audio_path
+            )
+        else:
+            output_file = stitch_time_aligned_segments(
+                session_id,
+                os.path.dirname(self.output_dir),  # Get parent directory
+                alignment_metadata,
+                output_file=os.path.join(self.tts_dir, f"final_output_{timestamp}.wav"),
+                original_audio_path=original_audio_path,
+                canvas_state=canvas_state,
+                dirty_segments=dirty_segments
+            )
         
         if not output_file or not os.path.exists(output_file):
             logger.error("Failed to stitch time-aligned segments")
             return None
         
+        # Remember the fingerprints of the segments that made it into the canvas
+        aligned_segments = {
+            str(entry.get("segment_id")) for entry in alignment_metadata.get("segments", [])
+            if isinstance(entry, dict) and entry.get("status") == "success"
+        }
+        update_metadata_section(session_name, "synthesis_state", {
+            "fingerprints": {
+                segment_id: fingerprint for segment_id, fingerprint in fingerprints.items()
+                if segment_id in aligned_segments
+            },
+            "canvas": canvas_state,
+            "last_run": {
+                "total_segments": len(segment_ids),
+                "synthesized_segments": len(dirty_segments),
+                "reused_segments": len(segment_ids) - len(dirty_segments),
+                "patched_canvas": canvas_state.get("patched", False)
+            }
+        }, session_base_dir)
+        
         # Step 5: Save synthesis details
         synthesis_details = {
             "time_aligned": True,
@@ -1209,7 +1515,9 @@ class TTSProcessor:
             "provider": self.provider,
             "language": self.language,
             "file": os.path.basename(output_file),
-            "alignment_metadata": alignment_metadata
+            "alignment_metadata": alignment_metadata,
+            "tts_cache": self.get_cache_stats(),
+            "synthesis_records": self.get_synthesis_records()
         }
         
         # Drop 'text' and 'translated_text' fields from each segment before saving
@@ -1224,6 +1532,7 @@ class TTSProcessor:
             json.dump(synthesis_details, f, indent=2)
         
         logger.info(f"Synthesis details saved to: {details_file}")
+        update_speaking_rates(details_file, synthesis_details["synthesis_records"])
         
         return output_file
     
@@ -1269,7 +1578,8 @@ def process_tts(session_id: str, output_dir: str, diarization_file: str = None)
             "segments": processor.segments,
             "silence_padding": silence_padding,
             "provider": processor.provider,
-            "language": processor.language
+            "language": processor.language,
+            "synthesis_records": processor.get_synthesis_records()
         }
         
         # Drop 'text' and 'translated_text' fields from each segment before saving
@@ -1282,6 +1592,7 @@ def process_tts(session_id: str, output_dir: str, diarization_file: str = None)
         with open(details_file, 'w') as f:
             json.dump(synthesis_details, f, indent=2)
         logger.info(f"Synthesis details saved to: {details_file}")
+        update_speaking_rates(details_file, synthesis_details["synthesis_records"])
         
         # Cleanup temporary files
         processor.cleanup()
@@ -5,13 +5,22 @@ Uses Silero VAD to detect speech segments in audio files.
 """
 
 import os
+import io
+import copy
 import json
+import math
+import shutil
 import logging
+import time
+import threading
+import subprocess
 import torch
 import numpy as np
 import librosa
 import soundfile as sf
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Iterator, Callable
+
+from modules.speech_config import get_vad_config
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -21,6 +30,29 @@ DEFAULT_SAMPLE_RATE = 16000
 DEFAULT_VAD_THRESHOLD = 0.5
 DEFAULT_COMBINE_DURATION = 8  # Maximum duration for combined segments in seconds
 DEFAULT_COMBINE_GAP = 1  # Maximum gap between segments to combine in seconds
+DEFAULT_VAD_OFFSET_THRESHOLD = None  # Threshold for the end of speech (None to use the onset threshold)
+DEFAULT_MIN_SPEECH_DURATION = 0.0  # Utterances shorter than this are dropped, in seconds
+DEFAULT_MIN_SILENCE_DURATION = 0.0  # Silences shorter than this are bridged, in seconds
+
+# Default batched VAD configuration
+DEFAULT_VAD_BATCHED = True
+DEFAULT_VAD_BATCH_STREAMS = 32  # Number of audio streams scored per forward pass
+DEFAULT_VAD_WARMUP_WINDOWS = 512  # Overlap windows used to settle each stream's RNN state (~16s at 16kHz)
+DEFAULT_VAD_TOLERANCE = 1e-2  # Maximum allowed hand-over deviation between consecutive streams
+VAD_CONVERGENCE_CHECK_WINDOWS = 32  # Trailing warm-up windows compared against the previous stream
+
+# Default streaming VAD configuration
+DEFAULT_STREAM_BLOCK_DURATION = 30.0  # Seconds of audio decoded per block in streaming mode
+
+# Supported VAD inference backends
+VAD_BACKEND_TORCH = "torch"
+VAD_BACKEND_ONNX = "onnx"
+DEFAULT_VAD_BACKEND = VAD_BACKEND_TORCH
+
+# Process-wide VAD model registry: one loaded model per (backend, source), copied once per thread
+_vad_models: Dict[Tuple[str, Optional[str]], Any] = {}
+_vad_models_lock = threading.Lock()
+_vad_thread_local = threading.local()
 
 @torch.no_grad()
 def get_vad_probs(model: torch.nn.Module, audio: np.ndarray, sample_rate: int = 16000) -> List[float]:
@@ -46,41 +78,395 @@ def get_vad_probs(model: torch.nn.Module, audio: np.ndarray, sample_rate: int =
         chunk = audio[current_start_sample: current_start_sample + window_size_samples]
         if len(chunk) < window_size_samples:
             chunk = torch.nn.functional.pad(chunk, (0, int(window_size_samples - len(chunk))))
-        speech_prob = model(chunk, sample_rate).item()
+        speech_prob = float(np.asarray(model(chunk, sample_rate)).reshape(-1)[0])
         speech_probs.append(speech_prob)
 
     return speech_probs
 
-def get_utterances(vad_probs: List[float], threshold: float = 0.5, frame_duration: float = 0.032) -> List[Tuple[float, float]]:
+@torch.no_grad()
+def _score_vad_streams(model: torch.nn.Module, windows: np.ndarray, starts: np.ndarray, steps: int, sample_rate: int) -> np.ndarray:
+    """
+    Run the VAD model over several contiguous window streams in lock-step.
+    
+    Args:
+        model: Silero VAD model
+        windows: Audio windows as a (num_windows, window_size) array
+        starts: Index of the first window of each stream
+        steps: Number of windows to score per stream
+        sample_rate: Audio sample rate
+        
+    Returns:
+        Array of shape (len(starts), steps) with the speech probabilities of each stream
+    """
+    num_windows, window_size = windows.shape
+    
+    # Windows past the end of the audio are scored as silence and discarded by the caller
+    padded = np.concatenate([windows, np.zeros((1, window_size), dtype=np.float32)])
+    indices = starts[:, None] + np.arange(steps)[None, :]
+    indices = np.where(indices < num_windows, indices, num_windows)
+    
+    model.reset_states()
+    probs = np.empty((len(starts), steps), dtype=np.float32)
+    for step in range(steps):
+        batch = torch.from_numpy(padded[indices[:, step]])
+        probs[:, step] = np.asarray(model(batch, sample_rate)).reshape(-1)
+    
+    return probs
+
+def get_vad_probs_batched(
+    model: torch.nn.Module,
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    num_streams: int = DEFAULT_VAD_BATCH_STREAMS,
+    warmup_windows: int = DEFAULT_VAD_WARMUP_WINDOWS,
+    atol: float = DEFAULT_VAD_TOLERANCE
+) -> np.ndarray:
+    """
+    Get speech probability for each audio window, scoring many windows per forward pass.
+    
+    The audio is split into contiguous streams that are fed to the model as one batch,
+    so each forward pass advances every stream by one window. Each stream (except the
+    first) starts ``warmup_windows`` early so that its RNN state settles before its own
+    windows are scored. A stream is accepted once the end of its warm-up agrees with the
+    previous stream within ``atol``; otherwise it is re-scored with a doubled warm-up,
+    down to a full sequential pass from the start of the audio in the worst case.
+    Use compare_vad_probs to measure the end-to-end deviation on real audio.
+    
+    Args:
+        model: Silero VAD model
+        audio: Audio data as numpy array
+        sample_rate: Audio sample rate
+        num_streams: Maximum number of streams scored per forward pass
+        warmup_windows: Number of overlap windows scored before each stream
+        atol: Maximum allowed hand-over deviation between consecutive streams
+        
+    Returns:
+        Array of speech probabilities for each window (same layout as get_vad_probs)
+    """
+    window_size_samples = 512 if sample_rate == 16000 else 256
+    audio = np.asarray(audio, dtype=np.float32)
+    num_windows = math.ceil(len(audio) / window_size_samples)
+    if num_windows == 0:
+        return np.zeros(0, dtype=np.float32)
+    
+    # Pad the tail the same way as the sequential loop and split into windows
+    padded_audio = np.zeros(num_windows * window_size_samples, dtype=np.float32)
+    padded_audio[:len(audio)] = audio
+    windows = padded_audio.reshape(num_windows, window_size_samples)
+    
+    # Keep streams at least as long as the warm-up so every overlap is covered by the previous stream
+    warmup_windows = max(int(warmup_windows), VAD_CONVERGENCE_CHECK_WINDOWS)
+    num_streams = max(1, min(int(num_streams), num_windows // warmup_windows))
+    stream_length = math.ceil(num_windows / num_streams)
+    stream_starts = np.arange(num_streams) * stream_length
+    
+    probs = np.empty(num_windows, dtype=np.float32)
+    pending = np.arange(num_streams)
+    warmup = warmup_windows
+    
+    while len(pending):
+        # Streams whose warm-up would reach the start of the audio are scored exactly from window 0
+        starts = np.maximum(stream_starts[pending] - warmup, 0)
+        offsets = stream_starts[pending] - starts
+        steps = int(np.max(offsets)) + stream_length
+        stream_probs = _score_vad_streams(model, windows, starts, steps, sample_rate)
+        
+        converged = []
+        for row, stream in enumerate(pending):
+            offset = offsets[row]
+            first = stream_starts[stream]
+            end = min(first + stream_length, num_windows)
+            probs[first:end] = stream_probs[row, offset:offset + end - first]
+            
+            if starts[row] == 0:
+                converged.append(True)
+                continue
+            
+            # Compare the end of the warm-up with the previous stream's probabilities
+            check = min(VAD_CONVERGENCE_CHECK_WINDOWS, int(offset))
+            deviation = np.max(np.abs(stream_probs[row, offset - check:offset] - probs[first - check:first]))
+            converged.append(deviation <= atol)
+        
+        pending = pending[~np.array(converged, dtype=bool)]
+        warmup *= 2
+        if len(pending):
+            logger.debug(f"Re-scoring {len(pending)} VAD streams with warm-up of {warmup} windows")
+    
+    return probs
+
+def compare_vad_probs(
+    model: torch.nn.Module,
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    atol: float = DEFAULT_VAD_TOLERANCE,
+    **batch_options
+) -> Tuple[bool, float]:
+    """
+    Check that batched VAD probabilities match the sequential loop.
+    
+    Args:
+        model: Silero VAD model
+        audio: Audio data as numpy array
+        sample_rate: Audio sample rate
+        atol: Maximum allowed absolute difference per window
+        **batch_options: Extra arguments passed to get_vad_probs_batched
+        
+    Returns:
+        Tuple of (within_tolerance, max_abs_difference)
+    """
+    reference = np.asarray(get_vad_probs(model, audio, sample_rate), dtype=np.float32)
+    batched = get_vad_probs_batched(model, audio, sample_rate, atol=atol, **batch_options)
+    max_difference = float(np.max(np.abs(reference - batched))) if len(reference) else 0.0
+    return max_difference <= atol, max_difference
+
+def get_vad_backend_name(model) -> str:
+    """
+    Get the name of the backend a VAD model runs on.
+    
+    Args:
+        model: Silero VAD model
+        
+    Returns:
+        Backend name ("torch" or "onnx")
+    """
+    return VAD_BACKEND_ONNX if isinstance(model, OnnxVADModel) else VAD_BACKEND_TORCH
+
+def detect_speech_probs(
+    model,
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    batched: bool = DEFAULT_VAD_BATCHED
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Get speech probabilities and measure the throughput of the model's backend.
+    
+    Args:
+        model: Silero VAD model (any backend)
+        audio: Audio data as numpy array
+        sample_rate: Audio sample rate
+        batched: Whether to score many VAD windows per forward pass
+        
+    Returns:
+        Tuple of (speech probabilities, stats) where stats contains the backend,
+        audio duration, elapsed time and throughput in audio-seconds per wall-second
+    """
+    start_time = time.perf_counter()
+    if batched:
+        speech_probs = get_vad_probs_batched(model, audio, sample_rate)
+    else:
+        speech_probs = np.asarray(get_vad_probs(model, audio, sample_rate), dtype=np.float32)
+    elapsed = time.perf_counter() - start_time
+    
+    audio_duration = len(audio) / sample_rate
+    stats = {
+        "backend": get_vad_backend_name(model),
+        "batched": batched,
+        "audio_duration": audio_duration,
+        "elapsed": elapsed,
+        "throughput": audio_duration / elapsed if elapsed > 0 else 0.0
+    }
+    logger.info(f"VAD ({stats['backend']} backend) scored {audio_duration:.2f}s of audio in {elapsed:.2f}s "
+                f"({stats['throughput']:.1f} audio-seconds per second)")
+    
+    return speech_probs, stats
+
+def measure_vad_throughput(
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    backends: Optional[List[str]] = None,
+    batched: bool = DEFAULT_VAD_BATCHED,
+    repeats: int = 1
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare the throughput of VAD backends on the same audio.
+    
+    Each backend is loaded (and warmed up by the first run) before timing,
+    and the best of ``repeats`` runs is reported.
+    
+    Args:
+        audio: Audio data as numpy array
+        sample_rate: Audio sample rate
+        backends: Backends to compare (defaults to all supported backends)
+        batched: Whether to score many VAD windows per forward pass
+        repeats: Number of timed runs per backend
+        
+    Returns:
+        Dictionary mapping backend name to its stats (see detect_speech_probs),
+        or to {"error": message} if the backend could not be loaded
+    """
+    results = {}
+    for backend in backends or list(VAD_BACKENDS):
+        try:
+            vad_model = get_vad_model(backend=backend)
+        except Exception as e:
+            results[backend] = {"error": str(e)}
+            continue
+        
+        best_stats = None
+        for _ in range(max(1, repeats)):
+            vad_model.reset_states()
+            _, stats = detect_speech_probs(vad_model, audio, sample_rate, batched=batched)
+            if best_stats is None or stats["elapsed"] < best_stats["elapsed"]:
+                best_stats = stats
+        results[backend] = best_stats
+    
+    return results
+
+def _frame_runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find runs of True values in a boolean frame mask.
+    
+    Args:
+        mask: Boolean array with one value per frame
+        
+    Returns:
+        Tuple of (start_frames, end_frames), with end frames exclusive
+    """
+    edges = np.diff(mask.astype(np.int8), prepend=np.int8(0), append=np.int8(0))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def _speech_frame_runs(vad_probs: np.ndarray, threshold: float, offset_threshold: Optional[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find runs of speech frames, optionally with hysteresis.
+    
+    Args:
+        vad_probs: Array of speech probabilities
+        threshold: Probability above which speech starts (onset)
+        offset_threshold: Probability at or below which speech ends (None to use threshold)
+        
+    Returns:
+        Tuple of (start_frames, end_frames), with end frames exclusive
+    """
+    onset = vad_probs > threshold
+    if offset_threshold is None or offset_threshold >= threshold:
+        return _frame_runs(onset)
+    
+    # With hysteresis, speech is a run above the offset threshold that contains an
+    # onset frame, starting from its first onset frame
+    run_starts, run_ends = _frame_runs(vad_probs > offset_threshold)
+    onset_frames = np.flatnonzero(onset)
+    first_onset = np.searchsorted(onset_frames, run_starts)
+    has_onset = first_onset < len(onset_frames)
+    has_onset[has_onset] = onset_frames[first_onset[has_onset]] < run_ends[has_onset]
+    return onset_frames[first_onset[has_onset]], run_ends[has_onset]
+
+def get_utterance_bounds(
+    vad_probs: List[float],
+    threshold: float = 0.5,
+    frame_duration: float = 0.032,
+    offset_threshold: Optional[float] = None,
+    min_speech_duration: float = 0.0,
+    min_silence_duration: float = 0.0
+) -> np.ndarray:
+    """
+    Extract utterance start and end times from VAD probabilities as an array.
+    
+    Speech starts on the first frame above ``threshold`` and ends on the first
+    frame at or below ``offset_threshold``. Silences shorter than
+    ``min_silence_duration`` are then bridged, and utterances shorter than
+    ``min_speech_duration`` are dropped.
+    
+    Args:
+        vad_probs: List or array of speech probabilities
+        threshold: Threshold for speech detection (onset threshold)
+        frame_duration: Duration of each frame in seconds
+        offset_threshold: Threshold for the end of speech (None to use threshold)
+        min_speech_duration: Minimum utterance duration in seconds
+        min_silence_duration: Minimum silence between utterances in seconds
+        
+    Returns:
+        Array of shape (num_utterances, 2) with the start and end time of each utterance
+    """
+    vad_probs = np.asarray(vad_probs, dtype=np.float32)
+    start_frames, end_frames = _speech_frame_runs(vad_probs, threshold, offset_threshold)
+    
+    if min_silence_duration > 0 and len(start_frames) > 1:
+        keep_gap = (start_frames[1:] - end_frames[:-1]) * frame_duration >= min_silence_duration
+        start_frames = start_frames[np.concatenate(([True], keep_gap))]
+        end_frames = end_frames[np.concatenate((keep_gap, [True]))]
+    
+    if min_speech_duration > 0:
+        keep = (end_frames - start_frames) * frame_duration >= min_speech_duration
+        start_frames, end_frames = start_frames[keep], end_frames[keep]
+    
+    return np.stack((start_frames, end_frames), axis=1) * frame_duration
+
+def get_utterances(
+    vad_probs: List[float],
+    threshold: float = 0.5,
+    frame_duration: float = 0.032,
+    offset_threshold: Optional[float] = None,
+    min_speech_duration: float = 0.0,
+    min_silence_duration: float = 0.0
+) -> List[Tuple[float, float]]:
     """
     Extract utterances (start and end times) based on VAD probabilities.
     
     Args:
-        vad_probs: List of speech probabilities
-        threshold: Threshold for speech detection
+        vad_probs: List or array of speech probabilities
+        threshold: Threshold for speech detection (onset threshold)
         frame_duration: Duration of each frame in seconds
+        offset_threshold: Threshold for the end of speech (None to use threshold)
+        min_speech_duration: Minimum utterance duration in seconds
+        min_silence_duration: Minimum silence between utterances in seconds
         
     Returns:
         List of tuples containing (start_time, end_time) for each utterance
     """
-    utterances = []
-    in_utterance = False
-    utterance_start = 0
+    bounds = get_utterance_bounds(
+        vad_probs, threshold, frame_duration, offset_threshold, min_speech_duration, min_silence_duration
+    )
+    return [tuple(bound) for bound in bounds.tolist()]
 
-    for i, prob in enumerate(vad_probs):
-        if prob > threshold and not in_utterance:
-            in_utterance = True
-            utterance_start = i * frame_duration
-        elif prob <= threshold and in_utterance:
-            in_utterance = False
-            utterance_end = i * frame_duration
-            if utterance_end - utterance_start > 0:
-                utterances.append((utterance_start, utterance_end))
-
-    if in_utterance:
-        utterances.append((utterance_start, len(vad_probs) * frame_duration))
-
-    return utterances
+def merge_segment_bounds(bounds: np.ndarray, max_duration: float = 8, max_gap: float = 1) -> np.ndarray:
+    """
+    Combine segments with pauses shorter than max_gap seconds, with total duration limit.
+    
+    Same result as merge_segments, computed on an array of segment bounds.
+    
+    Args:
+        bounds: Array of shape (num_segments, 2) with sorted (start_time, end_time) rows
+        max_duration: Maximum duration for a combined segment
+        max_gap: Maximum gap between segments to combine
+        
+    Returns:
+        Array of shape (num_merged, 2) with the merged segment bounds
+    """
+    bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 2)
+    if len(bounds) == 0:
+        return bounds
+    
+    starts, ends = bounds[:, 0], bounds[:, 1]
+    num_segments = len(bounds)
+    
+    # Segments separated by a long gap are never combined: find where each run of short gaps ends
+    run_breaks = np.flatnonzero(starts[1:] - ends[:-1] > max_gap) + 1
+    run_ends = np.append(run_breaks, num_segments)
+    run_end = run_ends[np.searchsorted(run_breaks, np.arange(num_segments), side='right')]
+    
+    # For every segment, the first later segment that would push a combined segment
+    # starting there over max_duration (rounding at the boundary is settled with
+    # the same subtraction as the duration check)
+    limit = np.searchsorted(ends, starts + max_duration, side='right')
+    index = np.arange(num_segments)
+    while True:
+        extend = (limit < num_segments) & (ends[np.minimum(limit, num_segments - 1)] - starts <= max_duration)
+        shrink = (limit - 1 > index) & (ends[np.maximum(limit - 1, 0)] - starts > max_duration)
+        if not (extend.any() or shrink.any()):
+            break
+        limit = limit + extend - shrink
+    next_start = np.maximum(np.minimum(limit, run_end), index + 1).tolist()
+    
+    # Follow the chain of merged segment starts from the first segment
+    group_starts = []
+    first = 0
+    while first < num_segments:
+        group_starts.append(first)
+        first = next_start[first]
+    group_starts = np.array(group_starts)
+    group_ends = np.array(next_start)[group_starts] - 1
+    
+    return np.stack((starts[group_starts], ends[group_ends]), axis=1)
 
 def merge_segments(segments: List[Tuple[float, float]], max_duration: float = 8, max_gap: float = 1) -> List[Tuple[float, float]]:
     """
@@ -94,46 +480,267 @@ def merge_segments(segments: List[Tuple[float, float]], max_duration: float = 8,
     Returns:
         List of merged (start_time, end_time) tuples
     """
-    merged_segments = []
-    if not segments:
-        return merged_segments  # Return empty if no segments are found
-
-    current_start, current_end = segments[0]
-
-    for start, end in segments[1:]:
-        combined_duration = (end - current_start)
+    if len(segments) == 0:
+        return []  # Return empty if no segments are found
+    
+    return [tuple(bound) for bound in merge_segment_bounds(segments, max_duration, max_gap).tolist()]
 
-        if (start - current_end <= max_gap) and (combined_duration <= max_duration):
-            current_end = end
-        else:
-            merged_segments.append((current_start, current_end))
-            current_start, current_end = start, end
+class OnnxVADModel:
+    """
+    Silero VAD running on ONNX Runtime.
+    
+    Mirrors the call interface of the TorchScript model (``model(x, sr)`` and
+    ``reset_states()``), so it can be used anywhere a VAD model is expected.
+    Inputs may be numpy arrays or CPU tensors; outputs are numpy arrays of shape
+    (batch_size, 1).
+    """
+    
+    def __init__(self, session):
+        """
+        Initialize the model around an ONNX Runtime inference session.
+        
+        Args:
+            session: onnxruntime.InferenceSession for the Silero VAD ONNX model
+        """
+        self.session = session
+        self.reset_states()
+    
+    def reset_states(self, batch_size: int = 1) -> None:
+        """
+        Reset the RNN state and audio context.
+        
+        Args:
+            batch_size: Number of streams in the next batch
+        """
+        self._state = np.zeros((2, batch_size, 128), dtype=np.float32)
+        self._context = None
+        self._last_sr = 0
+    
+    def __call__(self, x, sr: int) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[None, :]
+        
+        batch_size = x.shape[0]
+        context_size = 64 if sr == 16000 else 32
+        if self._state.shape[1] != batch_size or (self._last_sr and self._last_sr != sr):
+            self.reset_states(batch_size)
+        if self._context is None:
+            self._context = np.zeros((batch_size, context_size), dtype=np.float32)
+        
+        x = np.concatenate([self._context, x], axis=1)
+        out, self._state = self.session.run(None, {
+            "input": x,
+            "state": self._state,
+            "sr": np.array(sr, dtype=np.int64)
+        })
+        self._context = x[:, -context_size:]
+        self._last_sr = sr
+        return out
+    
+    def __deepcopy__(self, memo):
+        # Inference sessions are safe to share between threads; only the state is per-copy
+        return OnnxVADModel(self.session)
 
-    merged_segments.append((current_start, current_end))
-    return merged_segments
+def _create_onnx_session(model_path: str):
+    """
+    Create a single-threaded ONNX Runtime session for the Silero VAD model.
+    
+    Args:
+        model_path: Path to the Silero VAD ONNX model file
+        
+    Returns:
+        onnxruntime.InferenceSession
+    """
+    import onnxruntime
+    
+    options = onnxruntime.SessionOptions()
+    options.inter_op_num_threads = 1
+    options.intra_op_num_threads = 1
+    return onnxruntime.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
 
-def load_vad_model() -> torch.nn.Module:
+def _load_torch_vad_model(model_path: Optional[str] = None) -> torch.nn.Module:
     """
-    Load the Silero VAD model.
+    Load the TorchScript Silero VAD model from a local file or torch.hub.
     
+    Args:
+        model_path: Path to a local TorchScript model file (optional)
+        
     Returns:
-        Loaded VAD model
+        Loaded TorchScript model
     """
-    logger.info("Loading Silero VAD model...")
-    try:
+    if model_path:
+        logger.info(f"Loading Silero VAD model from local file: {model_path}")
+        vad_model = torch.jit.load(model_path, map_location="cpu")
+    else:
+        logger.info("Loading Silero VAD model...")
         vad_model, _ = torch.hub.load(
             repo_or_dir='snakers4/silero-vad',
             model='silero_vad',
             force_reload=False,
             onnx=False
         )
-        vad_model.eval()
-        logger.info("Silero VAD model loaded successfully")
+    vad_model.eval()
+    return vad_model
+
+def _load_onnx_vad_model(model_path: Optional[str] = None) -> OnnxVADModel:
+    """
+    Load the Silero VAD ONNX model from a local file or torch.hub.
+    
+    Args:
+        model_path: Path to a local ONNX model file (optional)
+        
+    Returns:
+        Loaded ONNX Runtime model
+    """
+    if model_path:
+        logger.info(f"Loading Silero VAD ONNX model from local file: {model_path}")
+        return OnnxVADModel(_create_onnx_session(model_path))
+    
+    logger.info("Loading Silero VAD ONNX model...")
+    hub_model, _ = torch.hub.load(
+        repo_or_dir='snakers4/silero-vad',
+        model='silero_vad',
+        force_reload=False,
+        onnx=True
+    )
+    return OnnxVADModel(hub_model.session)
+
+# Loaders for each supported VAD backend
+VAD_BACKENDS = {
+    VAD_BACKEND_TORCH: _load_torch_vad_model,
+    VAD_BACKEND_ONNX: _load_onnx_vad_model
+}
+
+def _resolve_vad_backend(backend: Optional[str], model_path: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Fill in the VAD backend and model path from the VAD configuration.
+    
+    Args:
+        backend: VAD backend name (None to use the configured backend)
+        model_path: Path to a local model file (None to use the configured path for the backend)
+        
+    Returns:
+        Tuple of (backend, model_path)
+    """
+    vad_config = get_vad_config()
+    if backend is None:
+        backend = vad_config.get("backend") or DEFAULT_VAD_BACKEND
+    if backend not in VAD_BACKENDS:
+        raise ValueError(f"Unsupported VAD backend: {backend} (supported: {', '.join(VAD_BACKENDS)})")
+    if model_path is None:
+        model_path = vad_config.get("onnx_model_path" if backend == VAD_BACKEND_ONNX else "model_path")
+    return backend, model_path
+
+def load_vad_model(model_path: Optional[str] = None, backend: Optional[str] = None):
+    """
+    Load the Silero VAD model.
+    
+    Args:
+        model_path: Path to a local model file. If None, uses the configured
+            model path for the backend and falls back to torch.hub.
+        backend: VAD backend ("torch" or "onnx"). If None, uses the configured backend.
+    
+    Returns:
+        Loaded VAD model
+    """
+    backend, model_path = _resolve_vad_backend(backend, model_path)
+    
+    try:
+        vad_model = VAD_BACKENDS[backend](model_path)
+        logger.info(f"Silero VAD model loaded successfully ({backend} backend)")
         return vad_model
     except Exception as e:
         logger.error(f"Error loading VAD model: {e}")
         raise
 
+def preload_vad_model(model_path: Optional[str] = None, backend: Optional[str] = None):
+    """
+    Load the Silero VAD model into the process-wide registry, if not already loaded.
+    
+    Call this at worker start so that requests never pay for model loading.
+    
+    Args:
+        model_path: Path to a local model file (optional)
+        backend: VAD backend ("torch" or "onnx", optional)
+        
+    Returns:
+        The shared VAD model
+    """
+    key = _resolve_vad_backend(backend, model_path)
+    
+    with _vad_models_lock:
+        if key not in _vad_models:
+            _vad_models[key] = load_vad_model(key[1], backend=key[0])
+        return _vad_models[key]
+
+def get_vad_model(model_path: Optional[str] = None, backend: Optional[str] = None):
+    """
+    Get the calling thread's Silero VAD model with its states reset.
+    
+    Each thread gets its own copy of the shared model, so concurrent requests
+    never share RNN state.
+    
+    Args:
+        model_path: Path to a local model file (optional)
+        backend: VAD backend ("torch" or "onnx", optional)
+        
+    Returns:
+        VAD model for the current thread
+    """
+    key = _resolve_vad_backend(backend, model_path)
+    
+    thread_models = getattr(_vad_thread_local, "models", None)
+    if thread_models is None:
+        thread_models = _vad_thread_local.models = {}
+    
+    if key not in thread_models:
+        thread_models[key] = copy.deepcopy(preload_vad_model(key[1], backend=key[0]))
+        logger.debug(f"Created {key[0]} VAD model instance for thread {threading.current_thread().name}")
+    
+    vad_model = thread_models[key]
+    vad_model.reset_states()
+    return vad_model
+
+def save_vad_model(output_path: str, model_path: Optional[str] = None) -> str:
+    """
+    Save the shared TorchScript Silero VAD model to a local file.
+    
+    Point the VAD model_path (SILERO_VAD_MODEL_PATH) at the saved file so
+    containers never need network access to load the model.
+    
+    Args:
+        output_path: Path to save the model file
+        model_path: Path to a local TorchScript model file to load from (optional)
+        
+    Returns:
+        Path to the saved model file
+    """
+    vad_model = preload_vad_model(model_path, backend=VAD_BACKEND_TORCH)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    torch.jit.save(vad_model, output_path)
+    logger.info(f"Saved Silero VAD model to: {output_path}")
+    return output_path
+
+def encode_wav_buffer(audio_data: np.ndarray, sample_rate: int = DEFAULT_SAMPLE_RATE) -> io.BytesIO:
+    """
+    Encode audio samples as an in-memory 16-bit WAV file.
+    
+    Produces the same bytes that segment_audio_with_vad writes to disk, so a
+    segment can be uploaded without touching the filesystem.
+    
+    Args:
+        audio_data: Audio data as numpy array (a view into the decoded audio is fine)
+        sample_rate: Audio sample rate
+        
+    Returns:
+        BytesIO positioned at the start of the WAV data
+    """
+    buffer = io.BytesIO()
+    sf.write(buffer, audio_data, sample_rate, format="WAV", subtype="PCM_16")
+    buffer.seek(0)
+    return buffer
+
 def segment_audio_with_vad(
     audio_path: str, 
     output_dir: str = "vad_segments",
@@ -141,7 +748,12 @@ def segment_audio_with_vad(
     sample_rate: int = DEFAULT_SAMPLE_RATE,
     vad_threshold: float = DEFAULT_VAD_THRESHOLD,
     combine_duration: float = DEFAULT_COMBINE_DURATION,
-    combine_gap: float = DEFAULT_COMBINE_GAP
+    combine_gap: float = DEFAULT_COMBINE_GAP,
+    batched: bool = DEFAULT_VAD_BATCHED,
+    offset_threshold: Optional[float] = DEFAULT_VAD_OFFSET_THRESHOLD,
+    min_speech_duration: float = DEFAULT_MIN_SPEECH_DURATION,
+    min_silence_duration: float = DEFAULT_MIN_SILENCE_DURATION,
+    on_audio: Optional[Callable[[np.ndarray], None]] = None
 ) -> List[Dict[str, Any]]:
     """
     Segment audio file using VAD and save segments to files.
@@ -154,6 +766,11 @@ def segment_audio_with_vad(
         vad_threshold: Threshold for speech detection
         combine_duration: Maximum duration for combined segments
         combine_gap: Maximum gap between segments to combine
+        batched: Whether to score many VAD windows per forward pass
+        offset_threshold: Threshold for the end of speech (None to use vad_threshold)
+        min_speech_duration: Minimum utterance duration in seconds
+        min_silence_duration: Minimum silence between utterances in seconds
+        on_audio: Called with the decoded samples (e.g. to hash them without decoding again)
         
     Returns:
         List of dictionaries containing segment information
@@ -163,8 +780,8 @@ def segment_audio_with_vad(
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
     
-    # Load VAD model
-    vad_model = load_vad_model()
+    # Get this thread's VAD model from the process-wide registry
+    vad_model = get_vad_model()
     
     # Load audio file
     try:
@@ -174,22 +791,30 @@ def segment_audio_with_vad(
     except Exception as e:
         logger.error(f"Error loading audio file: {e}")
         return []
+    if on_audio:
+        on_audio(audio_data)
     
     # Get VAD probabilities
     logger.info("Detecting speech probabilities...")
-    speech_probs = get_vad_probs(vad_model, audio_data, sample_rate)
+    speech_probs, _ = detect_speech_probs(vad_model, audio_data, sample_rate, batched=batched)
     
     # Get utterances
     logger.info(f"Extracting utterances with threshold {vad_threshold}...")
-    utterances = get_utterances(speech_probs, threshold=vad_threshold)
+    utterances = get_utterance_bounds(
+        speech_probs,
+        threshold=vad_threshold,
+        offset_threshold=offset_threshold,
+        min_speech_duration=min_speech_duration,
+        min_silence_duration=min_silence_duration
+    )
     
-    if not utterances:
+    if len(utterances) == 0:
         logger.warning(f"No speech segments detected in {audio_path}")
         return []
     
     # Merge segments
     logger.info(f"Merging segments (max duration: {combine_duration}s, max gap: {combine_gap}s)...")
-    merged_segments = merge_segments(utterances, max_duration=combine_duration, max_gap=combine_gap)
+    merged_segments = merge_segment_bounds(utterances, max_duration=combine_duration, max_gap=combine_gap).tolist()
     
     # Filter segments by minimum duration
     if min_segment_duration > 0:
@@ -244,11 +869,18 @@ def segment_audio_without_saving(
     sample_rate: int = DEFAULT_SAMPLE_RATE,
     vad_threshold: float = DEFAULT_VAD_THRESHOLD,
     combine_duration: float = DEFAULT_COMBINE_DURATION,
-    combine_gap: float = DEFAULT_COMBINE_GAP
+    combine_gap: float = DEFAULT_COMBINE_GAP,
+    batched: bool = DEFAULT_VAD_BATCHED,
+    offset_threshold: Optional[float] = DEFAULT_VAD_OFFSET_THRESHOLD,
+    min_speech_duration: float = DEFAULT_MIN_SPEECH_DURATION,
+    min_silence_duration: float = DEFAULT_MIN_SILENCE_DURATION,
+    min_segment_duration: float = 0.0,
+    on_audio: Optional[Callable[[np.ndarray], None]] = None
 ) -> List[Dict[str, Any]]:
     """
     Segment audio file using VAD without saving segments to disk.
-    Useful for in-memory processing.
+    Useful for in-memory processing: each segment's audio_data is a view into
+    the decoded audio, so no samples are copied.
     
     Args:
         audio_path: Path to the audio file
@@ -256,14 +888,20 @@ def segment_audio_without_saving(
         vad_threshold: Threshold for speech detection
         combine_duration: Maximum duration for combined segments
         combine_gap: Maximum gap between segments to combine
+        batched: Whether to score many VAD windows per forward pass
+        offset_threshold: Threshold for the end of speech (None to use vad_threshold)
+        min_speech_duration: Minimum utterance duration in seconds
+        min_silence_duration: Minimum silence between utterances in seconds
+        min_segment_duration: Minimum duration for segments in seconds
+        on_audio: Called with the decoded samples (e.g. to hash them without decoding again)
         
     Returns:
         List of dictionaries containing segment information and audio data
     """
     logger.info(f"Segmenting audio with VAD (in-memory): {audio_path}")
     
-    # Load VAD model
-    vad_model = load_vad_model()
+    # Get this thread's VAD model from the process-wide registry
+    vad_model = get_vad_model()
     
     # Load audio file
     try:
@@ -273,22 +911,35 @@ def segment_audio_without_saving(
     except Exception as e:
         logger.error(f"Error loading audio file: {e}")
         return []
+    if on_audio:
+        on_audio(audio_data)
     
     # Get VAD probabilities
     logger.info("Detecting speech probabilities...")
-    speech_probs = get_vad_probs(vad_model, audio_data, sample_rate)
+    speech_probs, _ = detect_speech_probs(vad_model, audio_data, sample_rate, batched=batched)
     
     # Get utterances
     logger.info(f"Extracting utterances with threshold {vad_threshold}...")
-    utterances = get_utterances(speech_probs, threshold=vad_threshold)
+    utterances = get_utterance_bounds(
+        speech_probs,
+        threshold=vad_threshold,
+        offset_threshold=offset_threshold,
+        min_speech_duration=min_speech_duration,
+        min_silence_duration=min_silence_duration
+    )
     
-    if not utterances:
+    if len(utterances) == 0:
         logger.warning(f"No speech segments detected in {audio_path}")
         return []
     
     # Merge segments
     logger.info(f"Merging segments (max duration: {combine_duration}s, max gap: {combine_gap}s)...")
-    merged_segments = merge_segments(utterances, max_duration=combine_duration, max_gap=combine_gap)
+    merged_segments = merge_segment_bounds(utterances, max_duration=combine_duration, max_gap=combine_gap).tolist()
+    
+    # Filter segments by minimum duration
+    if min_segment_duration > 0:
+        logger.info(f"Filtering segments with minimum duration: {min_segment_duration}s")
+        merged_segments = [(start, end) for start, end in merged_segments if (end - start) >= min_segment_duration]
     
     logger.info(f"Detected {len(merged_segments)} speech segments")
     
@@ -315,3 +966,332 @@ def segment_audio_without_saving(
         logger.info(f"Extracted segment {i}: {start_time:.2f}s - {end_time:.2f}s ({end_time - start_time:.2f}s)")
     
     return segment_info
+
+def stream_audio_blocks(
+    audio_path: str,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    block_duration: float = DEFAULT_STREAM_BLOCK_DURATION
+) -> Iterator[np.ndarray]:
+    """
+    Decode an audio file to mono float32 at sample_rate, one block at a time.
+    
+    Uses an ffmpeg pipe when ffmpeg is available (any container format), and
+    otherwise soundfile block reads with a streaming soxr resampler. Only one
+    block is held in memory at a time.
+    
+    Args:
+        audio_path: Path to the audio file
+        sample_rate: Target sample rate
+        block_duration: Duration of each decoded block in seconds
+        
+    Yields:
+        Blocks of audio samples as numpy arrays
+    """
+    block_samples = max(1, int(block_duration * sample_rate))
+    
+    if shutil.which("ffmpeg"):
+        command = [
+            "ffmpeg", "-nostdin", "-v", "error", "-i", audio_path,
+            "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "-"
+        ]
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            while True:
+                data = process.stdout.read(block_samples * 4)
+                if not data:
+                    break
+                yield np.frombuffer(data[:len(data) // 4 * 4], dtype=np.float32)
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read().decode(errors="replace").strip()
+            process.stderr.close()
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to decode {audio_path}: {stderr}")
+        return
+    
+    import soxr
+    
+    with sf.SoundFile(audio_path) as audio_file:
+        resampler = None
+        if audio_file.samplerate != sample_rate:
+            resampler = soxr.ResampleStream(audio_file.samplerate, sample_rate, 1, dtype="float32")
+        
+        input_block_samples = max(1, int(block_duration * audio_file.samplerate))
+        for block in audio_file.blocks(blocksize=input_block_samples, dtype="float32", always_2d=True):
+            block = block.mean(axis=1)
+            if resampler is not None:
+                block = resampler.resample_chunk(block)
+            if len(block):
+                yield block
+        
+        if resampler is not None:
+            tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+            if len(tail):
+                yield tail
+
+@torch.no_grad()
+def _score_vad_windows(model, windows: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Score consecutive windows with the VAD model, continuing from its current state.
+    
+    Args:
+        model: Silero VAD model (any backend)
+        windows: Audio windows as a (num_windows, window_size) array
+        sample_rate: Audio sample rate
+        
+    Returns:
+        Array of speech probabilities, one per window
+    """
+    probs = np.empty(len(windows), dtype=np.float32)
+    for i, window in enumerate(windows):
+        probs[i] = np.asarray(model(torch.from_numpy(window), sample_rate)).reshape(-1)[0]
+    return probs
+
+class StreamingSegmenter:
+    """
+    Incremental version of get_utterance_bounds followed by merge_segment_bounds.
+    
+    Speech probabilities are pushed in frame order, and merged segments are
+    returned as soon as no later frame can change them. Feeding all frames of a
+    file gives the same segments as the batch functions.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = DEFAULT_VAD_THRESHOLD,
+        frame_duration: float = 0.032,
+        offset_threshold: Optional[float] = DEFAULT_VAD_OFFSET_THRESHOLD,
+        min_speech_duration: float = DEFAULT_MIN_SPEECH_DURATION,
+        min_silence_duration: float = DEFAULT_MIN_SILENCE_DURATION,
+        max_duration: float = DEFAULT_COMBINE_DURATION,
+        max_gap: float = DEFAULT_COMBINE_GAP
+    ):
+        """
+        Initialize the segmenter.
+        
+        Args:
+            threshold: Threshold for speech detection (onset threshold)
+            frame_duration: Duration of each frame in seconds
+            offset_threshold: Threshold for the end of speech (None to use threshold)
+            min_speech_duration: Minimum utterance duration in seconds
+            min_silence_duration: Minimum silence between utterances in seconds
+            max_duration: Maximum duration for a combined segment
+            max_gap: Maximum gap between segments to combine
+        """
+        self.threshold = threshold
+        self.offset_threshold = threshold if offset_threshold is None else min(offset_threshold, threshold)
+        self.frame_duration = frame_duration
+        self.min_speech_duration = min_speech_duration
+        self.min_silence_duration = min_silence_duration
+        self.max_duration = max_duration
+        self.max_gap = max_gap
+        
+        self.num_frames = 0
+        self.run_start = None      # Start frame of the speech run in progress
+        self.pending_run = None    # Closed run that a short silence may still extend (frames)
+        self.group = None          # Merged segment that later utterances may still join (seconds)
+    
+    def push(self, probs: np.ndarray) -> List[Tuple[float, float]]:
+        """
+        Add the next speech probabilities.
+        
+        Args:
+            probs: Speech probabilities for the next frames
+            
+        Returns:
+            List of (start_time, end_time) tuples for segments that closed
+        """
+        closed = []
+        for prob in np.asarray(probs, dtype=np.float32).tolist():
+            frame = self.num_frames
+            self.num_frames += 1
+            if self.run_start is None:
+                if prob > self.threshold:
+                    self.run_start = frame
+            elif prob <= self.offset_threshold:
+                self._close_run(self.run_start, frame, closed)
+                self.run_start = None
+        
+        self._flush_settled(closed)
+        return closed
+    
+    def finish(self) -> List[Tuple[float, float]]:
+        """
+        Close everything still open at the end of the audio.
+        
+        Returns:
+            List of (start_time, end_time) tuples for the remaining segments
+        """
+        closed = []
+        if self.run_start is not None:
+            self._close_run(self.run_start, self.num_frames, closed)
+            self.run_start = None
+        if self.pending_run is not None:
+            self._add_utterance(*self.pending_run, closed)
+            self.pending_run = None
+        if self.group is not None:
+            closed.append(self.group)
+            self.group = None
+        return closed
+    
+    def earliest_open_time(self) -> float:
+        """
+        Get the earliest time that a segment not yet returned can start at.
+        
+        Returns:
+            Time in seconds; audio before it is no longer needed
+        """
+        if self.group is not None:
+            return self.group[0]
+        return self._earliest_start_frame() * self.frame_duration
+    
+    def _earliest_start_frame(self) -> int:
+        if self.pending_run is not None:
+            return self.pending_run[0]
+        if self.run_start is not None:
+            return self.run_start
+        return self.num_frames
+    
+    def _close_run(self, start: int, end: int, closed: List[Tuple[float, float]]) -> None:
+        # Bridge silences shorter than min_silence_duration
+        if self.pending_run is not None:
+            if (start - self.pending_run[1]) * self.frame_duration >= self.min_silence_duration:
+                self._add_utterance(*self.pending_run, closed)
+                self.pending_run = (start, end)
+            else:
+                self.pending_run = (self.pending_run[0], end)
+        else:
+            self.pending_run = (start, end)
+    
+    def _add_utterance(self, start: int, end: int, closed: List[Tuple[float, float]]) -> None:
+        if (end - start) * self.frame_duration < self.min_speech_duration:
+            return
+        
+        start_time, end_time = start * self.frame_duration, end * self.frame_duration
+        if self.group is not None:
+            group_start, group_end = self.group
+            if start_time - group_end <= self.max_gap and end_time - group_start <= self.max_duration:
+                self.group = (group_start, end_time)
+                return
+            closed.append(self.group)
+        self.group = (start_time, end_time)
+    
+    def _flush_settled(self, closed: List[Tuple[float, float]]) -> None:
+        # A pending run is final once the silence after it can no longer be bridged
+        if self.pending_run is not None and self.run_start is None:
+            if (self.num_frames - self.pending_run[1]) * self.frame_duration >= self.min_silence_duration:
+                self._add_utterance(*self.pending_run, closed)
+                self.pending_run = None
+        
+        # A merged segment is final once no later utterance can join it
+        if self.group is not None:
+            next_start = self._earliest_start_frame() * self.frame_duration
+            if next_start - self.group[1] > self.max_gap or next_start - self.group[0] > self.max_duration:
+                closed.append(self.group)
+                self.group = None
+
+def stream_vad_segments(
+    audio_path: str,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    vad_threshold: float = DEFAULT_VAD_THRESHOLD,
+    combine_duration: float = DEFAULT_COMBINE_DURATION,
+    combine_gap: float = DEFAULT_COMBINE_GAP,
+    offset_threshold: Optional[float] = DEFAULT_VAD_OFFSET_THRESHOLD,
+    min_speech_duration: float = DEFAULT_MIN_SPEECH_DURATION,
+    min_silence_duration: float = DEFAULT_MIN_SILENCE_DURATION,
+    min_segment_duration: float = 0.0,
+    block_duration: float = DEFAULT_STREAM_BLOCK_DURATION,
+    on_audio: Optional[Callable[[np.ndarray], None]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Segment an audio file with VAD while it is being decoded.
+    
+    The file is decoded and scored block by block, and each segment is yielded
+    as soon as it closes, so memory stays flat regardless of input length and
+    callers can start working on early segments before decoding finishes.
+    Segments have the same fields as segment_audio_without_saving.
+    
+    Args:
+        audio_path: Path to the audio file
+        sample_rate: Sample rate for audio processing
+        vad_threshold: Threshold for speech detection
+        combine_duration: Maximum duration for combined segments
+        combine_gap: Maximum gap between segments to combine
+        offset_threshold: Threshold for the end of speech (None to use vad_threshold)
+        min_speech_duration: Minimum utterance duration in seconds
+        min_silence_duration: Minimum silence between utterances in seconds
+        min_segment_duration: Minimum duration for segments in seconds
+        block_duration: Duration of each decoded block in seconds
+        on_audio: Called with each decoded block, in order (e.g. to hash the audio without decoding it again)
+        
+    Yields:
+        Dictionaries containing segment information and audio data
+    """
+    logger.info(f"Segmenting audio with streaming VAD: {audio_path}")
+    
+    window_size_samples = 512 if sample_rate == 16000 else 256
+    vad_model = get_vad_model()
+    segmenter = StreamingSegmenter(
+        threshold=vad_threshold,
+        frame_duration=window_size_samples / sample_rate,
+        offset_threshold=offset_threshold,
+        min_speech_duration=min_speech_duration,
+        min_silence_duration=min_silence_duration,
+        max_duration=combine_duration,
+        max_gap=combine_gap
+    )
+    
+    # Decoded audio still needed for open segments, starting at sample buffer_start
+    buffer = np.zeros(0, dtype=np.float32)
+    buffer_start = 0
+    scored_samples = 0
+    segment_count = 0
+    
+    def make_segments(bounds):
+        nonlocal segment_count
+        for start_time, end_time in bounds:
+            if end_time - start_time < min_segment_duration:
+                continue
+            start_sample, end_sample = int(start_time * sample_rate), int(end_time * sample_rate)
+            segment = {
+                "segment_id": f"seg_{segment_count:03d}",
+                "start_time": start_time,
+                "end_time": end_time,
+                "duration": end_time - start_time,
+                "audio_data": buffer[max(start_sample - buffer_start, 0):end_sample - buffer_start].copy(),
+                "sample_rate": sample_rate
+            }
+            logger.info(f"Closed segment {segment_count}: {start_time:.2f}s - {end_time:.2f}s ({end_time - start_time:.2f}s)")
+            segment_count += 1
+            yield segment
+    
+    for block in stream_audio_blocks(audio_path, sample_rate, block_duration):
+        if on_audio:
+            on_audio(block)
+        buffer = np.concatenate([buffer, block])
+        
+        # Score every complete window; a partial window waits for the next block
+        buffer_end = buffer_start + len(buffer)
+        num_windows = (buffer_end - scored_samples) // window_size_samples
+        if num_windows:
+            offset = scored_samples - buffer_start
+            windows = buffer[offset:offset + num_windows * window_size_samples].reshape(num_windows, window_size_samples)
+            scored_samples += num_windows * window_size_samples
+            yield from make_segments(segmenter.push(_score_vad_windows(vad_model, windows, sample_rate)))
+        
+        # Drop audio that no open segment can reach
+        keep_from = min(int(segmenter.earliest_open_time() * sample_rate), scored_samples)
+        if keep_from > buffer_start:
+            buffer = buffer[keep_from - buffer_start:].copy()
+            buffer_start = keep_from
+    
+    # Pad the final partial window the same way as the batch path
+    closed = []
+    remainder = buffer[scored_samples - buffer_start:]
+    if len(remainder):
+        window = np.zeros((1, window_size_samples), dtype=np.float32)
+        window[0, :len(remainder)] = remainder
+        closed = segmenter.push(_score_vad_windows(vad_model, window, sample_rate))
+    
+    yield from make_segments(closed + segmenter.finish())
+    logger.info(f"Streaming VAD detected {segment_count} speech segments in {(buffer_start + len(buffer)) / sample_rate:.2f}s of audio")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Script to compare the time stretch engines on local audio files.
+Reports the wall time of adjust_segment_duration and how far each output lands
+from the requested duration, for a range of speed factors.
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.time_aligned_tts import TIME_STRETCH_ENGINES, measure_time_stretch
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare time stretch engines on audio files')
+    parser.add_argument('audio_files', nargs='+', help='Synthesized speech files to stretch')
+    parser.add_argument('--engines', nargs='+', default=list(TIME_STRETCH_ENGINES), choices=list(TIME_STRETCH_ENGINES), help='Time stretch engines to compare')
+    parser.add_argument('--speed-factors', nargs='+', type=float, default=[0.9, 1.1, 1.3, 1.6], help='Speed factors to stretch each file by')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs per engine and speed factor (best run is reported)')
+    parser.add_argument('--output', help='Path to save the results as JSON')
+
+    args = parser.parse_args()
+
+    results = {}
+    for audio_path in args.audio_files:
+        if not os.path.exists(audio_path):
+            logger.error(f"Audio file not found: {audio_path}")
+            return 1
+
+        duration = sf.info(audio_path).duration
+        target_durations = [duration / speed_factor for speed_factor in args.speed_factors]
+        results[audio_path] = measure_time_stretch(
+            audio_path,
+            target_durations,
+            engines=args.engines,
+            repeats=args.repeats
+        )
+
+        print(f"\n{audio_path} ({duration:.1f}s)")
+        for engine, runs in results[audio_path].items():
+            for run in runs:
+                if "error" in run:
+                    print(f"  {engine:>6} -> {run['target_duration']:6.2f}s: failed ({run['error']})")
+                else:
+                    print(f"  {engine:>6} x{run['speed_factor']:.2f}: {run['elapsed'] * 1000:7.1f} ms, "
+                          f"duration error {run['duration_error'] * 1000:6.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Saved results to: {args.output}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Script to compare the throughput of the VAD backends on local audio files.
+Reports audio-seconds processed per wall-second for each backend.
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+import librosa
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.vad_segmentation import VAD_BACKENDS, DEFAULT_SAMPLE_RATE, measure_vad_throughput
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare VAD backend throughput on audio files')
+    parser.add_argument('audio_files', nargs='+', help='Audio files to score')
+    parser.add_argument('--backends', nargs='+', default=list(VAD_BACKENDS), choices=list(VAD_BACKENDS), help='VAD backends to compare')
+    parser.add_argument('--sequential', action='store_true', help='Score one window per forward pass instead of batching')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs per backend (best run is reported)')
+    parser.add_argument('--output', help='Path to save the results as JSON')
+    
+    args = parser.parse_args()
+    
+    results = {}
+    for audio_path in args.audio_files:
+        if not os.path.exists(audio_path):
+            logger.error(f"Audio file not found: {audio_path}")
+            return 1
+        
+        audio_data, _ = librosa.load(audio_path, sr=DEFAULT_SAMPLE_RATE)
+        results[audio_path] = measure_vad_throughput(
+            audio_data,
+            DEFAULT_SAMPLE_RATE,
+            backends=args.backends,
+            batched=not args.sequential,
+            repeats=args.repeats
+        )
+        
+        print(f"\n{audio_path} ({len(audio_data) / DEFAULT_SAMPLE_RATE:.1f}s)")
+        for backend, stats in results[audio_path].items():
+            if "error" in stats:
+                print(f"  {backend:>6}: failed to load ({stats['error']})")
+            else:
+                print(f"  {backend:>6}: {stats['throughput']:8.1f} audio-s/s ({stats['elapsed']:.2f}s)")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Saved results to: {args.output}")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for tests that need synthesized audio and session files.
+Tests write tones instead of real speech, and sessions hold only the
+diarization files and audio a test asks for.
+"""
+
+import os
+import json
+
+import numpy as np
+import soundfile as sf
+
+def write_tone(path, seconds, frequency=220, sample_rate=16000, amplitude=0.2, channels=1):
+    """
+    Write a sine tone as 16-bit WAV.
+
+    Args:
+        path: File to write
+        seconds: Length of the tone
+        frequency: Pitch of the tone in Hz
+        sample_rate: Sample rate of the file
+        amplitude: Peak amplitude
+        channels: Channel count (every channel gets the same tone)
+
+    Returns:
+        np.ndarray: The samples as written, read back as float32 with shape (samples, channels)
+    """
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    audio = amplitude * np.sin(2 * np.pi * frequency * t)
+    if channels > 1:
+        audio = np.stack([audio] * channels, axis=1)
+    sf.write(path, audio, sample_rate, subtype="PCM_16")
+    return sf.read(path, dtype="float32", always_2d=True)[0]
+
+def create_session(output_dir, segments, tones=None, sample_rate=16000, session_id="session_abc",
+                   diarization_files=("diarization.json",)):
+    """
+    Write a session directory with its diarization and synthesized segments.
+
+    Args:
+        output_dir: Base output directory
+        segments: Diarization segments
+        tones: Segment ID -> seconds, or (seconds, frequency), of the tone written to tts/segment_<ID>.wav
+        sample_rate: Sample rate of the tones
+        session_id: Session ID
+        diarization_files: Names of the diarization files to write the segments to
+
+    Returns:
+        Tuple[str, str]: Session directory and its tts directory
+    """
+    session_dir = os.path.join(output_dir, session_id)
+    tts_dir = os.path.join(session_dir, "tts")
+    os.makedirs(tts_dir)
+    for name in diarization_files:
+        with open(os.path.join(session_dir, name), "w") as f:
+            json.dump({"segments": segments}, f)
+    for segment_id, tone in (tones or {}).items():
+        seconds, frequency = tone if isinstance(tone, tuple) else (tone, 220)
+        write_tone(os.path.join(tts_dir, f"segment_{segment_id}.wav"), seconds, frequency, sample_rate)
+    return session_dir, tts_dir
@@ -8,6 +8,7 @@ import os
 import sys
 import json
 import logging
+import tempfile
 from pathlib import Path
 from pydub import AudioSegment
 
@@ -37,9 +38,8 @@ def create_test_audio(duration_ms, output_path):
 def test_algorithm_logic():
     """Test the core algorithm logic for time-aligned TTS."""
     
-    # Create output directory
-    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
-    os.makedirs(output_dir, exist_ok=True)
+    # Create a temporary output directory
+    output_dir = tempfile.mkdtemp(prefix="algorithm_logic_")
     
     # Test cases for different duration ratios
     test_cases = [
@@ -130,9 +130,8 @@ def test_algorithm_logic():
 def test_segment_merging():
     """Test the logic for merging audio segments with correct timing."""
     
-    # Create output directory
-    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
-    os.makedirs(output_dir, exist_ok=True)
+    # Create a temporary output directory
+    output_dir = tempfile.mkdtemp(prefix="algorithm_logic_")
     
     # Create test segments
     segments = [
@@ -42,9 +42,8 @@ def create_test_audio(duration_seconds=3.0, output_path=None):
 
 def test_speedup(source_duration=3.0, target_duration=2.0):
     """Test speeding up audio (source_duration > target_duration)."""
-    # Create test directory
-    test_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-    os.makedirs(test_dir, exist_ok=True)
+    # Create a temporary test directory
+    test_dir = tempfile.mkdtemp(prefix="audio_speedup_")
     
     # Create input file
     input_file = os.path.join(test_dir, f"test_speedup_input_{source_duration:.1f}s.wav")
@@ -70,9 +69,8 @@ def test_speedup(source_duration=3.0, target_duration=2.0):
 
 def test_slowdown(source_duration=2.0, target_duration=3.0):
     """Test slowing down audio (source_duration < target_duration)."""
-    # Create test directory
-    test_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-    os.makedirs(test_dir, exist_ok=True)
+    # Create a temporary test directory
+    test_dir = tempfile.mkdtemp(prefix="audio_speedup_")
     
     # Create input file
     input_file = os.path.join(test_dir, f"test_slowdown_input_{source_duration:.1f}s.wav")
@@ -98,9 +96,8 @@ def test_slowdown(source_duration=2.0, target_duration=3.0):
 
 def test_extreme_speedup(source_duration=10.0, target_duration=2.0):
     """Test extreme speedup (factor > 2.0, requiring chained atempo filters)."""
-    # Create test directory
-    test_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-    os.makedirs(test_dir, exist_ok=True)
+    # Create a temporary test directory
+    test_dir = tempfile.mkdtemp(prefix="audio_speedup_")
     
     # Create input file
     input_file = os.path.join(test_dir, f"test_extreme_speedup_input_{source_duration:.1f}s.wav")
@@ -126,9 +123,8 @@ def test_extreme_speedup(source_duration=10.0, target_duration=2.0):
 
 def test_extreme_slowdown(source_duration=1.0, target_duration=5.0):
     """Test extreme slowdown (factor < 0.5, requiring chained atempo filters)."""
-    # Create test directory
-    test_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-    os.makedirs(test_dir, exist_ok=True)
+    # Create a temporary test directory
+    test_dir = tempfile.mkdtemp(prefix="audio_speedup_")
     
     # Create input file
     input_file = os.path.join(test_dir, f"test_extreme_slowdown_input_{source_duration:.1f}s.wav")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test script for replaying requests as background jobs.
+This script checks that an async=true request posted as a form (or multipart
+upload) is replayed in the job with its full body and query string, and that
+endpoints that create a session get the session ID the job was submitted under.
+The job queue is replaced with a stand-in that runs jobs right away.
+"""
+
+import io
+import os
+import sys
+import logging
+from unittest.mock import patch
+
+from flask import g, jsonify, request
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class ImmediateJobQueue:
+    """Runs each submitted job in the calling thread and keeps its result."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, job_type, fn, *args, session_id=None, status_callback=None, **kwargs):
+        self.jobs.append({"job_type": job_type, "session_id": session_id, "result": fn(*args, **kwargs)})
+        return f"job_{len(self.jobs)}"
+
+def echo_request():
+    """View that reports what the replayed request carried."""
+    return jsonify({
+        "form": request.form.to_dict(),
+        "args": request.args.to_dict(),
+        "files": {name: upload.read().decode() for name, upload in request.files.items()},
+        "job_session_id": g.get("job_session_id")
+    })
+
+def submit(view, path, **kwargs):
+    """Call a decorated view for a request and return (response, jobs run)."""
+    queue = ImmediateJobQueue()
+    with patch.object(app_module, "get_job_queue", return_value=queue), \
+         app_module.app.test_request_context(path, method="POST", **kwargs):
+        response = app_module.app.make_response(view())
+    return response, queue.jobs
+
+def test_form_request_replayed_with_body_and_query():
+    """A form post with async=true reaches the job with its fields and query string."""
+    view = app_module.run_as_background_job("translation")(echo_request)
+    response, jobs = submit(view, "/api/translate?target_language=telugu",
+                            data={"async": "true", "session_id": "session_abc", "video_url": "https://youtu.be/abc"})
+
+    assert response.status_code == 202 and response.get_json()["session_id"] == "session_abc"
+    assert len(jobs) == 1 and jobs[0]["session_id"] == "session_abc"
+    result = jobs[0]["result"]
+    assert result["form"] == {"async": "true", "session_id": "session_abc", "video_url": "https://youtu.be/abc"}
+    assert result["args"] == {"target_language": "telugu"}
+    assert result["job_session_id"] is None
+
+def test_multipart_request_gets_new_session_id():
+    """A multipart upload keeps its file, and a new-session endpoint runs under the ID it returned."""
+    view = app_module.run_as_background_job("video_processing", new_session=True)(echo_request)
+    response, jobs = submit(view, "/api/process_video_url", content_type="multipart/form-data",
+                            data={"async": "true", "audio": (io.BytesIO(b"RIFF"), "audio.wav")})
+
+    session_id = response.get_json()["session_id"]
+    assert session_id and jobs[0]["session_id"] == session_id
+    result = jobs[0]["result"]
+    assert result["form"] == {"async": "true"} and result["files"] == {"audio": "RIFF"}
+    assert result["job_session_id"] == session_id
+
+if __name__ == "__main__":
+    test_form_request_replayed_with_body_and_query()
+    test_multipart_request_gets_new_session_id()
+    logger.info("All background job replay tests passed")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test script for the sample-buffer stitcher.
+This script checks that stitch_time_aligned_segments places every segment at its
+sample offset in one preallocated buffer, loops and adds the background music,
+and writes the result once as 44.1 kHz 16-bit WAV.
+"""
+
+import os
+import sys
+import json
+import logging
+import tempfile
+
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.time_aligned_tts import stitch_time_aligned_segments
+from utils.metadata_manager import update_metadata_field, flush_metadata
+from audio_fixtures import create_session as create_session_files, write_tone
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 44100
+
+def create_session(output_dir, background):
+    """Write two aligned segments, their timing and optionally a background stem."""
+    segments = [
+        {"segment_id": segment_id, "status": "success", "start_time": start, "end_time": start + seconds}
+        for segment_id, start, seconds in [("seg_000", 0.5, 1.0), ("seg_001", 1.2, 0.8)]
+    ]
+    session_dir, _ = create_session_files(output_dir, segments)
+    os.makedirs(os.path.join(session_dir, "synthesis"))
+    os.makedirs(os.path.join(session_dir, "music"))
+
+    audio = {}
+    for segment, frequency in zip(segments, (220, 330)):
+        path = os.path.join(session_dir, "synthesis", f"{segment['segment_id']}_time_aligned.wav")
+        audio[segment["segment_id"]] = write_tone(path, segment["end_time"] - segment["start_time"], frequency, SAMPLE_RATE)
+        segment["output_file"] = path
+
+    if background:
+        audio["background"] = write_tone(os.path.join(session_dir, "music", "background.wav"), 0.7, 110, SAMPLE_RATE,
+                                         amplitude=0.05, channels=2)
+        with open(os.path.join(session_dir, "music", "metadata.json"), "w") as f:
+            json.dump({"analysis": {"has_significant_background": True}, "stats": {"background_rms_db": -30}}, f)
+        update_metadata_field("session_abc", "preserve_background_music", True, output_dir)
+        flush_metadata("session_abc", output_dir)
+
+    return {"segments": segments}, audio
+
+def expected_speech(audio, duration):
+    canvas = np.zeros((int(duration * SAMPLE_RATE), 1), dtype=np.float32)
+    canvas[int(0.5 * SAMPLE_RATE):int(0.5 * SAMPLE_RATE) + len(audio["seg_000"])] += audio["seg_000"]
+    canvas[int(1.2 * SAMPLE_RATE):int(1.2 * SAMPLE_RATE) + len(audio["seg_001"])] += audio["seg_001"]
+    return canvas
+
+def test_segments_added_at_sample_offsets():
+    """Overlapping segments are summed at their offsets and trimmed to the timing."""
+    with tempfile.TemporaryDirectory() as output_dir:
+        alignment_metadata, audio = create_session(output_dir, background=False)
+        output_file = os.path.join(output_dir, "out.wav")
+
+        assert stitch_time_aligned_segments("session_abc", output_dir, alignment_metadata, output_file=output_file) == output_file
+
+        info = sf.info(output_file)
+        assert info.samplerate == SAMPLE_RATE and info.subtype == "PCM_16"
+        output, _ = sf.read(output_file, dtype="float32", always_2d=True)
+        expected = expected_speech(audio, 2.0 + 1.5)
+        assert output.shape == expected.shape
+        assert np.abs(output - expected).max() < 2 / 32768
+
+def test_background_looped_and_mixed():
+    """A short stereo background is looped to the canvas length and added to every channel."""
+    with tempfile.TemporaryDirectory() as output_dir:
+        alignment_metadata, audio = create_session(output_dir, background=True)
+        output_file = os.path.join(output_dir, "out.wav")
+
+        stitch_time_aligned_segments("session_abc", output_dir, alignment_metadata, output_file=output_file)
+
+        output, _ = sf.read(output_file, dtype="float32", always_2d=True)
+        speech = expected_speech(audio, 2.0 + 1.5)
+        background = np.tile(audio["background"], (6, 1))[:len(speech)]
+        assert output.shape == (len(speech), 2)
+        assert np.abs(output - (speech + background)).max() < 2 / 32768
+
+if __name__ == "__main__":
+    test_segments_added_at_sample_offsets()
+    test_background_looped_and_mixed()
+    logger.info("All canvas stitcher tests passed")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for concurrent per-segment diarization.
+This script checks that VAD segments are transcribed concurrently under the
+concurrency cap and that results are combined in segment order. The VAD model
+and the Sarvam jobs are replaced with stand-ins, so no network access is needed.
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import tempfile
+from unittest.mock import patch
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import sarvam_speech, vad_segmentation
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+class EnergyVADModel:
+    """Stateless stand-in for Silero VAD that marks loud windows as speech."""
+
+    def reset_states(self, batch_size=1):
+        pass
+
+    def __call__(self, x, sr):
+        x = np.asarray(x, dtype=np.float32).reshape(-1, 512)
+        return (np.sqrt(np.mean(x ** 2, axis=1, keepdims=True)) > 0.05).astype(np.float32)
+
+def create_test_file(directory, num_segments=12):
+    """Write a file with one loud burst every three seconds."""
+    rng = np.random.default_rng(0)
+    audio = 0.001 * rng.standard_normal((num_segments * 3 + 1) * SAMPLE_RATE).astype(np.float32)
+    for i in range(num_segments):
+        start = (i * 3 + 1) * SAMPLE_RATE
+        audio[start:start + int(1.5 * SAMPLE_RATE)] += 0.3 * rng.standard_normal(int(1.5 * SAMPLE_RATE)).astype(np.float32)
+    audio_path = os.path.join(directory, "session123.wav")
+    sf.write(audio_path, audio, SAMPLE_RATE)
+    return audio_path
+
+def run_transcription(max_concurrent, streaming=False):
+    """Transcribe the test file with fake segment jobs of random length."""
+    in_flight = []
+    peak = [0]
+
+    async def fake_process(audio_path, api_key=None, audio_data=None, audio_duration=None):
+        in_flight.append(audio_path)
+        peak[0] = max(peak[0], len(in_flight))
+        await asyncio.sleep(random.uniform(0.05, 0.2))
+        in_flight.remove(audio_path)
+        index = int(os.path.basename(audio_path)[8:11])
+        return {"transcript": f"text {index}", "segments": [{"text": f"text {index}", "speaker": "SPEAKER_00", "start": 0.0, "end": 1.0}]}
+
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch.object(vad_segmentation, "get_vad_model", return_value=EnergyVADModel()), \
+         patch.object(sarvam_speech, "process_audio_with_diarization", side_effect=fake_process):
+        audio_path = create_test_file(temp_dir)
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            start_time = time.perf_counter()
+            result = asyncio.run(sarvam_speech.transcribe_with_vad_diarization(
+                audio_path, api_key="test-key", vad_segments_dir=os.path.join(temp_dir, "vad_segments"),
+                save_segments=False, streaming=streaming, max_concurrent=max_concurrent
+            ))
+            elapsed = time.perf_counter() - start_time
+        finally:
+            os.chdir(cwd)
+
+    return result, peak[0], elapsed
+
+def test_segments_run_concurrently_under_cap():
+    """Jobs overlap up to the cap, and the transcript stays in segment order."""
+    result, peak, elapsed = run_transcription(max_concurrent=4)
+    logger.info(f"Peak concurrency {peak}, elapsed {elapsed:.2f}s")
+
+    assert peak == 4
+    assert result["transcript"] == " ".join(f"text {i}" for i in range(12))
+    assert [segment["start_time"] for segment in result["segments"]] == sorted(segment["start_time"] for segment in result["segments"])
+
+def test_streaming_segments_run_concurrently():
+    """Streaming mode dispatches closed segments without waiting for earlier jobs."""
+    result, peak, _ = run_transcription(max_concurrent=3, streaming=True)
+
+    assert 1 < peak <= 3
+    assert result["transcript"] == " ".join(f"text {i}" for i in range(12))
+
+def test_sequential_with_cap_of_one():
+    """A cap of one restores the sequential behaviour."""
+    result, peak, _ = run_transcription(max_concurrent=1)
+
+    assert peak == 1
+    assert result["transcript"].startswith("text 0 text 1")
+
+if __name__ == "__main__":
+    test_segments_run_concurrently_under_cap()
+    test_streaming_segments_run_concurrently()
+    test_sequential_with_cap_of_one()
+    logger.info("All concurrent diarization tests passed")
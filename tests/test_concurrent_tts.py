@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for concurrent speech synthesis.
+This script checks the per-provider retry policy and that TTSProcessor synthesizes
+segments in parallel while returning results in timeline order. Provider HTTP
+sessions and synthesis calls are replaced with stand-ins, so no network access
+is needed.
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+import threading
+from unittest.mock import patch
+
+import pytest
+import requests
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import provider_request
+from modules.tts_processor import TTSProcessor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class FakeSession:
+    """Returns (or raises) the queued outcomes in order."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+def send(outcomes, provider="cartesia"):
+    session = FakeSession(outcomes)
+    sleeps = []
+    with patch.object(provider_request, "get_http_session", return_value=session), \
+         patch.object(provider_request.time, "sleep", side_effect=sleeps.append):
+        response = provider_request.send_provider_request(provider, "POST", "https://example.com/tts")
+    return response, session.calls, sleeps
+
+def test_retries_transient_errors_with_backoff():
+    """429 and 5xx responses and connection errors are retried with exponential backoff."""
+    response, calls, sleeps = send([
+        FakeResponse(429), requests.ConnectionError("reset"), FakeResponse(503), FakeResponse(200)
+    ])
+
+    assert response.status_code == 200
+    assert calls == 4
+    assert sleeps == [1.0, 2.0, 4.0]
+
+def test_honours_retry_after_and_gives_up():
+    """Retry-After overrides the backoff, and the last response is returned once retries run out."""
+    response, calls, sleeps = send([FakeResponse(429, {"Retry-After": "7"})] * 3, provider="openai")
+
+    assert response.status_code == 429
+    assert calls == 3
+    assert sleeps == [7.0, 7.0]
+
+def test_client_errors_are_not_retried():
+    """Other error responses are returned straight away."""
+    response, calls, sleeps = send([FakeResponse(400)])
+
+    assert response.status_code == 400
+    assert calls == 1 and sleeps == []
+
+def test_connection_error_raised_after_retries():
+    """A connection error on the last attempt is raised to the caller."""
+    with pytest.raises(requests.ConnectionError):
+        send([requests.ConnectionError("down")] * 4)
+
+def test_segments_synthesized_concurrently_in_order():
+    """Segments run in parallel, up to max_workers, and results keep the task order."""
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def fake_synthesize(segment, output_path, duration):
+        with lock:
+            active.append(segment["segment_id"])
+            peak.append(len(active))
+        # Later segments finish first
+        time.sleep(0.05 * (6 - int(segment["segment_id"])))
+        with lock:
+            active.remove(segment["segment_id"])
+        return segment["segment_id"] != "3"
+
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch("modules.tts_processor.get_tts_concurrency_config", return_value={"max_workers": 4}):
+        processor = TTSProcessor(output_dir=temp_dir, provider="sarvam", language="telugu")
+        with patch.object(processor, "synthesize_segment_with_duration", side_effect=fake_synthesize):
+            tasks = [({"segment_id": str(i)}, os.path.join(temp_dir, f"{i}.wav"), 1) for i in range(6)]
+            started = time.monotonic()
+            results = processor.synthesize_segments_concurrently(tasks)
+            elapsed = time.monotonic() - started
+
+    assert results == [True, True, True, False, True, True]
+    assert max(peak) == 4
+    assert elapsed < 0.05 * sum(range(1, 7))
+
+if __name__ == "__main__":
+    test_retries_transient_errors_with_backoff()
+    test_honours_retry_after_and_gives_up()
+    test_client_errors_are_not_retried()
+    test_connection_error_raised_after_retries()
+    test_segments_synthesized_concurrently_in_order()
+    logger.info("All concurrent TTS tests passed")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script for pooled HTTP connections to Sarvam.
+This script checks that API requests reuse kept-alive connections across event
+loops, using a local HTTP server, and that storage downloads run concurrently
+using an in-memory stand-in for the Data Lake directory client.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import sarvam_speech
+from utils.connection_pool import get_http_session, close_http_sessions
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """Answers every request with a small JSON body and records the client port."""
+    protocol_version = "HTTP/1.1"
+    client_ports = set()
+
+    def do_GET(self):
+        StatusHandler.client_ports.add(self.client_address[1])
+        body = b'{"job_state": "Completed"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def test_api_requests_reuse_connections_across_event_loops():
+    """Requests from separate asyncio.run calls share one kept-alive connection."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/status"
+    StatusHandler.client_ports.clear()
+
+    async def check_status():
+        response = await sarvam_speech.sarvam_api_request("GET", url)
+        return response.json()
+
+    try:
+        for _ in range(3):
+            assert asyncio.run(check_status())["job_state"] == "Completed"
+    finally:
+        server.shutdown()
+        close_http_sessions()
+
+    assert len(StatusHandler.client_ports) == 1
+
+def test_shared_session_is_process_wide():
+    """The same named session is returned from every thread."""
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(get_http_session("sarvam"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    close_http_sessions()
+
+    assert all(session is sessions[0] for session in sessions)
+
+def test_download_files_runs_concurrently():
+    """Files are downloaded in parallel and returned in request order."""
+    class FakeDownload:
+        def __init__(self, name):
+            self.name = name
+
+        def readall(self):
+            time.sleep(0.2)
+            return self.name.encode()
+
+    class FakeFileClient:
+        def __init__(self, name):
+            self.name = name
+
+        def download_file(self):
+            if self.name == "missing.json":
+                raise FileNotFoundError(self.name)
+            return FakeDownload(self.name)
+
+    class FakeDirectoryClient:
+        def get_file_client(self, name):
+            return FakeFileClient(name)
+
+    client = sarvam_speech.SarvamStorageClient("https://acct.blob.core.windows.net/fs/job1/out?sig=x")
+    names = [f"segment_{i:03d}.json" for i in range(6)] + ["missing.json"]
+
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch.object(client, "_get_directory_client", return_value=FakeDirectoryClient()):
+        started = time.monotonic()
+        paths = asyncio.run(client.download_files(names, temp_dir))
+        elapsed = time.monotonic() - started
+        contents = [open(path).read() for path in paths]
+
+    logger.info(f"Downloaded {len(paths)} files in {elapsed:.2f}s")
+    assert [os.path.basename(path) for path in paths] == names[:6]
+    assert contents == names[:6]
+    assert elapsed < 0.2 * 6 / 2
+
+if __name__ == "__main__":
+    test_api_requests_reuse_connections_across_event_loops()
+    test_shared_session_is_process_wide()
+    test_download_files_runs_concurrently()
+    logger.info("All connection pool tests passed")
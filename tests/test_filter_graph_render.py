@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-pass ffmpeg render mode.
+This script checks that planning a session works out speed factors without
+writing _time_aligned.wav files, and that the whole dub is rendered by one
+ffmpeg invocation whose filter graph stretches every segment, concatenates the
+ones that don't overlap and mixes only overlapping speech and the background.
+ffmpeg itself is replaced with a stand-in.
+"""
+
+import os
+import sys
+import logging
+import tempfile
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import time_aligned_tts
+from modules.time_aligned_tts import (
+    build_time_aligned_filter_graph,
+    process_segments_with_time_alignment,
+    render_time_aligned_filter_graph
+)
+from audio_fixtures import create_session as create_session_files
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def create_session(output_dir):
+    """Write two synthesized segments and the diarization they were made from."""
+    segments = [
+        {"segment_id": "seg_000", "start_time": 0.5, "end_time": 2.5, "duration": 2.0},
+        {"segment_id": "seg_001", "start_time": 3.0, "end_time": 4.0, "duration": 1.0}
+    ]
+    return create_session_files(output_dir, segments, tones={"seg_000": 2.5, "seg_001": 0.5}, sample_rate=22050)
+
+def test_filter_graph_layout():
+    """Non-overlapping segments are stretched, padded and concatenated, then mixed with the looped background."""
+    placements = {
+        "seg_000": {"position_ms": 500, "file": "a.wav"},
+        "seg_001": {"position_ms": 3000, "file": "b.wav"}
+    }
+    input_args, graph = build_time_aligned_filter_graph(
+        placements, {"seg_000": 1.25, "seg_001": 2.5}, 4200,
+        background={"file": "background.wav", "adjustment_db": 0}, channels=2,
+        durations={"seg_000": 2.0, "seg_001": 0.4}
+    )
+
+    assert input_args == ["-i", "a.wav", "-i", "b.wav", "-stream_loop", "-1", "-i", "background.wav"]
+    assert "[0:a]" in graph and "atempo=1.250000,apad=whole_dur=2.500,atrim=end=2.500[s0]" in graph
+    assert "atempo=2.0,atempo=1.250000[s1]" in graph
+    assert "[s0][s1]concat=n=2:v=0:a=1,adelay=500:all=1[lane0]" in graph
+    assert "channel_layouts=stereo" in graph and "[2:a]" in graph
+    assert "[lane0][bg]amix=inputs=2" in graph
+    assert graph.endswith("apad=whole_dur=4.200,atrim=end=4.200[out]")
+
+def test_filter_graph_mixes_only_overlaps():
+    """Overlapping speech gets a lane of its own, and a single lane is not passed through amix."""
+    placements = {
+        "seg_000": {"position_ms": 0, "file": "a.wav"},
+        "seg_001": {"position_ms": 1000, "file": "b.wav"},
+        "seg_002": {"position_ms": 2500, "file": "c.wav"}
+    }
+    speed_factors = {"seg_000": 1.0, "seg_001": 1.0, "seg_002": 1.0}
+    _, graph = build_time_aligned_filter_graph(
+        placements, speed_factors, 4000, durations={"seg_000": 2.0, "seg_001": 1.0, "seg_002": 1.0}
+    )
+
+    assert "apad=whole_dur=2.500,atrim=end=2.500[s0]" in graph
+    assert "[s0][s2]concat=n=2:v=0:a=1,adelay=0:all=1[lane0]" in graph
+    assert "[s1]adelay=1000:all=1[lane1]" in graph
+    assert "[lane0][lane1]amix=inputs=2" in graph
+
+    _, graph = build_time_aligned_filter_graph(
+        placements, speed_factors, 4000, durations={"seg_000": 1.0, "seg_001": 1.0, "seg_002": 1.0}
+    )
+    assert "[s0][s1][s2]concat=n=3:v=0:a=1,adelay=0:all=1[lane0]" in graph
+    assert "amix" not in graph and graph.endswith("[lane0]apad=whole_dur=4.000,atrim=end=4.000[out]")
+
+def test_single_ffmpeg_run_without_aligned_files():
+    """Planning reads durations only, and rendering starts ffmpeg once for the whole session."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Alignment metadata is also recorded under ./outputs
+        os.chdir(output_dir)
+        try:
+            session_dir, tts_dir = create_session(output_dir)
+            alignment_metadata = process_segments_with_time_alignment(
+                "session_abc", output_dir, os.path.join(session_dir, "diarization.json"), tts_dir, plan_only=True
+            )
+
+            segments = {segment["segment_id"]: segment for segment in alignment_metadata["segments"]}
+            assert segments["seg_000"]["speed_factor"] == 1.25
+            assert segments["seg_001"]["speed_factor"] == 0.9
+            assert segments["seg_000"]["engine"] == "filter_graph"
+            assert alignment_metadata["global_stats"]["successful_segments"] == 2
+
+            commands = []
+            graphs = []
+
+            def fake_run(command, **kwargs):
+                commands.append(command)
+                with open(command[command.index("-filter_complex_script") + 1]) as f:
+                    graphs.append(f.read())
+
+            output_file = os.path.join(tts_dir, "final_output.wav")
+            with patch.object(time_aligned_tts.subprocess, "run", side_effect=fake_run):
+                assert render_time_aligned_filter_graph("session_abc", output_dir, alignment_metadata, output_file) == output_file
+
+            assert len(commands) == 1
+            assert commands[0].count("-i") == 2 and commands[0][-1] == output_file
+            assert "atempo=1.250000,apad=whole_dur=2.500,atrim=end=2.500[s0]" in graphs[0]
+            assert "atempo=0.900000[s1]" in graphs[0] and "concat=n=2" in graphs[0] and "amix" not in graphs[0]
+            assert not [name for name in os.listdir(tts_dir) if name.endswith("_time_aligned.wav")]
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    test_filter_graph_layout()
+    test_filter_graph_mixes_only_overlaps()
+    test_single_ffmpeg_run_without_aligned_files()
+    logger.info("All filter graph render tests passed")
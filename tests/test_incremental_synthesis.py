@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Test script for incremental re-synthesis.
+This script checks that patching the speech canvas gives the same audio as a full
+re-render, and that a second synthesis run after a translation edit only
+synthesizes the edited segment. Synthesis and ffmpeg time stretching are replaced
+with stand-ins, so neither network access nor ffmpeg is needed.
+"""
+
+import os
+import sys
+import json
+import shutil
+import logging
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import soundfile as sf
+from pydub import AudioSegment
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import time_aligned_tts
+from modules.time_aligned_tts import render_speech_canvas, patch_speech_canvas
+from modules.tts_processor import TTSProcessor
+from utils.metadata_manager import get_metadata_field
+from audio_fixtures import create_session as create_session_files, write_tone
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def samples(audio):
+    return np.array(audio.get_array_of_samples())
+
+def test_patch_matches_full_render():
+    """Patching one segment, including where it overlaps a neighbour, matches a full render."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        files = {}
+        for name, seconds, frequency in [("a", 1.5, 220), ("b", 1.0, 330), ("c", 0.8, 440), ("b2", 1.6, 550)]:
+            files[name] = os.path.join(temp_dir, f"{name}.wav")
+            write_tone(files[name], seconds, frequency)
+
+        before = {
+            "a": {"position_ms": 0, "file": files["a"]},
+            "b": {"position_ms": 1200, "file": files["b"]},
+            "c": {"position_ms": 3000, "file": files["c"]}
+        }
+        canvas = render_speech_canvas(before, 5000)
+
+        # Segment b gets new, longer audio that runs into segment c
+        after = {segment_id: dict(placement) for segment_id, placement in before.items()}
+        after["b"]["file"] = files["b2"]
+        patched = patch_speech_canvas(canvas, after, before, ["b"])
+        expected = render_speech_canvas({segment_id: dict(placement) for segment_id, placement in after.items()}, 5000)
+
+        assert patched.shape == expected.shape
+        assert np.array_equal(patched, expected)
+        assert after["b"]["length_ms"] == 1600 and after["c"]["length_ms"] == 800
+
+def test_patch_moves_repositioned_segment():
+    """A segment that only moved is cleared from its old position and added at its new one."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "a.wav")
+        write_tone(path, 0.5, 220)
+
+        before = {"a": {"position_ms": 0, "file": path}}
+        canvas = render_speech_canvas(before, 2000)
+        after = {"a": {"position_ms": 1000, "file": path}}
+        patched = patch_speech_canvas(canvas, after, before, [])
+        expected = render_speech_canvas({"a": {"position_ms": 1000, "file": path}}, 2000)
+
+        assert np.array_equal(patched, expected)
+        assert not patched[:22050].any() and patched[44100:66150].any()
+
+def create_session(base_dir, translations):
+    """Write the diarization files of a three segment session."""
+    segments = [
+        {"segment_id": f"seg_{i:03d}", "speaker": "SPEAKER_00", "start_time": start, "end_time": end,
+         "duration": end - start, "text": text, "translated_text": text, "language": "telugu"}
+        for i, (start, end, text) in enumerate([(0.5, 2.0, translations[0]), (2.5, 4.0, translations[1]), (5.0, 6.5, translations[2])])
+    ]
+    session_dir, _ = create_session_files(os.path.join(base_dir, "outputs"), segments,
+                                          diarization_files=("diarization.json", "diarization_translated.json"))
+    return session_dir
+
+def run_synthesis(session_dir, synthesized, failing=()):
+    """Run time-aligned synthesis with fake TTS and time stretching, returning the output samples."""
+    def fake_synthesize(segment, output_path, duration):
+        text = segment["translated_text"]
+        synthesized.append(text)
+        if text in failing:
+            return False
+        write_tone(output_path, 0.1 * len(text), 100 + 10 * len(text))
+        return True
+
+    def fake_adjust(input_path, output_path, target_duration, original_duration=None):
+        shutil.copyfile(input_path, output_path)
+        return True, {"speed_factor": 1.0, "quality_level": "good"}
+
+    processor = TTSProcessor(output_dir=os.path.join("outputs", "session_abc"), provider="sarvam", language="telugu")
+    with patch.object(processor, "synthesize_segment_with_duration", side_effect=fake_synthesize), \
+         patch.object(time_aligned_tts, "adjust_segment_duration", side_effect=fake_adjust):
+        output_file = processor.process_tts_with_time_alignment(os.path.join(session_dir, "diarization_translated.json"))
+    return samples(AudioSegment.from_file(output_file))
+
+def test_only_edited_segments_resynthesized():
+    """After one translation edit, one segment is synthesized and the canvas is patched."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            session_dir = create_session(temp_dir, ["first line", "second line that runs long", "third line"])
+            synthesized = []
+            run_synthesis(session_dir, synthesized)
+            assert len(synthesized) == 3
+            assert get_metadata_field("session_abc", "synthesis_state")["last_run"]["patched_canvas"] is False
+
+            # Edit one translation and synthesize again
+            translated_file = os.path.join(session_dir, "diarization_translated.json")
+            with open(translated_file) as f:
+                data = json.load(f)
+            data["segments"][1]["translated_text"] = "an edited second line"
+            with open(translated_file, "w") as f:
+                json.dump(data, f)
+
+            synthesized.clear()
+            patched_output = run_synthesis(session_dir, synthesized)
+            state = get_metadata_field("session_abc", "synthesis_state")
+            assert synthesized == ["an edited second line"]
+            assert state["last_run"]["synthesized_segments"] == 1
+            assert state["last_run"]["patched_canvas"] is True
+
+            # The patched output matches a full run over the edited session
+            fresh_dir = os.path.join(temp_dir, "fresh")
+            os.makedirs(fresh_dir)
+            os.chdir(fresh_dir)
+            fresh_session = create_session(fresh_dir, ["first line", "an edited second line", "third line"])
+            full_output = run_synthesis(fresh_session, [])
+            assert np.array_equal(patched_output, full_output)
+        finally:
+            os.chdir(cwd)
+
+def test_failed_segment_cleared_from_canvas():
+    """A segment that synthesized before but fails after an edit leaves silence where its old audio was."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            session_dir = create_session(temp_dir, ["first line", "second line that runs long", "third line"])
+            run_synthesis(session_dir, [])
+
+            translated_file = os.path.join(session_dir, "diarization_translated.json")
+            with open(translated_file) as f:
+                data = json.load(f)
+            data["segments"][1]["translated_text"] = "an edited second line"
+            with open(translated_file, "w") as f:
+                json.dump(data, f)
+
+            patched_output = run_synthesis(session_dir, [], failing=("an edited second line",))
+            assert get_metadata_field("session_abc", "synthesis_state")["last_run"]["patched_canvas"] is True
+
+            fresh_dir = os.path.join(temp_dir, "fresh")
+            os.makedirs(fresh_dir)
+            os.chdir(fresh_dir)
+            fresh_session = create_session(fresh_dir, ["first line", "an edited second line", "third line"])
+            full_output = run_synthesis(fresh_session, [], failing=("an edited second line",))
+            assert np.array_equal(patched_output, full_output)
+            # Nothing is left between the first and third segments
+            assert not patched_output[int(2.1 * 44100):int(4.9 * 44100)].any()
+        finally:
+            os.chdir(cwd)
+
+def test_canvas_of_failed_run_not_patched():
+    """A run that fails after saving its canvas doesn't leave audio the next run can't account for."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            session_dir = create_session(temp_dir, ["first line", "second", "third line"])
+            run_synthesis(session_dir, [])
+            translated_file = os.path.join(session_dir, "diarization_translated.json")
+
+            def edit_second(text):
+                with open(translated_file) as f:
+                    data = json.load(f)
+                data["segments"][1]["translated_text"] = text
+                with open(translated_file, "w") as f:
+                    json.dump(data, f)
+
+            # The second segment gets longer audio, but writing the final output fails
+            edit_second("a much longer second")
+            real_write = time_aligned_tts.sf.write
+
+            def failing_write(file, *args, **kwargs):
+                if "final_output" in str(file):
+                    raise OSError("disk full")
+                return real_write(file, *args, **kwargs)
+
+            with patch.object(time_aligned_tts.sf, "write", side_effect=failing_write):
+                try:
+                    run_synthesis(session_dir, [])
+                except Exception:
+                    pass
+
+            # Then its next edit fails to synthesize
+            edit_second("edited again")
+            patched_output = run_synthesis(session_dir, [], failing=("edited again",))
+            assert not patched_output[int(2.1 * 44100):int(4.9 * 44100)].any()
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    test_patch_matches_full_render()
+    test_patch_moves_repositioned_segment()
+    test_only_edited_segments_resynthesized()
+    test_failed_segment_cleared_from_canvas()
+    test_canvas_of_failed_run_not_patched()
+    logger.info("All incremental synthesis tests passed")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for adaptive Sarvam job status polling.
+This script drives wait_for_job with a scripted sequence of job states instead of
+the Sarvam API, using millisecond delays so the backoff can be observed quickly.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import tempfile
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import sarvam_speech
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FAST_POLLING = {"initial_delay": 0.01, "max_delay": 0.04, "backoff": 2.0, "jitter": 0.0, "min_deadline": 5.0}
+
+def poll(states, polling_config=None, audio_duration=None):
+    """Run wait_for_job against a scripted list of job states and return (status, check times)."""
+    check_times = []
+    remaining = list(states)
+
+    async def fake_check(job_id, api_key=None):
+        check_times.append(time.monotonic())
+        state = remaining.pop(0) if len(remaining) > 1 else remaining[0]
+        return {"job_id": job_id, "job_state": state}
+
+    with patch.object(sarvam_speech, "check_job_status", side_effect=fake_check):
+        started = time.monotonic()
+        job_status = asyncio.run(sarvam_speech.wait_for_job(
+            "job1", api_key="test-key", audio_duration=audio_duration, polling_config=polling_config or FAST_POLLING
+        ))
+    return job_status, [t - started for t in check_times]
+
+def test_short_job_is_picked_up_on_first_check():
+    """A job that is already done is seen after the initial delay, with no backoff."""
+    job_status, check_times = poll(["Completed"])
+
+    assert job_status["job_state"] == "Completed"
+    assert len(check_times) == 1
+    assert check_times[0] < 0.5
+    assert job_status["job_timing"]["status_checks"] == 1
+
+def test_backoff_and_queue_processing_split():
+    """Delays grow up to max_delay, and time before the first Running state counts as queued."""
+    job_status, check_times = poll(["Accepted", "Pending", "Running", "Running", "Running", "Completed"])
+    gaps = [later - earlier for earlier, later in zip(check_times, check_times[1:])]
+    logger.info(f"Gaps between status checks: {[round(gap, 3) for gap in gaps]}")
+
+    assert len(check_times) == 6
+    assert gaps[-1] >= 0.035 and gaps[-1] > check_times[0]
+    timing = job_status["job_timing"]
+    assert abs(timing["queue_time"] - check_times[2]) < 0.02
+    assert abs(timing["queue_time"] + timing["processing_time"] - timing["total_time"]) < 0.002
+
+def test_deadline_scales_with_audio_duration():
+    """Long audio gets a longer deadline, capped at max_deadline, and a stuck job times out."""
+    config = {"min_deadline": 150, "deadline_per_audio_second": 3.0, "max_deadline": 3600}
+    assert sarvam_speech.get_job_deadline(None, config) == 150
+    assert sarvam_speech.get_job_deadline(10, config) == 150
+    assert sarvam_speech.get_job_deadline(600, config) == 1800
+    assert sarvam_speech.get_job_deadline(7200, config) == 3600
+
+    job_status, _ = poll(["Running"], dict(FAST_POLLING, min_deadline=0.1))
+    assert "error" in job_status
+    assert job_status["job_timing"]["final_state"] == "Running"
+
+def test_job_timings_recorded_in_metadata():
+    """Timings of every job are written to the session metadata once per job."""
+    timing_a = {"job_id": "a", "queue_time": 1.0, "processing_time": 2.0, "total_time": 3.0}
+    timing_b = {"job_id": "b", "queue_time": 3.0, "processing_time": 4.0, "total_time": 7.0}
+    results = [{"job_timing": timing_a}, {"job_timing": timing_b}, {"job_timing": timing_b}, {"error": "failed"}]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            sarvam_speech.record_job_timings("session123", results)
+            with open(os.path.join("outputs", "session123", "metadata.json")) as f:
+                metadata = json.load(f)
+        finally:
+            os.chdir(cwd)
+
+    section = metadata["diarization_jobs"]
+    assert section["job_count"] == 2
+    assert section["mean_queue_time"] == 2.0
+    assert section["max_processing_time"] == 4.0
+
+if __name__ == "__main__":
+    test_short_job_is_picked_up_on_first_check()
+    test_backoff_and_queue_processing_split()
+    test_deadline_scales_with_audio_duration()
+    test_job_timings_recorded_in_metadata()
+    logger.info("All job polling tests passed")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for the background job queue.
+This script checks job states, results and status updates with both the
+in-memory and the SQLite job stores, and the per-thread event loop helper.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.job_queue import JobQueue, InMemoryJobStore, SQLiteJobStore, run_coroutine, JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def wait_for_state(queue, job_id, states, timeout=5.0):
+    """Poll a job until it reaches one of the given states."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["state"] in states:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not reach {states}")
+
+def check_job_lifecycle(store):
+    """Submit returns at once; jobs move through their states and report progress."""
+    queue = JobQueue(store, max_workers=1)
+    release = threading.Event()
+    statuses = []
+
+    def slow_stage(value):
+        release.wait(5)
+        return {"value": value * 2}
+
+    def failing_stage():
+        raise ValueError("bad input")
+
+    started = time.monotonic()
+    slow_id = queue.submit("translation", slow_stage, 21, session_id="s1", status_callback=lambda *args: statuses.append(args))
+    failing_id = queue.submit("synthesis", failing_stage, session_id="s2", status_callback=lambda *args: statuses.append(args))
+    assert time.monotonic() - started < 0.5
+
+    assert wait_for_state(queue, slow_id, {JOB_RUNNING})["session_id"] == "s1"
+    # One worker: the second job waits for the first
+    assert queue.get(failing_id)["state"] == JOB_QUEUED
+    release.set()
+
+    completed = wait_for_state(queue, slow_id, {JOB_COMPLETED})
+    failed = wait_for_state(queue, failing_id, {JOB_FAILED})
+    queue.shutdown()
+
+    assert completed["result"] == {"value": 42}
+    assert completed["started_at"] <= completed["finished_at"]
+    assert failed["error"] == "bad input"
+    assert ("s2", "error", "bad input", 0) in statuses
+    assert statuses[0] == ("s1", "translation", "Waiting for a worker...", 0)
+    assert queue.get("unknown") is None
+
+def test_in_memory_job_store():
+    check_job_lifecycle(InMemoryJobStore())
+
+def test_sqlite_job_store_is_shared():
+    """Job records in SQLite are visible through a second store on the same file."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "jobs.db")
+        check_job_lifecycle(SQLiteJobStore(db_path))
+
+        queue = JobQueue(SQLiteJobStore(db_path), max_workers=1)
+        job_id = queue.submit("detect_language", lambda: {"language": "hi-IN"})
+        wait_for_state(queue, job_id, {JOB_COMPLETED})
+        queue.shutdown()
+
+        assert SQLiteJobStore(db_path).get(job_id)["result"] == {"language": "hi-IN"}
+
+def test_run_coroutine_reuses_thread_loop():
+    """Each thread keeps one event loop across calls."""
+    async def current_loop():
+        await asyncio.sleep(0)
+        return asyncio.get_running_loop()
+
+    first, second = run_coroutine(current_loop()), run_coroutine(current_loop())
+    other = []
+    thread = threading.Thread(target=lambda: other.append(run_coroutine(current_loop())))
+    thread.start()
+    thread.join()
+
+    assert first is second
+    assert other[0] is not first
+
+if __name__ == "__main__":
+    test_in_memory_job_store()
+    test_sqlite_job_store_is_shared()
+    test_run_coroutine_reuses_thread_loop()
+    logger.info("All job queue tests passed")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test script for the locked, cached metadata store.
+This script checks that concurrent updates from threads and processes are never
+lost, that reads are served from the cache until the file changes, and that
+coalesced writes and the SQLite index behave as configured.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+import multiprocessing
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import metadata_manager
+from utils.metadata_manager import (
+    MetadataStore, MetadataIndex, update_metadata_field, update_metadata_section,
+    get_metadata_field, get_metadata
+)
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def update_from_process(base_dir, worker, count):
+    """Update metadata fields as a separate gunicorn worker would."""
+    for i in range(count):
+        update_metadata_section("session123", "stages", {f"worker{worker}_{i}": i}, base_dir)
+
+def test_concurrent_thread_updates_are_not_lost():
+    """Stages updating different fields at the same time keep each other's updates."""
+    with tempfile.TemporaryDirectory() as base_dir:
+        def stage(name):
+            for i in range(25):
+                update_metadata_field("session123", f"{name}_{i}", i, base_dir)
+                update_metadata_section("session123", "progress", {name: i}, base_dir)
+
+        threads = [threading.Thread(target=stage, args=(name,)) for name in ("transcription", "translation", "synthesis", "validation")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with open(os.path.join(base_dir, "session123", "metadata.json")) as f:
+            metadata = json.load(f)
+
+    assert len(metadata) == 4 * 25 + 1
+    assert metadata["progress"] == {"transcription": 24, "translation": 24, "synthesis": 24, "validation": 24}
+
+def test_concurrent_process_updates_are_not_lost():
+    """Worker processes writing the same session serialize on the file lock."""
+    with tempfile.TemporaryDirectory() as base_dir:
+        update_metadata_field("session123", "source_language", "hindi", base_dir)
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=update_from_process, args=(base_dir, worker, 15)) for worker in range(3)]
+        for process in processes:
+            process.start()
+        update_from_process(base_dir, 3, 15)
+        for process in processes:
+            process.join()
+
+        metadata = get_metadata("session123", base_dir)
+        leftovers = [name for name in os.listdir(os.path.join(base_dir, "session123")) if name.endswith(".tmp")]
+
+    assert metadata["source_language"] == "hindi"
+    assert len(metadata["stages"]) == 4 * 15
+    assert leftovers == []
+
+def test_reads_are_cached_until_the_file_changes():
+    """Repeated reads don't parse the file again, but external writes are picked up."""
+    with tempfile.TemporaryDirectory() as base_dir:
+        update_metadata_field("session123", "target_language", "telugu", base_dir)
+        with patch.object(metadata_manager.json, "load", wraps=json.load) as json_load:
+            for _ in range(20):
+                assert get_metadata_field("session123", "target_language", None, base_dir) == "telugu"
+            assert json_load.call_count == 0
+
+            # Another writer replaces the file
+            metadata_path = os.path.join(base_dir, "session123", "metadata.json")
+            with open(metadata_path, "w") as f:
+                json.dump({"target_language": "tamil", "extra": 1}, f)
+            os.utime(metadata_path, ns=(time.time_ns() + 10 ** 9, time.time_ns() + 10 ** 9))
+            assert get_metadata_field("session123", "target_language", None, base_dir) == "tamil"
+
+        # Returned values are copies
+        get_metadata("session123", base_dir)["extra"] = 2
+        assert get_metadata_field("session123", "extra", None, base_dir) == 1
+        assert get_metadata_field("missing_session", "extra", "default", base_dir) == "default"
+
+def test_coalesced_writes_keep_external_changes():
+    """Updates within the coalescing delay are written once, merged with newer file contents."""
+    with tempfile.TemporaryDirectory() as base_dir:
+        store = MetadataStore(coalesce_delay=0.2)
+        metadata_path = os.path.join(base_dir, "session123", "metadata.json")
+
+        with patch.object(metadata_manager.os, "replace", wraps=os.replace) as replace:
+            for i in range(30):
+                store.update("session123", lambda metadata, i=i: metadata.update({f"field_{i}": i}), base_dir)
+            assert not os.path.exists(metadata_path)
+            assert store.get_field("session123", "field_29", None, base_dir) == 29
+
+            # Another process writes the file before our flush
+            with open(metadata_path, "w") as f:
+                json.dump({"preserve_background_music": True}, f)
+            time.sleep(0.4)
+            assert replace.call_count == 1
+
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+
+    assert metadata["preserve_background_music"] is True
+    assert len(metadata) == 31
+
+def test_sqlite_index_finds_sessions():
+    """With the SQLite index, sessions can be queried by metadata field."""
+    with tempfile.TemporaryDirectory() as base_dir:
+        store = MetadataStore(index=MetadataIndex(os.path.join(base_dir, "metadata.db")))
+        store.update("session1", lambda metadata: metadata.update({"target_language": "hindi"}), base_dir)
+        store.update("session2", lambda metadata: metadata.update({"target_language": "tamil"}), base_dir)
+        store.update("session3", lambda metadata: metadata.update({"target_language": "hindi", "options": {"voice": "a"}}), base_dir)
+
+        assert store.index.find_sessions("target_language", "hindi") == ["session3", "session1"]
+        assert store.index.find_sessions("options") == ["session3"]
+        assert store.index.find_sessions("options", {"voice": "a"}) == ["session3"]
+
+if __name__ == "__main__":
+    test_concurrent_thread_updates_are_not_lost()
+    test_concurrent_process_updates_are_not_lost()
+    test_reads_are_cached_until_the_file_changes()
+    test_coalesced_writes_keep_external_changes()
+    test_sqlite_index_finds_sessions()
+    logger.info("All metadata store tests passed")
@@ -111,8 +111,8 @@ def test_time_aligned_tts_with_mocks(mock_cartesia, mock_sarvam):
     # Create sample diarization data
     diarization_data = create_sample_diarization_data()
     
-    # Create output directory if it doesn't exist
-    output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
+    # Create a temporary output directory (synthesis details are written next to it)
+    output_dir = os.path.join(tempfile.mkdtemp(prefix="mock_time_aligned_tts_"), "output")
     os.makedirs(output_dir, exist_ok=True)
     
     # Test Sarvam TTS
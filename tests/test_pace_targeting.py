@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for pace-targeted synthesis.
+This script checks that speaking rates are learned from the synthesis records
+of past sessions, that the chosen pace is clamped to the configured range, and
+that TTSProcessor asks Sarvam for the pace that makes a segment fit its slot,
+so only a small residual is left to stretch. Sarvam is replaced with a stand-in
+that speaks at a fixed rate.
+"""
+
+import os
+import sys
+import json
+import logging
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import speaking_rate, tts_processor
+from modules.speaking_rate import SpeakingRateTable, choose_pace, count_spoken_chars
+from modules.tts_processor import TTSProcessor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Characters per second the stand-in voice speaks at pace 1.0
+VOICE_RATE = 12.0
+
+def write_session_records(log_dir, session_id, records):
+    synthesis_dir = os.path.join(log_dir, session_id, "synthesis")
+    os.makedirs(synthesis_dir)
+    with open(os.path.join(synthesis_dir, "synthesis_details_20250101_000000.json"), "w") as f:
+        json.dump({"segments": [], "synthesis_records": records}, f)
+
+def test_rates_learned_from_past_sessions():
+    """Records at any pace are normalized to the voice's natural rate, per voice and language."""
+    with tempfile.TemporaryDirectory() as log_dir:
+        write_session_records(log_dir, "session_a", [
+            {"provider": "sarvam", "voice": "anushka", "language": "telugu", "chars": 24, "pace": 1.0, "duration": 2.0},
+            {"provider": "sarvam", "voice": "anushka", "language": "telugu", "chars": 36, "pace": 1.5, "duration": 2.0}
+        ])
+        write_session_records(log_dir, "session_b", [
+            {"provider": "sarvam", "voice": "anushka", "language": "tamil", "chars": 10, "pace": 1.0, "duration": 2.0},
+            {"provider": "sarvam", "voice": "anushka", "language": "telugu", "chars": 0, "pace": 1.0, "duration": 1.0}
+        ])
+
+        table = SpeakingRateTable()
+        assert table.aggregate_logs(log_dir) == 4
+
+    assert table.get_rate("sarvam", "anushka", "telugu") == 12.0
+    assert table.get_rate("sarvam", "anushka", "tamil") == 5.0
+    assert table.get_rate("sarvam", "anushka", "tamil", min_samples=2) is None
+    assert table.get_rate("sarvam", "karun", "telugu") is None
+
+def test_pace_choice():
+    """The pace fills the target duration in coarse steps, within the configured range, and defaults to 1.0."""
+    assert count_spoken_chars(" నమస్కారం  ప్రపంచం ") == len("నమస్కారంప్రపంచం")
+    assert choose_pace(10.0, 30, 2.5) == 1.2
+    assert choose_pace(10.0, 30, 10.0) == 0.8
+    assert choose_pace(10.0, 30, 1.0, max_pace=1.5) == 1.5
+    # A rate that drifts by a few percent keeps asking for the same pace
+    assert choose_pace(10.0, 31, 2.5) == choose_pace(10.1, 31, 2.5) == 1.25
+    assert choose_pace(10.0, 31, 2.5, step=0) == 1.24
+    assert choose_pace(None, 30, 2.5) == 1.0
+    assert choose_pace(10.0, 30, 0) == 1.0
+
+def test_processor_synthesizes_at_target_pace():
+    """Sarvam is asked for the predicted pace and the synthesis is recorded at that pace."""
+    requested = []
+
+    def fake_sarvam(text, output_path, language, speaker=None, pace=1.0):
+        requested.append(pace)
+        seconds = count_spoken_chars(text) / (VOICE_RATE * pace)
+        sf.write(output_path, np.zeros(int(seconds * 16000)), 16000)
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_dir = os.path.join(temp_dir, "outputs")
+        write_session_records(log_dir, "session_a", [
+            {"provider": "sarvam", "voice": "anushka", "language": "telugu", "chars": 24, "pace": 1.0, "duration": 2.0}
+        ] * 5)
+        pace_config = {"enabled": True, "min_pace": 0.8, "max_pace": 1.5, "min_samples": 5, "pace_step": 0.05}
+        rate_config = {"table_file": os.path.join(temp_dir, "speaking_rates.json"), "log_dir": log_dir}
+
+        with patch.object(tts_processor, "get_pace_targeting_config", return_value=pace_config), \
+             patch.object(speaking_rate, "get_speaking_rate_config", return_value=rate_config), \
+             patch.object(tts_processor, "get_tts_cache", return_value=None), \
+             patch.object(tts_processor, "sarvam_synthesize", side_effect=fake_sarvam):
+            processor = TTSProcessor(output_dir=os.path.join(temp_dir, "session"), provider="sarvam", language="telugu",
+                                     speaker_voice_map={"SPEAKER_00": "anushka"})
+            segment = {"segment_id": "seg_000", "translated_text": "x" * 30, "speaker": "SPEAKER_00",
+                       "start_time": 1.0, "end_time": 3.0}
+            output_path = os.path.join(temp_dir, "seg_000.wav")
+            assert processor.synthesize_segment_with_duration(segment, output_path, 0)
+
+        # 30 chars at 12 chars/s take 2.5s, so a 2s slot needs pace 1.25
+        assert requested == [1.25] and segment["synthesis_pace"] == 1.25
+        assert abs(sf.info(output_path).duration - 2.0) < 0.01
+
+        records = processor.get_synthesis_records()
+        assert len(records) == 1 and records[0]["pace"] == 1.25 and records[0]["chars"] == 30
+
+def test_pace_targeting_disabled():
+    """With pace targeting off, segments are synthesized at pace 1.0 and still recorded."""
+    requested = []
+
+    def fake_sarvam(text, output_path, language, speaker=None, pace=1.0):
+        requested.append(pace)
+        sf.write(output_path, np.zeros(16000), 16000)
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pace_config = {"enabled": False, "min_pace": 0.8, "max_pace": 1.5, "min_samples": 5, "pace_step": 0.05}
+        with patch.object(tts_processor, "get_pace_targeting_config", return_value=pace_config), \
+             patch.object(tts_processor, "get_tts_cache", return_value=None), \
+             patch.object(tts_processor, "sarvam_synthesize", side_effect=fake_sarvam):
+            processor = TTSProcessor(output_dir=os.path.join(temp_dir, "session"), provider="sarvam", language="telugu")
+            segment = {"segment_id": "seg_000", "translated_text": "hello", "duration": 3.0}
+            assert processor.synthesize_segment_with_duration(segment, os.path.join(temp_dir, "seg_000.wav"), 3)
+
+    assert requested == [1.0]
+    assert processor.get_synthesis_records()[0]["duration"] == 1.0
+
+if __name__ == "__main__":
+    test_rates_learned_from_past_sessions()
+    test_pace_choice()
+    test_processor_synthesizes_at_target_pace()
+    test_pace_targeting_disabled()
+    logger.info("All pace targeting tests passed")
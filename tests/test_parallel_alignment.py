@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for process-pool time alignment.
+This script checks that aligning segments over several worker processes gives
+the same segment results and global statistics, in the same order, as aligning
+them one by one, and that alignment still completes if the pool can't start.
+Segments are stretched with the in-process engine, so ffmpeg isn't needed.
+"""
+
+import os
+import sys
+import logging
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import time_aligned_tts
+from modules.time_aligned_tts import get_alignment_workers, process_segments_with_time_alignment
+from audio_fixtures import create_session as create_session_files
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Synthesized and original durations of the test segments
+DURATIONS = [(1.0, 0.8), (0.6, 1.0), (1.5, 0.9), (0.7, 0.7), (2.0, 1.0)]
+
+def create_session(output_dir):
+    """Write synthesized tones for each segment and the diarization they were made from."""
+    segments = [{"segment_id": f"seg_{i:03d}", "duration": original} for i, (_, original) in enumerate(DURATIONS)]
+    # A segment without synthesized audio
+    segments.append({"segment_id": "seg_099", "duration": 1.0})
+    tones = {f"seg_{i:03d}": (synthesized, 200 + 20 * i) for i, (synthesized, _) in enumerate(DURATIONS)}
+    session_dir, tts_dir = create_session_files(output_dir, segments, tones=tones)
+    return os.path.join(session_dir, "diarization.json"), tts_dir
+
+def align(output_dir, max_workers):
+    diarization_file, tts_dir = create_session(os.path.join(output_dir, f"workers_{max_workers}"))
+    with patch.object(time_aligned_tts, "get_time_stretch_config", return_value={"engine": "wsola"}):
+        metadata = process_segments_with_time_alignment(
+            "session_abc", os.path.dirname(os.path.dirname(tts_dir)), diarization_file, tts_dir, max_workers=max_workers
+        )
+    outputs = [
+        sf.read(entry["output_file"])[0] if entry.get("output_file") else None
+        for entry in metadata["segments"]
+    ]
+    return metadata, outputs
+
+def test_parallel_matches_serial():
+    """Worker processes produce the same audio, order and global_stats as a serial run."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as output_dir:
+        os.chdir(output_dir)
+        try:
+            serial, serial_outputs = align(output_dir, 1)
+            parallel, parallel_outputs = align(output_dir, 3)
+        finally:
+            os.chdir(cwd)
+
+    assert parallel["alignment_workers"] == 3 and serial["alignment_workers"] == 1
+    assert parallel["global_stats"] == serial["global_stats"]
+    assert serial["global_stats"]["successful_segments"] == 5 and serial["global_stats"]["failed_segments"] == 1
+    assert [entry["segment_id"] for entry in parallel["segments"]] == [f"seg_{i:03d}" for i in range(5)] + ["seg_099"]
+    for serial_audio, parallel_audio in zip(serial_outputs, parallel_outputs):
+        assert (serial_audio is None and parallel_audio is None) or np.array_equal(serial_audio, parallel_audio)
+
+def test_pool_failure_falls_back_to_serial():
+    """If worker processes can't be started, segments are aligned in this process."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as output_dir:
+        os.chdir(output_dir)
+        try:
+            with patch.object(time_aligned_tts, "ProcessPoolExecutor", side_effect=OSError("no processes")) as pool:
+                metadata, _ = align(output_dir, 4)
+        finally:
+            os.chdir(cwd)
+
+    assert metadata["global_stats"]["successful_segments"] == 5
+    # Workers are never forked from the multi-threaded web process
+    assert pool.call_args[1]["mp_context"].get_start_method() in ("forkserver", "spawn")
+
+def test_worker_count_defaults_to_share_of_cores():
+    """A worker count of 0 splits the cores this process may run on between concurrent jobs."""
+    with patch.object(time_aligned_tts, "get_alignment_concurrency_config", return_value={"max_workers": 0}), \
+         patch.object(time_aligned_tts.os, "sched_getaffinity", return_value=set(range(8)), create=True):
+        with patch.object(time_aligned_tts, "get_job_queue_config", return_value={"max_workers": 2}):
+            assert get_alignment_workers() == 4
+        with patch.object(time_aligned_tts, "get_job_queue_config", return_value={"max_workers": 16}):
+            assert get_alignment_workers() == 1
+    assert get_alignment_workers(6) == 6
+
+if __name__ == "__main__":
+    test_parallel_matches_serial()
+    test_pool_failure_falls_back_to_serial()
+    test_worker_count_defaults_to_share_of_cores()
+    logger.info("All parallel alignment tests passed")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test script for the provider rate limiter.
+This script checks the token bucket timing from threads and coroutines.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limiter import RateLimiter, get_rate_limiter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_burst_then_steady_rate():
+    """The first `burst` requests go straight through, then requests are spaced at 1/rate."""
+    limiter = RateLimiter(rate=20, burst=3)
+    delays = [limiter.reserve() for _ in range(6)]
+
+    assert delays[:3] == [0.0, 0.0, 0.0]
+    assert all(abs(delay - expected) < 0.01 for delay, expected in zip(delays[3:], [0.05, 0.10, 0.15]))
+
+def test_unlimited():
+    """A limiter without a rate never waits."""
+    limiter = RateLimiter(rate=None)
+    assert all(limiter.reserve() == 0.0 for _ in range(100))
+
+def test_shared_across_threads_and_loops():
+    """Coroutines on separate event loops in separate threads share one budget."""
+    limiter = RateLimiter(rate=50, burst=1)
+    finished = []
+
+    async def worker():
+        for _ in range(5):
+            await limiter.acquire_async()
+        finished.append(time.monotonic())
+
+    start_time = time.monotonic()
+    threads = [threading.Thread(target=asyncio.run, args=(worker(),)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 20 requests at 50/s with a burst of 1 need at least 19 intervals of 20 ms
+    assert max(finished) - start_time >= 0.35
+
+def test_provider_limiter_is_shared():
+    """get_rate_limiter returns the same limiter for the same provider."""
+    assert get_rate_limiter("sarvam") is get_rate_limiter("sarvam")
+    assert get_rate_limiter("sarvam").rate
+
+if __name__ == "__main__":
+    test_burst_then_steady_rate()
+    test_unlimited()
+    test_shared_across_threads_and_loops()
+    test_provider_limiter_is_shared()
+    logger.info("All rate limiter tests passed")
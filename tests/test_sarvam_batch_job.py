@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-file Sarvam batch jobs.
+This script checks that all VAD segments of a session go through one batch job,
+are uploaded in parallel and get their own outputs back. The Sarvam API and the
+storage client are replaced with in-memory stand-ins, so no network access is needed.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import logging
+import tempfile
+from unittest.mock import patch
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import sarvam_speech, speech_config, vad_segmentation
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+class FakeSarvam:
+    """In-memory stand-in for the Sarvam job API and its storage directories."""
+
+    def __init__(self, failed_files=()):
+        self.jobs = {}
+        self.failed_files = set(failed_files)
+        self.uploads_in_flight = 0
+        self.peak_uploads = 0
+
+    async def initialize_job(self, api_key=None):
+        job_id = f"job{len(self.jobs)}"
+        self.jobs[job_id] = {"inputs": {}}
+        return {"job_id": job_id, "input_storage_path": f"https://x.blob.core/fs/{job_id}/in",
+                "output_storage_path": f"https://x.blob.core/fs/{job_id}/out"}
+
+    async def start_job(self, job_id, api_key=None, with_diarization=True):
+        return {"job_id": job_id}
+
+    async def wait_for_job(self, job_id, api_key=None, audio_duration=None):
+        details = [
+            {"inputs": [{"file_name": name}], "outputs": [] if name in self.failed_files else [{"file_name": name.replace(".wav", ".json")}],
+             "state": "Failed" if name in self.failed_files else "Success", "error_message": "bad audio"}
+            for name in self.jobs[job_id]["inputs"]
+        ]
+        return {"job_state": "Completed", "job_details": details}
+
+    def storage_client(self, url):
+        fake = self
+        job_id, direction = url.split("/")[-2:]
+
+        class Client:
+            async def upload_data(self, data, file_name, overwrite=True):
+                fake.uploads_in_flight += 1
+                fake.peak_uploads = max(fake.peak_uploads, fake.uploads_in_flight)
+                await asyncio.sleep(0.05)
+                fake.uploads_in_flight -= 1
+                fake.jobs[job_id]["inputs"][file_name] = data
+                return True
+
+            async def list_files(self):
+                return [name.replace(".wav", ".json") for name in fake.jobs[job_id]["inputs"] if name not in fake.failed_files]
+
+            async def download_files(self, file_names, destination_dir):
+                paths = []
+                for file_name in file_names:
+                    path = os.path.join(destination_dir, file_name)
+                    with open(path, "w") as f:
+                        json.dump({"transcript": f"text {file_name[8:11]}", "diarized_transcript": {"entries": []}}, f)
+                    paths.append(path)
+                return paths
+
+        return Client()
+
+    def patches(self):
+        return [
+            patch.object(sarvam_speech, "initialize_job", side_effect=self.initialize_job),
+            patch.object(sarvam_speech, "start_job", side_effect=self.start_job),
+            patch.object(sarvam_speech, "wait_for_job", side_effect=self.wait_for_job),
+            patch.object(sarvam_speech, "SarvamStorageClient", side_effect=self.storage_client),
+        ]
+
+def run_with_patches(fake, coroutine_factory):
+    """Run a coroutine with the fake Sarvam API in place."""
+    patches = fake.patches()
+    for item in patches:
+        item.start()
+    try:
+        return asyncio.run(coroutine_factory())
+    finally:
+        for item in patches:
+            item.stop()
+
+def test_outputs_fan_out_to_files():
+    """One job processes every file, uploads overlap, and failures stay per file."""
+    fake = FakeSarvam(failed_files={"segment_002.wav"})
+    files = [{"file_name": f"segment_{i:03d}.wav", "audio_data": b"RIFF"} for i in range(5)]
+
+    results = run_with_patches(fake, lambda: sarvam_speech.process_files_with_batch_job(files, api_key="test-key"))
+
+    assert len(fake.jobs) == 1
+    assert fake.peak_uploads == 5
+    assert results["segment_000.wav"]["transcript"] == "text 000"
+    assert results["segment_004.wav"]["transcript"] == "text 004"
+    assert "bad audio" in results["segment_002.wav"]["error"]
+
+def test_transcription_uses_one_job_per_batch():
+    """A session's segments are split into jobs of at most batch_max_files and combined in order."""
+    class EnergyVADModel:
+        def reset_states(self, batch_size=1):
+            pass
+
+        def __call__(self, x, sr):
+            x = np.asarray(x, dtype=np.float32).reshape(-1, 512)
+            return (np.sqrt(np.mean(x ** 2, axis=1, keepdims=True)) > 0.05).astype(np.float32)
+
+    rng = np.random.default_rng(0)
+    audio = 0.001 * rng.standard_normal(40 * SAMPLE_RATE).astype(np.float32)
+    for i in range(13):
+        start = (i * 3 + 1) * SAMPLE_RATE
+        audio[start:start + int(1.5 * SAMPLE_RATE)] += 0.3 * rng.standard_normal(int(1.5 * SAMPLE_RATE)).astype(np.float32)
+
+    fake = FakeSarvam()
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch.object(vad_segmentation, "get_vad_model", return_value=EnergyVADModel()), \
+         patch.dict(speech_config.DEFAULT_DIARIZATION_CONFIG, {"batch_max_files": 5}):
+        audio_path = os.path.join(temp_dir, "session123.wav")
+        sf.write(audio_path, audio, SAMPLE_RATE)
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            result = run_with_patches(fake, lambda: sarvam_speech.transcribe_with_vad_diarization(
+                audio_path, api_key="test-key", vad_segments_dir=os.path.join(temp_dir, "vad_segments"),
+                save_segments=False, batch_job=True
+            ))
+        finally:
+            os.chdir(cwd)
+
+    assert len(fake.jobs) == 3
+    assert result["transcript"] == " ".join(f"text {i:03d}" for i in range(13))
+
+if __name__ == "__main__":
+    test_outputs_fan_out_to_files()
+    test_transcription_uses_one_job_per_batch()
+    logger.info("All Sarvam batch job tests passed")
@@ -43,6 +43,7 @@ import json
 import argparse
 import datetime
 import logging
+import tempfile
 from pathlib import Path
 import copy
 
@@ -65,13 +66,12 @@ from modules.translation_metrics import (
 )
 
 # Configure logging
-os.makedirs("tests/output", exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler(f"tests/output/sarvam_test_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+        logging.FileHandler(os.path.join(tempfile.gettempdir(), f"sarvam_test_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.log"))
     ]
 )
 logger = logging.getLogger(__name__)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental segment result aggregator.
+This script feeds segment results in random order and checks the running partial
+transcript, the progress updates and the final combined result.
+"""
+
+import os
+import sys
+import random
+import asyncio
+import logging
+import tempfile
+from unittest.mock import patch
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import sarvam_speech, vad_segmentation
+from modules.sarvam_speech import SegmentResultAggregator, combine_segment_results
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+def make_result(i):
+    """Result of segment i, starting at 10*i seconds, with two speaker turns."""
+    return {
+        "transcript": f"part {i}",
+        "language_code": "hi-IN",
+        "start_time": 10.0 * i,
+        "end_time": 10.0 * i + 8,
+        "segments": [
+            {"speaker": "SPEAKER_00", "text": f"part {i} a", "start_time": 0.0, "end_time": 3.0},
+            {"speaker": "SPEAKER_01", "text": f"part {i} b", "start_time": 3.0, "end_time": 8.0}
+        ]
+    }
+
+def test_out_of_order_results_are_ordered():
+    """Results added in any order give the partial and final output of the ordered results."""
+    results = [make_result(i) for i in range(8)]
+    shuffled = list(results)
+    random.Random(0).shuffle(shuffled)
+
+    updates = []
+    aggregator = SegmentResultAggregator(on_update=updates.append)
+    for count, result in enumerate(shuffled, start=1):
+        aggregator.add(result)
+        done = sorted(shuffled[:count], key=lambda item: item["start_time"])
+        assert aggregator.get_partial_transcript() == " ".join(item["transcript"] for item in done)
+    aggregator.add({"error": "Job failed", "start_time": 35.0})
+    aggregator.set_total(9)
+
+    combined = aggregator.get_result()
+    assert combined == combine_segment_results(results)
+    assert combined["transcript"] == " ".join(f"part {i}" for i in range(8))
+    assert [segment["segment_id"] for segment in combined["segments"]] == [f"seg_{i:03d}" for i in range(16)]
+    assert combined["segments"][3]["start_time"] == 13.0
+    assert combined["language_code"] == "hi-IN"
+    assert updates[-1] == {"segments_completed": 9, "segments_failed": 1, "segments_total": 9, "partial_transcript": combined["transcript"]}
+
+def test_transcription_reports_partial_progress():
+    """transcribe_with_vad_diarization reports every finished segment as it completes."""
+    class EnergyVADModel:
+        def reset_states(self, batch_size=1):
+            pass
+
+        def __call__(self, x, sr):
+            x = np.asarray(x, dtype=np.float32).reshape(-1, 512)
+            return (np.sqrt(np.mean(x ** 2, axis=1, keepdims=True)) > 0.05).astype(np.float32)
+
+    async def fake_process(audio_path, api_key=None, audio_data=None, audio_duration=None):
+        index = int(os.path.basename(audio_path)[8:11])
+        # Later segments finish first
+        await asyncio.sleep(0.05 * (5 - index))
+        return {"transcript": f"text {index}", "segments": []}
+
+    rng = np.random.default_rng(0)
+    audio = 0.001 * rng.standard_normal(20 * SAMPLE_RATE).astype(np.float32)
+    for i in range(5):
+        start = (i * 4 + 1) * SAMPLE_RATE
+        audio[start:start + 2 * SAMPLE_RATE] += 0.3 * rng.standard_normal(2 * SAMPLE_RATE).astype(np.float32)
+
+    updates = []
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch.object(vad_segmentation, "get_vad_model", return_value=EnergyVADModel()), \
+         patch.object(sarvam_speech, "process_audio_with_diarization", side_effect=fake_process):
+        sf.write(os.path.join(temp_dir, "session123.wav"), audio, SAMPLE_RATE)
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            result = asyncio.run(sarvam_speech.transcribe_with_vad_diarization(
+                "session123.wav", api_key="test-key", save_segments=False, use_cache=False,
+                progress_callback=updates.append
+            ))
+        finally:
+            os.chdir(cwd)
+
+    completed = [update for update in updates if update["segments_completed"]]
+    assert [update["segments_completed"] for update in completed] == [1, 2, 3, 4, 5]
+    assert completed[0]["partial_transcript"] == "text 4"
+    assert completed[1]["partial_transcript"] == "text 3 text 4"
+    assert completed[-1]["segments_total"] == 5
+    assert result["transcript"] == completed[-1]["partial_transcript"] == "text 0 text 1 text 2 text 3 text 4"
+
+if __name__ == "__main__":
+    test_out_of_order_results_are_ordered()
+    test_transcription_reports_partial_progress()
+    logger.info("All segment aggregator tests passed")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for the segment manifest.
+This script checks that the manifest records each segment's audio file, that
+unchanged entries are carried over, and that time alignment looks segments up
+in the manifest, or in a single directory listing when there is none, and
+records the lookup cost in its metadata.
+"""
+
+import os
+import sys
+import logging
+import tempfile
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import segment_manifest
+from modules.segment_manifest import TTSFileIndex, load_segment_manifest, write_segment_manifest
+from modules.time_aligned_tts import process_segments_with_time_alignment
+from audio_fixtures import create_session, write_tone
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_manifest_entries_carried_over():
+    """Headers are only read for new or changed files, and missing files are left out."""
+    with tempfile.TemporaryDirectory() as tts_dir:
+        files = {f"seg_{i:03d}": os.path.join(tts_dir, f"segment_seg_{i:03d}.wav") for i in range(3)}
+        write_tone(files["seg_000"], 1.0)
+        write_tone(files["seg_001"], 0.5)
+
+        first = write_segment_manifest(tts_dir, files)
+        assert set(first) == {"seg_000", "seg_001"}
+        assert first["seg_001"]["duration"] == 0.5 and first["seg_001"]["format"] == "wav"
+
+        # Rewrite one file with a different length
+        write_tone(files["seg_001"], 0.75)
+        os.utime(files["seg_001"], (first["seg_001"]["mtime"] + 5, first["seg_001"]["mtime"] + 5))
+        with patch.object(segment_manifest, "describe_audio_file", wraps=segment_manifest.describe_audio_file) as describe:
+            second = write_segment_manifest(tts_dir, files, load_segment_manifest(tts_dir))
+
+        assert [call[0][0] for call in describe.call_args_list] == [files["seg_001"]]
+        assert second["seg_000"] == first["seg_000"]
+        assert load_segment_manifest(tts_dir)["seg_001"]["duration"] == 0.75
+
+def test_directory_index_read_once():
+    """Without a manifest, one sorted listing serves every lookup, merged and original IDs included."""
+    with tempfile.TemporaryDirectory() as tts_dir:
+        for name in ("segment_seg_000.wav", "segment_seg_000_time_aligned.wav", "segment_merged_001.mp3",
+                     "segment_seg_007.wav", "notes.txt"):
+            with open(os.path.join(tts_dir, name), "wb") as f:
+                f.write(b"x")
+
+        with patch.object(segment_manifest.os, "listdir", wraps=os.listdir) as listdir:
+            index = TTSFileIndex(tts_dir)
+            assert index.source == "directory"
+            assert os.path.basename(index.find("seg_000")["file"]) == "segment_seg_000.wav"
+            assert index.find("001")["format"] == "mp3"
+            assert os.path.basename(index.find("merged_002", [{"segment_id": "seg_007"}])["file"]) == "segment_seg_007.wav"
+            assert index.find("seg_005") is None
+
+        assert listdir.call_count == 1
+        assert index.stats == {"manifest_hits": 0, "directory_hits": 3, "misses": 1}
+
+def test_alignment_uses_manifest():
+    """Alignment takes files and durations from the manifest and records the lookup time."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as output_dir:
+        os.chdir(output_dir)
+        try:
+            segments = [{"segment_id": f"seg_{i:03d}", "duration": 1.0} for i in range(4)]
+            session_dir, tts_dir = create_session(output_dir, segments, tones={f"seg_{i:03d}": 1.2 for i in range(4)})
+            files = {f"seg_{i:03d}": os.path.join(tts_dir, f"segment_seg_{i:03d}.wav") for i in range(4)}
+            write_segment_manifest(tts_dir, files)
+
+            with patch.object(segment_manifest.os, "listdir", side_effect=AssertionError("directory scanned")):
+                metadata = process_segments_with_time_alignment(
+                    "session_abc", output_dir, os.path.join(session_dir, "diarization.json"), tts_dir, plan_only=True
+                )
+
+            assert metadata["global_stats"]["successful_segments"] == 4
+            assert all(abs(segment["speed_factor"] - 1.2) < 1e-9 for segment in metadata["segments"])
+            lookup = metadata["file_lookup"]
+            assert lookup["source"] == "manifest" and lookup["lookups"] == 4 and lookup["manifest_hits"] == 4
+            assert lookup["total_lookup_ms"] >= 0 and "lookup_ms" in metadata["segments"][0]
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    test_manifest_entries_carried_over()
+    test_directory_index_read_once()
+    test_alignment_uses_manifest()
+    logger.info("All segment manifest tests passed")
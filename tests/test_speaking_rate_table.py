@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the speaking rate table.
+This script checks that the table keeps the mean and variance of each voice's
+characters per second, persists them, predicts segment durations, aggregates
+the synthesis logs of every session exactly once, and is updated when a
+synthesis job saves its log.
+"""
+
+import os
+import sys
+import json
+import logging
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import speaking_rate
+from modules.speaking_rate import SpeakingRateTable, get_speaking_rate_table, predict_segment_duration
+from modules.synthesis_logger import SynthesisLogger
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_variance_persistence_and_prediction():
+    """Online updates match the batch mean and variance, survive a reload and drive predictions."""
+    durations = [2.0, 2.5, 1.6, 2.2]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "speaking_rates.json")
+        table = SpeakingRateTable(path)
+        for duration in durations:
+            table.observe("sarvam", "anushka", "Telugu", 24, duration)
+        table.save()
+
+        stats = SpeakingRateTable(path).get_stats("sarvam", "anushka", "telugu")
+
+    rates = np.array([24 / duration for duration in durations])
+    assert stats["count"] == 4 and stats["chars"] == 96
+    assert abs(stats["chars_per_second"] - rates.mean()) < 1e-9
+    assert abs(stats["variance"] - rates.var(ddof=1)) < 1e-9
+
+    prediction = table.predict_duration("sarvam", "anushka", "telugu", "x" * 30, pace=1.25)
+    assert abs(prediction["duration"] - 30 / (rates.mean() * 1.25)) < 1e-9
+    assert prediction["std"] > 0 and prediction["samples"] == 4
+    assert table.predict_duration("sarvam", "anushka", "telugu", "x" * 30, min_samples=5) is None
+    assert table.predict_duration("cartesia", None, "hindi", "x" * 30) is None
+
+def test_logs_aggregated_once():
+    """Each session's log is counted once, in either log format, and again only if it is rewritten."""
+    with tempfile.TemporaryDirectory() as log_dir:
+        first = os.path.join(log_dir, "session_a", "synthesis", "synthesis_details_20250101_000000.json")
+        second = os.path.join(log_dir, "session_b", "synthesis", "synthesis_details_session_b.json")
+        os.makedirs(os.path.dirname(first))
+        os.makedirs(os.path.dirname(second))
+        with open(first, "w") as f:
+            json.dump({"synthesis_records": [
+                {"provider": "sarvam", "voice": "anushka", "language": "telugu", "chars": 24, "pace": 1.0, "duration": 2.0}
+            ]}, f)
+        # SynthesisLogger format
+        with open(second, "w") as f:
+            json.dump({"provider": "sarvam", "language": "telugu", "speaker": "anushka", "segments": [
+                {"text": "x" * 20, "duration": 2.5, "output_duration": 2.0, "pace": 1.2},
+                {"text": "", "duration": 1.0, "output_duration": 1.0},
+                # Only the source slot length, not the synthesized audio's
+                {"text": "x" * 20, "duration": 2.0}
+            ]}, f)
+
+        table = SpeakingRateTable()
+        assert table.aggregate_logs(log_dir) == 2
+        assert table.aggregate_logs(log_dir) == 0
+
+        stat = os.stat(first)
+        with open(first, "w") as f:
+            json.dump({"synthesis_records": [
+                {"provider": "sarvam", "voice": "anushka", "language": "telugu", "chars": 12, "pace": 1.0, "duration": 1.0}
+            ]}, f)
+        os.utime(first, (stat.st_mtime + 5, stat.st_mtime + 5))
+        assert table.aggregate_logs(log_dir) == 1
+
+    assert [row["count"] for row in table.get_table()] == [3]
+
+def test_resaved_log_counts_new_segments_only():
+    """A SynthesisLogger log saved again with another segment only adds that segment."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_dir = os.path.join(temp_dir, "outputs")
+        os.makedirs(log_dir)
+        rate_config = {"table_file": os.path.join(log_dir, "speaking_rates.json"), "log_dir": log_dir}
+
+        with patch.object(speaking_rate, "get_speaking_rate_config", return_value=rate_config):
+            synthesis_logger = SynthesisLogger("session_d", os.path.join(log_dir, "session_d"))
+            synthesis_logger.set_provider_details("sarvam", "tamil", speaker="meera")
+            synthesis_logger.add_segment({"text": "x" * 25, "duration": 2.5, "output_duration": 2.5,
+                                          "start_time": 0.0, "end_time": 2.5})
+            synthesis_logger.save()
+            synthesis_logger.add_segment({"text": "x" * 20, "duration": 2.0, "output_duration": 2.0,
+                                          "start_time": 3.0, "end_time": 5.0})
+            synthesis_logger.save()
+
+            rows = get_speaking_rate_table().get_table()
+
+    assert len(rows) == 1 and rows[0]["count"] == 2 and rows[0]["chars"] == 45
+
+def test_table_updated_after_each_job():
+    """Saving a job's synthesis log adds it to the persisted table without rescanning sessions."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_dir = os.path.join(temp_dir, "outputs")
+        os.makedirs(log_dir)
+        rate_config = {"table_file": os.path.join(log_dir, "speaking_rates.json"), "log_dir": log_dir}
+
+        with patch.object(speaking_rate, "get_speaking_rate_config", return_value=rate_config):
+            assert predict_segment_duration("sarvam", "meera", "tamil", "x" * 10) is None
+
+            synthesis_logger = SynthesisLogger("session_c", os.path.join(log_dir, "session_c"))
+            synthesis_logger.set_provider_details("sarvam", "tamil", speaker="meera")
+            synthesis_logger.add_segment({"text": "x" * 25, "duration": 3.0, "output_duration": 2.5,
+                                          "start_time": 0.0, "end_time": 3.0})
+            with patch.object(SpeakingRateTable, "aggregate_logs", side_effect=AssertionError("sessions rescanned")):
+                synthesis_logger.save()
+
+            assert predict_segment_duration("sarvam", "meera", "tamil", "x" * 10)["duration"] == 1.0
+            assert get_speaking_rate_table().aggregate_logs(log_dir) == 0
+
+        with open(rate_config["table_file"]) as f:
+            assert json.load(f)["rates"]["sarvam|meera|tamil"]["count"] == 1
+
+if __name__ == "__main__":
+    test_variance_persistence_and_prediction()
+    test_logs_aggregated_once()
+    test_resaved_log_counts_new_segments_only()
+    test_table_updated_after_each_job()
+    logger.info("All speaking rate table tests passed")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for the processing status pub/sub.
+This script checks that listeners wake up on new events with the in-memory
+implementation, and that events published by another process reach listeners
+with the SQLite implementation.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+import multiprocessing
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.status_pubsub import InMemoryPubSub, SQLitePubSub, format_sse_event
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def publish_from_other_process(db_path, count):
+    """Publish status events as a separate worker process would."""
+    pubsub = SQLitePubSub(db_path)
+    for i in range(count):
+        time.sleep(0.05)
+        pubsub.publish("session123", {"stage": "transcription", "progress": (i + 1) * 100 // count})
+
+def check_pubsub(pubsub):
+    """Latest event, ordering and per-channel filtering."""
+    assert pubsub.get_latest("session123") is None
+    assert pubsub.listen("session123", 0, timeout=0.05) == []
+
+    first = pubsub.publish("session123", {"stage": "video_processing", "progress": 5})
+    pubsub.publish("other", {"stage": "translation", "progress": 50})
+    second = pubsub.publish("session123", {"stage": "video_processing", "progress": 40})
+
+    assert second > first
+    assert pubsub.get_latest("session123") == (second, {"stage": "video_processing", "progress": 40})
+    assert [event_id for event_id, _ in pubsub.listen("session123", 0, timeout=0)] == [first, second]
+    assert pubsub.listen("session123", second, timeout=0) == []
+
+def test_in_memory_listener_wakes_on_publish():
+    """A waiting listener returns as soon as an event is published."""
+    pubsub = InMemoryPubSub()
+    check_pubsub(pubsub)
+
+    after_id = pubsub.get_latest("session123")[0]
+    timer = threading.Timer(0.1, pubsub.publish, ("session123", {"stage": "completed", "progress": 100}))
+    timer.start()
+    started = time.monotonic()
+    events = pubsub.listen("session123", after_id, timeout=5)
+    elapsed = time.monotonic() - started
+
+    assert [message["stage"] for _, message in events] == ["completed"]
+    assert elapsed < 1.0
+
+def test_sqlite_events_cross_processes():
+    """Events published in another process reach a listener in this one."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "status.db")
+        check_pubsub(SQLitePubSub(db_path))
+
+        pubsub = SQLitePubSub(db_path, poll_interval=0.02)
+        after_id = pubsub.get_latest("session123")[0]
+        process = multiprocessing.get_context("spawn").Process(target=publish_from_other_process, args=(db_path, 3))
+        process.start()
+
+        received = []
+        deadline = time.monotonic() + 30
+        while len(received) < 3 and time.monotonic() < deadline:
+            events = pubsub.listen("session123", after_id, timeout=1)
+            if events:
+                after_id = events[-1][0]
+                received.extend(message["progress"] for _, message in events)
+        process.join()
+
+    assert received == [33, 66, 100]
+
+def test_sse_event_format():
+    """Events are encoded with their ID so clients can resume with Last-Event-ID."""
+    encoded = format_sse_event(7, {"stage": "transcription", "progress": 50})
+    lines = encoded.split("\n")
+
+    assert encoded.endswith("\n\n")
+    assert lines[0] == "id: 7"
+    assert lines[1] == "event: status"
+    assert json.loads(lines[2][len("data: "):]) == {"stage": "transcription", "progress": 50}
+
+if __name__ == "__main__":
+    test_in_memory_listener_wakes_on_publish()
+    test_sqlite_events_cross_processes()
+    test_sse_event_format()
+    logger.info("All status pub/sub tests passed")
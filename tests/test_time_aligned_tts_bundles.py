@@ -34,12 +34,12 @@ class TestTimeAlignedTTSBundles(unittest.TestCase):
         # Create temporary directory for test outputs
         self.test_dir = tempfile.mkdtemp()
         
-        # Create input directory if it doesn't exist
-        input_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+        # Keep inputs and saved outputs inside the temporary directory
+        input_dir = os.path.join(self.test_dir, "data")
         os.makedirs(input_dir, exist_ok=True)
         
-        # Create test_outputs directory for permanent output files
-        self.test_outputs_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_outputs")
+        # Create test_outputs directory for the output files of the run
+        self.test_outputs_dir = os.path.join(self.test_dir, "test_outputs")
         os.makedirs(self.test_outputs_dir, exist_ok=True)
         
         # Use a real diarization file with full content
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-process time stretch engine.
+This script checks that WSOLA hits the requested length without shifting pitch,
+and that adjust_segment_duration keeps its speed factor clamping and quality
+scoring without starting ffmpeg.
+"""
+
+import os
+import sys
+import logging
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import time_aligned_tts
+from modules.time_aligned_tts import adjust_segment_duration, get_speed_factor_quality
+from modules.time_stretch import wsola_time_stretch
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def tone(seconds, frequency, sample_rate):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+def peak_frequency(audio, sample_rate):
+    spectrum = np.abs(np.fft.rfft(audio))
+    return np.argmax(spectrum) * sample_rate / len(audio)
+
+def test_wsola_length_and_pitch():
+    """Output is exactly len / speed_factor samples long and keeps the input pitch."""
+    sample_rate = 22050
+    audio = tone(1.5, 220, sample_rate)
+
+    for speed_factor in (0.9, 1.0, 1.3, 2.4):
+        stretched = wsola_time_stretch(audio, speed_factor, sample_rate)
+        assert len(stretched) == round(len(audio) / speed_factor)
+        assert abs(peak_frequency(stretched, sample_rate) - 220) < 2
+        assert np.max(np.abs(stretched)) < 0.31
+
+    stereo = wsola_time_stretch(np.stack([audio, audio * 0.5], axis=1), 1.2, sample_rate)
+    assert stereo.shape == (round(len(audio) / 1.2), 2)
+
+def test_quality_scoring_unchanged():
+    """Slowdowns are clamped to 0.9 and speed factors are scored as before."""
+    assert get_speed_factor_quality(1.0, 2.0)["speed_factor"] == 0.9
+    assert get_speed_factor_quality(1.2, 1.0)["quality_level"] == "good"
+    assert get_speed_factor_quality(1.5, 1.0)["quality_level"] == "acceptable"
+    poor = get_speed_factor_quality(2.0, 1.0)
+    assert poor["quality_level"] == "poor" and poor["quality_score"] == 50 and "warning" in poor
+
+def test_adjust_segment_duration_in_process():
+    """The wsola engine writes 44.1 kHz PCM WAV of the target duration without running ffmpeg."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_path = os.path.join(temp_dir, "segment.wav")
+        output_path = os.path.join(temp_dir, "segment_time_aligned.wav")
+        sf.write(input_path, tone(2.0, 200, 16000), 16000, subtype="PCM_16")
+
+        with patch.object(time_aligned_tts.subprocess, "run") as run:
+            success, metrics = adjust_segment_duration(input_path, output_path, 1.6, engine="wsola")
+            slowed, slowed_metrics = adjust_segment_duration(input_path, output_path, 4.0, engine="wsola")
+        run.assert_not_called()
+
+        assert success and slowed
+        assert metrics["engine"] == "wsola"
+        assert metrics["speed_factor"] == 1.25 and metrics["quality_score"] == 90
+        assert abs(metrics["output_duration"] - 1.6) < 0.001
+
+        # Clamped to 0.9, so the output falls well short of 4s and is penalized
+        info = sf.info(output_path)
+        assert info.samplerate == 44100 and info.subtype == "PCM_16"
+        assert abs(slowed_metrics["output_duration"] - 2.0 / 0.9) < 0.001
+        assert slowed_metrics["quality_score"] == 80
+
+def test_undecodable_input_falls_back_to_ffmpeg():
+    """Files soundfile can't read are stretched with ffmpeg instead."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_path = os.path.join(temp_dir, "segment.wav")
+        with open(input_path, "wb") as f:
+            f.write(b"not audio")
+
+        with patch.object(time_aligned_tts.subprocess, "run") as run:
+            adjust_segment_duration(input_path, os.path.join(temp_dir, "out.wav"), 1.0, 1.2, engine="wsola")
+
+        command = run.call_args[0][0]
+        assert "atempo=1.200000" in command
+
+if __name__ == "__main__":
+    test_wsola_length_and_pitch()
+    test_quality_scoring_unchanged()
+    test_adjust_segment_duration_in_process()
+    test_undecodable_input_falls_back_to_ffmpeg()
+    logger.info("All time stretch tests passed")
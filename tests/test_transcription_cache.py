@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Test script for the content-addressed transcription cache.
+This script checks that a repeated transcription is served from the cache without
+VAD or API calls, that new audio is decoded only once (by VAD, which also hashes
+it), that keys follow the decoded audio and settings, and that the cache evicts
+least recently used entries along with their file hash aliases. The VAD model and the Sarvam API are
+replaced with stand-ins, so no network access is needed.
+"""
+
+import os
+import sys
+import json
+import shutil
+import asyncio
+import logging
+import tempfile
+from unittest.mock import patch
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import sarvam_speech, vad_segmentation
+from modules.transcription_cache import TranscriptionCache, hash_decoded_audio
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+class EnergyVADModel:
+    """Stateless stand-in for Silero VAD that marks loud windows as speech."""
+
+    def reset_states(self, batch_size=1):
+        pass
+
+    def __call__(self, x, sr):
+        x = np.asarray(x, dtype=np.float32).reshape(-1, 512)
+        return (np.sqrt(np.mean(x ** 2, axis=1, keepdims=True)) > 0.05).astype(np.float32)
+
+def create_test_audio():
+    """Create 12 seconds of 16-bit noise with three bursts of 'speech' (exact in WAV and FLAC)."""
+    rng = np.random.default_rng(0)
+    audio = 0.001 * rng.standard_normal(12 * SAMPLE_RATE).astype(np.float32)
+    for start, end in [(1.0, 3.0), (5.0, 6.4), (8.0, 10.5)]:
+        audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] += 0.3 * rng.standard_normal(int((end - start) * SAMPLE_RATE)).astype(np.float32)
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+
+def run_transcriptions(temp_dir, runs):
+    """Run transcribe_with_vad_diarization for (file name, min_segment_duration) pairs and count API calls and decodes."""
+    calls = []
+
+    async def fake_process(audio_path, api_key=None, audio_data=None, audio_duration=None):
+        calls.append(os.path.basename(audio_path))
+        return {"transcript": f"text {len(calls)}", "segments": []}
+
+    results = []
+    vad_model = EnergyVADModel()
+    cwd = os.getcwd()
+    os.chdir(temp_dir)
+    try:
+        with patch.object(vad_segmentation, "get_vad_model", return_value=vad_model) as get_vad_model, \
+             patch.object(vad_segmentation.librosa, "load", wraps=vad_segmentation.librosa.load) as load, \
+             patch.object(vad_segmentation, "stream_audio_blocks", side_effect=AssertionError("decoded again to hash")), \
+             patch.object(sarvam_speech, "process_audio_with_diarization", side_effect=fake_process):
+            for file_name, min_segment_duration in runs:
+                calls_before = len(calls)
+                vad_calls_before = get_vad_model.call_count
+                loads_before = load.call_count
+                result = asyncio.run(sarvam_speech.transcribe_with_vad_diarization(
+                    file_name, api_key="test-key", min_segment_duration=min_segment_duration, save_segments=False
+                ))
+                results.append((result, len(calls) - calls_before, get_vad_model.call_count - vad_calls_before,
+                                load.call_count - loads_before))
+    finally:
+        os.chdir(cwd)
+    return results
+
+def test_repeated_transcription_is_served_from_cache():
+    """Repeated audio makes no API calls, and is only decoded again if its bytes are new."""
+    audio = create_test_audio()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sf.write(os.path.join(temp_dir, "first.wav"), audio, SAMPLE_RATE)
+        sf.write(os.path.join(temp_dir, "second.flac"), audio, SAMPLE_RATE)
+        shutil.copy(os.path.join(temp_dir, "first.wav"), os.path.join(temp_dir, "third.wav"))
+
+        first, second, third, fourth = run_transcriptions(
+            temp_dir, [("first.wav", 1.0), ("second.flac", 1.0), ("third.wav", 1.0), ("first.wav", 0.5)]
+        )
+
+        with open(os.path.join(temp_dir, "outputs", "second", "diarization.json")) as f:
+            restored = json.load(f)
+        with open(os.path.join(temp_dir, "outputs", "second", "vad_segments", "segment_info.json")) as f:
+            segment_info = json.load(f)
+        with open(os.path.join(temp_dir, "outputs", "second", "metadata.json")) as f:
+            metadata = json.load(f)
+
+    # New audio is decoded once, by VAD
+    assert first[1:] == (3, 1, 1)
+    # The same samples in another container are decoded to find them, but skip the API
+    assert second[1:] == (0, 1, 1)
+    # The same bytes are found without decoding
+    assert third[1:] == (0, 0, 0)
+    assert second[0] == third[0] == first[0] == restored
+    assert len(segment_info) == 3
+    assert metadata["transcription_cache"]["hit"] is True
+    assert metadata["transcription_cache"]["stats"]["hits"] >= 1
+    # A different VAD setting is a different key
+    assert fourth[1] > 0
+
+def test_streaming_run_hashes_decoded_blocks():
+    """A streaming run keys its result by the blocks it decoded, matching a direct hash of the audio."""
+    audio = create_test_audio()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sf.write(os.path.join(temp_dir, "session.wav"), audio, SAMPLE_RATE)
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            async def fake_process(audio_path, api_key=None, audio_data=None, audio_duration=None):
+                return {"transcript": "text", "segments": []}
+
+            with patch.object(vad_segmentation, "get_vad_model", return_value=EnergyVADModel()), \
+                 patch.object(sarvam_speech, "process_audio_with_diarization", side_effect=fake_process):
+                asyncio.run(sarvam_speech.transcribe_with_vad_diarization(
+                    "session.wav", api_key="test-key", save_segments=False, streaming=True
+                ))
+            expected_hash = hash_decoded_audio("session.wav")
+            entries = [name for name in os.listdir(os.path.join("cache", "transcriptions")) if name.endswith(".json")]
+            with open(os.path.join("cache", "transcriptions", entries[0])) as f:
+                entry = json.load(f)
+        finally:
+            os.chdir(cwd)
+
+    assert len(entries) == 1 and entry["audio_hash"] == expected_hash
+
+def test_failed_segments_are_not_cached():
+    """A transcription with a failed segment is retried on the next run."""
+    audio = create_test_audio()
+    calls = []
+
+    async def failing_process(audio_path, api_key=None, audio_data=None, audio_duration=None):
+        calls.append(audio_path)
+        return {"error": "Job failed"}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sf.write(os.path.join(temp_dir, "session.wav"), audio, SAMPLE_RATE)
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            with patch.object(vad_segmentation, "get_vad_model", return_value=EnergyVADModel()), \
+                 patch.object(sarvam_speech, "process_audio_with_diarization", side_effect=failing_process):
+                for _ in range(2):
+                    asyncio.run(sarvam_speech.transcribe_with_vad_diarization("session.wav", api_key="test-key", save_segments=False))
+        finally:
+            os.chdir(cwd)
+
+    assert len(calls) == 6
+
+def test_decoded_audio_hash_ignores_container():
+    """The same samples hash the same in WAV and FLAC, and differently when changed."""
+    audio = create_test_audio()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sf.write(os.path.join(temp_dir, "a.wav"), audio, SAMPLE_RATE)
+        sf.write(os.path.join(temp_dir, "a.flac"), audio, SAMPLE_RATE)
+        sf.write(os.path.join(temp_dir, "b.wav"), audio // 2, SAMPLE_RATE)
+        hashes = [hash_decoded_audio(os.path.join(temp_dir, name)) for name in ("a.wav", "a.flac", "b.wav")]
+
+    assert hashes[0] == hashes[1]
+    assert hashes[0] != hashes[2]
+
+def test_least_recently_used_entries_are_evicted():
+    """Once the cache is over its size limit, the entries read longest ago go first, with their aliases."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = TranscriptionCache(temp_dir, max_bytes=10 ** 9)
+        for i, key in enumerate(["a", "b", "c"]):
+            cache.put(key, {"transcript": "x" * 1000}, audio_hash=f"audio_{key}")
+            cache.remember_audio_hash(f"file_{key}", f"audio_{key}")
+            os.utime(os.path.join(temp_dir, f"{key}.json"), (1000 + i, 1000 + i))
+
+        entry_size = os.path.getsize(os.path.join(temp_dir, "a.json"))
+        assert cache.get("a") is not None
+        assert cache.get("missing") is None
+        cache.max_bytes = 2 * entry_size + entry_size // 2
+        cache.put("d", {"transcript": "x" * 1000})
+
+        remaining = sorted(name for name in os.listdir(temp_dir) if name.endswith(".json"))
+        aliases = sorted(os.listdir(os.path.join(temp_dir, "aliases")))
+        stats = cache.get_stats()
+
+    assert remaining == ["a.json", "d.json"]
+    # Aliases leading to evicted entries go with them
+    assert aliases == ["file_a_16000"]
+    assert stats["evictions"] == 2
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+if __name__ == "__main__":
+    test_repeated_transcription_is_served_from_cache()
+    test_streaming_run_hashes_decoded_blocks()
+    test_failed_segments_are_not_cached()
+    test_decoded_audio_hash_ignores_container()
+    test_least_recently_used_entries_are_evicted()
+    logger.info("All transcription cache tests passed")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for the TTS audio cache.
+This script checks cache keys, LRU eviction and that TTSProcessor skips the
+provider call for segments it has already synthesized. The providers are
+replaced with stand-ins, so no network access is needed.
+"""
+
+import os
+import sys
+import time
+import logging
+import tempfile
+from unittest.mock import patch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import tts_processor
+from modules.tts_cache import TTSAudioCache, make_tts_cache_key
+from modules.tts_processor import TTSProcessor
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def test_cache_key_fields():
+    """Whitespace doesn't change the key; voice, language and pace do."""
+    key = make_tts_cache_key("sarvam", "bulbul:v2", "anushka", "telugu", "నమస్కారం  ప్రపంచం ", pace=1.0)
+
+    assert key == make_tts_cache_key("sarvam", "bulbul:v2", "anushka", "telugu", " నమస్కారం ప్రపంచం", pace=1.0)
+    assert key != make_tts_cache_key("sarvam", "bulbul:v2", "karun", "telugu", "నమస్కారం ప్రపంచం", pace=1.0)
+    assert key != make_tts_cache_key("sarvam", "bulbul:v2", "anushka", "tamil", "నమస్కారం ప్రపంచం", pace=1.0)
+    assert key != make_tts_cache_key("sarvam", "bulbul:v2", "anushka", "telugu", "నమస్కారం ప్రపంచం", pace=1.2)
+
+def test_lru_eviction():
+    """Least recently read entries are evicted first once the cache is over max_bytes."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = TTSAudioCache(os.path.join(temp_dir, "cache"), max_bytes=250)
+        source = os.path.join(temp_dir, "audio.mp3")
+        output = os.path.join(temp_dir, "out.mp3")
+        with open(source, "wb") as f:
+            f.write(b"x" * 100)
+
+        cache.put("a", source)
+        cache.put("b", source)
+        past = time.time() - 60
+        os.utime(cache._entry_path("a"), (past, past))
+        os.utime(cache._entry_path("b"), (past - 60, past - 60))
+        assert cache.get("b", output)
+
+        cache.put("c", source)
+
+        assert not cache.get("a", output)
+        assert cache.get("b", output) and cache.get("c", output)
+        assert cache.get_stats()["evictions"] == 1
+
+def test_processor_reuses_cached_audio():
+    """A repeated segment is copied from the cache, and failed syntheses aren't cached."""
+    calls = []
+
+    def fake_sarvam(text, output_path, language, speaker=None, pace=1.0):
+        calls.append(text)
+        if text == "fail":
+            return False
+        with open(output_path, "wb") as f:
+            f.write(f"audio:{text}".encode("utf-8"))
+        return True
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = TTSAudioCache(os.path.join(temp_dir, "cache"), max_bytes=1 << 20)
+        with patch.object(tts_processor, "get_tts_cache", return_value=cache), \
+             patch.object(tts_processor, "sarvam_synthesize", side_effect=fake_sarvam):
+            processor = TTSProcessor(output_dir=os.path.join(temp_dir, "session"), provider="sarvam", language="telugu")
+            segment = {"segment_id": "seg_000", "translated_text": "hello  there", "speaker": "SPEAKER_00"}
+            first = os.path.join(temp_dir, "first.wav")
+            second = os.path.join(temp_dir, "second.wav")
+
+            assert processor.synthesize_segment_with_duration(segment, first, 2)
+            assert processor.synthesize_segment_with_duration(dict(segment, translated_text="hello there"), second, 2)
+            assert not processor.synthesize_segment_with_duration(dict(segment, translated_text="fail"), first, 2)
+            assert not processor.synthesize_segment_with_duration(dict(segment, translated_text="fail"), first, 2)
+
+            with open(second, "rb") as f:
+                assert f.read() == b"audio:hello  there"
+
+        assert calls == ["hello  there", "fail", "fail"]
+        assert processor.get_cache_stats() == {"hits": 1, "misses": 3, "hit_rate": 0.25}
+
+if __name__ == "__main__":
+    test_cache_key_fields()
+    test_lru_eviction()
+    test_processor_reuses_cached_audio()
+    logger.info("All TTS cache tests passed")
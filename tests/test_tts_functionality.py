@@ -63,7 +63,7 @@ def test_tts_functionality():
         
         # Create a TTSProcessor instance
         session_id = "test_session"
-        processor = tts_processor.TTSProcessor(session_id, test_dir)
+        processor = tts_processor.TTSProcessor(os.path.join(test_dir, session_id), session_id=session_id)
         
         # Process TTS
         logger.info("Processing TTS...")
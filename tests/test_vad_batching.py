@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for batched VAD inference.
+This script checks the batched VAD probabilities against the sequential loop
+using a small stateful stand-in for the Silero model, so no model download is needed.
+"""
+
+import os
+import sys
+import logging
+import numpy as np
+import torch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.vad_segmentation import get_vad_probs, get_vad_probs_batched, compare_vad_probs
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+class FakeVADModel(torch.nn.Module):
+    """Stateful stand-in for Silero VAD: a leaky integrator over window energy."""
+
+    def __init__(self, decay=0.9):
+        super().__init__()
+        self.decay = decay
+        self._state = None
+
+    def reset_states(self, batch_size=1):
+        self._state = None
+
+    def forward(self, x, sr):
+        if x.dim() == 1:
+            x = x.unsqueeze(0)
+        if self._state is None or self._state.shape[0] != x.shape[0]:
+            self._state = torch.zeros(x.shape[0])
+        energy = x.pow(2).mean(dim=1).sqrt()
+        self._state = self.decay * self._state + (1 - self.decay) * torch.clamp(energy * 4, 0, 1)
+        return self._state.unsqueeze(1)
+
+def create_test_audio(duration_seconds, seed=0):
+    """Create noise with speech-like bursts of varying length."""
+    rng = np.random.default_rng(seed)
+    audio = 0.005 * rng.standard_normal(int(duration_seconds * SAMPLE_RATE)).astype(np.float32)
+    position = 0.5
+    while position < duration_seconds - 1:
+        burst = 0.3 + 1.5 * rng.random()
+        start, end = int(position * SAMPLE_RATE), int(min(position + burst, duration_seconds) * SAMPLE_RATE)
+        audio[start:end] += 0.2 * rng.standard_normal(end - start).astype(np.float32)
+        position += burst + 0.2 + 2.0 * rng.random()
+    return audio
+
+def test_batched_matches_sequential():
+    """Batched probabilities should match the sequential loop when the warm-up is long enough."""
+    model = FakeVADModel(decay=0.9)
+    audio = create_test_audio(120)
+
+    within_tolerance, max_difference = compare_vad_probs(
+        model, audio, SAMPLE_RATE, atol=1e-4, num_streams=8, warmup_windows=256
+    )
+    logger.info(f"Max difference between batched and sequential VAD: {max_difference:.2e}")
+
+    assert within_tolerance
+    assert isinstance(get_vad_probs_batched(model, audio, SAMPLE_RATE), np.ndarray)
+
+def test_batched_rescores_unconverged_streams():
+    """Streams whose warm-up is too short for the model's memory should be re-scored."""
+    model = FakeVADModel(decay=0.995)
+    audio = create_test_audio(120, seed=1)
+
+    reference = np.asarray(get_vad_probs(model, audio, SAMPLE_RATE))
+    batched = get_vad_probs_batched(model, audio, SAMPLE_RATE, num_streams=8, warmup_windows=32, atol=1e-3)
+    max_difference = np.max(np.abs(reference - batched))
+    logger.info(f"Max difference with re-scored streams: {max_difference:.2e}")
+
+    assert max_difference <= 1e-3
+
+def test_batched_short_and_empty_audio():
+    """Audio shorter than the warm-up is scored as a single exact stream."""
+    model = FakeVADModel()
+    audio = create_test_audio(3)
+
+    reference = np.asarray(get_vad_probs(model, audio, SAMPLE_RATE))
+    batched = get_vad_probs_batched(model, audio, SAMPLE_RATE)
+
+    assert len(batched) == len(reference)
+    assert np.allclose(batched, reference, atol=1e-6)
+    assert len(get_vad_probs_batched(model, np.zeros(0, dtype=np.float32), SAMPLE_RATE)) == 0
+
+if __name__ == "__main__":
+    test_batched_matches_sequential()
+    test_batched_rescores_unconverged_streams()
+    test_batched_short_and_empty_audio()
+    logger.info("All batched VAD tests passed")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the zero-write VAD segmentation path.
+This script checks that segments are uploaded from in-memory WAV buffers and that
+segment files are only written when the debug flag is set. The VAD model and the
+Sarvam API are replaced with stand-ins, so no network access is needed.
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import tempfile
+from unittest.mock import patch
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import sarvam_speech, vad_segmentation
+from modules.vad_segmentation import encode_wav_buffer, segment_audio_without_saving
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+class EnergyVADModel:
+    """Stateless stand-in for Silero VAD that marks loud windows as speech."""
+
+    def reset_states(self, batch_size=1):
+        pass
+
+    def __call__(self, x, sr):
+        x = np.asarray(x, dtype=np.float32).reshape(-1, 512)
+        return (np.sqrt(np.mean(x ** 2, axis=1, keepdims=True)) > 0.05).astype(np.float32)
+
+def create_test_file(directory):
+    """Write a 12 second file with three bursts of 'speech'."""
+    rng = np.random.default_rng(0)
+    audio = 0.001 * rng.standard_normal(12 * SAMPLE_RATE).astype(np.float32)
+    for start, end in [(1.0, 3.0), (5.0, 5.4), (8.0, 10.5)]:
+        audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] += 0.3 * rng.standard_normal(int((end - start) * SAMPLE_RATE)).astype(np.float32)
+    audio_path = os.path.join(directory, "session123.wav")
+    sf.write(audio_path, audio, SAMPLE_RATE)
+    return audio_path
+
+def test_wav_buffer_matches_file():
+    """The in-memory WAV has the same bytes as the file segment_audio_with_vad writes."""
+    audio = np.sin(np.linspace(0, 200, SAMPLE_RATE)).astype(np.float32) * 0.5
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "segment_000.wav")
+        sf.write(file_path, audio, SAMPLE_RATE)
+        with open(file_path, "rb") as f:
+            assert encode_wav_buffer(audio, SAMPLE_RATE).getvalue() == f.read()
+
+def test_segments_are_views_and_filtered():
+    """In-memory segments share the decoded audio and honour min_segment_duration."""
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch.object(vad_segmentation, "get_vad_model", return_value=EnergyVADModel()):
+        audio_path = create_test_file(temp_dir)
+        segments = segment_audio_without_saving(audio_path, combine_gap=0.5, min_segment_duration=1.0)
+
+    assert len(segments) == 2
+    assert all(segment["audio_data"].base is not None for segment in segments)
+
+def test_transcription_uploads_from_memory():
+    """Without the debug flag, segments are uploaded from memory and no WAV files are written."""
+    uploads = []
+
+    async def fake_process(audio_path, api_key=None, audio_data=None, audio_duration=None):
+        uploads.append((os.path.basename(audio_path), audio_data))
+        return {"transcript": "hello", "segments": []}
+
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch.object(vad_segmentation, "get_vad_model", return_value=EnergyVADModel()), \
+         patch.object(sarvam_speech, "process_audio_with_diarization", side_effect=fake_process), \
+         patch.object(sarvam_speech, "combine_segment_results", side_effect=lambda results: {"segments": results}):
+        audio_path = create_test_file(temp_dir)
+        segments_dir = os.path.join(temp_dir, "vad_segments")
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            asyncio.run(sarvam_speech.transcribe_with_vad_diarization(
+                audio_path, api_key="test-key", vad_segments_dir=segments_dir, save_segments=False
+            ))
+        finally:
+            os.chdir(cwd)
+
+        assert [name for name, _ in uploads] == ["segment_000.wav", "segment_001.wav"]
+        assert all(data[:4] == b"RIFF" for _, data in uploads)
+        assert os.listdir(segments_dir) == ["segment_info.json"]
+
+if __name__ == "__main__":
+    test_wav_buffer_matches_file()
+    test_segments_are_views_and_filtered()
+    test_transcription_uploads_from_memory()
+    logger.info("All in-memory VAD segmentation tests passed")
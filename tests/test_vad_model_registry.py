@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the process-wide VAD model registry.
+This script checks that the VAD model is loaded once per process, copied once per
+thread and can be loaded from a local file, without downloading the Silero model.
+"""
+
+import os
+import sys
+import logging
+import tempfile
+import threading
+from unittest.mock import patch
+import torch
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import vad_segmentation
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class TinyVADModel(torch.nn.Module):
+    """Minimal scriptable model with the Silero VAD interface."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    @torch.jit.export
+    def reset_states(self, batch_size: int = 1):
+        self.calls = 0
+
+    def forward(self, x: torch.Tensor, sr: int) -> torch.Tensor:
+        self.calls += 1
+        return torch.zeros(1, 1)
+
+def clear_registry():
+    """Reset the module-level registry between tests."""
+    vad_segmentation._vad_models.clear()
+    vad_segmentation._vad_thread_local.models = {}
+
+def test_model_loaded_once_and_copied_per_thread():
+    """Concurrent threads share one loaded model but get their own instances."""
+    clear_registry()
+    load_calls = []
+
+    def fake_load(model_path=None, backend=None):
+        load_calls.append(model_path)
+        return TinyVADModel()
+
+    thread_models = {}
+
+    def worker(name):
+        first = vad_segmentation.get_vad_model(model_path="fake.jit")
+        second = vad_segmentation.get_vad_model(model_path="fake.jit")
+        assert first is second
+        thread_models[name] = first
+
+    with patch.object(vad_segmentation, "load_vad_model", side_effect=fake_load):
+        threads = [threading.Thread(target=worker, args=(f"worker_{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert load_calls == ["fake.jit"]
+    assert len({id(model) for model in thread_models.values()}) == 4
+
+def test_model_states_reset_on_checkout():
+    """Each checkout hands out a model with reset states."""
+    clear_registry()
+
+    with patch.object(vad_segmentation, "load_vad_model", side_effect=lambda model_path=None, backend=None: TinyVADModel()):
+        model = vad_segmentation.get_vad_model(model_path="fake.jit")
+        model(torch.zeros(512), 16000)
+        assert model.calls == 1
+        model = vad_segmentation.get_vad_model(model_path="fake.jit")
+        assert model.calls == 0
+
+def test_load_model_from_local_file():
+    """A saved TorchScript model can be loaded without torch.hub."""
+    clear_registry()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = os.path.join(temp_dir, "silero_vad.jit")
+        torch.jit.save(torch.jit.script(TinyVADModel()), model_path)
+
+        with patch.object(torch.hub, "load", side_effect=AssertionError("torch.hub should not be used")):
+            model = vad_segmentation.get_vad_model(model_path=model_path)
+
+        assert float(model(torch.zeros(512), 16000)) == 0.0
+
+if __name__ == "__main__":
+    test_model_loaded_once_and_copied_per_thread()
+    test_model_states_reset_on_checkout()
+    test_load_model_from_local_file()
+    logger.info("All VAD model registry tests passed")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test script for VAD post-processing.
+This script checks the vectorized utterance extraction and segment merging against
+frame-by-frame reference loops, including hysteresis and min-speech/min-silence smoothing.
+"""
+
+import os
+import sys
+import time
+import logging
+import numpy as np
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.vad_segmentation import get_utterances, merge_segments, get_utterance_bounds, merge_segment_bounds
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FRAME_DURATION = 0.032
+
+def reference_utterances(vad_probs, threshold=0.5, offset_threshold=None, min_speech_frames=0, min_silence_frames=0):
+    """Frame-by-frame reference: hysteresis, then silence bridging, then short speech removal."""
+    offset_threshold = threshold if offset_threshold is None else min(offset_threshold, threshold)
+    runs = []
+    in_utterance = False
+    for i, prob in enumerate(vad_probs):
+        if not in_utterance and prob > threshold:
+            in_utterance, start = True, i
+        elif in_utterance and prob <= offset_threshold:
+            in_utterance = False
+            runs.append([start, i])
+    if in_utterance:
+        runs.append([start, len(vad_probs)])
+
+    bridged = []
+    for run in runs:
+        if bridged and run[0] - bridged[-1][1] < min_silence_frames:
+            bridged[-1][1] = run[1]
+        else:
+            bridged.append(run)
+
+    return [(start * FRAME_DURATION, end * FRAME_DURATION) for start, end in bridged if end - start >= min_speech_frames]
+
+def reference_merge(segments, max_duration=8, max_gap=1):
+    """Greedy reference merge, as in the original loop implementation."""
+    merged_segments = []
+    if not segments:
+        return merged_segments
+    current_start, current_end = segments[0]
+    for start, end in segments[1:]:
+        if (start - current_end <= max_gap) and (end - current_start <= max_duration):
+            current_end = end
+        else:
+            merged_segments.append((current_start, current_end))
+            current_start, current_end = start, end
+    merged_segments.append((current_start, current_end))
+    return merged_segments
+
+def random_probs(num_frames, rng):
+    """Random-walk speech probabilities with many threshold crossings."""
+    return np.clip(np.cumsum(rng.normal(0, 0.2, num_frames)) % 1.3, 0, 1).astype(np.float32)
+
+def test_utterances_match_reference():
+    """Vectorized extraction matches the frame loop, with and without hysteresis and smoothing."""
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        vad_probs = random_probs(int(rng.integers(0, 2000)), rng)
+        threshold = float(rng.uniform(0.3, 0.8))
+        offset_threshold = float(rng.uniform(0.1, threshold))
+        min_speech_frames, min_silence_frames = int(rng.integers(0, 10)), int(rng.integers(0, 10))
+
+        assert get_utterances(vad_probs, threshold) == reference_utterances(vad_probs, threshold)
+        assert get_utterances(vad_probs.tolist(), threshold) == reference_utterances(vad_probs, threshold)
+
+        # Durations sit half a frame below the frame count so rounding cannot flip the comparison
+        result = get_utterances(
+            vad_probs, threshold,
+            offset_threshold=offset_threshold,
+            min_speech_duration=(min_speech_frames - 0.5) * FRAME_DURATION if min_speech_frames else 0.0,
+            min_silence_duration=(min_silence_frames - 0.5) * FRAME_DURATION if min_silence_frames else 0.0
+        )
+        expected = reference_utterances(vad_probs, threshold, offset_threshold, min_speech_frames, min_silence_frames)
+        assert np.allclose(result, expected) and len(result) == len(expected)
+
+def test_hysteresis_ignores_dips_between_thresholds():
+    """Dips that stay above the offset threshold do not split an utterance."""
+    vad_probs = [0.1, 0.9, 0.4, 0.45, 0.9, 0.2, 0.4, 0.1]
+
+    assert len(get_utterances(vad_probs, threshold=0.5)) == 2
+    assert get_utterances(vad_probs, threshold=0.5, offset_threshold=0.3) == [(FRAME_DURATION, 5 * FRAME_DURATION)]
+
+def test_merge_matches_reference():
+    """Vectorized merging matches the greedy loop for random gap and duration limits."""
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        utterances = get_utterances(random_probs(int(rng.integers(0, 3000)), rng), float(rng.uniform(0.3, 0.8)))
+        max_duration, max_gap = float(rng.uniform(0.5, 10)), float(rng.uniform(0, 2))
+        assert merge_segments(utterances, max_duration, max_gap) == reference_merge(utterances, max_duration, max_gap)
+
+    assert merge_segments([]) == []
+    assert merge_segments([(0.0, 12.0), (12.5, 13.0)]) == [(0.0, 12.0), (12.5, 13.0)]
+
+def test_post_processing_is_fast_on_long_audio():
+    """A three-hour recording is post-processed in a few milliseconds."""
+    rng = np.random.default_rng(2)
+    vad_probs = np.zeros(340000, dtype=np.float32)
+    position = 0
+    while position < len(vad_probs):
+        length = int(rng.integers(30, 190))
+        vad_probs[position:position + length] = 0.9
+        position += length + int(rng.integers(5, 60))
+
+    start_time = time.perf_counter()
+    utterances = get_utterance_bounds(vad_probs, offset_threshold=0.35, min_speech_duration=0.25, min_silence_duration=0.1)
+    merged = merge_segment_bounds(utterances)
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"Post-processed {len(vad_probs)} frames into {len(merged)} segments in {elapsed * 1000:.2f} ms")
+
+    assert elapsed < 0.05
+
+if __name__ == "__main__":
+    test_utterances_match_reference()
+    test_hysteresis_ignores_dips_between_thresholds()
+    test_merge_matches_reference()
+    test_post_processing_is_fast_on_long_audio()
+    logger.info("All VAD post-processing tests passed")
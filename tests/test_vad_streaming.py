@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test script for streaming VAD segmentation.
+This script checks that block-by-block decoding and incremental segmentation give
+the same segments as the whole-file path, and that segments are emitted before
+decoding finishes. A stateless energy detector stands in for the Silero model.
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import threading
+import tempfile
+from unittest.mock import patch
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import sarvam_speech, vad_segmentation
+from modules.vad_segmentation import (
+    StreamingSegmenter, get_utterance_bounds, merge_segment_bounds,
+    segment_audio_without_saving, stream_audio_blocks, stream_vad_segments
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class EnergyVADModel:
+    """Stateless stand-in for Silero VAD: speech probability grows with window energy."""
+
+    def reset_states(self, batch_size=1):
+        pass
+
+    def __call__(self, x, sr):
+        x = np.asarray(x, dtype=np.float32).reshape(-1, 512)
+        return np.sqrt(np.mean(x ** 2, axis=1, keepdims=True)) * 5
+
+def create_test_file(directory, duration=120, sample_rate=44100):
+    """Write a stereo file with speech-like bursts every few seconds."""
+    rng = np.random.default_rng(0)
+    audio = 0.01 * rng.standard_normal((duration * sample_rate, 2)).astype(np.float32)
+    position = 0.5
+    while position < duration - 1:
+        burst = rng.uniform(0.3, 3.0)
+        start, end = int(position * sample_rate), int(min(position + burst, duration) * sample_rate)
+        audio[start:end] += 0.3 * rng.standard_normal((end - start, 1)).astype(np.float32)
+        position += burst + rng.uniform(0.2, 2.5)
+    audio_path = os.path.join(directory, "session123.wav")
+    sf.write(audio_path, audio, sample_rate)
+    return audio_path
+
+def test_streaming_segmenter_matches_batch():
+    """Feeding probabilities in arbitrary chunks gives the batch segments."""
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        probs = np.clip(np.cumsum(rng.normal(0, 0.2, int(rng.integers(0, 3000)))) % 1.3, 0, 1).astype(np.float32)
+        options = {
+            "threshold": 0.5,
+            "offset_threshold": float(rng.uniform(0.2, 0.5)) if rng.random() < 0.5 else None,
+            "min_speech_duration": float(rng.uniform(0, 0.3)),
+            "min_silence_duration": float(rng.uniform(0, 0.3)),
+        }
+        max_duration, max_gap = float(rng.uniform(1, 10)), float(rng.uniform(0, 2))
+
+        expected = merge_segment_bounds(
+            get_utterance_bounds(probs, frame_duration=0.032, **options), max_duration, max_gap
+        ).tolist()
+
+        segmenter = StreamingSegmenter(max_duration=max_duration, max_gap=max_gap, **options)
+        result = []
+        for start in range(0, len(probs), 250):
+            result += segmenter.push(probs[start:start + 250])
+        result += segmenter.finish()
+
+        assert [list(bound) for bound in result] == expected
+
+def test_stream_matches_whole_file():
+    """Streaming segmentation of a resampled stereo file matches the whole-file path."""
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch.object(vad_segmentation, "get_vad_model", return_value=EnergyVADModel()), \
+         patch.object(vad_segmentation.shutil, "which", return_value=None):
+        audio_path = create_test_file(temp_dir)
+
+        decoded = np.concatenate(list(stream_audio_blocks(audio_path, block_duration=7.0)))
+        assert abs(len(decoded) - 120 * 16000) <= 1
+
+        streamed = list(stream_vad_segments(audio_path, block_duration=7.0, min_segment_duration=0.5))
+        whole = segment_audio_without_saving(audio_path, batched=False, min_segment_duration=0.5)
+
+    assert len(streamed) == len(whole) > 10
+    for stream_segment, whole_segment in zip(streamed, whole):
+        assert stream_segment["segment_id"] == whole_segment["segment_id"]
+        assert stream_segment["start_time"] == whole_segment["start_time"]
+        assert stream_segment["end_time"] == whole_segment["end_time"]
+        assert len(stream_segment["audio_data"]) == len(whole_segment["audio_data"])
+        assert np.allclose(stream_segment["audio_data"], whole_segment["audio_data"], atol=1e-3)
+
+def test_segments_emitted_before_decoding_finishes():
+    """The first segment is yielded after only a few blocks have been decoded."""
+    decoded_blocks = []
+
+    def counting_blocks(*args, **kwargs):
+        for block in stream_audio_blocks(*args, **kwargs):
+            decoded_blocks.append(len(block))
+            yield block
+
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch.object(vad_segmentation, "get_vad_model", return_value=EnergyVADModel()), \
+         patch.object(vad_segmentation.shutil, "which", return_value=None), \
+         patch.object(vad_segmentation, "stream_audio_blocks", side_effect=counting_blocks):
+        audio_path = create_test_file(temp_dir)
+        first_segment = next(stream_vad_segments(audio_path, block_duration=5.0))
+
+    assert first_segment["start_time"] < 5.0
+    assert len(decoded_blocks) <= 3
+
+def test_streaming_transcription():
+    """In streaming mode every closed segment is transcribed from memory."""
+    uploads = []
+
+    async def fake_process(audio_path, api_key=None, audio_data=None, audio_duration=None):
+        uploads.append(os.path.basename(audio_path))
+        return {"transcript": "hello", "segments": []}
+
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch.object(vad_segmentation, "get_vad_model", return_value=EnergyVADModel()), \
+         patch.object(vad_segmentation.shutil, "which", return_value=None), \
+         patch.object(sarvam_speech, "process_audio_with_diarization", side_effect=fake_process), \
+         patch.object(sarvam_speech, "combine_segment_results", side_effect=lambda results: {"segments": results}):
+        audio_path = create_test_file(temp_dir, duration=30)
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            result = asyncio.run(sarvam_speech.transcribe_with_vad_diarization(
+                audio_path, api_key="test-key", vad_segments_dir=os.path.join(temp_dir, "vad_segments"),
+                min_segment_duration=0.0, save_segments=False, streaming=True
+            ))
+        finally:
+            os.chdir(cwd)
+
+    assert len(uploads) == len(result["segments"]) > 0
+    assert uploads[0] == "segment_000.wav"
+
+def test_background_iteration_stops_when_consumer_leaves():
+    """Leaving the async for early stops the producer thread and closes the iterator."""
+    closed = threading.Event()
+
+    def endless_segments():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.set()
+
+    async def consume():
+        async for item in sarvam_speech.iterate_in_background(endless_segments(), max_pending=2):
+            if item == 3:
+                raise ValueError("consumer failed")
+
+    def run():
+        try:
+            asyncio.run(consume())
+        except ValueError:
+            pass
+
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+    runner.join(timeout=10)
+
+    assert not runner.is_alive()
+    assert closed.is_set()
+
+if __name__ == "__main__":
+    test_streaming_segmenter_matches_batch()
+    test_stream_matches_whole_file()
+    test_segments_emitted_before_decoding_finishes()
+    test_streaming_transcription()
+    test_background_iteration_stops_when_consumer_leaves()
+    logger.info("All streaming VAD tests passed")
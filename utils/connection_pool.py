@@ -0,0 +1,84 @@
+"""
+Connection Pool Module
+
+This module provides process-wide HTTP sessions with keep-alive connection pools,
+so repeated calls to the same provider reuse TLS connections instead of opening
+new ones. Sessions are plain requests sessions: they are safe to share between
+worker threads and don't belong to any event loop, so they outlive the short-lived
+event loops the app creates for each request.
+"""
+
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Process-wide HTTP sessions by name
+_http_sessions = {}
+_http_sessions_lock = threading.Lock()
+
+def create_http_session(pool_connections=10, pool_maxsize=32):
+    """
+    Create an HTTP session with a keep-alive connection pool.
+
+    Args:
+        pool_connections (int): Number of hosts to keep connection pools for
+        pool_maxsize (int): Maximum number of kept-alive connections per host
+
+    Returns:
+        requests.Session: The HTTP session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_http_session(name="default"):
+    """
+    Get a process-wide pooled HTTP session.
+
+    Pool sizes come from speech_config.get_connection_pool_config and are read
+    when the session is first created.
+
+    Args:
+        name (str): Session name (e.g. 'sarvam')
+
+    Returns:
+        requests.Session: The shared HTTP session
+    """
+    with _http_sessions_lock:
+        if name not in _http_sessions:
+            from modules.speech_config import get_connection_pool_config
+
+            config = get_connection_pool_config()
+            _http_sessions[name] = create_http_session(config.get("pool_connections", 10), config.get("pool_maxsize", 32))
+            logger.info(f"Created pooled HTTP session '{name}': {config}")
+        return _http_sessions[name]
+
+def get_storage_transport(name="default"):
+    """
+    Get an Azure SDK transport that sends requests over a shared pooled HTTP session.
+
+    Clients created with this transport don't close the session when they are closed.
+
+    Args:
+        name (str): Session name (e.g. 'sarvam')
+
+    Returns:
+        azure.core.pipeline.transport.RequestsTransport: The transport
+    """
+    from azure.core.pipeline.transport import RequestsTransport
+
+    return RequestsTransport(session=get_http_session(name), session_owner=False)
+
+def close_http_sessions():
+    """
+    Close all process-wide HTTP sessions and their pooled connections.
+    """
+    with _http_sessions_lock:
+        for session in _http_sessions.values():
+            session.close()
+        _http_sessions.clear()
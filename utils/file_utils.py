@@ -358,31 +358,17 @@ def save_metadata(session_id, new_metadata, base_dir="outputs"):
     Returns:
         str: Path to the saved file
     """
-    import json
     import logging
+    from utils.metadata_manager import update_metadata
     
     dirs = create_session_directory(session_id, base_dir)
     metadata_path = os.path.join(dirs["session_dir"], "metadata.json")
     
-    # Load existing metadata if available
-    existing_metadata = {}
-    if os.path.exists(metadata_path):
-        try:
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                existing_metadata = json.load(f)
-            logging.info(f"Loaded existing metadata from {metadata_path}: {existing_metadata}")
-        except Exception as e:
-            logging.error(f"Error loading existing metadata: {str(e)}")
-    
-    # Update with new metadata
-    existing_metadata.update(new_metadata)
+    # Merge into the existing metadata through the locked metadata store
+    existing_metadata = update_metadata(session_id, new_metadata, base_dir)
     
     # Log the updated metadata
-    logging.info(f"Saving updated metadata to {metadata_path}: {existing_metadata}")
-    
-    # Save updated metadata
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(existing_metadata, f, ensure_ascii=False, indent=2)
+    logging.info(f"Saved updated metadata to {metadata_path}: {existing_metadata}")
     
     return metadata_path
 
@@ -735,18 +721,12 @@ def translate_and_save_diarization(session_id, target_language, base_dir="output
     
     # If not found in diarization data, check metadata
     if not source_language:
-        metadata_path = os.path.join(dirs["session_dir"], "metadata.json")
-        print(f"==== TRANSLATION UTIL DEBUG ==== Checking metadata at: {metadata_path}")
-        if os.path.exists(metadata_path):
-            try:
-                with open(metadata_path, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                    source_language = metadata.get("source_language")
-                    if source_language:
-                        print(f"==== TRANSLATION UTIL DEBUG ==== Using language from metadata: {source_language}")
-                        logging.info(f"Using language from metadata: {source_language}")
-            except Exception as e:
-                print(f"==== TRANSLATION UTIL DEBUG ==== Error reading metadata: {str(e)}")
+        from utils.metadata_manager import get_metadata_field
+        print(f"==== TRANSLATION UTIL DEBUG ==== Checking metadata for session: {session_id}")
+        source_language = get_metadata_field(session_id, "source_language", None, base_dir)
+        if source_language:
+            print(f"==== TRANSLATION UTIL DEBUG ==== Using language from metadata: {source_language}")
+            logging.info(f"Using language from metadata: {source_language}")
     
     # If still not found, use a default but log a warning
     if not source_language:
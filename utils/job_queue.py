@@ -0,0 +1,285 @@
+"""
+Job Queue Module
+
+This module runs long pipeline stages on a pool of background worker threads.
+Submitting a job returns its id immediately; job records are kept in memory or
+in a SQLite database, so any worker process on the host can report on them
+without external services.
+"""
+
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Process-wide job queue
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+# Per-thread event loops used by run_coroutine
+_thread_state = threading.local()
+
+class InMemoryJobStore:
+    """
+    Job records kept in a dictionary, visible to this process only.
+    """
+    def __init__(self):
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def create(self, job):
+        """
+        Store a new job record.
+
+        Args:
+            job (dict): Job record with an "id"
+        """
+        with self.lock:
+            self.jobs[job["id"]] = dict(job)
+
+    def update(self, job_id, **fields):
+        """
+        Update fields of a job record.
+
+        Args:
+            job_id (str): Job ID
+            **fields: Fields to set
+        """
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+
+    def get(self, job_id):
+        """
+        Get a job record.
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            dict: A copy of the job record, or None if the job is unknown
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+class SQLiteJobStore:
+    """
+    Job records kept in a SQLite database, shared by all processes on the host.
+    """
+    FIELDS = ("id", "type", "session_id", "state", "result", "error", "created_at", "started_at", "finished_at")
+
+    def __init__(self, db_path):
+        """
+        Open the database and create the jobs table if needed.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+        """
+        self.db_path = db_path
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, type TEXT, session_id TEXT, state TEXT, result TEXT, error TEXT, "
+                "created_at REAL, started_at REAL, finished_at REAL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create(self, job):
+        """
+        Store a new job record.
+
+        Args:
+            job (dict): Job record with an "id"
+        """
+        record = dict(job, result=json.dumps(job.get("result")))
+        with self._connect() as connection:
+            connection.execute(
+                f"INSERT INTO jobs ({', '.join(self.FIELDS)}) VALUES ({', '.join('?' for _ in self.FIELDS)})",
+                [record.get(field) for field in self.FIELDS]
+            )
+
+    def update(self, job_id, **fields):
+        """
+        Update fields of a job record.
+
+        Args:
+            job_id (str): Job ID
+            **fields: Fields to set
+        """
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        columns = [field for field in fields if field in self.FIELDS and field != "id"]
+        with self._connect() as connection:
+            connection.execute(
+                f"UPDATE jobs SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+                [fields[column] for column in columns] + [job_id]
+            )
+
+    def get(self, job_id):
+        """
+        Get a job record.
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            dict: The job record, or None if the job is unknown
+        """
+        with self._connect() as connection:
+            row = connection.execute(f"SELECT {', '.join(self.FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(zip(self.FIELDS, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+class JobQueue:
+    """
+    Runs submitted functions on a pool of worker threads and records their state.
+    """
+    def __init__(self, store, max_workers=2):
+        """
+        Initialize the job queue.
+
+        Args:
+            store: Job store (InMemoryJobStore or SQLiteJobStore)
+            max_workers (int): Number of worker threads
+        """
+        self.store = store
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="job-worker")
+
+    def submit(self, job_type, func, *args, session_id=None, status_callback=None, **kwargs):
+        """
+        Queue a function to run in the background.
+
+        Args:
+            job_type (str): Kind of job (e.g. 'detect_language'), also used as the status stage
+            func (callable): Function to run; its return value must be JSON serializable
+            *args: Positional arguments for func
+            session_id (str, optional): Session the job belongs to
+            status_callback (callable, optional): Called as status_callback(session_id, stage,
+                message, progress) when the job is queued, starts and fails
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            str: Job ID
+        """
+        job_id = uuid.uuid4().hex
+        self.store.create({
+            "id": job_id,
+            "type": job_type,
+            "session_id": session_id,
+            "state": JOB_QUEUED,
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None
+        })
+
+        def report(stage, message, progress):
+            if status_callback and session_id:
+                try:
+                    status_callback(session_id, stage, message, progress)
+                except Exception as e:
+                    logger.warning(f"Status callback failed for job {job_id}: {str(e)}")
+
+        def run():
+            self.store.update(job_id, state=JOB_RUNNING, started_at=time.time())
+            report(job_type, "Processing started", 1)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"Job {job_id} ({job_type}) failed: {str(e)}\n{traceback.format_exc()}")
+                self.store.update(job_id, state=JOB_FAILED, error=str(e), finished_at=time.time())
+                report("error", str(e), 0)
+                return
+            self.store.update(job_id, state=JOB_COMPLETED, result=result, finished_at=time.time())
+            logger.info(f"Job {job_id} ({job_type}) completed")
+
+        report(job_type, "Waiting for a worker...", 0)
+        self.executor.submit(run)
+        logger.info(f"Queued job {job_id} ({job_type}) for session {session_id}")
+        return job_id
+
+    def get(self, job_id):
+        """
+        Get the record of a job.
+
+        Args:
+            job_id (str): Job ID
+
+        Returns:
+            dict: Job record, or None if the job is unknown
+        """
+        return self.store.get(job_id)
+
+    def shutdown(self, wait=True):
+        """
+        Stop the worker threads.
+
+        Args:
+            wait (bool): Whether to wait for running and queued jobs to finish
+        """
+        self.executor.shutdown(wait=wait)
+
+def get_job_queue():
+    """
+    Get the process-wide job queue.
+
+    The store backend and pool size come from speech_config.get_job_queue_config
+    and are read when the queue is first created.
+
+    Returns:
+        JobQueue: The job queue
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            from modules.speech_config import get_job_queue_config
+
+            config = get_job_queue_config()
+            if config.get("backend") == "sqlite":
+                store = SQLiteJobStore(config["db_path"])
+            else:
+                store = InMemoryJobStore()
+            _job_queue = JobQueue(store, config.get("max_workers", 2))
+            logger.info(f"Created job queue: {config}")
+        return _job_queue
+
+def run_coroutine(coroutine):
+    """
+    Run a coroutine to completion on the calling thread's event loop.
+
+    Each thread keeps one event loop for its lifetime instead of creating and
+    closing a new loop per call.
+
+    Args:
+        coroutine: Coroutine to run
+
+    Returns:
+        The coroutine's result
+    """
+    loop = getattr(_thread_state, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_state.loop = loop
+    asyncio.set_event_loop(loop)
+    return loop.run_until_complete(coroutine)
@@ -3,13 +3,367 @@ Metadata Manager Module
 
 This module provides functions for managing metadata in an append-only fashion,
 ensuring that metadata fields are only updated, never completely overwritten.
+
+Metadata goes through a process-wide store that caches each session's
+metadata.json, serializes updates with a per-session lock (a thread lock plus an
+advisory file lock, so concurrent stages and worker processes never lose each
+other's updates) and writes the file atomically with a temp file and rename.
+Writes can optionally be coalesced, and an optional SQLite index makes metadata
+queryable across sessions.
 """
 
 import os
+import copy
 import json
+import time
+import atexit
+import sqlite3
 import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; fall back to in-process locking only
+    fcntl = None
+
+# Process-wide metadata store
+_metadata_store = None
+_metadata_store_lock = threading.Lock()
+
+@contextmanager
+def _session_file_lock(session_dir):
+    """
+    Hold an exclusive advisory lock on a session directory, shared with other processes.
+    
+    Args:
+        session_dir (str): The session directory
+    """
+    if fcntl is None:
+        yield
+        return
+    
+    fd = os.open(session_dir, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+def _file_signature(path):
+    """
+    Get a cheap signature of a file that changes whenever the file is rewritten.
+    
+    Args:
+        path (str): Path to the file
+        
+    Returns:
+        tuple: (inode, size, modification time), or None if the file doesn't exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+class _SessionMetadata:
+    """
+    Cached metadata of one session, with the updates not yet written to disk.
+    """
+    def __init__(self, session_dir):
+        self.session_dir = session_dir
+        self.path = os.path.join(session_dir, "metadata.json")
+        self.lock = threading.RLock()
+        self.data = None
+        self.signature = None
+        self.pending = []
+        self.timer = None
+
+class MetadataIndex:
+    """
+    SQLite table of every session's top-level metadata fields, for queries across sessions.
+    """
+    def __init__(self, db_path):
+        """
+        Open the database and create the metadata table if needed.
+        
+        Args:
+            db_path (str): Path to the SQLite database file
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS session_metadata ("
+                "session_id TEXT, field TEXT, value TEXT, updated_at REAL, PRIMARY KEY (session_id, field))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS session_metadata_field ON session_metadata (field, value)")
+    
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+    
+    def save(self, session_id, metadata):
+        """
+        Replace the indexed fields of a session.
+        
+        Args:
+            session_id (str): The session ID
+            metadata (dict): The session's full metadata
+        """
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute("DELETE FROM session_metadata WHERE session_id = ?", (session_id,))
+            connection.executemany(
+                "INSERT INTO session_metadata (session_id, field, value, updated_at) VALUES (?, ?, ?, ?)",
+                [(session_id, field, json.dumps(value, ensure_ascii=False, sort_keys=True), now) for field, value in metadata.items()]
+            )
+    
+    def find_sessions(self, field_name, value=None):
+        """
+        Find sessions by a top-level metadata field.
+        
+        Args:
+            field_name (str): The field to look for
+            value: Value the field must have (None to match any value)
+            
+        Returns:
+            list: Session IDs, most recently updated first
+        """
+        query = "SELECT session_id FROM session_metadata WHERE field = ?"
+        params = [field_name]
+        if value is not None:
+            query += " AND value = ?"
+            params.append(json.dumps(value, ensure_ascii=False, sort_keys=True))
+        with self._connect() as connection:
+            rows = connection.execute(query + " ORDER BY updated_at DESC", params).fetchall()
+        return [row[0] for row in rows]
+
+class MetadataStore:
+    """
+    Per-session write-back cache of metadata.json files.
+    
+    Reads are served from the cache as long as the file on disk is unchanged.
+    Updates are applied under the session's lock and written atomically; with a
+    coalesce_delay, updates arriving within the delay are written together. When
+    a flush finds that another process changed the file, the pending updates are
+    re-applied on top of the new contents instead of overwriting them.
+    """
+    def __init__(self, coalesce_delay=0.0, max_sessions=256, index=None):
+        """
+        Initialize the store.
+        
+        Args:
+            coalesce_delay (float): Seconds to hold updates before writing them (0 writes each update)
+            max_sessions (int): Number of sessions kept in the cache
+            index (MetadataIndex, optional): Index updated after every write
+        """
+        self.coalesce_delay = coalesce_delay
+        self.max_sessions = max_sessions
+        self.index = index
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def _session(self, session_id, base_dir):
+        session_dir = os.path.abspath(os.path.join(base_dir, session_id))
+        with self.lock:
+            state = self.sessions.get(session_dir)
+            if state is None:
+                state = self.sessions[session_dir] = _SessionMetadata(session_dir)
+            self.sessions.move_to_end(session_dir)
+            
+            # Forget the least recently used sessions that have nothing left to write
+            for cached_dir in list(self.sessions)[:-self.max_sessions]:
+                if not self.sessions[cached_dir].pending:
+                    del self.sessions[cached_dir]
+            return state
+    
+    def _load(self, state):
+        metadata = {}
+        if os.path.exists(state.path):
+            try:
+                with open(state.path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except Exception as e:
+                logging.error(f"Error loading existing metadata: {str(e)}")
+        return metadata
+    
+    def _refresh(self, state):
+        # Reload when the file changed on disk, keeping updates that are not written yet
+        signature = _file_signature(state.path)
+        if state.data is None or signature != state.signature:
+            state.data = self._load(state)
+            state.signature = signature
+            for apply_update in state.pending:
+                apply_update(state.data)
+    
+    def read(self, session_id, base_dir="outputs"):
+        """
+        Get the metadata of a session.
+        
+        Args:
+            session_id (str): The session ID
+            base_dir (str): Base directory for outputs
+            
+        Returns:
+            dict: A copy of the metadata
+        """
+        state = self._session(session_id, base_dir)
+        with state.lock:
+            self._refresh(state)
+            return copy.deepcopy(state.data)
+    
+    def get_field(self, session_id, field_name, default=None, base_dir="outputs"):
+        """
+        Get a field of a session's metadata.
+        
+        Args:
+            session_id (str): The session ID
+            field_name (str): The name of the field to get
+            default: The default value to return if the field doesn't exist
+            base_dir (str): Base directory for outputs
+            
+        Returns:
+            A copy of the field's value, or the default if not found
+        """
+        state = self._session(session_id, base_dir)
+        with state.lock:
+            self._refresh(state)
+            if field_name not in state.data:
+                return default
+            return copy.deepcopy(state.data[field_name])
+    
+    def update(self, session_id, apply_update, base_dir="outputs"):
+        """
+        Apply an update to a session's metadata and write it (or schedule the write).
+        
+        Args:
+            session_id (str): The session ID
+            apply_update (callable): Function that modifies the metadata dict in place;
+                it may be applied again on newer file contents
+            base_dir (str): Base directory for outputs
+            
+        Returns:
+            dict: A copy of the updated metadata
+        """
+        state = self._session(session_id, base_dir)
+        with state.lock:
+            os.makedirs(state.session_dir, exist_ok=True)
+            self._refresh(state)
+            apply_update(state.data)
+            state.pending.append(apply_update)
+            
+            if self.coalesce_delay > 0:
+                if state.timer is None:
+                    state.timer = threading.Timer(self.coalesce_delay, self._flush, (state,))
+                    state.timer.daemon = True
+                    state.timer.start()
+            else:
+                self._flush(state)
+            return copy.deepcopy(state.data)
+    
+    def _flush(self, state):
+        with state.lock:
+            if state.timer is not None:
+                state.timer.cancel()
+                state.timer = None
+            if not state.pending:
+                return
+            
+            with _session_file_lock(state.session_dir):
+                # Another process may have written since we last read the file
+                if _file_signature(state.path) != state.signature:
+                    state.data = self._load(state)
+                    for apply_update in state.pending:
+                        apply_update(state.data)
+                
+                fd, temp_path = tempfile.mkstemp(dir=state.session_dir, prefix=".metadata.", suffix=".tmp")
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(state.data, f, ensure_ascii=False, indent=2)
+                    os.replace(temp_path, state.path)
+                except Exception:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    raise
+                state.signature = _file_signature(state.path)
+                state.pending = []
+            
+            if self.index:
+                try:
+                    self.index.save(os.path.basename(state.session_dir), state.data)
+                except Exception as e:
+                    logging.error(f"Error indexing metadata: {str(e)}")
+    
+    def flush(self, session_id=None, base_dir="outputs"):
+        """
+        Write pending updates now.
+        
+        Args:
+            session_id (str, optional): The session to flush (None for all sessions)
+            base_dir (str): Base directory for outputs
+        """
+        if session_id is not None:
+            states = [self._session(session_id, base_dir)]
+        else:
+            with self.lock:
+                states = list(self.sessions.values())
+        for state in states:
+            self._flush(state)
+
+def get_metadata_store():
+    """
+    Get the process-wide metadata store.
+    
+    Settings come from speech_config.get_metadata_store_config and are read when
+    the store is first created.
+    
+    Returns:
+        MetadataStore: The metadata store
+    """
+    global _metadata_store
+    with _metadata_store_lock:
+        if _metadata_store is None:
+            from modules.speech_config import get_metadata_store_config
+            
+            config = get_metadata_store_config()
+            index = MetadataIndex(config["db_path"]) if config.get("backend") == "sqlite" else None
+            _metadata_store = MetadataStore(config.get("coalesce_delay", 0.0), config.get("max_sessions", 256), index)
+            atexit.register(_metadata_store.flush)
+            logging.info(f"Created metadata store: {config}")
+        return _metadata_store
+
+def flush_metadata(session_id=None, base_dir="outputs"):
+    """
+    Write pending metadata updates to disk now.
+    
+    Args:
+        session_id (str, optional): The session to flush (None for all sessions)
+        base_dir (str): Base directory for outputs
+    """
+    get_metadata_store().flush(session_id, base_dir)
+
+def find_sessions(field_name, value=None):
+    """
+    Find sessions by a top-level metadata field (requires the SQLite metadata backend).
+    
+    Args:
+        field_name (str): The field to look for
+        value: Value the field must have (None to match any value)
+        
+    Returns:
+        list: Session IDs, most recently updated first (empty without the SQLite backend)
+    """
+    store = get_metadata_store()
+    if not store.index:
+        logging.warning("find_sessions needs METADATA_BACKEND=sqlite")
+        return []
+    return store.index.find_sessions(field_name, value)
+
 def update_metadata_field(session_id, field_name, field_value, base_dir="outputs"):
     """
     Update a single field in the metadata file.
@@ -23,33 +377,14 @@ def update_metadata_field(session_id, field_name, field_value, base_dir="outputs
     Returns:
         dict: The updated metadata
     """
-    # Construct metadata path
-    session_dir = os.path.join(base_dir, session_id)
-    os.makedirs(session_dir, exist_ok=True)
-    metadata_path = os.path.join(session_dir, "metadata.json")
-    
-    # Load existing metadata
-    existing_metadata = {}
-    if os.path.exists(metadata_path):
-        try:
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                existing_metadata = json.load(f)
-            logging.info(f"Loaded existing metadata from {metadata_path}")
-        except Exception as e:
-            logging.error(f"Error loading existing metadata: {str(e)}")
+    def apply_update(metadata):
+        metadata[field_name] = copy.deepcopy(field_value)
     
     # Log the change
-    old_value = existing_metadata.get(field_name)
+    old_value = get_metadata_store().get_field(session_id, field_name, base_dir=base_dir)
     logging.info(f"Updating metadata field '{field_name}': {old_value} -> {field_value}")
     
-    # Update only the specified field
-    existing_metadata[field_name] = field_value
-    
-    # Save the updated metadata
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(existing_metadata, f, ensure_ascii=False, indent=2)
-    
-    return existing_metadata
+    return get_metadata_store().update(session_id, apply_update, base_dir)
 
 def update_metadata_section(session_id, section_name, section_data, base_dir="outputs"):
     """
@@ -64,41 +399,24 @@ def update_metadata_section(session_id, section_name, section_data, base_dir="ou
     Returns:
         dict: The updated metadata
     """
-    # Construct metadata path
-    session_dir = os.path.join(base_dir, session_id)
-    os.makedirs(session_dir, exist_ok=True)
-    metadata_path = os.path.join(session_dir, "metadata.json")
-    
-    # Load existing metadata
-    existing_metadata = {}
-    if os.path.exists(metadata_path):
-        try:
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                existing_metadata = json.load(f)
-            logging.info(f"Loaded existing metadata from {metadata_path}")
-        except Exception as e:
-            logging.error(f"Error loading existing metadata: {str(e)}")
-    
-    # If section doesn't exist, create it
-    if section_name not in existing_metadata:
-        existing_metadata[section_name] = {}
-    elif not isinstance(existing_metadata[section_name], dict):
-        # If it exists but is not a dict, convert it to a dict
-        existing_metadata[section_name] = {"value": existing_metadata[section_name]}
+    def apply_update(metadata):
+        # If section doesn't exist, create it
+        if section_name not in metadata:
+            metadata[section_name] = {}
+        elif not isinstance(metadata[section_name], dict):
+            # If it exists but is not a dict, convert it to a dict
+            metadata[section_name] = {"value": metadata[section_name]}
+        
+        # Update the section with new data
+        metadata[section_name].update(copy.deepcopy(section_data))
     
     # Log the change
+    old_section = get_metadata_store().get_field(session_id, section_name, base_dir=base_dir)
     for key, value in section_data.items():
-        old_value = existing_metadata[section_name].get(key)
+        old_value = old_section.get(key) if isinstance(old_section, dict) else None
         logging.info(f"Updating metadata section '{section_name}.{key}': {old_value} -> {value}")
     
-    # Update the section with new data
-    existing_metadata[section_name].update(section_data)
-    
-    # Save the updated metadata
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(existing_metadata, f, ensure_ascii=False, indent=2)
-    
-    return existing_metadata
+    return get_metadata_store().update(session_id, apply_update, base_dir)
 
 def update_metadata(session_id, updates, base_dir="outputs"):
     """
@@ -112,34 +430,16 @@ def update_metadata(session_id, updates, base_dir="outputs"):
     Returns:
         dict: The updated metadata
     """
-    # Construct metadata path
-    session_dir = os.path.join(base_dir, session_id)
-    os.makedirs(session_dir, exist_ok=True)
-    metadata_path = os.path.join(session_dir, "metadata.json")
-    
-    # Load existing metadata
-    existing_metadata = {}
-    if os.path.exists(metadata_path):
-        try:
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                existing_metadata = json.load(f)
-            logging.info(f"Loaded existing metadata from {metadata_path}")
-        except Exception as e:
-            logging.error(f"Error loading existing metadata: {str(e)}")
+    def apply_update(metadata):
+        metadata.update(copy.deepcopy(updates))
     
     # Log the changes
+    existing_metadata = get_metadata_store().read(session_id, base_dir)
     for key, value in updates.items():
         old_value = existing_metadata.get(key)
         logging.info(f"Updating metadata field '{key}': {old_value} -> {value}")
     
-    # Update with new metadata
-    existing_metadata.update(updates)
-    
-    # Save the updated metadata
-    with open(metadata_path, 'w', encoding='utf-8') as f:
-        json.dump(existing_metadata, f, ensure_ascii=False, indent=2)
-    
-    return existing_metadata
+    return get_metadata_store().update(session_id, apply_update, base_dir)
 
 def get_metadata_field(session_id, field_name, default=None, base_dir="outputs"):
     """
@@ -154,18 +454,7 @@ def get_metadata_field(session_id, field_name, default=None, base_dir="outputs")
     Returns:
         The value of the field, or the default if not found
     """
-    metadata_path = os.path.join(base_dir, session_id, "metadata.json")
-    
-    if not os.path.exists(metadata_path):
-        return default
-    
-    try:
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-        return metadata.get(field_name, default)
-    except Exception as e:
-        logging.error(f"Error reading metadata: {str(e)}")
-        return default
+    return get_metadata_store().get_field(session_id, field_name, default, base_dir)
 
 def get_metadata(session_id, base_dir="outputs"):
     """
@@ -178,17 +467,7 @@ def get_metadata(session_id, base_dir="outputs"):
     Returns:
         dict: The metadata, or an empty dict if not found
     """
-    metadata_path = os.path.join(base_dir, session_id, "metadata.json")
-    
-    if not os.path.exists(metadata_path):
-        return {}
-    
-    try:
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        logging.error(f"Error reading metadata: {str(e)}")
-        return {}
+    return get_metadata_store().read(session_id, base_dir)
 
 def log_metadata_change(session_id, field_name, old_value, new_value, base_dir="outputs"):
     """
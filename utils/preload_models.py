@@ -2,12 +2,17 @@
 Preload and verify NLP models and dependencies.
 
 This script preloads the BERT model and verifies that all required
-dependencies for translation metrics are correctly installed.
+dependencies for translation metrics are correctly installed. It also
+warms up the Silero VAD model used for audio segmentation.
 """
 
 import os
 import sys
 import logging
+import argparse
+
+# Add parent directory to path to import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -41,6 +46,30 @@ def verify_sacrebleu():
         logger.error(f"Error loading sacrebleu: {str(e)}")
         return False
 
+def warm_up_vad_model(save_path=None):
+    """
+    Load the Silero VAD model into the process-wide registry.
+    
+    Call this at worker start so that VAD requests never pay for model loading.
+    
+    Args:
+        save_path: Optional path to also save the model as a local TorchScript file
+    """
+    try:
+        from modules.vad_segmentation import preload_vad_model, save_vad_model
+        logger.info("Warming up Silero VAD model...")
+        preload_vad_model()
+        if save_path:
+            save_vad_model(save_path)
+        logger.info("Silero VAD model is ready")
+        return True
+    except ImportError as e:
+        logger.error(f"VAD dependencies not available: {str(e)}")
+        return False
+    except Exception as e:
+        logger.error(f"Error warming up VAD model: {str(e)}")
+        return False
+
 def verify_all_dependencies():
     """Verify all required dependencies for translation metrics."""
     dependencies = {
@@ -60,6 +89,13 @@ def verify_all_dependencies():
     return all_success
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Preload models and verify dependencies')
+    parser.add_argument('--save-vad-model', help='Save the Silero VAD model to this path and exit')
+    args = parser.parse_args()
+    
+    if args.save_vad_model:
+        sys.exit(0 if warm_up_vad_model(save_path=args.save_vad_model) else 1)
+    
     logger.info("Starting dependency verification...")
     success = verify_all_dependencies()
     if success:
@@ -0,0 +1,80 @@
+"""
+Provider Request Module
+
+This module sends blocking HTTP requests to external providers under each
+provider's process-wide rate limit, over its pooled HTTP session, and retries
+rate-limited (429) and server (5xx) errors with exponential backoff. It is safe
+to call from many worker threads at once.
+"""
+
+import time
+import logging
+import requests
+
+from utils.rate_limiter import get_rate_limiter
+from utils.connection_pool import get_http_session
+
+logger = logging.getLogger(__name__)
+
+def get_retry_delay(attempt, retry_config, response=None):
+    """
+    Get the delay before retrying a failed request.
+
+    A Retry-After header sent by the provider takes precedence over the backoff.
+
+    Args:
+        attempt (int): Number of the failed attempt (0 for the first)
+        retry_config (dict): Retry configuration (backoff, max_delay)
+        response (requests.Response, optional): The failed response
+
+    Returns:
+        float: Seconds to wait
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), retry_config["max_delay"])
+        except ValueError:
+            pass
+    return min(retry_config["backoff"] * (2 ** attempt), retry_config["max_delay"])
+
+def send_provider_request(provider, method, url, retry_config=None, **kwargs):
+    """
+    Send a request to a provider under its rate limit, retrying transient errors.
+
+    Args:
+        provider (str): Provider name (e.g. 'sarvam', 'cartesia', 'openai')
+        method (str): HTTP method
+        url (str): Request URL
+        retry_config (dict, optional): Retry configuration values to override
+        **kwargs: Extra arguments passed to requests.Session.request
+
+    Returns:
+        requests.Response: The last response received
+
+    Raises:
+        requests.RequestException: If the last attempt failed without a response
+    """
+    from modules.speech_config import get_retry_config
+
+    config = get_retry_config(provider, retry_config)
+    limiter = get_rate_limiter(provider)
+    session = get_http_session(provider)
+
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= config["max_retries"]:
+                raise
+            delay = get_retry_delay(attempt, config)
+            logger.warning(f"{provider} request failed ({str(e)}), retrying in {delay:.1f}s")
+        else:
+            if response.status_code not in config["retry_statuses"] or attempt >= config["max_retries"]:
+                return response
+            delay = get_retry_delay(attempt, config, response)
+            logger.warning(f"{provider} request returned {response.status_code}, retrying in {delay:.1f}s")
+        time.sleep(delay)
+        attempt += 1
@@ -0,0 +1,102 @@
+"""
+Rate Limiter Module
+
+This module provides a token-bucket rate limiter shared by all callers of an
+external provider in the process. It works from both threads and coroutines,
+including coroutines running on different event loops.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Process-wide rate limiters by provider name
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+class RateLimiter:
+    """
+    Token bucket: up to `burst` requests at once, refilled at `rate` requests per second.
+    
+    Each acquire reserves the next free token and waits until it is due, so
+    waiting callers are served in arrival order.
+    """
+    def __init__(self, rate, burst=1):
+        """
+        Initialize the rate limiter.
+        
+        Args:
+            rate (float): Sustained requests per second (0 or None for no limit)
+            burst (int): Maximum number of requests allowed back to back
+        """
+        self.rate = rate
+        self.burst = max(1, int(burst or 1))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Reserve a token.
+        
+        Returns:
+            float: Seconds to wait before the reserved request may be sent
+        """
+        if not self.rate:
+            return 0.0
+        
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self):
+        """
+        Wait (blocking) until a request may be sent.
+        
+        Returns:
+            float: Seconds waited
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self):
+        """
+        Wait (without blocking the event loop) until a request may be sent.
+        
+        Returns:
+            float: Seconds waited
+        """
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+def get_rate_limiter(provider):
+    """
+    Get the process-wide rate limiter for a provider.
+    
+    Limits come from speech_config.get_rate_limit_config and are read when the
+    limiter is first created.
+    
+    Args:
+        provider (str): Provider name (e.g. 'sarvam', 'cartesia', 'openai')
+        
+    Returns:
+        RateLimiter: The provider's rate limiter
+    """
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            from modules.speech_config import get_rate_limit_config
+            
+            config = get_rate_limit_config(provider)
+            _rate_limiters[provider] = RateLimiter(config.get("requests_per_second"), config.get("burst", 1))
+            logger.info(f"Created rate limiter for {provider}: {config}")
+        return _rate_limiters[provider]
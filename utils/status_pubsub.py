@@ -0,0 +1,219 @@
+"""
+Status Pub/Sub Module
+
+This module carries processing status events from the code that emits them
+(update_processing_status) to the clients that stream them. The in-memory
+implementation serves a single process; the SQLite implementation lets every
+gunicorn worker on the host publish and read the same events.
+"""
+
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Process-wide pub/sub
+_status_pubsub = None
+_status_pubsub_lock = threading.Lock()
+
+class InMemoryPubSub:
+    """
+    Events kept per channel in this process, with blocking waits for new events.
+    """
+    def __init__(self, history=100):
+        """
+        Initialize the pub/sub.
+
+        Args:
+            history (int): Number of recent events kept per channel
+        """
+        self.history = history
+        self.channels = {}
+        self.last_id = 0
+        self.condition = threading.Condition()
+
+    def publish(self, channel, message):
+        """
+        Publish an event.
+
+        Args:
+            channel (str): Channel name (e.g. a session ID)
+            message (dict): JSON-serializable event
+
+        Returns:
+            int: Event ID, increasing across all channels
+        """
+        with self.condition:
+            self.last_id += 1
+            self.channels.setdefault(channel, deque(maxlen=self.history)).append((self.last_id, message))
+            self.condition.notify_all()
+            return self.last_id
+
+    def get_latest(self, channel):
+        """
+        Get the most recent event of a channel.
+
+        Args:
+            channel (str): Channel name
+
+        Returns:
+            tuple: (event ID, message), or None if nothing was published
+        """
+        with self.condition:
+            events = self.channels.get(channel)
+            return events[-1] if events else None
+
+    def _events_after(self, channel, after_id):
+        return [event for event in self.channels.get(channel, ()) if event[0] > after_id]
+
+    def listen(self, channel, after_id=0, timeout=15.0):
+        """
+        Wait for events newer than after_id.
+
+        Args:
+            channel (str): Channel name
+            after_id (int): ID of the last event already seen
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            list: (event ID, message) tuples, empty if the wait timed out
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self._events_after(channel, after_id), timeout=timeout)
+            return self._events_after(channel, after_id)
+
+class SQLitePubSub:
+    """
+    Events kept in a SQLite database shared by all processes on the host.
+
+    Listeners poll the database, so an event reaches them within poll_interval.
+    """
+    def __init__(self, db_path, poll_interval=0.25, retention=3600):
+        """
+        Open the database and create the events table if needed.
+
+        Args:
+            db_path (str): Path to the SQLite database file
+            poll_interval (float): Seconds between checks for new events while listening
+            retention (float): Seconds events are kept before they are pruned
+        """
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.last_pruned = 0.0
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS status_events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT, data TEXT, created_at REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS status_events_channel ON status_events (channel, id)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def publish(self, channel, message):
+        """
+        Publish an event.
+
+        Args:
+            channel (str): Channel name (e.g. a session ID)
+            message (dict): JSON-serializable event
+
+        Returns:
+            int: Event ID, increasing across all channels
+        """
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO status_events (channel, data, created_at) VALUES (?, ?, ?)",
+                (channel, json.dumps(message), now)
+            )
+            if now - self.last_pruned > 60:
+                connection.execute("DELETE FROM status_events WHERE created_at < ?", (now - self.retention,))
+                self.last_pruned = now
+            return cursor.lastrowid
+
+    def get_latest(self, channel):
+        """
+        Get the most recent event of a channel.
+
+        Args:
+            channel (str): Channel name
+
+        Returns:
+            tuple: (event ID, message), or None if nothing was published
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT id, data FROM status_events WHERE channel = ? ORDER BY id DESC LIMIT 1", (channel,)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def _events_after(self, channel, after_id):
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT id, data FROM status_events WHERE channel = ? AND id > ? ORDER BY id", (channel, after_id)
+            ).fetchall()
+        return [(event_id, json.loads(data)) for event_id, data in rows]
+
+    def listen(self, channel, after_id=0, timeout=15.0):
+        """
+        Wait for events newer than after_id.
+
+        Args:
+            channel (str): Channel name
+            after_id (int): ID of the last event already seen
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            list: (event ID, message) tuples, empty if the wait timed out
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self._events_after(channel, after_id)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            time.sleep(min(self.poll_interval, remaining))
+
+def get_status_pubsub():
+    """
+    Get the process-wide status pub/sub.
+
+    The backend comes from speech_config.get_status_pubsub_config and is read
+    when the pub/sub is first created.
+
+    Returns:
+        InMemoryPubSub or SQLitePubSub: The status pub/sub
+    """
+    global _status_pubsub
+    with _status_pubsub_lock:
+        if _status_pubsub is None:
+            from modules.speech_config import get_status_pubsub_config
+
+            config = get_status_pubsub_config()
+            if config.get("backend") == "sqlite":
+                _status_pubsub = SQLitePubSub(config["db_path"], config.get("poll_interval", 0.25), config.get("retention", 3600))
+            else:
+                _status_pubsub = InMemoryPubSub()
+            logger.info(f"Created status pub/sub: {config}")
+        return _status_pubsub
+
+def format_sse_event(event_id, message, event="status"):
+    """
+    Format an event for a Server-Sent Events stream.
+
+    Args:
+        event_id (int): Event ID, sent back by clients as Last-Event-ID when reconnecting
+        message (dict): JSON-serializable event data
+        event (str): Event type
+
+    Returns:
+        str: The encoded event
+    """
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(message)}\n\n"